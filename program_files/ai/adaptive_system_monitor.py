@@ -1,6 +1,6 @@
 """Minimal adaptive system monitor for parameter optimization"""
 from typing import Dict, Any, Optional
-import time, threading, logging
+import time, threading, logging, weakref
 from datetime import datetime, timedelta
 from enum import Enum
 from program_files.config.runtime_config import runtime_config
@@ -23,6 +23,8 @@ class AdaptiveSystemMonitor:
         self.mode_lock = threading.Lock()
         self.last_mode_change = time.time()
         self.recent_changes = {}
+        self._subscriptions = weakref.WeakKeyDictionary()  # Bus -> this monitor's subscription on it
+        self.session_modes: Dict[str, SystemMode] = {}  # Session -> LISTENING/PROCESSING from its speech events
         
     @property
     def db(self):
@@ -33,14 +35,49 @@ class AdaptiveSystemMonitor:
     
     def set_system_mode(self, mode: SystemMode, context: str = ""):
         with self.mode_lock:
-            if self.current_mode != mode:
-                logger.info(f"Mode: {self.current_mode.value} → {mode.value}" + (f" ({context})" if context else ""))
-                self.current_mode = mode
-                self.last_mode_change = time.time()
+            self._set_mode(mode, context)
+    
+    def _set_mode(self, mode: SystemMode, context: str):
+        if self.current_mode != mode:
+            logger.info(f"Mode: {self.current_mode.value} → {mode.value}" + (f" ({context})" if context else ""))
+            self.current_mode = mode
+            self.last_mode_change = time.time()
     
     def get_system_mode(self) -> SystemMode:
         return self.current_mode
     
+    def subscribe(self, bus):
+        """Switch LISTENING/PROCESSING on speech events; delivered on the bus thread, once per bus"""
+        with self.mode_lock:
+            subscription = self._subscriptions.get(bus)
+            if subscription is None:
+                from program_files.core.event_bus import EventType
+                subscription = bus.subscribe(self._on_speech_event, EventType.SPEECH_START, EventType.SPEECH_END)
+                self._subscriptions[bus] = subscription
+            return subscription
+    
+    def _on_speech_event(self, event):
+        from program_files.core.event_bus import EventType
+        with self.mode_lock:
+            speaking = event.type == EventType.SPEECH_START
+            self.session_modes[event.session] = SystemMode.PROCESSING if speaking else SystemMode.LISTENING
+            self._sync_speech_mode()
+    
+    def end_session(self, session: str):
+        """Forget *session*'s speech state, e.g. once its stream has finished"""
+        with self.mode_lock:
+            if self.session_modes.pop(session, None) is not None:
+                self._sync_speech_mode()
+    
+    def _sync_speech_mode(self):
+        """Host mode from all sessions: PROCESSING while any is speaking, LISTENING once none is"""
+        if self.current_mode not in {SystemMode.LISTENING, SystemMode.PROCESSING}:
+            return  # GEMMA, IDLE and SHUTDOWN are set explicitly by the host
+        if SystemMode.PROCESSING in self.session_modes.values():
+            self._set_mode(SystemMode.PROCESSING, "Processing speech input")
+        else:
+            self._set_mode(SystemMode.LISTENING, "No speech detected")
+    
     def is_monitoring_allowed(self) -> bool:
         return self.current_mode not in {SystemMode.GEMMA, SystemMode.SHUTDOWN}
     
@@ -93,7 +130,7 @@ class AdaptiveSystemMonitor:
         
         # High interruptions -> adjust speech detection
         if metrics["interruptions"] > 0.3 and self._can_change("speech"):
-            result = runtime_config.update_config('speech_processor', silence_threshold=4)
+            result = runtime_config.update_config('speech_processor', hangover_ms=450)
             if result.get('changed'): changes.update(result['changed'])
             self._record_change("speech")
             
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""Shared text embedding service: one resident model for the vector DB and RAG.
+
+The conversation database and ``rag_functions`` used to embed text with
+two separate MiniLM stacks (Chroma's implicit default embedding function
+and a SentenceTransformer).  Both now go through ``get_embedding_service()``:
+
+* one model, loaded on first use from ``model_dir`` or the library's own
+  download cache, and downloaded into ``model_dir`` only when neither has
+  it (never when ``offline`` is set)
+* texts submitted from any thread are grouped within ``max_batch_wait``
+  into one forward pass on a worker thread
+* vectors are kept in an LRU cache keyed by text, optionally stored as
+  float16 or int8 to fit more entries in the same memory; vectors that
+  get persisted (``embed_for_storage``) are always full precision
+
+Backends (both all-MiniLM-L6-v2, 384-d, unit length, so vectors already
+stored in Chroma stay comparable):
+
+* ``onnx``                  - Chroma's ONNX export run with ONNX Runtime
+* ``sentence_transformers`` - the PyTorch SentenceTransformer
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from program_files.config.config import EmbeddingConfig
+
+ONNX_FILES = ("config.json", "model.onnx", "special_tokens_map.json",
+              "tokenizer_config.json", "tokenizer.json", "vocab.txt")
+CACHE_DTYPES = ("float32", "float16", "int8")
+
+
+def resolve_model_dir(config: EmbeddingConfig) -> str:
+    """``model_dir`` as an absolute path (relative paths are under program_files)"""
+    if os.path.isabs(config.model_dir):
+        return config.model_dir
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), config.model_dir)
+
+
+class EmbeddingBackend:
+    """Base class: turns a batch of texts into unit-length float32 vectors"""
+
+    name = "base"
+
+    def __init__(self, config: EmbeddingConfig):
+        self.config = config
+        self.model_dir = resolve_model_dir(config)
+
+    def load(self):
+        raise NotImplementedError
+
+    def download(self):
+        """Fetch the model files into ``model_dir`` (the one step that needs network)"""
+        raise NotImplementedError
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+
+class OnnxBackend(EmbeddingBackend):
+    """MiniLM exported to ONNX, the same files Chroma's default embedding function uses"""
+
+    name = "onnx"
+
+    def find_model_dir(self) -> Optional[str]:
+        """``model_dir``, else Chroma's download cache - the first that holds the ONNX files"""
+        from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+        for directory in (self.model_dir, str(ONNXMiniLM_L6_V2.DOWNLOAD_PATH)):
+            if all(os.path.exists(os.path.join(directory, "onnx", f)) for f in ONNX_FILES):
+                return directory
+        return None
+
+    def _function(self, directory: str):
+        from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+        function = ONNXMiniLM_L6_V2(preferred_providers=["CPUExecutionProvider"])
+        function.DOWNLOAD_PATH = directory  # Instance attribute: read from / download to this directory
+        return function
+
+    def load(self):
+        directory = self.find_model_dir()
+        if directory is None:
+            if self.config.offline:
+                raise FileNotFoundError(f"No ONNX embedding model in {self.model_dir} or Chroma's cache - "
+                                        "run `python program_files/cli.py embedding-model` once with network access")
+            print(f"⚠️  No local embedding model - downloading it to {self.model_dir} on first use")
+            directory = self.model_dir
+        self.function = self._function(directory)
+
+    def download(self):
+        self._function(self.model_dir)(["warm-up"])  # Chroma downloads and verifies the archive on first call
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.function(texts), dtype=np.float32)
+
+
+class SentenceTransformersBackend(EmbeddingBackend):
+    name = "sentence_transformers"
+
+    def load(self):
+        if self.config.offline:
+            os.environ.setdefault("HF_HUB_OFFLINE", "1")  # model_name then resolves from the Hugging Face cache
+            os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+        import torch
+        from sentence_transformers import SentenceTransformer
+        if self.config.num_threads:
+            torch.set_num_threads(self.config.num_threads)
+        source = self.model_dir if os.path.isdir(self.model_dir) else self.config.model_name
+        try:
+            self.model = SentenceTransformer(source, device="cpu")
+        except OSError as e:
+            if not self.config.offline:
+                raise
+            raise FileNotFoundError(f"No SentenceTransformer model in {self.model_dir} or the Hugging Face cache - "
+                                    "run `python program_files/cli.py embedding-model` once with network access") from e
+
+    def download(self):
+        from sentence_transformers import SentenceTransformer
+        SentenceTransformer(self.config.model_name, device="cpu").save(self.model_dir)
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, batch_size=self.config.batch_size, convert_to_numpy=True,
+                                 normalize_embeddings=True).astype(np.float32)
+
+
+EMBEDDING_BACKENDS = {
+    "onnx": OnnxBackend,
+    "sentence_transformers": SentenceTransformersBackend,
+}
+
+
+class EmbeddingService:
+    """Micro-batched, cached text embeddings from one resident model.
+
+    The model loads on first use, so opening a database that never embeds
+    anything (analytics, clustering) costs nothing.  ``embed`` blocks and
+    returns an ``(n, dim)`` array; ``submit`` returns a Future per text.
+    ``encode`` mirrors ``SentenceTransformer.encode`` for existing callers.
+    """
+
+    def __init__(self, config: Optional[EmbeddingConfig] = None, backend: Optional[EmbeddingBackend] = None):
+        if config is None:
+            from program_files.config.config import cfg
+            config = cfg.embedding
+        if config.cache_dtype not in CACHE_DTYPES:
+            raise ValueError(f"cache_dtype must be one of {CACHE_DTYPES}, got {config.cache_dtype}")
+
+        self.config = config
+        if backend is None:
+            backend_cls = EMBEDDING_BACKENDS.get(config.backend)
+            if backend_cls is None:
+                raise ValueError(f"Unknown embedding backend: {config.backend}")
+            backend = backend_cls(config)
+        self.backend = backend
+
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._pending = queue.Queue()
+        self.batch_sizes = deque(maxlen=1000)
+        self.embedded = 0
+        self.cache_hits = 0
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            print(f"Loading embedding model ({self.backend.name})...")
+            self.backend.load()
+            self._worker = threading.Thread(target=self._run, name="embedding-service", daemon=True)
+            self._worker.start()
+            self._loaded = True
+
+    # Cache ####################################################################
+
+    def _pack(self, vector: np.ndarray) -> np.ndarray:
+        if self.config.cache_dtype == "int8":
+            return np.round(vector * 127).astype(np.int8)  # Unit-length vectors: components lie in [-1, 1]
+        return vector.astype(self.config.cache_dtype)
+
+    def _unpack(self, stored: np.ndarray) -> np.ndarray:
+        if stored.dtype == np.int8:
+            vector = stored.astype(np.float32) / 127
+            return vector / (np.linalg.norm(vector) + 1e-10)
+        return stored.astype(np.float32)
+
+    def _cache_get(self, text: str) -> Optional[np.ndarray]:
+        with self._cache_lock:
+            stored = self._cache.get(text)
+            if stored is None:
+                return None
+            self._cache.move_to_end(text)
+        return self._unpack(stored)
+
+    def _cache_put(self, text: str, vector: np.ndarray):
+        stored = self._pack(vector)
+        with self._cache_lock:
+            self._cache[text] = stored
+            self._cache.move_to_end(text)
+            while len(self._cache) > self.config.cache_size:
+                self._cache.popitem(last=False)
+
+    # Embedding ################################################################
+
+    def submit(self, text: str, exact: bool = False) -> Future:
+        """Queue *text*; the Future receives its float32 vector.
+
+        With *exact*, a cached vector is only reused when the cache holds
+        it at full precision.
+        """
+        future = Future()
+        cached = None if exact and self.config.cache_dtype != "float32" else self._cache_get(text)
+        if cached is not None:
+            self.cache_hits += 1
+            future.set_result(cached)
+            return future
+
+        self._ensure_loaded()
+        self._pending.put((text, future))
+        return future
+
+    def embed(self, texts: Sequence[str], exact: bool = False) -> np.ndarray:
+        """Blocking: ``(len(texts), dim)`` float32 array of unit vectors"""
+        futures = [self.submit(text, exact) for text in texts]
+        if not futures:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([future.result() for future in futures])
+
+    def embed_for_storage(self, texts: Sequence[str]) -> np.ndarray:
+        """Like ``embed``, but never from a float16/int8 cache copy: for vectors that get persisted"""
+        return self.embed(texts, exact=True)
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        return self.embed(texts)
+
+    def encode(self, texts: Union[str, Sequence[str]], **kwargs) -> np.ndarray:
+        """``SentenceTransformer.encode`` compatible: a single text gives a 1-d vector"""
+        if isinstance(texts, str):
+            return self.embed([texts])[0]
+        return self.embed(texts)
+
+    def _next_batch(self) -> List:
+        """Block for one text, then take what is queued and wait up to ``max_batch_wait`` for more"""
+        batch = [self._pending.get()]
+        deadline = time.perf_counter() + self.config.max_batch_wait
+        while len(batch) < self.config.batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self._pending.get(timeout=remaining))
+                else:
+                    batch.append(self._pending.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+
+            # Identical texts in one batch share a single slot
+            unique = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                vectors = dict(zip(unique, self.backend.embed_batch(unique)))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for text, vector in vectors.items():
+                self._cache_put(text, vector)
+            self.batch_sizes.append(len(unique))
+            self.embedded += len(unique)
+            for text, future in batch:
+                future.set_result(vectors[text])
+
+    def get_stats(self) -> Dict[str, float]:
+        total = self.embedded + self.cache_hits
+        return {
+            "backend": self.backend.name,
+            "embedded": self.embedded,
+            "cache_hits": self.cache_hits,
+            "cache_hit_rate": self.cache_hits / total if total else 0.0,
+            "cached_texts": len(self._cache),
+            "mean_batch_size": float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0
+        }
+
+
+_service: Optional[EmbeddingService] = None
+_service_lock = threading.Lock()
+
+
+def get_embedding_service(config: Optional[EmbeddingConfig] = None) -> EmbeddingService:
+    """Return the process-wide embedding service (the model itself loads on first embed)"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = EmbeddingService(config)
+    return _service
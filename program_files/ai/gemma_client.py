@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
 """Gemma API client for simplified interactions"""
 
-import requests
+from program_files.utils.lazy_imports import lazy_module
 import base64
 import json
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Union, Iterator
 from pathlib import Path
 
+requests = lazy_module("requests")
+
 class GemmaClient:
     """Simple client for Gemma API interactions"""
     
@@ -27,20 +29,12 @@ class GemmaClient:
             return prompt_template.format(context=context, prompt=prompt)
         return f"{context}\nUser: {prompt}\n\nAssistant:" if context else prompt
     
-    def generate_response(self, prompt: str, context: str = "", timeout: Optional[int] = None, 
-                         image_path: Optional[Union[str, Path]] = None,
-                         prompt_template: Optional[str] = None,
-                         vector_context: Optional[Dict[str, Any]] = None) -> Optional[str]:
-        """Generate response from Gemma with enhanced input options
-        
-        Args:
-            prompt: The main prompt text
-            context: Additional context text
-            timeout: Request timeout in seconds
-            image_path: Path to image file for multimodal input
-            prompt_template: Template string with {context} and {prompt} placeholders
-            vector_context: JSON object containing vector database context or metadata
-        """
+    def _build_payload(self, prompt: str, context: str = "",
+                       image_path: Optional[Union[str, Path]] = None,
+                       prompt_template: Optional[str] = None,
+                       vector_context: Optional[Dict[str, Any]] = None,
+                       stream: bool = False) -> Optional[Dict[str, Any]]:
+        """Build the Ollama request payload, or None if the image cannot be read"""
         # Format the prompt using template if provided
         full_prompt = self._format_prompt_with_template(prompt, context, prompt_template)
         
@@ -53,7 +47,7 @@ class GemmaClient:
         payload = {
             'model': self.model, 
             'prompt': full_prompt.strip(), 
-            'stream': False
+            'stream': stream
         }
         
         # Add image if provided
@@ -65,6 +59,26 @@ class GemmaClient:
                 print(f"❌ Error encoding image: {e}")
                 return None
         
+        return payload
+    
+    def generate_response(self, prompt: str, context: str = "", timeout: Optional[int] = None, 
+                         image_path: Optional[Union[str, Path]] = None,
+                         prompt_template: Optional[str] = None,
+                         vector_context: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Generate response from Gemma with enhanced input options
+        
+        Args:
+            prompt: The main prompt text
+            context: Additional context text
+            timeout: Request timeout in seconds
+            image_path: Path to image file for multimodal input
+            prompt_template: Template string with {context} and {prompt} placeholders
+            vector_context: JSON object containing vector database context or metadata
+        """
+        payload = self._build_payload(prompt, context, image_path, prompt_template, vector_context)
+        if payload is None:
+            return None
+        
         # Use default timeout if none provided
         request_timeout = timeout if timeout is not None else 30
         response = requests.post(self.api_url, json=payload, timeout=request_timeout)
@@ -76,6 +90,30 @@ class GemmaClient:
         print(f"❌ Error: HTTP {response.status_code}")
         return None
     
+    def generate_response_stream(self, prompt: str, context: str = "", timeout: Optional[int] = None,
+                                 image_path: Optional[Union[str, Path]] = None,
+                                 prompt_template: Optional[str] = None,
+                                 vector_context: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """Yield response tokens as Ollama produces them (same arguments as generate_response)"""
+        payload = self._build_payload(prompt, context, image_path, prompt_template, vector_context, stream=True)
+        if payload is None:
+            return
+        
+        request_timeout = timeout if timeout is not None else 30
+        with requests.post(self.api_url, json=payload, timeout=request_timeout, stream=True) as response:
+            if response.status_code != 200:
+                print(f"❌ Error: HTTP {response.status_code}")
+                return
+            
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get('response'):
+                    yield chunk['response']
+                if chunk.get('done'):
+                    break
+    
     def is_server_available(self) -> bool:
         """Check if Gemma server is available"""
         response = requests.get(f"{self.base_url}/api/tags", timeout=5)
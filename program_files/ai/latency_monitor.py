@@ -2,7 +2,6 @@
 """Latency monitoring and adaptive response system"""
 
 import time
-import threading
 from collections import deque
 from typing import Optional, Callable, Dict, Any
 from dataclasses import dataclass
@@ -20,7 +19,11 @@ class LatencyMetrics:
     timestamp: float
 
 class LatencyMonitor:
-    """Monitors response latency and user speech patterns to optimize model selection"""
+    """Monitors response latency and user speech patterns to optimize model selection.
+
+    Owned by one session and driven from its thread: response timing by the
+    client, speech activity by inline event bus subscriptions, so no lock.
+    """
     
     def __init__(self, config: Optional[LatencyMonitorConfig] = None):
         if config is None:
@@ -32,8 +35,8 @@ class LatencyMonitor:
         self.current_response_start = None
         self.speech_during_response = 0.0
         self.speech_start_time = None
+        self.user_speaking = False
         self.is_monitoring = False
-        self.lock = threading.Lock()
         
         # Adaptive thresholds from config
         self.high_latency_threshold = config.high_latency_threshold
@@ -42,60 +45,68 @@ class LatencyMonitor:
         
     def start_response_timing(self, model: str, context_length: int, has_image: bool):
         """Start timing a model response"""
-        with self.lock:
-            self.current_response_start = time.time()
-            self.speech_during_response = 0.0
-            self.is_monitoring = True
-            self.current_model = model
-            self.current_context_length = context_length
-            self.current_has_image = has_image
+        self.current_response_start = time.time()
+        self.speech_during_response = 0.0
+        # Speech already in progress counts from the start of the response
+        self.speech_start_time = self.current_response_start if self.user_speaking else None
+        self.is_monitoring = True
+        self.current_model = model
+        self.current_context_length = context_length
+        self.current_has_image = has_image
     
-    def record_speech_activity(self, is_speech: bool):
+    def record_speech_activity(self, is_speech: bool, at: Optional[float] = None):
         """Record when user is speaking during model response"""
+        self.user_speaking = is_speech
         if not self.is_monitoring:
             return
             
-        with self.lock:
-            current_time = time.time()
-            
-            if is_speech and self.speech_start_time is None:
-                # User started speaking
-                self.speech_start_time = current_time
-            elif not is_speech and self.speech_start_time is not None:
-                # User stopped speaking
-                speech_duration = current_time - self.speech_start_time
-                self.speech_during_response += speech_duration
-                self.speech_start_time = None
+        current_time = time.time() if at is None else at
+        
+        if is_speech and self.speech_start_time is None:
+            # User started speaking (no earlier than the response itself)
+            self.speech_start_time = max(current_time, self.current_response_start)
+        elif not is_speech and self.speech_start_time is not None:
+            # User stopped speaking
+            speech_duration = current_time - self.speech_start_time
+            self.speech_during_response += max(0.0, speech_duration)
+            self.speech_start_time = None
+    
+    def subscribe(self, bus, session: str = "") -> tuple:
+        """Follow speech start/end events of *session* instead of per-frame updates; returns the subscriptions"""
+        from program_files.core.event_bus import EventType
+        return (
+            bus.subscribe(lambda e: self.record_speech_activity(True, e.time), EventType.SPEECH_START, session=session, inline=True),
+            bus.subscribe(lambda e: self.record_speech_activity(False, e.time), EventType.SPEECH_END, session=session, inline=True),
+        )
     
     def end_response_timing(self) -> LatencyMetrics:
         """End timing and record metrics"""
-        with self.lock:
-            if not self.is_monitoring or self.current_response_start is None:
-                return None
-                
-            end_time = time.time()
-            response_time = end_time - self.current_response_start
-            
-            # Handle case where user is still speaking when response ends
-            if self.speech_start_time is not None:
-                speech_duration = end_time - self.speech_start_time
-                self.speech_during_response += speech_duration
-                self.speech_start_time = None
-            
-            metrics = LatencyMetrics(
-                response_time=response_time,
-                user_spoke_during_response=self.speech_during_response > 0.5,  # >0.5s = interruption
-                speech_activity_during_response=self.speech_during_response,
-                model_used=self.current_model,
-                context_length=self.current_context_length,
-                had_image=self.current_has_image,
-                timestamp=end_time
-            )
+        if not self.is_monitoring or self.current_response_start is None:
+            return None
             
-            self.metrics_history.append(metrics)
-            self.is_monitoring = False
-            
-            return metrics
+        end_time = time.time()
+        response_time = end_time - self.current_response_start
+        
+        # Handle case where user is still speaking when response ends
+        if self.speech_start_time is not None:
+            speech_duration = end_time - self.speech_start_time
+            self.speech_during_response += speech_duration
+            self.speech_start_time = None
+        
+        metrics = LatencyMetrics(
+            response_time=response_time,
+            user_spoke_during_response=self.speech_during_response > 0.5,  # >0.5s = interruption
+            speech_activity_during_response=self.speech_during_response,
+            model_used=self.current_model,
+            context_length=self.current_context_length,
+            had_image=self.current_has_image,
+            timestamp=end_time
+        )
+        
+        self.metrics_history.append(metrics)
+        self.is_monitoring = False
+        
+        return metrics
     
     def get_interruption_rate(self, recent_count: int = 10) -> float:
         """Get the rate of user interruptions in recent responses"""
@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 """Model preloading and warming strategies"""
 
-import requests
 import threading
 import time
 from typing import List, Optional
 from program_files.config.config import ModelPreloaderConfig
+from program_files.utils.lazy_imports import lazy_module
+
+requests = lazy_module("requests")
 
 class ModelPreloader:
     """Preload and warm models to minimize loading times"""
@@ -19,6 +21,32 @@ class ModelPreloader:
         self.timeout = config.timeout
         self.max_retries = config.max_retries
         self.api_url = f"{config.base_url}/api/generate"
+        self.loaded_model = None  # Model this process keeps resident in Ollama
+        self._switch_lock = threading.Lock()
+    
+    def switch_to(self, model: str) -> Optional[float]:
+        """Make *model* the resident model, unloading the previous one.
+
+        Clients sharing this preloader switch one at a time, so they never
+        unload each other's model mid-switch.  Returns the load time, or
+        None when *model* was already resident.
+        """
+        with self._switch_lock:
+            if model == self.loaded_model:
+                return None
+            if self.loaded_model:
+                self.unload_model(self.loaded_model)
+            load_time = self.warm_model(model)
+            self.loaded_model = model
+            return load_time
+    
+    def unload_model(self, model: str):
+        """Explicitly unload a model to free VRAM"""
+        try:
+            requests.post(self.api_url, json={'model': model, 'keep_alive': 0}, timeout=10)
+            print(f"🗑️  Unloaded {model}")
+        except Exception as e:
+            print(f"⚠️  Failed to unload {model}: {e}")
     
     def warm_model(self, model: str) -> float:
         """Warm up a model with a minimal request"""
@@ -6,30 +6,49 @@ from .smart_model_selector import SmartModelSelector
 from .model_preloader import ModelPreloader
 from .latency_monitor import LatencyMonitor
 from program_files.config.config import GemmaClientConfig
-import requests
 import time
-from typing import Optional
+from typing import Optional, Iterator
 
 class OptimizedGemmaClient(GemmaClient):
-    """Enhanced GemmaClient with loading optimizations"""
+    """Enhanced GemmaClient with loading optimizations
+
+    Pass one ``selector`` and ``preloader`` to every client in a process
+    (see ``SharedModels``) so they agree on which model is resident
+    instead of loading and unloading it under each other.
+    """
     
-    def __init__(self, config: Optional[GemmaClientConfig] = None):
+    def __init__(self, config: Optional[GemmaClientConfig] = None, selector: Optional[SmartModelSelector] = None,
+                 preloader: Optional[ModelPreloader] = None):
         if config is None:
             from config.config import cfg
             config = cfg.gemma_client
             
         super().__init__(config.default_model, config.base_url)
-        self.selector = SmartModelSelector()  # Uses default config
-        self.preloader = ModelPreloader()  # Uses default config
+        self.stream = config.stream
+        self.selector = selector or SmartModelSelector()  # Uses default config
+        self.preloader = preloader or ModelPreloader()  # Uses default config
         self.latency_monitor = LatencyMonitor()  # Uses default config
-        self.current_loaded_model = None
-        
-    def generate_response_optimized(self, prompt: str, context: str = "", **kwargs):
-        """Generate response with optimized model selection and latency monitoring"""
-        
-        # Check if image is provided
-        has_image = 'image_path' in kwargs and kwargs['image_path'] is not None
+        self.event_bus = None
+        self.session_name = ""
+        self._subscriptions = ()
+    
+    def attach_event_bus(self, bus, session: str = ""):
+        """Publish response start/end on *bus* and track the session's speech through it"""
+        self.detach_event_bus()
+        self.event_bus = bus
+        self.session_name = session
+        self._subscriptions = self.latency_monitor.subscribe(bus, session)
+    
+    def detach_event_bus(self):
+        """Stop publishing to and listening on the attached bus"""
+        if self.event_bus is not None:
+            for subscription in self._subscriptions:
+                self.event_bus.unsubscribe(subscription)
+        self.event_bus = None
+        self._subscriptions = ()
         
+    def _prepare_model(self, prompt: str, context: str, has_image: bool):
+        """Select, load and start timing the optimal model; returns (model_switched, switch_reason)"""
         # Get optimal model from selector
         optimal_model = self.selector.get_optimal_model(prompt, context, has_image)
         
@@ -39,20 +58,14 @@ class OptimizedGemmaClient(GemmaClient):
         if reason.startswith("🚨"):
             print(reason)
         
-        # Check if we need to switch models
-        if final_model != self.current_loaded_model:
+        # Switch the resident model if needed (unloads the previous one to free VRAM)
+        model_switched = final_model != self.preloader.loaded_model
+        if model_switched:
             print(f"🔄 Switching to {final_model}...")
-            
-            # Unload current model to free VRAM
-            if self.current_loaded_model:
-                self._unload_model(self.current_loaded_model)
-            
-            # Warm up new model
-            load_time = self.preloader.warm_model(final_model)
+        load_time = self.preloader.switch_to(final_model)
+        if load_time is not None:
             print(f"⚡ Model loaded in {load_time:.2f}s")
-            
-            self.current_loaded_model = final_model
-            self.model = final_model
+        self.model = final_model
         
         # Start latency monitoring
         self.latency_monitor.start_response_timing(
@@ -60,48 +73,77 @@ class OptimizedGemmaClient(GemmaClient):
             context_length=len(context),
             has_image=has_image
         )
+        if self.event_bus is not None:
+            from program_files.core.event_bus import EventType
+            self.event_bus.publish(EventType.RESPONSE_START, self.session_name, model=final_model)
         
-        model_switched = final_model != self.current_loaded_model
         switch_reason = reason if model_switched else ""
+        return model_switched, switch_reason
+    
+    def _finish_timing(self, model_switched: bool, switch_reason: str, time_to_first_token: Optional[float] = None):
+        """End latency monitoring and keep metrics for the database"""
+        metrics = self.latency_monitor.end_response_timing()
+        if self.event_bus is not None:
+            from program_files.core.event_bus import EventType
+            self.event_bus.publish(EventType.RESPONSE_END, self.session_name,
+                                   response_time=metrics.response_time if metrics else None,
+                                   interrupted=bool(metrics and metrics.user_spoke_during_response))
+        if metrics:
+            # Store metrics for database
+            self._last_latency_metrics = {
+                'response_time': metrics.response_time,
+                'user_spoke_during_response': metrics.user_spoke_during_response,
+                'speech_activity_during_response': metrics.speech_activity_during_response,
+                'model_used': metrics.model_used,
+                'context_length': metrics.context_length,
+                'had_image': metrics.had_image,
+                'model_switched': model_switched,
+                'switch_reason': switch_reason
+            }
+            if time_to_first_token is not None:
+                self._last_latency_metrics['time_to_first_token'] = time_to_first_token
+            
+            if metrics.response_time > 3.0:
+                print(f"⚠️  Slow response: {metrics.response_time:.2f}s")
+            if metrics.user_spoke_during_response:
+                print(f"🗣️  User spoke for {metrics.speech_activity_during_response:.1f}s during response")
+            if model_switched:
+                print(f"🔄 Model switched: {switch_reason}")
+    
+    def generate_response_optimized(self, prompt: str, context: str = "", **kwargs):
+        """Generate response with optimized model selection and latency monitoring"""
+        
+        # Check if image is provided
+        has_image = 'image_path' in kwargs and kwargs['image_path'] is not None
+        model_switched, switch_reason = self._prepare_model(prompt, context, has_image)
         
         try:
             # Generate response
             response = self.generate_response(prompt, context, **kwargs)
             return response
         finally:
-            # End latency monitoring
-            metrics = self.latency_monitor.end_response_timing()
-            if metrics:
-                # Store metrics for database
-                self._last_latency_metrics = {
-                    'response_time': metrics.response_time,
-                    'user_spoke_during_response': metrics.user_spoke_during_response,
-                    'speech_activity_during_response': metrics.speech_activity_during_response,
-                    'model_used': metrics.model_used,
-                    'context_length': metrics.context_length,
-                    'had_image': metrics.had_image,
-                    'model_switched': model_switched,
-                    'switch_reason': switch_reason
-                }
-                
-                if metrics.response_time > 3.0:
-                    print(f"⚠️  Slow response: {metrics.response_time:.2f}s")
-                if metrics.user_spoke_during_response:
-                    print(f"🗣️  User spoke for {metrics.speech_activity_during_response:.1f}s during response")
-                if model_switched:
-                    print(f"🔄 Model switched: {switch_reason}")
+            self._finish_timing(model_switched, switch_reason)
+    
+    def generate_response_stream_optimized(self, prompt: str, context: str = "", **kwargs) -> Iterator[str]:
+        """Streaming variant of generate_response_optimized that yields tokens"""
+        has_image = 'image_path' in kwargs and kwargs['image_path'] is not None
+        model_switched, switch_reason = self._prepare_model(prompt, context, has_image)
+        
+        start = time.time()
+        time_to_first_token = None
+        try:
+            for token in self.generate_response_stream(prompt, context, **kwargs):
+                if time_to_first_token is None:
+                    time_to_first_token = time.time() - start
+                yield token
+        finally:
+            self._finish_timing(model_switched, switch_reason, time_to_first_token)
     
     def _unload_model(self, model: str):
         """Explicitly unload a model to free VRAM"""
-        try:
-            requests.post(
-                f"{self.base_url}/api/generate",
-                json={'model': model, 'keep_alive': 0},
-                timeout=10
-            )
-            print(f"🗑️  Unloaded {model}")
-        except Exception as e:
-            print(f"⚠️  Failed to unload {model}: {e}")
+        self.preloader.unload_model(model)
+        if self.preloader.loaded_model == model:
+            self.preloader.loaded_model = None
     
     def benchmark_switching(self):
         """Benchmark model switching performance"""
@@ -127,7 +169,7 @@ class OptimizedGemmaClient(GemmaClient):
         return results
     
     def record_speech_activity(self, is_speech: bool):
-        """Record user speech activity for latency monitoring"""
+        """Record user speech activity for latency monitoring (or use ``attach_event_bus``)"""
         self.latency_monitor.record_speech_activity(is_speech)
     
     def get_latency_status(self):
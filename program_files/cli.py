@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Command line maintenance tasks for cron jobs.
+
+Each subcommand imports only what it needs, so none of them load the
+audio (PyAudio, Vosk, webrtcvad) or TTS stacks.
+
+Usage:
+    python program_files/cli.py analytics --days 7
+    python program_files/cli.py clustering --confidence 0.8
+    python program_files/cli.py cue-cards --days 1
+    python program_files/cli.py embedding-model
+    python program_files/cli.py ingest documents/ "referrals/**/*.pdf"
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add the repository root to the path so program_files imports resolve
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def run_analytics(args) -> int:
+    """Print latency analytics from the conversation database"""
+    from program_files.database.enhanced_conversation_db import EnhancedConversationDB
+
+    analytics = EnhancedConversationDB().get_latency_analytics(session_id=args.session, days=args.days)
+    if "status" in analytics:
+        print(f"📊 No analytics: {analytics.get('message', analytics['status'])}")
+        return 1 if analytics['status'] == "error" else 0
+    print(f"""📊 Database Latency Analytics ({args.days} day(s)):
+   Total responses: {analytics['total_responses']}
+   Interruption rate: {analytics['interruption_rate']:.1%}
+   High latency rate: {analytics['high_latency_rate']:.1%}
+   Model switch rate: {analytics['model_switch_rate']:.1%}""")
+    return 0
+
+
+def run_clustering(args) -> int:
+    """Refit the speaker GMM and relabel stored audio features"""
+    from program_files.ml.gmm_clustering import update_database_speakers
+
+    update_database_speakers(confidence_threshold=args.confidence)
+    return 0
+
+
+def run_cue_cards(args) -> int:
+    """Refresh cue cards from recent conversations"""
+    from rag_functions.core.main import update_cue_cards_from_conversations
+
+    update_cue_cards_from_conversations(days_back=args.days, similarity_threshold=args.threshold)
+    return 0
+
+
+def run_embedding_model(args) -> int:
+    """Download the embedding model into its local directory for offline use"""
+    from program_files.ai.embedding_service import EMBEDDING_BACKENDS, resolve_model_dir
+    from program_files.config.config import cfg
+
+    backend = EMBEDDING_BACKENDS[args.backend or cfg.embedding.backend](cfg.embedding)
+    print(f"📦 Fetching {backend.name} embedding model into {resolve_model_dir(cfg.embedding)}")
+    backend.download()
+    return 0
+
+
+def run_ingest(args) -> int:
+    """Ingest many documents, resuming from the checkpoints of earlier runs"""
+    from rag_functions.core.ingest import BatchIngestor, JobStore, find_documents
+
+    jobs = JobStore(args.jobs_db) if args.jobs_db else JobStore()
+    try:
+        if args.status:
+            print(f"📋 Ingestion jobs: {jobs.summary() or 'none'}")
+            for path, error in jobs.failures():
+                print(f"   ❌ {path}: {error}")
+            return 0
+
+        paths = find_documents(args.paths)
+        if not paths:
+            print("📄 No documents found")
+            return 1
+        counts = BatchIngestor(jobs, ocr_workers=args.ocr_workers, documents_in_flight=args.parallel_documents,
+                               retry_failed=args.retry_failed).run(paths)
+        return 1 if counts.get("failed") else 0
+    finally:
+        jobs.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Cortex Bridge maintenance tasks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    analytics = subparsers.add_parser("analytics", help="Show response latency analytics")
+    analytics.add_argument("--days", type=int, default=7, help="Look-back window in days")
+    analytics.add_argument("--session", help="Restrict to one session id")
+    analytics.set_defaults(handler=run_analytics)
+
+    clustering = subparsers.add_parser("clustering", help="Re-cluster speakers with the GMM")
+    clustering.add_argument("--confidence", type=float, default=0.8, help="Minimum assignment confidence")
+    clustering.set_defaults(handler=run_clustering)
+
+    cue_cards = subparsers.add_parser("cue-cards", help="Update cue cards from recent conversations")
+    cue_cards.add_argument("--days", type=int, default=1, help="Look-back window in days")
+    cue_cards.add_argument("--threshold", type=float, default=0.7, help="Similarity threshold for matching cards")
+    cue_cards.set_defaults(handler=run_cue_cards)
+
+    embedding_model = subparsers.add_parser("embedding-model", help="Download the embedding model for offline use")
+    embedding_model.add_argument("--backend", help="Embedding backend (default: configured backend)")
+    embedding_model.set_defaults(handler=run_embedding_model)
+
+    ingest = subparsers.add_parser("ingest", help="Ingest documents into cue cards and adaptive prompts")
+    ingest.add_argument("paths", nargs="*", help="Document files, directories or glob patterns")
+    ingest.add_argument("--jobs-db", help="Job state database (default: program_files/data/ingest_jobs.sqlite3)")
+    ingest.add_argument("--ocr-workers", type=int, default=2, help="OCR processes (0 extracts in this process)")
+    ingest.add_argument("--parallel-documents", type=int, default=2, help="Documents in the LLM stages at once")
+    ingest.add_argument("--retry-failed", action="store_true", help="Retry documents that failed before")
+    ingest.add_argument("--status", action="store_true", help="Show job counts and failures, then exit")
+    ingest.set_defaults(handler=run_ingest)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
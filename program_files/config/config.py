@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import List
+from typing import List, Optional
 
 @dataclass
 class SmartModelSelectorConfig:
@@ -96,22 +96,28 @@ class SpeechProcessorConfig:
     """Configuration for SpeechProcessor (Voice Activity Detection)"""
     sample_rate: int = 16000  # Audio sample rate
     vad_aggressiveness: int = 2  # WebRTC VAD aggressiveness (0-3, higher = more aggressive)
-    silence_threshold: int = 3  # Frames of silence before marking as not speaking
-    energy_threshold: float = 500.0  # Fallback energy threshold for speech detection
-    frame_size: int = 960  # Audio frame size for VAD processing
+    energy_threshold: float = 500.0  # Mean absolute amplitude for the energy backend
+    backend: str = "webrtc"  # "webrtc", "energy" (vectorized numpy) or "silero" (neural, CPU)
+    frame_ms: int = 30  # VAD frame length: 10, 20 or 30 ms
+    onset_frames: int = 3  # Consecutive voiced frames that open a speech segment
+    hangover_ms: int = 300  # Trailing silence that closes a speech segment
+    silero_threshold: float = 0.5  # Speech probability threshold for the silero backend
 
 @dataclass
 class SpeakerDetectorConfig:
     """Configuration for SpeakerDetector"""
     # Core detection parameters
     max_speakers: int = 8  # Maximum number of speakers to track
-    buffer_size: int = 16000  # Audio buffer size (1 second at 16kHz)
+    buffer_size: int = 16000  # Recent audio kept for message features (1 second at 16kHz)
     similarity_threshold: float = 0.40  # Threshold for speaker matching
     min_speech_energy: float = 0.02  # Minimum energy to consider as speech
     
-    # Speaker change detection
-    min_frames_for_new_speaker: int = 15  # Frames needed to register new speaker
-    min_frames_for_change: int = 4  # Frames needed to confirm speaker change
+    # Online diarization (segments come from VAD boundaries)
+    min_segment_seconds: float = 0.5  # Shorter segments keep the previous speaker and are not clustered
+    max_segment_seconds: float = 3.0  # Long speech is split so changes without a pause are caught
+    merge_threshold: float = 0.70  # Clusters whose centroids are this similar are merged
+    relabel_window_seconds: float = 10.0  # Recent segments that may be relabeled as evidence accumulates
+    max_history_segments: int = 64  # Segments kept for relabeling (bounds memory)
     
     # Model settings
     use_ecapa_model: bool = True  # Use ECAPA-TDNN model (fallback to spectral if False)
@@ -150,13 +156,97 @@ class VoskModelConfig:
     # Fallback model if none found
     fallback_model_name: str = "vosk-model-en-us-0.22"
 
+@dataclass
+class RecognizerConfig:
+    """Configuration for Vosk recognizer management"""
+    partial_poll_interval: int = 5  # Audio reads between PartialResult() polls
+    enable_words: bool = True  # Request word-level timestamps from Vosk
+    pool_size: int = 1  # Recognizers allocated up front per sample rate; sessions hand theirs back on finish
+    min_segment_chars: int = 5  # Shortest text worth emitting on a forced endpoint
+
 @dataclass
 class GemmaClientConfig:
     """Configuration for GemmaClient"""
     default_model: str = "gemma3n:e2b"
     base_url: str = "http://localhost:11434"
     timeout: int = 30  # Default timeout for requests
-    stream: bool = False  # Stream responses or not
+    stream: bool = True  # Stream tokens so TTS can start after the first sentence (needs a TTS with speak_stream)
+
+@dataclass
+class TTSConfig:
+    """Configuration for the resident text-to-speech backend"""
+    backend: str = "auto"  # "auto" (coqui when installed and on disk), "coqui" (resident), "edge" (needs network) or "none" (silent)
+    model_name: str = "tts_models/en/vctk/vits"  # Coqui model id, looked up in Coqui's model cache
+    model_dir: Optional[str] = None  # Local directory with model_file.pth + config.json (overrides model_name)
+    offline: bool = True  # No network: never download a Coqui model, fall back to silence instead of the edge voice
+    speaker: str = "p229"  # Default speaker for multi-speaker models
+    sample_rate: int = 22050  # Overwritten by the loaded model's output rate
+    use_cuda: bool = False  # Run synthesis on GPU when available
+    batch_size: int = 4  # Sentences synthesized per forward pass
+    max_synthesis_latency: float = 1.5  # Seconds per forward pass; slower batches shrink the batch size
+    latency_history_size: int = 100  # Synthesis calls kept for latency statistics
+    warmup_text: str = "Ready."  # Synthesized once at load so the first real call is warm
+
+@dataclass
+class EmotionConfig:
+    """Configuration for the emotion inference service"""
+    model_name: str = "j-hartmann/emotion-english-distilroberta-base"
+    backend: str = "quantized"  # "transformers" (fp32), "quantized" (int8 dynamic) or "onnx" (ONNX Runtime)
+    onnx_dir: str = "models/emotion_onnx"  # Exported ONNX model cache, relative to program_files
+    batch_size: int = 8  # Max utterances per forward pass
+    max_batch_wait: float = 0.02  # Seconds to wait for more utterances before running a batch
+    max_result_wait: float = 0.3  # Seconds an utterance waits for its emotion before it is stored without one
+    cache_size: int = 512  # Normalized texts whose results are kept
+    num_threads: Optional[int] = None  # Intra-op CPU threads (None = library default)
+    max_length: int = 128  # Tokens per utterance
+
+@dataclass
+class EmbeddingConfig:
+    """Configuration for the shared text embedding service (vector DB and RAG)"""
+    backend: str = "onnx"  # "onnx" (MiniLM on ONNX Runtime, Chroma's format) or "sentence_transformers"
+    model_name: str = "sentence-transformers/all-MiniLM-L6-v2"
+    model_dir: str = "models/all-MiniLM-L6-v2"  # Local model files, relative to program_files
+    offline: bool = False  # True: never download; fail unless model_dir or the library cache has the model
+    batch_size: int = 32  # Max texts per forward pass
+    max_batch_wait: float = 0.005  # Seconds to wait for more texts before running a batch
+    cache_size: int = 4096  # Texts whose vectors are kept
+    cache_dtype: str = "float32"  # Cached vector storage: "float32", "float16" or "int8"
+    num_threads: Optional[int] = None  # Intra-op CPU threads (None = library default)
+
+@dataclass
+class StartupConfig:
+    """Configuration for startup orchestration"""
+    max_workers: int = 4  # Components loaded concurrently
+    emotion_mode: str = "lazy"  # "critical", "background" or "lazy"
+    print_timeline: bool = True  # Print the load timeline once listening starts
+
+@dataclass
+class ServerConfig:
+    """Configuration for multi-stream server mode"""
+    max_workers: Optional[int] = None  # Worker threads shared by all sessions (None = CPU count)
+    frames_per_buffer: int = 2048  # Samples per audio read
+    max_queued_frames: int = 64  # Per-session backlog before the source is throttled
+    frames_per_step: int = 8  # Frames a worker processes before yielding to other sessions
+    speak_responses: bool = False  # Sessions share one host, so TTS playback is off by default
+
+@dataclass
+class SpeakerClusteringConfig:
+    """Configuration for offline GMM speaker clustering (ml/gmm_clustering.py)"""
+    max_components: int = 20  # Largest speaker count tried in the BIC search
+    covariance_type: str = "diag"
+    reg_covar: float = 1e-4
+    random_state: int = 42
+    n_jobs: int = -1  # joblib workers for the BIC search (-1 = all cores)
+    warm_start_max_iter: int = 20  # EM iterations when refining the saved model on new rows
+    replay_size: int = 2000  # Previously seen rows mixed into an incremental refit
+    refit_growth: float = 0.2  # Full BIC refit once new rows exceed this fraction of rows seen
+
+@dataclass
+class VectorDBConfig:
+    """Configuration for the Chroma conversation store (database/enhanced_conversation_db.py)"""
+    utterance_shard_bucket: str = "month"  # Time bucket of utterance shards: "month" or "week"
+    search_shards: Optional[int] = None  # Utterance shards searched by similarity queries (None = all; N = newest N, faster but misses older talk)
+    max_source_passages: int = 3  # Document passages added to the LLM context alongside cue cards
 
 @dataclass
 class Config:
@@ -169,5 +259,13 @@ class Config:
     speech_processor: SpeechProcessorConfig = field(default_factory=SpeechProcessorConfig)
     speaker_detector: SpeakerDetectorConfig = field(default_factory=SpeakerDetectorConfig)
     vosk_model: VoskModelConfig = field(default_factory=VoskModelConfig)
+    recognizer: RecognizerConfig = field(default_factory=RecognizerConfig)
+    tts: TTSConfig = field(default_factory=TTSConfig)
+    emotion: EmotionConfig = field(default_factory=EmotionConfig)
+    embedding: EmbeddingConfig = field(default_factory=EmbeddingConfig)
+    server: ServerConfig = field(default_factory=ServerConfig)
+    startup: StartupConfig = field(default_factory=StartupConfig)
+    speaker_clustering: SpeakerClusteringConfig = field(default_factory=SpeakerClusteringConfig)
+    vector_db: VectorDBConfig = field(default_factory=VectorDBConfig)
 
 cfg = Config()
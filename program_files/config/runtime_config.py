@@ -16,11 +16,14 @@ class RuntimeConfigManager:
         
         # Define parameters that require component restart
         self.restart_required_params = {
-            'speaker_detector': {'use_ecapa_model', 'model_save_dir'},
+            'speaker_detector': {'use_ecapa_model', 'model_save_dir', 'max_segment_seconds', 'max_history_segments'},  # Buffers are sized once
             'vosk_model': {'models_base_dir', 'available_models', 'preferred_models'},
             'model_preloader': {'base_url'},
             'gemma_client': {'base_url'},
-            'speech_processor': {'sample_rate'},  # Changing sample rate requires reinit
+            'speech_processor': {'sample_rate', 'backend', 'frame_ms'},  # Framing and classifier are set up once
+            'tts': {'backend', 'model_name', 'model_dir', 'offline', 'use_cuda'},  # Resident model is loaded once
+            'emotion': {'backend', 'model_name', 'onnx_dir', 'num_threads', 'max_length'},  # Model is loaded once
+            'embedding': {'backend', 'model_name', 'model_dir', 'offline', 'num_threads'},  # Model is loaded once
         }
         
         # Define read-only parameters that should never change
@@ -186,15 +189,20 @@ class RuntimeConfigManager:
         elif key == 'vad_aggressiveness':
             val = int(value)
             return val if 0 <= val <= 3 else None
-        elif key == 'silence_threshold':
-            val = int(value)
-            return val if val > 0 else None
         elif key == 'energy_threshold':
             val = float(value)
             return val if val > 0 else None
-        elif key == 'frame_size':
+        elif key == 'backend':
+            return value if value in ('webrtc', 'energy', 'silero') else None
+        elif key == 'frame_ms':
             val = int(value)
-            return val if val > 0 else None
+            return val if val in (10, 20, 30) else None
+        elif key in ('onset_frames', 'hangover_ms'):
+            val = int(value)
+            return val if val >= 0 else None
+        elif key == 'silero_threshold':
+            val = float(value)
+            return val if 0.0 < val < 1.0 else None
         return value
     
     def _validate_speaker_detector(self, key: str, value: Any) -> Any:
@@ -205,10 +213,13 @@ class RuntimeConfigManager:
         elif key == 'buffer_size':
             val = int(value)
             return val if val > 0 else None
-        elif key in ['similarity_threshold', 'min_speech_energy', 'embedding_alpha']:
+        elif key in ['similarity_threshold', 'min_speech_energy', 'embedding_alpha', 'merge_threshold']:
             val = float(value)
             return val if 0.0 <= val <= 1.0 else None
-        elif key in ['min_frames_for_new_speaker', 'min_frames_for_change']:
+        elif key in ['min_segment_seconds', 'max_segment_seconds', 'relabel_window_seconds']:
+            val = float(value)
+            return val if val > 0 else None
+        elif key == 'max_history_segments':
             val = int(value)
             return val if val > 0 else None
         elif key in ['use_ecapa_model', 'normalize_embeddings']:
@@ -1,7 +1,16 @@
 #!/usr/bin/env python3
 """Core pipeline components"""
 
-from .program_pipeline import main
-from .conversation_manager import ConversationManager
+__all__ = ['main', 'ConversationManager']
 
-__all__ = ['main', 'ConversationManager'] 
\ No newline at end of file
+
+def __getattr__(name):
+    # Resolved on first use (PEP 562) so importing a core submodule does not
+    # drag in the whole pipeline
+    if name == 'main':
+        from .program_pipeline import main
+        return main
+    if name == 'ConversationManager':
+        from .conversation_manager import ConversationManager
+        return ConversationManager
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
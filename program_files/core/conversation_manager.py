@@ -11,7 +11,8 @@ from program_files.config.config import ConversationModeConfig
 class ConversationManager:
     """Manages conversation state and history"""
     
-    def __init__(self, enable_vector_db: bool = True, config: Optional[ConversationModeConfig] = None):
+    def __init__(self, enable_vector_db: bool = True, config: Optional[ConversationModeConfig] = None,
+                 vector_db: Optional[EnhancedConversationDB] = None):
         if config is None:
             from program_files.config.config import cfg
             config = cfg.conversation_mode
@@ -22,7 +23,10 @@ class ConversationManager:
         self.gemma_conversation_history = []
         self.last_feedback = None
         self.session_id = self._generate_session_id()
-        self.vector_db = EnhancedConversationDB() if enable_vector_db else None
+        if vector_db is not None:
+            self.vector_db = vector_db  # Shared client, e.g. across server sessions
+        else:
+            self.vector_db = EnhancedConversationDB() if enable_vector_db else None
         
         # Emotion tracking for triggering
         self.emotion_history = deque(maxlen=config.emotion_window_size)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""In-process event bus for segment-level pipeline events.
+
+The capture loop publishes one event per transition (speech start/end, a
+final transcript, a speaker change, an LLM response starting or ending)
+instead of calling every interested component on every frame.
+
+Subscribers are either *inline* (called on the publishing thread; for
+cheap, per-session state such as the latency monitor) or *queued*
+(delivered on the bus's dispatcher thread; for shared components such
+as the adaptive system monitor).  Queues are ``collections.deque``,
+whose append/popleft are atomic, and the routing table is replaced
+copy-on-write, so ``publish`` never takes a lock.
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class EventType(Enum):
+    SPEECH_START = "speech_start"
+    SPEECH_END = "speech_end"
+    PARTIAL_TRANSCRIPT = "partial_transcript"
+    FINAL_TRANSCRIPT = "final_transcript"
+    SPEAKER_CHANGE = "speaker_change"
+    RESPONSE_START = "response_start"
+    RESPONSE_END = "response_end"
+
+
+@dataclass
+class Event:
+    type: EventType
+    session: str  # Name of the publishing session ("" for single-stream mode)
+    time: float  # Wall clock (time.time()) at which the event happened
+    data: Dict[str, Any] = field(default_factory=dict)
+
+
+class Subscription:
+    """One handler's registration and, for queued delivery, its inbox"""
+
+    def __init__(self, handler: Callable[[Event], None], types: Tuple[EventType, ...],
+                 session: Optional[str], inline: bool):
+        self.handler = handler
+        self.types = types
+        self.session = session  # None = every session
+        self.inline = inline
+        self.inbox = deque()
+
+    def deliver(self, event: Event):
+        try:
+            self.handler(event)
+        except Exception as e:
+            print(f"⚠️  Event handler for {event.type.value} failed: {e}")
+
+    def drain(self) -> int:
+        """Deliver everything queued so far; returns the number of events handled"""
+        count = 0
+        while True:
+            try:
+                event = self.inbox.popleft()
+            except IndexError:
+                return count
+            self.deliver(event)
+            count += 1
+
+
+class EventBus:
+    """Typed publish/subscribe with inline or dispatcher-thread delivery"""
+
+    def __init__(self):
+        self._routes: Dict[EventType, Tuple[Subscription, ...]] = {}
+        self._queued: Tuple[Subscription, ...] = ()
+        self._subscribe_lock = threading.Lock()  # Serializes (rare) subscribe/unsubscribe only
+        self._wakeup = threading.Event()
+        self._dispatcher: Optional[threading.Thread] = None
+        self.published = 0
+
+    def subscribe(self, handler: Callable[[Event], None], *types: EventType,
+                  session: Optional[str] = None, inline: bool = False) -> Subscription:
+        """Register *handler* for *types* (all types if none given), optionally for one session"""
+        subscription = Subscription(handler, types or tuple(EventType), session, inline)
+        with self._subscribe_lock:
+            routes = dict(self._routes)
+            for event_type in subscription.types:
+                routes[event_type] = routes.get(event_type, ()) + (subscription,)
+            self._routes = routes
+            if not inline:
+                self._queued = self._queued + (subscription,)
+                self._start_dispatcher()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._subscribe_lock:
+            self._routes = {t: tuple(s for s in subs if s is not subscription) for t, subs in self._routes.items()}
+            self._queued = tuple(s for s in self._queued if s is not subscription)
+
+    def publish(self, event_type: EventType, session: str = "", at: Optional[float] = None, **data) -> Event:
+        """Deliver inline subscribers now and queue the event for the others"""
+        event = Event(event_type, session, time.time() if at is None else at, data)
+        self.published += 1
+        queued = False
+        for subscription in self._routes.get(event_type, ()):
+            if subscription.session is not None and subscription.session != session:
+                continue
+            if subscription.inline:
+                subscription.deliver(event)
+            else:
+                subscription.inbox.append(event)
+                queued = True
+        if queued:
+            self._wakeup.set()
+        return event
+
+    def drain(self) -> int:
+        """Deliver all queued events on the calling thread (shutdown, tests)"""
+        return sum(subscription.drain() for subscription in self._queued)
+
+    def _start_dispatcher(self):
+        if self._dispatcher is None:
+            self._dispatcher = threading.Thread(target=self._run, name="event-bus", daemon=True)
+            self._dispatcher.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            self.drain()
+
+
+# Process-wide bus; sessions tag their events with their name
+event_bus = EventBus()
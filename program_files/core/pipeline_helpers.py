@@ -3,6 +3,10 @@
 
 from typing import Dict, Optional
 import json
+import os
+import time
+from program_files.tts.text_processing import SentenceChunker
+from program_files.utils.stage_timer import pipeline_timer
 
 def get_vector_context(query: str, conversation_context: str = "", top_k: int = 3, vector_db=None) -> Optional[Dict]:
     """Get relevant vector context from database"""
@@ -21,21 +25,74 @@ def get_vector_context(query: str, conversation_context: str = "", top_k: int =
         return {
             "relevant_cue_cards": [{"q": c.get("question", ""), "a": c.get("answer", "")} for c in context.get("relevant_cue_cards", [])],
             "relevant_prompts": [{"issue": p.get("issue", ""), "prompt": p.get("prompt", "")} for p in context.get("relevant_prompts", [])],
-            "similar_conversations": [{"text": c.get("text", ""), "speaker": c.get("speaker", "")} for c in context.get("similar_conversations", [])]
+            "similar_conversations": [{"text": c.get("text", ""), "speaker": c.get("speaker", "")} for c in context.get("similar_conversations", [])],
+            "source_passages": [{"document": os.path.basename(p.get("document_path", "")), "text": p.get("text", "")} for p in context.get("source_passages", [])]
         }
     except Exception as e:
         print(f"Error getting vector context: {e}")
         return None
 
+def stream_gemma_response_to_speech(gemma_client, text: str, context: str, tts_file, chunk_length: int = 80, **kwargs) -> Optional[str]:
+    """Speak a streamed Gemma reply sentence by sentence and return the full text"""
+    tokens = []
+    llm_seconds = [0.0]  # Time spent waiting on the LLM; the rest of the stream is TTS
+    
+    def token_stream():
+        stream = gemma_client.generate_response_stream_optimized(text, context, **kwargs)
+        while True:
+            start = time.perf_counter()
+            token = next(stream, None)
+            llm_seconds[0] += time.perf_counter() - start
+            if token is None:
+                return
+            tokens.append(token)
+            yield token
+    
+    stream_start = time.perf_counter()
+    
+    chunks = SentenceChunker(max_chunk_length=chunk_length).iter_chunks(token_stream())
+    print("🔊 Streaming response to speech...")
+    try:
+        if not tts_file.speak_stream(chunks):
+            print("❌ Failed to stream speech for response")
+    except Exception as e:
+        print(f"❌ TTS error: {e}")
+    
+    # Drain whatever TTS did not consume so the full reply is recorded
+    for _ in chunks:
+        pass
+    
+    pipeline_timer.record("llm", llm_seconds[0])
+    pipeline_timer.record("tts", time.perf_counter() - stream_start - llm_seconds[0])
+    response = "".join(tokens).strip()
+    return response or None
+
+def supports_speak_stream(tts_file) -> bool:
+    """Whether *tts_file* can speak a token stream; a TTS still loading in the background counts as no"""
+    from .startup import LazyComponent
+    if isinstance(tts_file, LazyComponent):
+        if not tts_file.loaded:
+            return False  # Asking would block until TTS is ready; the reply is spoken whole instead
+        tts_file = tts_file.get()
+    return tts_file is not None and hasattr(tts_file, 'speak_stream')
+
 def handle_gemma_response(gemma_client, text: str, context: str, conversation_manager, tts_file=None, prompt_template=None, image_path=None, use_vector_context=True):
     """Generate and handle Gemma response with latency tracking and TTS"""
     
     # Get vector context if enabled
     vector_context = None
     if use_vector_context and conversation_manager.vector_db:
-        vector_context = get_vector_context(text, context, vector_db=conversation_manager.vector_db)
+        with pipeline_timer.stage("retrieval"):
+            vector_context = get_vector_context(text, context, vector_db=conversation_manager.vector_db)
+    
+    # Stream straight into TTS when both ends support it
+    streaming = getattr(gemma_client, 'stream', False) and supports_speak_stream(tts_file)
+    if streaming:
+        response = stream_gemma_response_to_speech(gemma_client, text, context, tts_file, prompt_template=prompt_template, image_path=image_path, vector_context=vector_context)
+    else:
+        with pipeline_timer.stage("llm"):
+            response = gemma_client.generate_response_optimized(text, context, prompt_template=prompt_template, image_path=image_path, vector_context=vector_context)
     
-    response = gemma_client.generate_response_optimized(text, context, prompt_template=prompt_template, image_path=image_path, vector_context=vector_context)
     if response:
         print(f"🤖 Gemma: {response}")
         latency_metrics = gemma_client.get_last_latency_metrics()
@@ -48,14 +105,16 @@ def handle_gemma_response(gemma_client, text: str, context: str, conversation_ma
         conversation_manager.add_to_history(response, False, "Gemma", latency_metrics=latency_metrics, model_used=model_used)
         
         # Convert response to speech using streaming TTS
-        if tts_file:
+        if tts_file and not streaming:
             try:
                 # Clean the response text before TTS processing
                 cleaned_response = response.strip()
                 
                 # Use streaming TTS for better responsiveness
                 print("🔊 Streaming response to speech...")
-                if not tts_file.stream_text_to_speech(cleaned_response, chunk_length=80):
+                with pipeline_timer.stage("tts"):
+                    spoken = tts_file.stream_text_to_speech(cleaned_response, chunk_length=80)
+                if not spoken:
                     print("❌ Failed to stream speech for response")
             except Exception as e:
                 print(f"❌ TTS error: {e}")
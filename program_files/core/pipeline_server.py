@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Multi-stream server mode: several rooms on one host sharing loaded models.
+
+Models are loaded once (see ``SharedModels``).  Each audio source gets a
+reader thread that queues frames and a ``PipelineSession`` with its own
+conversation, speaker and recognizer state.  A shared worker pool runs a
+session for ``frames_per_step`` frames at a time; a session is never on
+two workers at once, so its frames are always processed in order.
+"""
+
+import argparse
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from .pipeline_session import PipelineSession, SharedModels
+from program_files.speech.audio_sources import AudioSource, create_audio_source
+from program_files.ai.adaptive_system_monitor import adaptive_monitor, SystemMode
+from program_files.config.config import cfg, ServerConfig
+
+
+class PipelineServer:
+    """Schedules N concurrent audio sessions across a worker pool"""
+
+    def __init__(self, models: SharedModels, config: Optional[ServerConfig] = None):
+        if config is None:
+            config = cfg.server
+
+        self.config = config
+        self.models = models
+        self.sessions: List[PipelineSession] = []
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._readers: List[threading.Thread] = []
+
+    def add_session(self, source: AudioSource, name: Optional[str] = None, tts_file=None) -> PipelineSession:
+        """Create a session for *source*; call before ``run``"""
+        name = name or f"{source.name}{len(self.sessions) + 1}"
+        if tts_file is None and self.config.speak_responses:
+            from program_files.tts.tts_backends import create_tts_player
+            tts_file = create_tts_player()
+        session = PipelineSession(self.models, source, name=name, tts_file=tts_file)
+        self.sessions.append(session)
+        return session
+
+    def _pump(self, session: PipelineSession):
+        """Reader thread: move frames from the source into the session queue.
+
+        Stops, closing the source, as soon as the session finishes (an
+        "exit program" or a processing error), even while its queue is full.
+        """
+        try:
+            with session.source:
+                while not self._stopping.is_set() and not session.finished:
+                    data = session.source.read(self.config.frames_per_buffer)
+                    if not self._deliver(session, data) or data is None:
+                        return
+        except Exception as e:
+            print(f"[{session.name}] ❌ Audio source failed: {e}")
+        self._deliver(session, None)
+
+    def _deliver(self, session: PipelineSession, data) -> bool:
+        """Queue *data* for *session*, waiting while it falls behind; False once it has finished"""
+        while not session.finished:
+            try:
+                session.frames.put(data, timeout=0.1)
+            except queue.Full:
+                continue
+            self._wake.set()
+            return True
+        return False
+
+    def _step(self, session: PipelineSession):
+        """Worker task: process a bounded slice of one session's queued frames"""
+        try:
+            for _ in range(self.config.frames_per_step):
+                try:
+                    data = session.frames.get_nowait()
+                except queue.Empty:
+                    break
+                if data is None or not session.process_frame(data):
+                    session.finish()
+                    break
+        except Exception as e:
+            print(f"[{session.name}] ❌ Session error: {e}")
+            session.finish()
+        finally:
+            session.scheduled = False
+            self._wake.set()
+
+    def run(self):
+        """Process all sessions until every source is exhausted or ``stop`` is called"""
+        workers = self.config.max_workers or os.cpu_count() or 1
+        print(f"🏢 Serving {len(self.sessions)} session(s) on {workers} worker(s)")
+
+        for session in self.sessions:
+            session.start()
+            reader = threading.Thread(target=self._pump, args=(session,), name=f"audio-{session.name}", daemon=True)
+            reader.start()
+            self._readers.append(reader)
+
+        adaptive_monitor.set_system_mode(SystemMode.LISTENING, "Ready for speech input")
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="session") as pool:
+            while not all(s.finished for s in self.sessions):
+                self._wake.wait(timeout=0.5)
+                self._wake.clear()
+                for session in self.sessions:
+                    if session.scheduled or session.finished or session.frames.empty():
+                        continue
+                    session.scheduled = True
+                    pool.submit(self._step, session)
+
+    def stop(self):
+        """Stop reading audio; queued frames are still processed"""
+        self._stopping.set()
+        for session in self.sessions:
+            if not session.finished:
+                try:
+                    session.frames.put_nowait(None)
+                except queue.Full:
+                    pass  # Reader will deliver the end marker once it notices the stop
+        self._wake.set()
+
+
+def main(argv=None):
+    """Run several audio sources through one process"""
+    parser = argparse.ArgumentParser(description="Multi-room speech pipeline server")
+    parser.add_argument("sources", nargs="+", help="mic, mic:<device>, wav:<path> or tcp:<host>:<port>")
+    parser.add_argument("--workers", type=int, default=None, help="Worker threads (default: CPU count)")
+    parser.add_argument("--realtime", action="store_true", help="Replay WAV files at real-time speed")
+    args = parser.parse_args(argv)
+
+    if args.workers:
+        cfg.server.max_workers = args.workers
+
+    adaptive_monitor.set_system_mode(SystemMode.IDLE, "System starting up")
+    adaptive_monitor.start_monitoring()
+
+    from .startup import plan_pipeline_startup
+    startup = plan_pipeline_startup(with_tts=False)  # Ollama is checked in the background
+    try:
+        models = SharedModels.from_components(startup.run())
+    except RuntimeError as e:
+        print(f"❌ {e}. Exiting.")
+        adaptive_monitor.set_system_mode(SystemMode.SHUTDOWN, "Startup failed")
+        adaptive_monitor.stop_monitoring()
+        return
+    if cfg.startup.print_timeline:
+        startup.timeline.print()
+
+    server = PipelineServer(models)
+    sample_rate = cfg.vosk_model.sample_rate
+    for spec in args.sources:
+        server.add_session(create_audio_source(spec, sample_rate, realtime=args.realtime))
+
+    try:
+        server.run()
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping server...")
+        server.stop()
+    finally:
+        for session in server.sessions:
+            session.finish()
+        adaptive_monitor.set_system_mode(SystemMode.SHUTDOWN, "Server stopped")
+        adaptive_monitor.stop_monitoring()
+        print("✅ Cleanup complete")
+
+
+if __name__ == "__main__":
+    main()
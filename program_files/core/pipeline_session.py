@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""Per-stream pipeline state on top of models shared by every stream"""
+
+import queue
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Optional, Tuple
+
+from .conversation_manager import ConversationManager
+from .program_pipeline import process_text
+from .pipeline_helpers import print_speaker_info, handle_special_commands
+from program_files.speech.speech_processor import SpeechProcessor, SpeakerDetector
+from program_files.speech.recognizer_manager import RecognizerManager, RecognizerPool
+from program_files.speech.audio_sources import AudioSource
+from program_files.ai.optimized_gemma_client import OptimizedGemmaClient
+from program_files.ai.smart_model_selector import SmartModelSelector
+from program_files.ai.model_preloader import ModelPreloader
+from program_files.ai.adaptive_system_monitor import adaptive_monitor
+from program_files.tts.tts_backends import SilentTTSPlayer
+from program_files.utils.stage_timer import pipeline_timer
+from .event_bus import EventType, event_bus
+from program_files.config.config import cfg
+
+
+class SharedModels:
+    """Heavy models loaded once per process and used read-only by all sessions"""
+
+    def __init__(self, vosk_model, speaker_model=None, emotion_classifier=None, vector_db=None):
+        self.vosk_model = vosk_model
+        self.speaker_model = speaker_model
+        self.emotion_classifier = emotion_classifier  # May be a LazyComponent still loading
+        self.vector_db = vector_db
+        self._recognizer_pools = {}
+        self._pools_lock = threading.Lock()
+        # One model selector and resident-model tracker for every session's Gemma client
+        self.model_selector = SmartModelSelector()
+        self.model_preloader = ModelPreloader()
+
+    def recognizer_pool(self, sample_rate: int) -> RecognizerPool:
+        """Recognizers shared by every stream at *sample_rate*, created on first use"""
+        with self._pools_lock:
+            pool = self._recognizer_pools.get(sample_rate)
+            if pool is None:
+                pool = self._recognizer_pools[sample_rate] = RecognizerPool(
+                    self.vosk_model, sample_rate, size=cfg.recognizer.pool_size,
+                    enable_words=cfg.recognizer.enable_words)
+            return pool
+
+    @classmethod
+    def from_components(cls, components: dict) -> "SharedModels":
+        """Build from the results of a startup orchestrator run"""
+        return cls(
+            vosk_model=components["vosk"],
+            speaker_model=components.get("ecapa"),
+            emotion_classifier=components.get("emotion"),
+            vector_db=components.get("chroma")
+        )
+
+    @classmethod
+    def load(cls, enable_vector_db: bool = True) -> "SharedModels":
+        """Load the Vosk model, ECAPA encoder and database client concurrently; emotion lazily"""
+        from .startup import plan_pipeline_startup
+        orchestrator = plan_pipeline_startup(enable_vector_db=enable_vector_db, with_tts=False, with_ollama=False)
+        return cls.from_components(orchestrator.run())
+
+
+class PipelineSession:
+    """One audio stream: its own conversation, speaker tracking and recognizer.
+
+    ``process_frame`` holds the per-frame logic of the listening loop, so a
+    session can be driven by a simple read loop or by a worker pool.
+    """
+
+    def __init__(self, models: SharedModels, source: AudioSource, name: Optional[str] = None, tts_file=None, bus=None):
+        self.name = name or source.name
+        self.models = models
+        self.source = source
+        self.tag = f"[{name}] " if name else ""
+
+        self.conversation_manager = ConversationManager(vector_db=models.vector_db, enable_vector_db=models.vector_db is not None)
+        self.speech_processor = SpeechProcessor()  # Uses config defaults
+        self.gemma_client = OptimizedGemmaClient(selector=models.model_selector, preloader=models.model_preloader)
+        self.tts_file = tts_file or SilentTTSPlayer()
+        self.speaker_detector = SpeakerDetector(cfg.speaker_detector, speaker_model=models.speaker_model,
+                                                sample_rate=source.sample_rate)
+        self.recognizer = RecognizerManager(sample_rate=source.sample_rate, pool=models.recognizer_pool(source.sample_rate))
+
+        # Segment-level events replace per-frame calls into the monitors
+        self.bus = bus or event_bus
+        self.gemma_client.attach_event_bus(self.bus, self.name)
+        adaptive_monitor.subscribe(self.bus)
+
+        # Track speaker changes for message segmentation
+        self.current_speaker_for_text = self.speaker_detector.current_speaker
+        self.carry_text = ""  # Words already spoken by the new speaker when a change was confirmed
+        self._late_emotions = queue.SimpleQueue()  # Filled by the emotion worker, drained on this session's thread
+
+        # Scheduling state used by PipelineServer
+        self.frames = queue.Queue(maxsize=cfg.server.max_queued_frames)
+        self.scheduled = False
+        self.finished = False
+
+    def start(self):
+        """Open the first conversation session"""
+        self.conversation_manager.start_new_conversation()
+
+    def _process_message(self, text: str, speaker: str):
+        """Process a message cut short by a speaker change"""
+        self.bus.publish(EventType.FINAL_TRANSCRIPT, self.name, text=text, speaker=speaker)
+        print(f"{self.tag}📝 {text}")
+        known_speakers = self.speaker_detector.get_known_speakers()
+        print_speaker_info(speaker, self.speaker_detector.speaker_count, known_speakers)
+
+        audio_features = self.speaker_detector.get_current_features()
+        # We skip emotion classification here to avoid duplicate costly inference.
+        process_text(text, self.conversation_manager, self.gemma_client, self.speaker_detector, self.tts_file, audio_features, image_path=None)
+        if audio_features:
+            self.speaker_detector.clear_feature_buffer()
+
+    def _classify_emotion(self, text: str) -> Tuple[Optional[str], Optional[float]]:
+        """Emotion for *text*, waiting up to ``cfg.emotion.max_result_wait`` for a cache miss.
+
+        A result that arrives later is queued and added to the trigger
+        history by ``_drain_late_emotions`` on this session's thread.
+        """
+        emotion = self.models.emotion_classifier.submit(text)
+        try:
+            emotion_text, confidence = emotion.result(timeout=cfg.emotion.max_result_wait)
+        except FutureTimeout:
+            emotion.add_done_callback(lambda f: f.exception() is None and self._late_emotions.put(f.result()))
+            return None, None
+        print(f"{self.tag}🎭 Emotion: {emotion_text} (Confidence: {confidence:.2f})")
+        return emotion_text, confidence
+
+    def _drain_late_emotions(self):
+        """Add emotions that finished after their utterance was stored to the trigger history"""
+        while True:
+            try:
+                emotion_text, confidence = self._late_emotions.get_nowait()
+            except queue.Empty:
+                return
+            print(f"{self.tag}🎭 Emotion: {emotion_text} (Confidence: {confidence:.2f})")
+            self.conversation_manager.add_emotion_to_history(emotion_text, confidence)
+
+    def _process_result(self, text: str) -> bool:
+        """Handle a finalized utterance; returns False when the session should stop"""
+        self.bus.publish(EventType.FINAL_TRANSCRIPT, self.name, text=text, speaker=self.speaker_detector.current_speaker)
+        if text.lower() == "exit program":
+            print(f"{self.tag}ending program")
+            return False  # Ends this session only; the host sets SHUTDOWN once its streams have stopped
+
+        if handle_special_commands(text, self.gemma_client, self.conversation_manager):
+            return True
+
+        if self.conversation_manager.in_gemma_mode:
+            print(f"{self.tag}💬 You: {text}")
+        elif self.conversation_manager.waiting_for_feedback:
+            print(f"{self.tag}📝 Feedback: {text}")
+        else:
+            print(f"{self.tag}📝 {text}")
+            known_speakers = self.speaker_detector.get_known_speakers()
+            print_speaker_info(self.speaker_detector.current_speaker, self.speaker_detector.speaker_count, known_speakers)
+
+        audio_features = self.speaker_detector.get_current_features()
+        self._drain_late_emotions()
+        emotion_text, confidence = self._classify_emotion(text)
+        process_text(text, self.conversation_manager, self.gemma_client, self.speaker_detector, self.tts_file, audio_features, emotion_text, confidence, image_path=None)
+
+        if audio_features:
+            self.speaker_detector.clear_feature_buffer()
+
+        # Reset tracking after normal message completion
+        self.current_speaker_for_text = self.speaker_detector.current_speaker
+        return True
+
+    def _publish_speech_events(self, events):
+        """Publish VAD segment events, timestamped when the speech actually started or stopped"""
+        vad = self.speech_processor.vad
+        now, stream_now = time.time(), vad.frames_processed * vad.frame_seconds
+        for event in events:
+            event_type = EventType.SPEECH_START if event.kind == "start" else EventType.SPEECH_END
+            self.bus.publish(event_type, self.name, at=now - (stream_now - event.time), stream_time=event.time)
+
+    def process_frame(self, data: bytes) -> bool:
+        """Run VAD, speaker tracking and recognition on one frame; False stops the session"""
+        if not self._late_emotions.empty():
+            self._drain_late_emotions()
+        with pipeline_timer.stage("vad"):
+            events = self.speech_processor.process(data)
+        if events:
+            self._publish_speech_events(events)
+
+        # Buffers audio every read; embeds only when a VAD segment closes
+        with pipeline_timer.stage("embedding"):
+            self.speaker_detector.process(data, events, self.speech_processor.is_speaking)
+        for segment, previous in self.speaker_detector.diarizer.pop_relabeled():
+            print(f"{self.tag}🔁 {segment.start:.1f}-{segment.end:.1f}s relabeled {previous} → {segment.speaker}")
+            self.bus.publish(EventType.SPEAKER_CHANGE, self.name, previous=previous, speaker=segment.speaker,
+                             start=segment.start, end=segment.end, retroactive=True)
+
+        # On a speaker change, endpoint the recognizer and split its words where the new voice began
+        if self.speaker_detector.speaker_changed:
+            with pipeline_timer.stage("asr"):
+                final = self.recognizer.force_endpoint()
+            if final['result']:
+                boundary = self.speaker_detector.change_time
+                before, after = RecognizerManager.split_words_at(final['result'], boundary)
+            else:
+                before, after = final['text'], ""
+            before = f"{self.carry_text} {before}".strip()
+            if len(before) >= cfg.recognizer.min_segment_chars:
+                self._process_message(before, self.speaker_detector.previous_speaker)
+            self.carry_text = after
+            self.bus.publish(EventType.SPEAKER_CHANGE, self.name, previous=self.speaker_detector.previous_speaker,
+                             speaker=self.speaker_detector.current_speaker, start=self.speaker_detector.change_time)
+        # Merges and relabels only rename the speaker of the text so far
+        self.current_speaker_for_text = self.speaker_detector.current_speaker
+
+        with pipeline_timer.stage("asr"):
+            result = self.recognizer.accept(data)
+        if result is None:
+            partial = self.recognizer.pop_partial()
+            if partial:
+                self.bus.publish(EventType.PARTIAL_TRANSCRIPT, self.name, text=f"{self.carry_text} {partial}".strip(),
+                                 speaker=self.speaker_detector.current_speaker)
+            return True
+
+        text = f"{self.carry_text} {result['text']}".strip()
+        self.carry_text = ""
+        if not text:
+            return True
+        return self._process_result(text)
+
+    def process_transcript(self, text: str) -> bool:
+        """Handle *text* as if the recognizer had just finalized it (benchmarks, scripted input)"""
+        return self._process_result(text)
+
+    def finish(self):
+        """Flush whatever the recognizer still holds and release it"""
+        if self.finished:
+            return
+        self.finished = True
+        events = self.speech_processor.flush()
+        if events:
+            self._publish_speech_events(events)
+            self.speaker_detector.process(b"", events)
+
+        text = f"{self.carry_text} {self.recognizer.force_endpoint()['text']}".strip()
+        self.carry_text = ""
+        if len(text) >= cfg.recognizer.min_segment_chars:
+            self._process_result(text)
+        self.recognizer.close()
+        self.gemma_client.detach_event_bus()
+        adaptive_monitor.end_session(self.name)
@@ -1,19 +1,13 @@
 #!/usr/bin/env python3
 """Simplified Speech Processing Pipeline"""
 
-import json
-import pyaudio
 import os
 from typing import Optional, Dict
-from vosk import Model, KaldiRecognizer
 from .conversation_manager import ConversationManager
-from program_files.speech.speech_processor import SpeechProcessor, SpeakerDetector
 from program_files.ai.optimized_gemma_client import OptimizedGemmaClient
 from program_files.ai.adaptive_system_monitor import adaptive_monitor, SystemMode
-from program_files.utils.ollama_utils import ensure_ollama_running, ensure_required_models
 from program_files.config.config import cfg
-from .pipeline_helpers import handle_gemma_response, print_speaker_info, process_feedback, handle_special_commands
-from program_files.tts.tts_personal import OfflineTTSFile
+from .pipeline_helpers import handle_gemma_response, process_feedback
 
 def load_vosk_model(config=None):
     """Load Vosk model using configuration"""
@@ -21,6 +15,7 @@ def load_vosk_model(config=None):
         config = cfg.vosk_model
     
     print("Loading Vosk model...")
+    from vosk import Model
     
     # Get base directory for models
     current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -43,33 +38,6 @@ def load_vosk_model(config=None):
     print(f"   Using fallback: {config.fallback_model_name}")
     return Model(fallback_path)
 
-class EmotionClassifier:
-    """Emotion classification using a HuggingFace pipeline."""
-
-    def __init__(self):
-        print("Loading emotion classification model...")
-        from transformers import pipeline
-        self.classifier = pipeline(
-            "text-classification",
-            model="j-hartmann/emotion-english-distilroberta-base",
-            return_all_scores=True
-        )
-
-    def process(self, text: str):
-        """Return the top emotion label and confidence for the given text."""
-        if self.classifier is None:
-            return "neutral", 0.0
-        
-        try:
-            emotions = self.classifier(text)[0]
-            top_emotion = max(emotions, key=lambda x: x['score'])
-            emotion_text = f"{top_emotion['label'].title()}"
-            confidence = top_emotion['score']
-            return emotion_text, confidence
-        except Exception as e:
-            print(f"⚠️  Emotion processing failed: {e}")
-            return "neutral", 0.0
-
 def process_text(text: str, conversation_manager: ConversationManager, gemma_client: OptimizedGemmaClient, 
                 speaker_detector, tts_file, audio_features: Optional[Dict] = None, emotion_text: str = None, confidence: float = None, prompt_template: str = None, image_path: Optional[str] = None):
     """Process transcribed text based on conversation state
@@ -184,141 +152,48 @@ def main():
     adaptive_monitor.set_system_mode(SystemMode.IDLE, "System starting up")
     adaptive_monitor.start_monitoring()
     
-    if not ensure_ollama_running() or not ensure_required_models():
-        print("❌ Failed to initialize Ollama. Exiting.")
-        adaptive_monitor.set_system_mode(SystemMode.SHUTDOWN, "Ollama initialization failed")
+    from .startup import plan_pipeline_startup
+    from .pipeline_session import PipelineSession, SharedModels
+    from program_files.speech.audio_sources import MicrophoneSource
+    
+    # Vosk, ECAPA and Chroma load concurrently; Ollama and TTS start in the
+    # background and emotion loads lazily, so listening starts sooner
+    startup = plan_pipeline_startup()
+    try:
+        components = startup.run()
+    except RuntimeError as e:
+        print(f"❌ {e}. Exiting.")
+        adaptive_monitor.set_system_mode(SystemMode.SHUTDOWN, "Startup failed")
         adaptive_monitor.stop_monitoring()
         return
     
-    print("✅ Ollama initialization complete")
-    
-    model = load_vosk_model()
-    emotion_classifier = EmotionClassifier() # Load emotion classifier 
-    conversation_manager = ConversationManager()
-    speech_processor = SpeechProcessor()  # Uses config defaults
-    gemma_client = OptimizedGemmaClient()  # Uses config defaults
-    tts_file = OfflineTTSFile() # offline tts 
-    #tts_file.set_reference_audio("/Users/alexander/Library/CloudStorage/Dropbox/Personal Research/cortex_bridge/program_files/tts/voice_example.wav")
-    
-    speaker_detector = SpeakerDetector(enhanced_db=conversation_manager.vector_db)  # Uses config defaults
+    models = SharedModels.from_components(components)
+    frames_per_buffer = cfg.server.frames_per_buffer
+    source = MicrophoneSource(cfg.vosk_model.sample_rate, frames_per_buffer=frames_per_buffer)
+    session = PipelineSession(models, source, tts_file=components["tts"])  # Resident offline TTS (cfg.tts.backend)
+    #session.tts_file.set_reference_audio("/Users/alexander/Library/CloudStorage/Dropbox/Personal Research/cortex_bridge/program_files/tts/voice_example.wav")
     
     # Start initial session for listening mode
-    conversation_manager.start_new_conversation()
+    session.start()
     
     # Set to listening mode after initialization
     adaptive_monitor.set_system_mode(SystemMode.LISTENING, "Ready for speech input")
     
-    sample_rate = cfg.vosk_model.sample_rate
-    rec = KaldiRecognizer(model, sample_rate)
-    audio = pyaudio.PyAudio()
-    stream = audio.open(format=pyaudio.paInt16, channels=1, rate=sample_rate, 
-                       input=True, frames_per_buffer=2048)
-    stream.start_stream()
-    
-    # Track speaker changes for message segmentation
-    partial_text = ""
-    current_speaker_for_text = speaker_detector.current_speaker
-    frames_with_same_speaker = 0
-    
-    def process_message(text, speaker):
-        """Process a complete message"""
-        print(f"📝 {text}")
-        known_speakers = speaker_detector.get_known_speakers()
-        print_speaker_info(speaker, speaker_detector.speaker_count, known_speakers)
-        
-        audio_features = speaker_detector.get_current_features()
-        # We skip emotion classification here to avoid duplicate costly inference.
-        process_text(text, conversation_manager, gemma_client, speaker_detector, tts_file, audio_features, image_path=None)
-        if audio_features:
-            speaker_detector.clear_feature_buffer()
-    
     try:
-        while True:
-            try:
-                data = stream.read(2048, exception_on_overflow=False)
-            except OSError as e:
-                if e.errno == -9981:
-                    continue
-                print(f"Audio error: {e}")
-                break
-            
-            # Process speech and speaker detection
-            is_speech = speech_processor.process_frame(data)
-            
-            # Record speech activity for latency monitoring
-            gemma_client.record_speech_activity(is_speech)
-            
-            if is_speech:
-                # Set to processing mode during active speech processing
-                if adaptive_monitor.get_system_mode() == SystemMode.LISTENING:
-                    adaptive_monitor.set_system_mode(SystemMode.PROCESSING, "Processing speech input")
-                speaker_detector.update_speaker_count(data, speech_processor.silence_frames)
-            else:
-                # Return to listening mode when no speech detected
-                if adaptive_monitor.get_system_mode() == SystemMode.PROCESSING:
-                    adaptive_monitor.set_system_mode(SystemMode.LISTENING, "No speech detected")
-            
-            # Track partial results for speaker change detection
-            partial_result = json.loads(rec.PartialResult())
-            new_partial_text = partial_result.get('partial', '').strip()
-            if new_partial_text:
-                partial_text = new_partial_text
-            
-            # Check for speaker change based message segmentation
-            if speaker_detector.current_speaker != current_speaker_for_text:
-                frames_with_same_speaker += 1
-                if frames_with_same_speaker >= 30 and partial_text and len(partial_text) > 5:
-                    process_message(partial_text, current_speaker_for_text)
-                    partial_text = ""
-                    current_speaker_for_text = speaker_detector.current_speaker
-                    frames_with_same_speaker = 0
-                    rec = KaldiRecognizer(model, sample_rate)
-            else:
-                frames_with_same_speaker = 0
-            
-            if rec.AcceptWaveform(data):
-                result = json.loads(rec.Result())
-                text = result.get('text', '').strip()
-                if not text:
-                    continue
-                
-                if text.lower() == "exit program":
-                    print("ending program")
-                    adaptive_monitor.set_system_mode(SystemMode.SHUTDOWN, "User requested exit")
+        with source:
+            startup.timeline.mark("listening")
+            if cfg.startup.print_timeline:
+                startup.timeline.print()
+            while True:
+                data = source.read(frames_per_buffer)
+                if data is None or not session.process_frame(data):
                     break
-                
-                if handle_special_commands(text, gemma_client, conversation_manager):
-                    continue
-                
-                if conversation_manager.in_gemma_mode:
-                    print(f"💬 You: {text}")
-                elif conversation_manager.waiting_for_feedback:
-                    print(f"📝 Feedback: {text}")
-                else:
-                    print(f"📝 {text}")
-                    known_speakers = speaker_detector.get_known_speakers()
-                    print_speaker_info(speaker_detector.current_speaker, speaker_detector.speaker_count, known_speakers)
-                
-                audio_features = speaker_detector.get_current_features()
-                # Determine emotion for full recognized text
-                emotion_text, confidence = emotion_classifier.process(text)
-                print(f"🎭 Emotion: {emotion_text} (Confidence: {confidence:.2f})")
-                process_text(text, conversation_manager, gemma_client, speaker_detector, tts_file, audio_features, emotion_text, confidence, image_path=None)
-                
-                if audio_features:
-                    speaker_detector.clear_feature_buffer()
-                
-                # Reset tracking after normal message completion
-                partial_text = ""
-                current_speaker_for_text = speaker_detector.current_speaker
-                frames_with_same_speaker = 0
                         
     except KeyboardInterrupt:
         print("\n🛑 Stopping pipeline...")
-        adaptive_monitor.set_system_mode(SystemMode.SHUTDOWN, "Keyboard interrupt")
-        stream.stop_stream()
-        stream.close()
-        audio.terminate()
+    finally:
+        adaptive_monitor.set_system_mode(SystemMode.SHUTDOWN, "Pipeline stopped")
+        session.finish()  # Flushes the recognizer and returns it to the pool
         adaptive_monitor.stop_monitoring()
         
         # Save configuration on exit
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Startup orchestration: concurrent, lazy model loading with a timeline.
+
+Components are registered with one of three modes:
+
+* ``critical``   - needed before listening; all load concurrently and
+                   ``run`` waits for them
+* ``background`` - started immediately but not waited for (Ollama, TTS)
+* ``lazy``       - started once the critical set is ready, or earlier on
+                   first use (emotion)
+
+Non-critical components are returned as ``LazyComponent`` proxies that
+forward attribute access to the loaded object, blocking only if it is
+used before its load has finished.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from program_files.config.config import cfg
+
+
+class StartupTimeline:
+    """Start/end offsets of each component load, relative to process startup"""
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def now(self) -> float:
+        return time.perf_counter() - self.t0
+
+    def add(self, name: str, start: float, end: float, mode: str, ok: bool = True):
+        with self._lock:
+            self.events.append({'name': name, 'start': start, 'end': end, 'mode': mode, 'ok': ok})
+
+    def mark(self, name: str):
+        """Record an instantaneous milestone such as "listening" """
+        at = self.now()
+        self.add(name, at, at, "milestone")
+
+    def print(self, width: int = 40):
+        with self._lock:
+            events = sorted(self.events, key=lambda e: (e['start'], e['end']))
+        if not events:
+            return
+
+        total = max(e['end'] for e in events) or 1.0
+        print("\n⏱️  Startup timeline")
+        for e in events:
+            lo = int(e['start'] / total * width)
+            hi = max(lo + 1, int(e['end'] / total * width))
+            bar = " " * lo + ("|" if e['mode'] == "milestone" else "█" * (hi - lo))
+            status = "" if e['ok'] else " ❌"
+            if e['mode'] == "milestone":
+                print(f"   {e['name']:<12} {bar:<{width}} at {e['start']:.2f}s")
+            else:
+                print(f"   {e['name']:<12} {bar:<{width}} {e['start']:6.2f}s → {e['end']:6.2f}s ({e['mode']}){status}")
+
+
+class LazyComponent:
+    """Proxy for a component that loads in the background or on first use"""
+
+    def __init__(self, name: str, loader: Callable[[], Any], timeline: StartupTimeline, mode: str = "lazy"):
+        self._name = name
+        self._loader = loader
+        self._timeline = timeline
+        self._mode = mode
+        self._future: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        start = self._timeline.now()
+        try:
+            value = self._loader()
+        except Exception:
+            self._timeline.add(self._name, start, self._timeline.now(), self._mode, ok=False)
+            raise
+        end = self._timeline.now()
+        self._timeline.add(self._name, start, end, self._mode)
+        if self._mode != "critical":
+            print(f"✅ {self._name} ready at {end:.2f}s ({self._mode})")
+        return value
+
+    def start(self, executor: Optional[ThreadPoolExecutor] = None) -> Future:
+        """Begin loading (on *executor*, or on this thread when None) unless already started"""
+        with self._lock:
+            if self._future is not None:
+                return self._future
+            if executor is not None:
+                self._future = executor.submit(self._load)
+                return self._future
+            self._future = future = Future()
+
+        # First use before anyone scheduled the load: do it here
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(self._load())
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    @property
+    def loaded(self) -> bool:
+        return self._future is not None and self._future.done() and self._future.exception() is None
+
+    def get(self) -> Any:
+        """The loaded component; loads it now if nobody has started it yet"""
+        return self.start().result()
+
+    def __getattr__(self, attr):
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        return getattr(self.get(), attr)
+
+
+class StartupOrchestrator:
+    """Loads registered components concurrently and records a timeline"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.timeline = StartupTimeline()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or cfg.startup.max_workers,
+                                           thread_name_prefix="startup")
+        self._critical: Dict[str, Callable[[], Any]] = {}
+        self.components: Dict[str, Any] = {}
+
+    def add(self, name: str, loader: Callable[[], Any], mode: str = "critical"):
+        """Register *loader*; ``background`` loads start right away"""
+        if mode == "critical":
+            self._critical[name] = loader
+            return None
+
+        component = LazyComponent(name, loader, self.timeline, mode)
+        self.components[name] = component
+        if mode == "background":
+            component.start(self.executor)
+        return component
+
+    def run(self) -> Dict[str, Any]:
+        """Load critical components in parallel, then kick off the lazy ones"""
+        futures = {}
+        for name, loader in self._critical.items():
+            futures[name] = LazyComponent(name, loader, self.timeline, "critical").start(self.executor)
+
+        errors = []
+        for name, future in futures.items():
+            try:
+                self.components[name] = future.result()
+            except Exception as e:
+                errors.append(f"{name}: {e}")
+        if errors:
+            self.timeline.print()
+            raise RuntimeError("Startup failed - " + "; ".join(errors))
+
+        # Warm deferred components while the pipeline is already listening
+        for component in self.components.values():
+            if isinstance(component, LazyComponent):
+                component.start(self.executor)
+        self.executor.shutdown(wait=False)
+        return self.components
+
+
+def check_ollama() -> bool:
+    """Start Ollama and pull required models; runs in the background"""
+    from program_files.utils.ollama_utils import ensure_ollama_running, ensure_required_models
+    ready = ensure_ollama_running() and ensure_required_models()
+    if not ready:
+        print("❌ Ollama is not available - replies will fail until it is running")
+    return ready
+
+
+def plan_pipeline_startup(enable_vector_db: bool = True, with_tts: bool = True,
+                          with_ollama: bool = True) -> StartupOrchestrator:
+    """Register every pipeline component with its startup mode"""
+    orchestrator = StartupOrchestrator()
+
+    def load_vosk():
+        from .program_pipeline import load_vosk_model
+        return load_vosk_model()
+
+    def load_ecapa():
+        from program_files.speech.speech_processor import load_speaker_model
+        return load_speaker_model(cfg.speaker_detector) if cfg.speaker_detector.use_ecapa_model else None
+
+    def load_chroma():
+        from program_files.database.enhanced_conversation_db import EnhancedConversationDB
+        return EnhancedConversationDB()
+
+    def load_emotion():
+        from program_files.ai.emotion_service import EmotionService
+        return EmotionService()
+
+    def load_tts():
+        from program_files.tts.tts_backends import create_tts_player
+        return create_tts_player()
+
+    if with_ollama:
+        orchestrator.add("ollama", check_ollama, mode="background")
+    orchestrator.add("vosk", load_vosk)
+    orchestrator.add("ecapa", load_ecapa)
+    if enable_vector_db:
+        orchestrator.add("chroma", load_chroma)
+    if with_tts:
+        orchestrator.add("tts", load_tts, mode="background")
+    orchestrator.add("emotion", load_emotion, mode=cfg.startup.emotion_mode)
+    return orchestrator
@@ -60,6 +60,10 @@ def add_latency_to_metadata(metadata: Dict, latency_metrics: Dict):
     for field, default in latency_fields:
         metadata[field] = latency_metrics.get(field, default)
     
+    # Only present for streamed responses
+    if 'time_to_first_token' in latency_metrics:
+        metadata['time_to_first_token'] = latency_metrics['time_to_first_token']
+    
     # Derived field
     metadata['high_latency'] = latency_metrics.get('response_time', 0.0) > 3.0
     metadata['user_interrupted'] = metadata['user_spoke_during_response']
@@ -1,20 +1,34 @@
 #!/usr/bin/env python3
 """Conversation database with audio features storage"""
 
-import chromadb
 import os
 import json
 import pickle
 import numpy as np
 import uuid
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import Any, Callable, Dict, List, Optional
 from .db_helpers import create_conversation_id, create_metadata, calculate_analytics, analyze_session
+from .sharding import EmbeddedCollection, ShardedCollection
+from program_files.config.config import cfg
+from program_files.utils.lazy_imports import lazy_module
+
+chromadb = lazy_module("chromadb")
+
+UPDATE_BATCH_SIZE = 500  # Rows per get/update round trip in bulk_update_metadata
 
 class EnhancedConversationDB:
-    """Vector database with audio features storage"""
+    """Vector database with audio features storage.
     
-    def __init__(self, persist_directory: str = None):
+    Each content type has its own collection: utterances go to
+    time-bucketed ``conversations_*`` shards, cue cards and adaptive prompts
+    to ``cue_cards`` and ``adaptive_prompts`` and source document passages
+    to ``document_chunks``, so searching one type never walks the index of
+    another.  Use ``collection_for`` to route by type.
+    All text is embedded by the shared embedding service (or *embed*).
+    """
+    
+    def __init__(self, persist_directory: str = None, embed: Optional[Callable[[List[str]], Any]] = None):
         if persist_directory is None:
             base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
             persist_directory = os.path.join(base_dir, "data", "vector_db")
@@ -22,8 +36,40 @@ class EnhancedConversationDB:
         os.makedirs(persist_directory, exist_ok=True)
         self.client = chromadb.PersistentClient(path=persist_directory)
         
-        self.conversations = self.client.get_or_create_collection("conversations")
-        self.audio_features = self.client.get_or_create_collection("audio_features")
+        if embed is None:
+            from program_files.ai.embedding_service import get_embedding_service
+            embed = get_embedding_service()
+        self.embed = embed
+        
+        self.conversations = ShardedCollection(self.client, "conversations", cfg.vector_db.utterance_shard_bucket, embed)
+        self.cue_cards = EmbeddedCollection(self.client.get_or_create_collection("cue_cards"), embed)
+        self.adaptive_prompts = EmbeddedCollection(self.client.get_or_create_collection("adaptive_prompts"), embed)
+        self.document_chunks = EmbeddedCollection(self.client.get_or_create_collection("document_chunks"), embed)
+        self.audio_features = EmbeddedCollection(self.client.get_or_create_collection("audio_features"), embed)
+        self._check_unmigrated()
+    
+    def _check_unmigrated(self):
+        """Warn when rows are still in the single pre-sharding ``conversations`` collection"""
+        names = {c if isinstance(c, str) else c.name for c in self.client.list_collections()}
+        if "conversations" in names and self.client.get_collection("conversations").count():
+            print("⚠️  Unsharded 'conversations' collection found - run program_files/scripts/migrate_shards.py")
+    
+    def collection_for(self, content_type: Optional[str] = None):
+        """Collection that stores rows of *content_type* (utterances for anything else)"""
+        return {
+            'cue_card': self.cue_cards,
+            'adaptive_prompt': self.adaptive_prompts,
+            'document_chunk': self.document_chunks,
+        }.get(content_type, self.conversations)
+    
+    def _collection(self, collection: str):
+        """Collection by name, as used by the generic get/update helpers"""
+        return {
+            'audio_features': self.audio_features,
+            'cue_cards': self.cue_cards,
+            'adaptive_prompts': self.adaptive_prompts,
+            'document_chunks': self.document_chunks,
+        }.get(collection, self.conversations)
     
     def add_conversation_with_audio(self, session_id: str, text: str, speaker: str, 
                                   role: str, is_gemma_mode: bool, audio_features: Optional[Dict] = None,
@@ -68,17 +114,10 @@ class EnhancedConversationDB:
 
     def update_session_with_feedback(self, session_id: str, feedback: Dict):
         """Update session messages with feedback"""
-        data = self.conversations.get()
-        
-        for i, metadata in enumerate(data['metadatas']):
-            if metadata.get('session_id') == session_id:
-                updated_metadata = metadata.copy()
-                updated_metadata['feedback_helpful'] = str(feedback.get('helpful', ''))
-                
-                self.conversations.update(
-                    ids=[data['ids'][i]],
-                    metadatas=[updated_metadata]
-                )
+        data = self.conversations.get(where={"session_id": session_id}, include=[])
+        helpful = str(feedback.get('helpful', ''))
+        return self.bulk_update_metadata({row_id: {'feedback_helpful': helpful} for row_id in data['ids']},
+                                         collection="conversations")
     
     def get_conversation_stats(self) -> Dict[str, Any]:
         """Get conversation statistics"""
@@ -91,23 +130,29 @@ class EnhancedConversationDB:
         }
 
     # functions for reading and updating the database
-    def get_data(self, collection="audio_features", return_features=True):
-        """General function to get data from any collection"""
-        target_collection = self.audio_features if collection == "audio_features" else self.conversations
-        data = target_collection.get()
+    def get_data(self, collection="audio_features", return_features=True, ids: Optional[List[str]] = None,
+                 return_ids=False):
+        """General function to get data from any collection (optionally only *ids*, optionally with ids)"""
+        target_collection = self._collection(collection)
+        data = target_collection.get(ids=ids) if ids is not None else target_collection.get()
         
         if not data['documents']:
-            return [], []
+            return ([], [], []) if return_ids else ([], [])
         
+        documents = data['documents']
         if return_features and collection == "audio_features":
             # Parse features from documents
-            features_list = []
-            for doc in data['documents']:
-                feature_data = json.loads(doc)
-                features_list.append(feature_data['features'])
-            return features_list, data['metadatas']
+            documents = [json.loads(doc)['features'] for doc in documents]
         
-        return data['documents'], data['metadatas']
+        if return_ids:
+            return documents, data['metadatas'], data['ids']
+        return documents, data['metadatas']
+    
+    def get_metadata(self, collection="audio_features"):
+        """Ids and metadata of every row, without loading documents"""
+        target_collection = self._collection(collection)
+        data = target_collection.get(include=['metadatas'])
+        return data['ids'], data['metadatas']
     
     def get_latency_analytics(self, session_id: str = None, days: int = 7) -> Dict[str, Any]:
         """Get latency analytics from stored conversations"""
@@ -119,7 +164,8 @@ class EnhancedConversationDB:
         try:
             results = self.conversations.get(
                 where=where_clause,
-                limit=1000  # Get up to 1000 recent entries
+                limit=1000,  # Get up to 1000 recent entries
+                since=datetime.now() - timedelta(days=days)
             )
             
             if not results['metadatas']:
@@ -177,32 +223,58 @@ class EnhancedConversationDB:
         except Exception as e:
             return []
         
-    def update_by_indexes(self, updates_dict, collection="audio_features"):
-        """General function to update database entries by index with field values"""
-        target_collection = self.audio_features if collection == "audio_features" else self.conversations
-        data = target_collection.get()
+    def bulk_update_metadata(self, patches: Dict[str, Dict], collection="audio_features",
+                             expected_versions: Optional[Dict[str, int]] = None,
+                             batch_size: int = UPDATE_BATCH_SIZE) -> Dict[str, int]:
+        """Merge metadata *patches* keyed by row id, one get and one update per batch.
         
-        if not data['metadatas']:
-            return print(f"No data found in {collection}")
+        Every write bumps the row's ``row_version``.  With *expected_versions*
+        (id -> version read earlier) a row whose version has moved on since is
+        skipped and counted as a conflict instead of being overwritten.  Chroma
+        has no conditional update, so the check is best effort: it closes the
+        window down to the time between a batch's get and its update.
+        """
+        target_collection = self._collection(collection)
+        ids = list(patches)
+        counts = {'updated': 0, 'missing': 0, 'conflicts': 0}
         
-        updated_count = 0
-        for index, field_updates in updates_dict.items():
-            if index < len(data['metadatas']):
-                current_meta = data['metadatas'][index]
-                updated_meta = {**current_meta, **field_updates}
-                
-                target_collection.update(
-                    ids=[data['ids'][index]],
-                    metadatas=[updated_meta]
-                )
-                updated_count += 1
+        for start in range(0, len(ids), batch_size):
+            chunk = ids[start:start + batch_size]
+            current = target_collection.get(ids=chunk, include=['metadatas'])
+            stored = dict(zip(current['ids'], current['metadatas']))
+            
+            batch_ids, batch_metas = [], []
+            for row_id in chunk:
+                if row_id not in stored:
+                    counts['missing'] += 1
+                    continue
+                metadata = stored[row_id] or {}
+                version = int(metadata.get('row_version', 0))
+                if expected_versions is not None and row_id in expected_versions and expected_versions[row_id] != version:
+                    counts['conflicts'] += 1
+                    continue
+                batch_ids.append(row_id)
+                batch_metas.append({**metadata, **patches[row_id], 'row_version': version + 1})
+            
+            if batch_ids:
+                target_collection.update(ids=batch_ids, metadatas=batch_metas)
+                counts['updated'] += len(batch_ids)
+        
+        return counts
+    
+    def update_by_indexes(self, updates_dict, collection="audio_features"):
+        """Update entries by position in the collection (prefer ``bulk_update_metadata``, which is keyed by id)"""
+        all_ids, _ = self.get_metadata(collection)
+        if not all_ids:
+            return print(f"No data found in {collection}")
         
-        return updated_count
+        patches = {all_ids[index]: field_updates for index, field_updates in updates_dict.items() if index < len(all_ids)}
+        return self.bulk_update_metadata(patches, collection)['updated']
     
     def get_conversations_by_date_range(self, start_time: datetime, end_time: datetime) -> List[Dict[str, Any]]:
         """Get conversations within a date range"""
         try:
-            results = self.conversations.get(include=['metadatas'])
+            results = self.conversations.get(include=['metadatas'], since=start_time, until=end_time)
             if not results or not results.get('metadatas'): return []
             
             conversations = []
@@ -236,8 +308,8 @@ class EnhancedConversationDB:
         """Get Gemma conversations for fine-tuning"""
         cutoff_date = datetime.now() - timedelta(days=days_back)
         
-        # Get all conversations
-        data = self.conversations.get()
+        # Get conversations from the shards that can hold recent rows
+        data = self.conversations.get(since=cutoff_date)
         
         gemma_conversations = []
         for i, metadata in enumerate(data['metadatas']):
@@ -269,13 +341,17 @@ class EnhancedConversationDB:
             # Search for similar conversations
             similar_conversations = self.search_conversations(query, top_k=top_k)
             
-            if not cue_cards and not adaptive_prompts and not similar_conversations:
+            # Passages backing the cards, or the closest passages when the cards have none
+            source_passages = self.get_source_passages(cue_cards) or self.search_document_chunks(query, top_k=top_k)
+            
+            if not cue_cards and not adaptive_prompts and not similar_conversations and not source_passages:
                 return None
             
             return {
                 "relevant_cue_cards": cue_cards,
                 "relevant_prompts": adaptive_prompts,
-                "similar_conversations": similar_conversations
+                "similar_conversations": similar_conversations,
+                "source_passages": source_passages
             }
         except Exception as e:
             print(f"Error getting vector context: {e}")
@@ -283,45 +359,55 @@ class EnhancedConversationDB:
 
     def search_cue_cards(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
         """Search for cue cards in the database"""
+        return self.match_cue_cards([query], top_k=top_k)[0]
+
+    def match_cue_cards(self, queries: List[str], top_k: int = 3, min_similarity: Optional[float] = None) -> List[List[Dict[str, Any]]]:
+        """Nearest cue cards for each of *queries* in one batched embedding pass and query.
+        
+        Each card carries its row ``id`` and the cosine ``similarity`` to the
+        query; cards below *min_similarity* are left out.
+        """
         try:
-            # Build filter for cue cards
-            filter_conditions = {"content_type": {"$eq": "cue_card"}}
-            
-            # Search the database
-            results = self.conversations.query(
-                query_texts=[query],
+            if not queries:
+                return []
+            # Search the cue card collection
+            results = self.cue_cards.query(
+                query_texts=list(queries),
                 n_results=top_k,
-                where=filter_conditions
+                include=['metadatas', 'distances']
             )
             
             # Format results
-            cue_cards = []
-            if results['documents'] and results['documents'][0]:
-                for i, doc in enumerate(results['documents'][0]):
-                    metadata = results['metadatas'][0][i] if results['metadatas'] and results['metadatas'][0] else {}
+            matches = []
+            for q in range(len(queries)):
+                cue_cards = []
+                for i, card_id in enumerate(results['ids'][q] if results['ids'] else []):
+                    metadata = results['metadatas'][q][i] if results['metadatas'] and results['metadatas'][q] else {}
+                    similarity = 1 - results['distances'][q][i] / 2  # Squared L2 between unit vectors = 2 - 2 cos
+                    if min_similarity is not None and similarity < min_similarity:
+                        continue
                     cue_cards.append({
+                        "id": card_id,
                         "question": metadata.get("question", ""),
                         "answer": metadata.get("answer", ""),
                         "prompt_type": metadata.get("prompt_type", ""),
+                        "similarity": similarity,
                         "metadata": metadata
                     })
+                matches.append(cue_cards)
             
-            return cue_cards
+            return matches
         except Exception as e:
             print(f"Error searching cue cards: {e}")
-            return []
+            return [[] for _ in queries]
 
     def search_adaptive_prompts(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
         """Search for adaptive prompts in the database"""
         try:
-            # Build filter for adaptive prompts
-            filter_conditions = {"content_type": {"$eq": "adaptive_prompt"}}
-            
-            # Search the database
-            results = self.conversations.query(
+            # Search the adaptive prompt collection
+            results = self.adaptive_prompts.query(
                 query_texts=[query],
-                n_results=top_k,
-                where=filter_conditions
+                n_results=top_k
             )
             
             # Format results
@@ -340,25 +426,70 @@ class EnhancedConversationDB:
             print(f"Error searching adaptive prompts: {e}")
             return []
 
+    @staticmethod
+    def _passage(text: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "text": text,
+            "document_path": metadata.get("document_path", ""),
+            "start_char": metadata.get("start_char"),
+            "end_char": metadata.get("end_char"),
+            "metadata": metadata
+        }
+
+    def search_document_chunks(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
+        """Search source document passages"""
+        try:
+            results = self.document_chunks.query(
+                query_texts=[query],
+                n_results=top_k
+            )
+            
+            passages = []
+            if results['documents'] and results['documents'][0]:
+                for i, doc in enumerate(results['documents'][0]):
+                    metadata = results['metadatas'][0][i] if results['metadatas'] and results['metadatas'][0] else {}
+                    passages.append(self._passage(doc, metadata))
+            
+            return passages
+        except Exception as e:
+            print(f"Error searching document chunks: {e}")
+            return []
+
+    def get_source_passages(self, cue_cards: List[Dict[str, Any]], max_passages: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Document passages linked to *cue_cards* (via ``source_chunk_ids``), best-supported first"""
+        max_passages = max_passages or cfg.vector_db.max_source_passages
+        chunk_ids = []
+        for card in cue_cards:
+            for chunk_id in card.get("metadata", {}).get("source_chunk_ids", "").split(","):
+                if chunk_id and chunk_id not in chunk_ids:
+                    chunk_ids.append(chunk_id)
+        chunk_ids = chunk_ids[:max_passages]
+        if not chunk_ids:
+            return []
+        
+        try:
+            results = self.document_chunks.get(ids=chunk_ids, include=['documents', 'metadatas'])
+            found = {row_id: self._passage(doc, metadata or {})
+                     for row_id, doc, metadata in zip(results['ids'], results['documents'], results['metadatas'])}
+            return [found[chunk_id] for chunk_id in chunk_ids if chunk_id in found]
+        except Exception as e:
+            print(f"Error getting source passages: {e}")
+            return []
+
     def search_conversations(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
         """Search for similar conversations in the database"""
         try:
-            # Search all conversations (excluding cue cards and adaptive prompts)
+            # Utterance shards only hold conversations; all of them unless search_shards limits it to the newest
             results = self.conversations.query(
                 query_texts=[query],
-                n_results=top_k * 2  # Get more to filter out non-conversations
+                n_results=top_k,
+                max_shards=cfg.vector_db.search_shards
             )
             
-            # Filter to actual conversations (not cue cards or adaptive prompts)
             conversations = []
             if results['documents'] and results['documents'][0]:
                 for i, doc in enumerate(results['documents'][0]):
                     metadata = results['metadatas'][0][i] if results['metadatas'] and results['metadatas'][0] else {}
-                    
-                    # Skip cue cards and adaptive prompts
-                    if metadata.get('content_type') in ['cue_card', 'adaptive_prompt']:
-                        continue
-                    
                     conversations.append({
                         "text": doc,
                         "speaker": metadata.get("speaker", ""),
@@ -366,9 +497,6 @@ class EnhancedConversationDB:
                         "is_gemma_mode": metadata.get("is_gemma_mode", False),
                         "metadata": metadata
                     })
-                    
-                    if len(conversations) >= top_k:
-                        break
             
             return conversations
         except Exception as e:
@@ -380,8 +508,8 @@ class EnhancedConversationDB:
         try:
             cutoff_date = datetime.now() - timedelta(days=days_back)
             
-            # Get all conversations
-            results = self.conversations.get(include=['metadatas', 'documents'])
+            # Get conversations from the shards that can hold recent rows
+            results = self.conversations.get(include=['metadatas', 'documents'], since=cutoff_date)
             
             if not results.get('metadatas'):
                 return {}
@@ -463,7 +591,7 @@ class EnhancedConversationDB:
         """Update an existing cue card"""
         try:
             # Get the existing cue card
-            data = self.conversations.get(ids=[cue_card_id])
+            data = self.cue_cards.get(ids=[cue_card_id])
             if not data['metadatas'] or not data['metadatas'][0]:
                 return False
             
@@ -478,7 +606,7 @@ class EnhancedConversationDB:
             updated_metadata['update_reason'] = update_reason
             
             # Update in database
-            self.conversations.update(
+            self.cue_cards.update(
                 ids=[cue_card_id],
                 documents=[new_content],
                 metadatas=[updated_metadata]
@@ -498,7 +626,7 @@ class EnhancedConversationDB:
             content = f"Question: {question}\nAnswer: {answer}"
             metadata = {
                 "document_path": f"conversation_update_{timestamp}",
-                "cue_card_id": doc_id,
+                "cue_card_id": f"cue_card_{doc_id}",
                 "prompt_type": prompt_type,
                 "question": question,
                 "answer": answer,
@@ -511,7 +639,7 @@ class EnhancedConversationDB:
             }
             
             # Store in database
-            self.conversations.add(
+            self.cue_cards.add(
                 documents=[content],
                 metadatas=[metadata],
                 ids=[f"cue_card_{doc_id}"]
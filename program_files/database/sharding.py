@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""Time-bucketed shards of one logical Chroma collection.
+
+Utterances are written to ``<prefix>_<bucket>`` collections (one per
+month or ISO week, from the row's ``timestamp`` metadata), so each HNSW
+index stays small and time-bounded reads only open the shards that can
+hold matching rows.  ``ShardedCollection`` offers the subset of the Chroma
+collection API the database uses (add/get/query/update/delete/count) and
+fans it out over the shards, newest first.  Text is embedded by the
+database's *embed* callable (the shared embedding service), once per
+query rather than once per shard.
+"""
+
+import re
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+SHARD_BUCKETS = ("month", "week")
+
+
+def _parse_time(value) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        return parsed.replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+def storage_vectors(embed: Callable[[List[str]], Any], texts: List[str]) -> List:
+    """Vectors to persist for *texts*: full precision even when *embed* caches them compactly"""
+    return list(getattr(embed, 'embed_for_storage', embed)(texts))
+
+
+class ShardedCollection:
+    """One logical collection spread over time-bucketed Chroma collections"""
+
+    def __init__(self, client, prefix: str, bucket: str = "month",
+                 embed: Optional[Callable[[List[str]], Any]] = None):
+        if bucket not in SHARD_BUCKETS:
+            raise ValueError(f"bucket must be one of {SHARD_BUCKETS}, got {bucket}")
+        self.client = client
+        self.prefix = prefix
+        self.bucket = bucket
+        self.embed = embed
+        pattern = r"(\d{4})_(\d{2})" if bucket == "month" else r"(\d{4})_w(\d{2})"
+        self._name_re = re.compile(rf"^{re.escape(prefix)}_{pattern}$")
+        self._shards: Dict[str, Any] = {}
+
+    # Routing ##################################################################
+
+    def shard_name(self, when: datetime) -> str:
+        if self.bucket == "month":
+            return f"{self.prefix}_{when.year:04d}_{when.month:02d}"
+        year, week, _ = when.isocalendar()
+        return f"{self.prefix}_{year:04d}_w{week:02d}"
+
+    def _bucket_range(self, name: str):
+        """``[start, end)`` covered by shard *name*"""
+        year, number = map(int, self._name_re.match(name).groups())
+        if self.bucket == "month":
+            start = datetime(year, number, 1)
+            end = datetime(year + number // 12, number % 12 + 1, 1)
+        else:
+            start = datetime.fromisocalendar(year, number, 1)
+            end = start + timedelta(days=7)
+        return start, end
+
+    def _open(self, name: str):
+        if name not in self._shards:
+            self._shards[name] = self.client.get_or_create_collection(name)
+        return self._shards[name]
+
+    def shard_for(self, timestamp=None):
+        """Collection that stores rows stamped *timestamp* (now if missing or unparsable)"""
+        return self._open(self.shard_name(_parse_time(timestamp) or datetime.now()))
+
+    def shard_names(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[str]:
+        """Existing shards overlapping ``[since, until]``, newest first"""
+        names = {c if isinstance(c, str) else c.name for c in self.client.list_collections()}
+        names = [name for name in names | set(self._shards) if self._name_re.match(name)]
+        selected = []
+        for name in names:
+            start, end = self._bucket_range(name)
+            if (since is None or end > since) and (until is None or start <= until):
+                selected.append(name)
+        return sorted(selected, key=lambda name: self._bucket_range(name)[0], reverse=True)
+
+    def shards(self, since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[Any]:
+        return [self._open(name) for name in self.shard_names(since, until)]
+
+    # Collection API ###########################################################
+
+    def add(self, ids: List[str], documents: Optional[List[str]] = None, metadatas: Optional[List[Dict]] = None,
+            embeddings: Optional[List] = None):
+        """Add rows, each to the shard of its ``timestamp`` metadata"""
+        self._write("add", ids, documents, metadatas, embeddings)
+
+    def upsert(self, ids: List[str], documents: Optional[List[str]] = None, metadatas: Optional[List[Dict]] = None,
+               embeddings: Optional[List] = None):
+        self._write("upsert", ids, documents, metadatas, embeddings)
+
+    def _write(self, method: str, ids, documents, metadatas, embeddings):
+        if embeddings is None and documents is not None and self.embed is not None:
+            embeddings = storage_vectors(self.embed, documents)
+        groups: Dict[str, List[int]] = {}
+        for i in range(len(ids)):
+            timestamp = metadatas[i].get('timestamp') if metadatas else None
+            groups.setdefault(self.shard_name(_parse_time(timestamp) or datetime.now()), []).append(i)
+
+        for name, rows in groups.items():
+            kwargs = {'ids': [ids[i] for i in rows]}
+            if documents is not None:
+                kwargs['documents'] = [documents[i] for i in rows]
+            if metadatas is not None:
+                kwargs['metadatas'] = [metadatas[i] for i in rows]
+            if embeddings is not None:
+                kwargs['embeddings'] = [embeddings[i] for i in rows]
+            getattr(self._open(name), method)(**kwargs)
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None, limit: Optional[int] = None,
+            include: Optional[List[str]] = None, since: Optional[datetime] = None,
+            until: Optional[datetime] = None) -> Dict[str, Any]:
+        """Rows from every shard in range, newest shard first (``limit`` counts across shards)"""
+        include = ['metadatas', 'documents'] if include is None else include
+        merged = {'ids': [], **{key: [] for key in include}}
+        for shard in self.shards(since, until):
+            remaining = None if limit is None else limit - len(merged['ids'])
+            if remaining is not None and remaining <= 0:
+                break
+            data = shard.get(ids=ids, where=where, limit=remaining, include=include)
+            merged['ids'].extend(data['ids'])
+            for key in include:
+                merged[key].extend(data.get(key) or [])
+        return merged
+
+    def query(self, query_texts: Optional[List[str]] = None, query_embeddings: Optional[List] = None,
+              n_results: int = 10, where: Optional[Dict] = None, include: Optional[List[str]] = None,
+              since: Optional[datetime] = None, until: Optional[datetime] = None,
+              max_shards: Optional[int] = None) -> Dict[str, Any]:
+        """Nearest rows across shards (at most the *max_shards* newest), merged by distance"""
+        include = ['metadatas', 'documents', 'distances'] if include is None else list(include)
+        if 'distances' not in include:
+            include.append('distances')
+        shards = self.shards(since, until)[:max_shards]
+        if shards and query_embeddings is None and self.embed is not None:
+            query_embeddings = list(self.embed(query_texts))  # Embed once, not once per shard
+        n_queries = len(query_embeddings if query_embeddings is not None else query_texts)
+
+        candidates = [[] for _ in range(n_queries)]
+        for shard in shards:
+            if query_embeddings is not None:
+                result = shard.query(query_embeddings=query_embeddings, n_results=n_results, where=where, include=include)
+            else:
+                result = shard.query(query_texts=query_texts, n_results=n_results, where=where, include=include)
+            for q in range(n_queries):
+                for i, row_id in enumerate(result['ids'][q]):
+                    candidates[q].append((result['distances'][q][i], row_id,
+                                          {key: result[key][q][i] for key in include if result.get(key)}))
+
+        merged = {'ids': [], **{key: [] for key in include}}
+        for rows in candidates:
+            rows = sorted(rows, key=lambda row: row[0])[:n_results]
+            merged['ids'].append([row_id for _, row_id, _ in rows])
+            for key in include:
+                merged[key].append([fields.get(key) for _, _, fields in rows])
+        return merged
+
+    def locate(self, ids: List[str], metadatas: Optional[List[Dict]] = None) -> Dict[str, List[str]]:
+        """Shard name -> the given ids it holds.
+
+        The shards named by the rows' ``timestamp`` metadata (the shard key)
+        are checked first; shards are opened newest first only until every
+        id is found.
+        """
+        names = self.shard_names()
+        hinted = [self.shard_name(when) for when in (_parse_time(m.get('timestamp')) for m in metadatas or [] if m) if when]
+        missing, located = list(dict.fromkeys(ids)), {}
+        for name in dict.fromkeys([name for name in hinted if name in names] + names):
+            if not missing:
+                break
+            found = self._open(name).get(ids=missing, include=[])['ids']
+            if found:
+                located[name] = found
+                found = set(found)
+                missing = [row_id for row_id in missing if row_id not in found]
+        return located
+
+    def update(self, ids: List[str], documents: Optional[List[str]] = None, metadatas: Optional[List[Dict]] = None):
+        """Update rows in whichever shard holds them"""
+        if documents is not None and self.embed is not None:
+            embeddings = storage_vectors(self.embed, documents)
+        position = {row_id: i for i, row_id in enumerate(ids)}
+        for name, found in self.locate(ids, metadatas).items():
+            kwargs = {'ids': found}
+            if documents is not None:
+                kwargs['documents'] = [documents[position[row_id]] for row_id in found]
+            if metadatas is not None:
+                kwargs['metadatas'] = [metadatas[position[row_id]] for row_id in found]
+            if documents is not None and self.embed is not None:
+                kwargs['embeddings'] = [embeddings[position[row_id]] for row_id in found]
+            self._open(name).update(**kwargs)
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None):
+        if ids is not None and where is None:
+            for name, found in self.locate(ids).items():
+                self._open(name).delete(ids=found)
+            return
+        for shard in self.shards():
+            shard.delete(ids=ids, where=where)
+
+    def count(self) -> int:
+        return sum(shard.count() for shard in self.shards())
+
+
+class EmbeddedCollection:
+    """A Chroma collection whose text is embedded by *embed* instead of Chroma's own model.
+
+    Embeddings are passed explicitly on every write and query, so existing
+    collections keep their stored configuration and Chroma never loads a
+    second embedding model.  Everything else is forwarded unchanged.
+    """
+
+    def __init__(self, collection, embed: Callable[[List[str]], Any]):
+        self.collection = collection
+        self.embed = embed
+
+    def __getattr__(self, attr):
+        return getattr(self.collection, attr)
+
+    def _with_embeddings(self, kwargs: Dict) -> Dict:
+        if kwargs.get('embeddings') is None and kwargs.get('documents') is not None:
+            kwargs['embeddings'] = storage_vectors(self.embed, kwargs['documents'])
+        return kwargs
+
+    def add(self, **kwargs):
+        return self.collection.add(**self._with_embeddings(kwargs))
+
+    def upsert(self, **kwargs):
+        return self.collection.upsert(**self._with_embeddings(kwargs))
+
+    def update(self, **kwargs):
+        return self.collection.update(**self._with_embeddings(kwargs))
+
+    def query(self, query_texts: Optional[List[str]] = None, **kwargs):
+        if query_texts is not None and kwargs.get('query_embeddings') is None:
+            kwargs['query_embeddings'] = list(self.embed(query_texts))
+        return self.collection.query(**kwargs)
@@ -1 +1,12 @@
-from .gmm_clustering import cluster_speakers, find_optimal_speakers, update_database_speakers
\ No newline at end of file
+#!/usr/bin/env python3
+"""Speaker clustering"""
+
+__all__ = ['cluster_vectors', 'find_optimal_clusters', 'update_database_speakers', 'load_gmm_model']
+
+
+def __getattr__(name):
+    # scikit-learn is only imported when clustering is actually used (PEP 562)
+    if name in __all__:
+        from . import gmm_clustering
+        return getattr(gmm_clustering, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
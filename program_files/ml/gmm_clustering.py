@@ -8,27 +8,53 @@ from sklearn.metrics import silhouette_score
 import sys
 import os
 import pickle
+from datetime import datetime
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from database.enhanced_conversation_db import EnhancedConversationDB
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from program_files.database.enhanced_conversation_db import EnhancedConversationDB
+from program_files.config.config import cfg
 
-def filter_consistent_dimensions(features, metadata):
-    """Filter features to most common dimension size for GMM clustering"""
+def filter_consistent_dimensions(features, metadata, *aligned, dim=None):
+    """Filter features to most common dimension size (or *dim*) for GMM clustering.
+
+    Extra lists in *aligned* (e.g. row ids) are filtered alongside metadata.
+    """
     if not features:
-        return [], []
+        return ([], [], *([] for _ in aligned))
     
     dimensions = [len(f) for f in features]
-    most_common_dim = max(set(dimensions), key=dimensions.count)
+    most_common_dim = dim or max(set(dimensions), key=dimensions.count)
     
-    filtered_features = []
-    filtered_metadata = []
-    for feat, meta in zip(features, metadata):
-        if len(feat) == most_common_dim:
-            filtered_features.append(feat)
-            filtered_metadata.append(meta)
+    keep = [i for i, d in enumerate(dimensions) if d == most_common_dim]
+    filtered = [[features[i] for i in keep], [metadata[i] for i in keep]]
+    filtered += [[values[i] for i in keep] for values in aligned]
     
-    print(f"📊 Using {len(filtered_features)}/{len(features)} samples with {most_common_dim}D features")
-    return filtered_features, filtered_metadata
+    print(f"📊 Using {len(keep)}/{len(features)} samples with {most_common_dim}D features")
+    return tuple(filtered)
+
+def _new_gmm(n_components, config):
+    return GaussianMixture(n_components=n_components, covariance_type=config.covariance_type,
+                           reg_covar=config.reg_covar, random_state=config.random_state)
+
+def _fit_gmm(X, n_components, config):
+    return _new_gmm(n_components, config).fit(X)
+
+def select_gmm_by_bic(X, config=None, max_components=None):
+    """Fit one GMM per candidate speaker count in parallel; returns (best fitted GMM, BIC scores)"""
+    from joblib import Parallel, delayed
+    config = config or cfg.speaker_clustering
+    max_components = max(1, min(max_components or config.max_components, len(X) // 2))
+    
+    models = Parallel(n_jobs=config.n_jobs)(
+        delayed(_fit_gmm)(X, n, config) for n in range(1, max_components + 1)
+    )
+    bic_scores = [model.bic(X) for model in models]
+    return models[int(np.argmin(bic_scores))], bic_scores
+
+def assign_speakers(gmm, scaler, features):
+    """Label and confidence for every row in one vectorized call"""
+    probs = gmm.predict_proba(scaler.transform(np.asarray(features)))
+    return probs.argmax(axis=1), probs.max(axis=1)
 
 def cluster_vectors(n_speakers=2):
     """Cluster audio features using GMM to identify speakers"""
@@ -42,8 +68,7 @@ def cluster_vectors(n_speakers=2):
         return print(f"Need at least {n_speakers} samples, found {len(features)}")
     
     X = StandardScaler().fit_transform(features)
-    gmm = GaussianMixture(n_components=n_speakers, covariance_type='diag', reg_covar=1e-4, random_state=42)
-    labels = gmm.fit_predict(X)
+    labels = _new_gmm(n_speakers, cfg.speaker_clustering).fit_predict(X)
     
     print(f"🎤 Found {n_speakers} speakers in {len(features)} samples")
     for i, (meta, label) in enumerate(zip(metadata, labels)):
@@ -64,86 +89,146 @@ def find_optimal_clusters():
         return print(f"Need at least 4 samples for optimization, found {len(features)}")
     
     X = StandardScaler().fit_transform(features)
-    max_speakers = min(20, len(features) // 2)
-    
-    bic_scores = []
-    for n in range(1, max_speakers + 1):
-        gmm = GaussianMixture(n_components=n, covariance_type='diag', reg_covar=1e-4, random_state=42)
-        gmm.fit(X)
-        bic_scores.append(gmm.bic(X))
+    gmm, bic_scores = select_gmm_by_bic(X)
+    optimal_n = gmm.n_components
     
-    optimal_n = np.argmin(bic_scores) + 1
-    best_bic = bic_scores[optimal_n - 1]
+    print(f"🎯 Optimal speakers: {optimal_n} (BIC: {bic_scores[optimal_n - 1]:.1f})")
+    print(f"📊 Tested {len(bic_scores)} configurations")
     
-    print(f"🎯 Optimal speakers: {optimal_n} (BIC: {best_bic:.1f})")
-    print(f"📊 Tested {max_speakers} configurations")
-    
-    # Run clustering with optimal number
-    labels, _ = cluster_vectors(optimal_n)
+    labels = gmm.predict(X)
     return optimal_n, labels, metadata
 
-def update_database_speakers(confidence_threshold=0.8):
-    """Find optimal speakers and update database with GMM results"""
-    db = EnhancedConversationDB()
-    all_features, all_metadata = db.get_data("audio_features", return_features=True)
-    
-    # Filter to consistent dimensions for GMM
-    features, metadata = filter_consistent_dimensions(all_features, all_metadata)
-    
-    if len(features) < 4:
-        return print(f"Need at least 4 samples, found {len(features)}")
-    
-    X = StandardScaler().fit_transform(features)
+def gmm_model_path():
+    """Location of the pickled speaker GMM and its scaler"""
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    return os.path.join(base_dir, "models", "speaker_gmm", "gmm_model.pkl")
+
+def load_gmm_model(path=None):
+    """Load the saved speaker GMM ({'gmm', 'scaler'}), or None if none has been trained"""
+    path = path or gmm_model_path()
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+def save_gmm_model(model, path=None):
+    path = path or gmm_model_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        pickle.dump(model, f)
+
+def _fit_full(features, config):
+    """BIC search over every row; returns the model dict to persist"""
     scaler = StandardScaler().fit(features)
-    max_speakers = min(20, len(features) // 2)
-    
-    # Find optimal number of speakers
-    bic_scores = []
-    for n in range(1, max_speakers + 1):
-        gmm = GaussianMixture(n_components=n, covariance_type='diag', reg_covar=1e-4, random_state=42)
-        gmm.fit(X)
-        bic_scores.append(gmm.bic(X))
-    
-    optimal_n = np.argmin(bic_scores) + 1
-    print(f"🎯 Optimal speakers: {optimal_n} (BIC: {bic_scores[optimal_n-1]:.1f})")
-    
-    # Train final GMM and save model
-    gmm = GaussianMixture(n_components=optimal_n, covariance_type='diag', reg_covar=1e-4, random_state=42)
+    gmm, bic_scores = select_gmm_by_bic(scaler.transform(features), config)
+    print(f"🎯 Optimal speakers: {gmm.n_components} (BIC: {bic_scores[gmm.n_components - 1]:.1f})")
+    return {'gmm': gmm, 'scaler': scaler, 'n_seen': len(features)}
+
+def _refine(model, new_features, replay_features, config):
+    """Warm-start EM from the saved model on new rows plus a replay sample of older ones"""
+    scaler, gmm = model['scaler'], model['gmm']
+    scaler.partial_fit(new_features)
+    X = scaler.transform(np.vstack([new_features] + ([replay_features] if len(replay_features) else [])))
+    
+    gmm.warm_start = True
+    gmm.max_iter = config.warm_start_max_iter
     gmm.fit(X)
-    
-    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-    model_dir = os.path.join(base_dir, "models", "speaker_gmm")
-    os.makedirs(model_dir, exist_ok=True)
-    
-    with open(os.path.join(model_dir, "gmm_model.pkl"), "wb") as f:
-        pickle.dump({'gmm': gmm, 'scaler': scaler}, f)
-    
-    # Create updates dictionary - map filtered indexes back to original indexes
-    updates_dict = {}
-    filtered_to_original = {i: all_metadata.index(meta) for i, meta in enumerate(metadata)}
-    
-    for i, (feature, meta) in enumerate(zip(features, metadata)):
-        feature_scaled = scaler.transform([feature])[0]
-        probs = gmm.predict_proba([feature_scaled])[0]
-        label = gmm.predict([feature_scaled])[0]
-        max_prob = np.max(probs)
-        
-        if max_prob >= confidence_threshold:
-            speaker_id = chr(65 + label)  # A, B, C...
-            original_index = filtered_to_original[i]
-            updates_dict[original_index] = {'ml_speaker': speaker_id, 'ml_speaker_confidence': float(max_prob)}
-    
-    # Update database using index-based updates
-    updated_count = db.update_by_indexes(updates_dict, "audio_features")
-    print(f"🎯 Updated {updated_count}/{len(all_features)} speakers (confidence ≥ {confidence_threshold})")
+    print(f"♻️  Refined {gmm.n_components}-speaker GMM on {len(new_features)} new + {len(replay_features)} replayed rows")
+    model['n_seen'] = model.get('n_seen', 0) + len(new_features)
+    return model
+
+def parse_timestamp(value):
+    """Row timestamp as a naive local datetime, or None when missing or unparseable"""
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00')) if 'T' in value else datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+        except (AttributeError, TypeError, ValueError):
+            return None
+    return parsed.astimezone().replace(tzinfo=None) if parsed.tzinfo else parsed
+
+def update_database_speakers(confidence_threshold=0.8, incremental=True, db=None, config=None, model_path=None):
+    """Label speakers with the GMM and write ml_speaker to the database.
+
+    With *incremental* and a saved model, only rows added since the last
+    run are loaded and labeled; the model is warm-started on them plus a
+    bounded replay sample.  A full parallel BIC search (labeling every
+    row) runs on the first call, when *incremental* is False, or once new
+    rows exceed ``refit_growth`` of the rows seen so far.
+    
+    Rows are new when their parsed timestamp is past the saved watermark;
+    rows without a usable timestamp are tracked by id instead.
+    """
+    config = config or cfg.speaker_clustering
+    db = db or EnhancedConversationDB()
+    all_ids, all_metadata = db.get_metadata("audio_features")
+    if not all_ids:
+        return print("Need at least 4 samples, found 0")
+    
+    model = load_gmm_model(model_path) if incremental else None
+    watermark = parse_timestamp(model.get('last_timestamp')) if model else None
+    seen_untimed = model.get('untimed_ids', set()) if model else set()
+    row_times = [parse_timestamp(meta.get('timestamp')) for meta in all_metadata]
+    untimed_ids = {row_id for row_id, row_time in zip(all_ids, row_times) if row_time is None}
+    
+    def is_new(row_id, row_time):
+        if row_time is None:
+            return row_id not in seen_untimed
+        return watermark is None or row_time > watermark
+    
+    new_ids = [row_id for row_id, row_time in zip(all_ids, row_times) if is_new(row_id, row_time)]
+    if not new_ids:
+        print("✅ No new audio features since the last run")
+        return 0
+    
+    full = model is None or len(new_ids) > config.refit_growth * max(model.get('n_seen', 0), 1)
+    features, metadata, ids = db.get_data("audio_features", return_features=True,
+                                          ids=None if full else new_ids, return_ids=True)
+    dim = None if full else model['gmm'].means_.shape[1]
+    features, metadata, ids = filter_consistent_dimensions(features, metadata, ids, dim=dim)
+    
+    if full:
+        if len(features) < 4:
+            return print(f"Need at least 4 samples, found {len(features)}")
+        model = _fit_full(np.asarray(features), config)
+    elif features:
+        new_set = set(new_ids)
+        old_ids = [row_id for row_id in all_ids if row_id not in new_set]
+        rng = np.random.default_rng(config.random_state)
+        replay_ids = list(rng.choice(old_ids, size=min(config.replay_size, len(old_ids)), replace=False)) if old_ids else []
+        replay = db.get_data("audio_features", return_features=True, ids=replay_ids)[0] if replay_ids else []
+        replay = np.asarray([f for f in replay if len(f) == dim])
+        model = _refine(model, np.asarray(features), replay, config)
+    
+    model['last_timestamp'] = max((t for t in row_times if t is not None), default=watermark)
+    model['untimed_ids'] = untimed_ids
+    save_gmm_model(model, model_path)
+    if not features:
+        return 0
+    
+    labels, confidences = assign_speakers(model['gmm'], model['scaler'], features)
+    
+    updates = {}
+    for row_id, label, confidence in zip(ids, labels, confidences):
+        if confidence >= confidence_threshold:
+            updates[row_id] = {'ml_speaker': chr(65 + int(label)), 'ml_speaker_confidence': float(confidence)}
+    
+    # Skip rows edited (e.g. relabeled by hand) since their metadata was read above
+    versions = {row_id: int(meta.get('row_version', 0)) for row_id, meta in zip(all_ids, all_metadata)}
+    counts = db.bulk_update_metadata(updates, "audio_features", expected_versions=versions)
+    updated_count = counts['updated']
+    if counts['conflicts']:
+        print(f"⚠️  Skipped {counts['conflicts']} rows changed during clustering")
+    print(f"🎯 Updated {updated_count}/{len(features)} speakers (confidence ≥ {confidence_threshold})")
     return updated_count
 
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "auto":
         find_optimal_clusters()
-    elif len(sys.argv) > 1 and sys.argv[1] == "update":
+    elif len(sys.argv) > 1 and sys.argv[1] in ("update", "refit"):
         confidence = float(sys.argv[2]) if len(sys.argv) > 2 else 0.8
-        update_database_speakers(confidence)
+        update_database_speakers(confidence, incremental=sys.argv[1] == "update")
     else:
         n = int(sys.argv[1]) if len(sys.argv) > 1 else 2
         cluster_vectors(n)
\ No newline at end of file
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Compare emotion backends: throughput (utterances/s) and p95 latency.
+
+Usage:
+    python program_files/scripts/benchmark_emotion.py
+    python program_files/scripts/benchmark_emotion.py --texts utterances.txt --backends quantized onnx
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add the repository root to the path so program_files imports resolve
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from program_files.ai.emotion_service import EMOTION_BACKENDS, benchmark_backends
+
+SAMPLE_UTTERANCES = [
+    "I've been waiting for over an hour and nobody has told me anything",
+    "Thank you so much, that really helps",
+    "What time should I take the second tablet",
+    "I'm scared the pain is going to come back tonight",
+    "Can you ask the nurse to come in please",
+    "That's great news, I can finally go home",
+    "I don't understand why they changed my medication again",
+    "My daughter is coming to pick me up at five",
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Emotion backend benchmark")
+    parser.add_argument("--texts", help="File with one utterance per line (default: built-in samples)")
+    parser.add_argument("--backends", nargs="+", choices=list(EMOTION_BACKENDS), default=list(EMOTION_BACKENDS))
+    parser.add_argument("--repeat", type=int, default=25, help="Times the utterance list is submitted")
+    args = parser.parse_args(argv)
+
+    texts = SAMPLE_UTTERANCES
+    if args.texts:
+        texts = [line.strip() for line in Path(args.texts).read_text().splitlines() if line.strip()]
+    # Suffix with a counter so repeats are not collapsed into one inference
+    corpus = [f"{text} {i}" for i in range(args.repeat) for text in texts]
+
+    results = benchmark_backends(corpus, args.backends)
+
+    print(f"\n📊 Emotion backends ({len(corpus)} utterances)")
+    print(f"   {'backend':<14} {'utt/s':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, stats in results.items():
+        if "status" in stats:
+            print(f"   {name:<14} {stats['status']:>9}")
+            continue
+        print(f"   {name:<14} {stats['utterances_per_second']:>9.1f} {stats['p50'] * 1000:>9.1f} {stats['p95'] * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""End-to-end pipeline benchmark over a fixed corpus of conversations.
+
+Each 16 kHz mono WAV file is replayed through a ``PipelineSession`` (as
+fast as possible by default, or in real time) against a stub Ollama
+server with fixed latency, so runs are repeatable without a microphone,
+GPU or real models.  Reports per-stage latency (VAD, embedding, ASR,
+retrieval, LLM, TTS), emotion service latency, CPU time and peak RSS,
+and can compare against a saved baseline to catch regressions.
+
+Without arguments the default corpus in ``data/benchmark_corpus`` is used.
+It is generated from a fixed seed on first use (see
+``program_files.utils.benchmark_corpus``).  Pass recorded WAV files or
+directories to benchmark real speech.
+
+A WAV file with a sibling ``.txt`` transcript (one utterance per line)
+has those utterances injected as finalized transcripts after its audio
+is replayed, so retrieval, the LLM and TTS run even when the recognizer
+hears no words in the audio (as with the synthetic corpus).  A stage
+that records no samples fails the baseline comparison.
+
+Usage:
+    python program_files/scripts/benchmark_pipeline.py --output run.json
+    python program_files/scripts/benchmark_pipeline.py recordings/ --baseline run.json
+"""
+
+import argparse
+import json
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the repository root to the path so program_files imports resolve
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from program_files.config.config import cfg
+from program_files.utils.benchmark_corpus import generate_corpus
+from program_files.utils.stage_timer import pipeline_timer
+from program_files.utils.stub_ollama import StubOllamaServer
+
+DEFAULT_CORPUS = Path(__file__).parent.parent / "data" / "benchmark_corpus"
+AUDIO_STAGES = ("vad", "embedding", "asr")
+TRANSCRIPT_STAGES = ("retrieval", "llm", "tts")  # Reached only once the session has words to act on
+
+
+def find_corpus(paths):
+    """Expand files and directories into a sorted list of WAV files; the default corpus is generated if missing"""
+    files = []
+    for path in map(Path, paths):
+        if path.resolve() == DEFAULT_CORPUS.resolve():
+            generate_corpus(path)
+        if path.is_dir():
+            files.extend(sorted(path.glob("*.wav")))
+        elif path.exists():
+            files.append(path)
+    return files
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KB on Linux
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def point_at_stub(gemma_client, url: str):
+    """Send a session's LLM traffic to the stub server"""
+    gemma_client.base_url = url
+    gemma_client.api_url = f"{url}/api/generate"
+    gemma_client.preloader.base_url = url
+    gemma_client.preloader.api_url = f"{url}/api/generate"
+
+
+def load_models(db_dir: str):
+    """Load shared models once, with a throwaway vector database"""
+    from program_files.core.pipeline_session import SharedModels
+    from program_files.core.program_pipeline import load_vosk_model
+    from program_files.ai.emotion_service import EmotionService
+    from program_files.speech.speech_processor import load_speaker_model
+    from program_files.database.enhanced_conversation_db import EnhancedConversationDB
+
+    with pipeline_timer.stage("startup"):
+        speaker_model = load_speaker_model(cfg.speaker_detector) if cfg.speaker_detector.use_ecapa_model else None
+        return SharedModels(
+            vosk_model=load_vosk_model(),
+            speaker_model=speaker_model,
+            emotion_classifier=EmotionService(),
+            vector_db=EnhancedConversationDB(persist_directory=db_dir)
+        )
+
+
+def read_transcript(path: Path) -> list:
+    """Utterances from the ``.txt`` next to *path*, or none"""
+    transcript = path.with_suffix(".txt")
+    if not transcript.exists():
+        return []
+    return [line.strip() for line in transcript.read_text().splitlines() if line.strip()]
+
+
+def run_conversation(models, path: Path, stub_url: str, realtime: bool, tts_file=None, transcript=()) -> dict:
+    """Replay one recording through a fresh session, then inject its *transcript*"""
+    from program_files.core.pipeline_session import PipelineSession
+    from program_files.speech.audio_sources import WavFileSource
+
+    source = WavFileSource(str(path), cfg.vosk_model.sample_rate, realtime=realtime)
+    session = PipelineSession(models, source, name=path.stem, tts_file=tts_file)
+    point_at_stub(session.gemma_client, stub_url)
+    session.start()
+
+    samples = 0
+    start = time.perf_counter()
+    with source:
+        while True:
+            data = source.read(cfg.server.frames_per_buffer)
+            if data is None:
+                break
+            samples += len(data) // 2
+            if not session.process_frame(data):
+                break
+    for text in transcript:
+        if not session.process_transcript(text):
+            break
+    session.finish()
+    wall = time.perf_counter() - start
+
+    audio_seconds = samples / float(cfg.vosk_model.sample_rate)
+    return {
+        "file": path.name,
+        "audio_seconds": audio_seconds,
+        "wall_seconds": wall,
+        "real_time_factor": wall / audio_seconds if audio_seconds else 0.0,
+        "injected_utterances": len(transcript)
+    }
+
+
+def compare_to_baseline(report: dict, baseline: dict, tolerance: float, expected_stages=AUDIO_STAGES) -> list:
+    """Return human-readable regressions beyond *tolerance* (fraction).
+
+    A stage in *expected_stages* or in the baseline that recorded no
+    samples is a regression: its latency was never measured.
+    """
+    regressions = []
+    for stage in sorted(set(expected_stages) | set(baseline.get("stages", {}))):
+        if report["stages"].get(stage, {}).get("count", 0) == 0:
+            regressions.append(f"{stage} recorded no samples")
+
+    for stage, stats in report["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if base and base["p95"] > 0 and stats["p95"] > base["p95"] * (1 + tolerance):
+            regressions.append(f"{stage} p95 {stats['p95'] * 1000:.1f}ms vs {base['p95'] * 1000:.1f}ms")
+
+    for key in ("cpu_seconds", "peak_rss_mb", "wall_seconds"):
+        if baseline.get(key) and report[key] > baseline[key] * (1 + tolerance):
+            regressions.append(f"{key} {report[key]:.2f} vs {baseline[key]:.2f}")
+    return regressions
+
+
+def print_report(report: dict):
+    print("\n📊 Per-stage latency")
+    print(f"   {'stage':<10} {'count':>7} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'total s':>9}")
+    for stage, s in sorted(report["stages"].items()):
+        print(f"   {stage:<10} {s['count']:>7} {s['mean'] * 1000:>9.2f} {s['p50'] * 1000:>9.2f} "
+              f"{s['p95'] * 1000:>9.2f} {s['max'] * 1000:>9.2f} {s['total']:>9.2f}")
+
+    print("\n🎧 Conversations")
+    for c in report["conversations"]:
+        print(f"   {c['file']:<40} {c['audio_seconds']:>7.1f}s audio  {c['wall_seconds']:>7.2f}s wall  RTF {c['real_time_factor']:.3f}")
+
+    emotion = report.get("emotion", {})
+    if "p95" in emotion:
+        print(f"\n🎭 Emotion ({emotion['backend']}): p95 {emotion['p95'] * 1000:.1f}ms | cache hits {emotion['cache_hit_rate']:.0%}")
+
+    print(f"\n⏱️  Wall: {report['wall_seconds']:.2f}s | CPU: {report['cpu_seconds']:.2f}s | Peak RSS: {report['peak_rss_mb']:.0f} MB")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Deterministic end-to-end pipeline benchmark")
+    parser.add_argument("corpus", nargs="*", default=[str(DEFAULT_CORPUS)], help="16 kHz mono WAV files or directories")
+    parser.add_argument("--realtime", action="store_true", help="Replay audio at real-time speed")
+    parser.add_argument("--tts", action="store_true", help="Include TTS synthesis with the configured backend")
+    parser.add_argument("--no-transcripts", dest="transcripts", action="store_false",
+                        help="Replay audio only; ignore .txt transcripts next to the WAV files")
+    parser.add_argument("--first-token-latency", type=float, default=0.1, help="Stub LLM time to first token (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0, help="Stub LLM token rate")
+    parser.add_argument("--load-latency", type=float, default=0.0, help="Stub LLM model load time (s)")
+    parser.add_argument("--output", help="Write the report as JSON")
+    parser.add_argument("--baseline", help="Fail if this JSON report is beaten by more than --tolerance")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown vs. baseline (fraction)")
+    args = parser.parse_args(argv)
+
+    files = find_corpus(args.corpus)
+    if not files:
+        print(f"❌ No WAV files found in {', '.join(args.corpus)}")
+        return 1
+
+    pipeline_timer.enabled = True
+    stub = StubOllamaServer(load_latency=args.load_latency,
+                            first_token_latency=args.first_token_latency,
+                            tokens_per_second=args.tokens_per_second).start()
+    print(f"🧪 Stub Ollama at {stub.url} | {len(files)} conversation(s)")
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="benchmark_db_") as db_dir:
+            models = load_models(db_dir)
+            tts_file = None
+            if args.tts:
+                from program_files.tts.tts_backends import create_tts_player
+                tts_file = create_tts_player()
+
+            cpu_start, wall_start = cpu_seconds(), time.perf_counter()
+            transcripts = [read_transcript(path) if args.transcripts else [] for path in files]
+            conversations = [run_conversation(models, path, stub.url, args.realtime, tts_file, transcript)
+                             for path, transcript in zip(files, transcripts)]
+            report = {
+                "stages": pipeline_timer.summary(),
+                "conversations": conversations,
+                "wall_seconds": time.perf_counter() - wall_start,
+                "cpu_seconds": cpu_seconds() - cpu_start,
+                "peak_rss_mb": peak_rss_mb(),
+                "llm_requests": stub.request_count,
+                "emotion": models.emotion_classifier.get_stats()
+            }
+    finally:
+        stub.stop()
+
+    print_report(report)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"💾 Report written to {args.output}")
+
+    if args.baseline:
+        expected_stages = AUDIO_STAGES + (TRANSCRIPT_STAGES if any(transcripts) else ())
+        regressions = compare_to_baseline(report, json.loads(Path(args.baseline).read_text()), args.tolerance,
+                                          expected_stages)
+        if regressions:
+            print("\n🚨 Performance regressions:")
+            for regression in regressions:
+                print(f"   {regression}")
+            return 1
+        print("\n✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
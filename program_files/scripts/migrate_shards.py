@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Move rows from the single ``conversations`` collection into sharded collections.
+
+Cue cards go to ``cue_cards``, adaptive prompts to ``adaptive_prompts`` and
+utterances to the time-bucketed ``conversations_*`` shards.  Stored
+embeddings are copied, so nothing is re-embedded.  Rows are upserted, so
+an interrupted run can simply be repeated; the old collection is only
+dropped once every row has been copied (unless --keep-source).
+
+Usage:
+    python program_files/scripts/migrate_shards.py --dry-run
+    python program_files/scripts/migrate_shards.py --batch-size 1000
+"""
+
+import argparse
+import sys
+from collections import Counter
+from pathlib import Path
+
+# Add the repository root to the path so program_files imports resolve
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from program_files.database.enhanced_conversation_db import EnhancedConversationDB
+
+LEGACY_COLLECTION = "conversations"
+
+
+def migrate(db: EnhancedConversationDB, batch_size: int = 500, dry_run: bool = False, keep_source: bool = False) -> Counter:
+    """Copy every legacy row to its collection; returns rows per destination"""
+    names = {c if isinstance(c, str) else c.name for c in db.client.list_collections()}
+    if LEGACY_COLLECTION not in names:
+        print("ℹ️  No unsharded collection to migrate")
+        return Counter()
+
+    legacy = db.client.get_collection(LEGACY_COLLECTION)
+    total = legacy.count()
+    moved = Counter()
+    for offset in range(0, total, batch_size):
+        data = legacy.get(offset=offset, limit=batch_size, include=['documents', 'metadatas', 'embeddings'])
+
+        # Group the batch by destination collection
+        groups = {}
+        for i, metadata in enumerate(data['metadatas']):
+            content_type = (metadata or {}).get('content_type')
+            groups.setdefault(content_type if content_type in ('cue_card', 'adaptive_prompt') else None, []).append(i)
+
+        for content_type, rows in groups.items():
+            label = content_type or "utterance"
+            moved[label] += len(rows)
+            if dry_run:
+                continue
+            db.collection_for(content_type).upsert(
+                ids=[data['ids'][i] for i in rows],
+                documents=[data['documents'][i] for i in rows],
+                metadatas=[data['metadatas'][i] for i in rows],
+                embeddings=[data['embeddings'][i] for i in rows],
+            )
+        print(f"   {min(offset + batch_size, total)}/{total} rows")
+
+    if not dry_run and not keep_source and sum(moved.values()) == total:
+        db.client.delete_collection(LEGACY_COLLECTION)
+        print(f"🗑️  Dropped the unsharded '{LEGACY_COLLECTION}' collection")
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Split the conversations collection by content type and time")
+    parser.add_argument("--persist-directory", help="Chroma directory (default: program_files/data/vector_db)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows copied per round trip")
+    parser.add_argument("--dry-run", action="store_true", help="Only count rows per destination")
+    parser.add_argument("--keep-source", action="store_true", help="Keep the old collection after copying")
+    args = parser.parse_args()
+
+    db = EnhancedConversationDB(persist_directory=args.persist_directory)
+    moved = migrate(db, args.batch_size, args.dry_run, args.keep_source)
+    verb = "Would move" if args.dry_run else "Moved"
+    for label, count in sorted(moved.items()):
+        print(f"📦 {verb} {count} {label} rows")
+
+
+if __name__ == "__main__":
+    main()
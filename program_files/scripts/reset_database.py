@@ -14,11 +14,14 @@ def reset_database(reset_conversations=True, reset_audio_features=True):
     db = EnhancedConversationDB()
     
     if reset_conversations:
-        try:
-            db.client.delete_collection("conversations")
-            print("✅ Conversations collection deleted")
-        except:
-            print("ℹ️  Conversations collection didn't exist")
+        # Utterance shards plus the cue card, adaptive prompt and document chunk collections
+        names = db.conversations.shard_names() + ["cue_cards", "adaptive_prompts", "document_chunks", "conversations"]
+        for name in names:
+            try:
+                db.client.delete_collection(name)
+                print(f"✅ {name} collection deleted")
+            except:
+                print(f"ℹ️  {name} collection didn't exist")
     
     if reset_audio_features:
         try:
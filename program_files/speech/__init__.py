@@ -1,6 +1,21 @@
 #!/usr/bin/env python3
 """Speech processing components"""
 
-from .speech_processor import SpeechProcessor, SpeakerDetector
+_EXPORTS = {
+    'SpeechProcessor': '.speech_processor',
+    'SpeakerDetector': '.speech_processor',
+    'VoiceActivityDetector': '.vad',
+    'SpeechEvent': '.vad',
+    'RecognizerManager': '.recognizer_manager',
+    'RecognizerPool': '.recognizer_manager',
+}
 
-__all__ = ['SpeechProcessor', 'SpeakerDetector'] 
\ No newline at end of file
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    # Resolved on first use (PEP 562) so e.g. audio_sources stays cheap to import
+    if name in _EXPORTS:
+        import importlib
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Pluggable audio inputs producing 16-bit mono PCM frames.
+
+Every source exposes ``start``, ``read`` and ``close``; ``read`` returns
+``None`` once the input is exhausted so sessions can finish cleanly.
+"""
+
+import socket
+import time
+import wave
+from typing import Optional
+
+
+class AudioSource:
+    """Base class for 16-bit mono PCM inputs"""
+
+    name = "audio"
+
+    def __init__(self, sample_rate: int = 16000):
+        self.sample_rate = sample_rate
+
+    def start(self):
+        """Open the underlying device, file or connection"""
+
+    def read(self, frames: int) -> Optional[bytes]:
+        """Return up to *frames* samples of PCM, or None when the source is exhausted"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release the underlying device, file or connection"""
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class MicrophoneSource(AudioSource):
+    """Live input from a PyAudio device"""
+
+    name = "mic"
+
+    def __init__(self, sample_rate: int = 16000, device_index: Optional[int] = None, frames_per_buffer: int = 2048):
+        super().__init__(sample_rate)
+        self.device_index = device_index
+        self.frames_per_buffer = frames_per_buffer
+        self.audio = None
+        self.stream = None
+
+    def start(self):
+        import pyaudio
+        self.audio = pyaudio.PyAudio()
+        self.stream = self.audio.open(format=pyaudio.paInt16, channels=1, rate=self.sample_rate,
+                                      input=True, input_device_index=self.device_index,
+                                      frames_per_buffer=self.frames_per_buffer)
+        self.stream.start_stream()
+
+    def read(self, frames: int) -> Optional[bytes]:
+        while True:
+            try:
+                return self.stream.read(frames, exception_on_overflow=False)
+            except OSError as e:
+                if e.errno == -9981:  # Input overflowed, try again
+                    continue
+                print(f"Audio error: {e}")
+                return None
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+        if self.audio is not None:
+            self.audio.terminate()
+            self.audio = None
+
+
+class WavFileSource(AudioSource):
+    """Replay a 16-bit mono WAV file, as fast as possible or in real time"""
+
+    name = "wav"
+
+    def __init__(self, path: str, sample_rate: int = 16000, realtime: bool = False):
+        super().__init__(sample_rate)
+        self.path = path
+        self.realtime = realtime
+        self.wav = None
+        self._started_at = 0.0
+        self._samples_read = 0
+
+    def start(self):
+        self.wav = wave.open(self.path, "rb")
+        if self.wav.getnchannels() != 1 or self.wav.getsampwidth() != 2:
+            raise ValueError(f"{self.path}: expected 16-bit mono PCM")
+        if self.wav.getframerate() != self.sample_rate:
+            raise ValueError(f"{self.path}: sample rate {self.wav.getframerate()} Hz, expected {self.sample_rate} Hz")
+        self._started_at = time.perf_counter()
+        self._samples_read = 0
+
+    def read(self, frames: int) -> Optional[bytes]:
+        data = self.wav.readframes(frames)
+        if not data:
+            return None
+
+        self._samples_read += len(data) // 2
+        if self.realtime:
+            # Sleep until the wall clock catches up with the audio clock
+            ahead = self._samples_read / float(self.sample_rate) - (time.perf_counter() - self._started_at)
+            if ahead > 0:
+                time.sleep(ahead)
+        return data
+
+    def close(self):
+        if self.wav is not None:
+            self.wav.close()
+            self.wav = None
+
+
+class SocketSource(AudioSource):
+    """Raw 16-bit mono PCM streamed over TCP by a single client"""
+
+    name = "tcp"
+
+    def __init__(self, host: str = "0.0.0.0", port: int = 9000, sample_rate: int = 16000):
+        super().__init__(sample_rate)
+        self.host = host
+        self.port = port
+        self.server = None
+        self.conn = None
+
+    def start(self):
+        self.server = socket.create_server((self.host, self.port))
+        print(f"🔌 Waiting for audio on {self.host}:{self.port}...")
+        self.conn, address = self.server.accept()
+        print(f"🔌 Audio client connected from {address[0]}:{address[1]}")
+
+    def read(self, frames: int) -> Optional[bytes]:
+        wanted = frames * 2
+        chunks = []
+        while wanted > 0:
+            chunk = self.conn.recv(wanted)
+            if not chunk:
+                break  # Client hung up
+            chunks.append(chunk)
+            wanted -= len(chunk)
+
+        data = b"".join(chunks)
+        data = data[:len(data) - len(data) % 2]  # Drop a dangling half sample
+        return data or None
+
+    def close(self):
+        for sock in (self.conn, self.server):
+            if sock is not None:
+                sock.close()
+        self.conn = self.server = None
+
+
+def create_audio_source(spec: str, sample_rate: int = 16000, realtime: bool = False) -> AudioSource:
+    """Build a source from a spec: ``mic``, ``mic:<device>``, ``wav:<path>`` or ``tcp:<host>:<port>``"""
+    kind, _, arg = spec.partition(":")
+
+    if kind == "mic":
+        return MicrophoneSource(sample_rate, device_index=int(arg) if arg else None)
+    if kind == "wav":
+        return WavFileSource(arg, sample_rate, realtime=realtime)
+    if kind == "tcp":
+        host, _, port = arg.rpartition(":")
+        return SocketSource(host or "0.0.0.0", int(port), sample_rate)
+    raise ValueError(f"Unknown audio source: {spec}")
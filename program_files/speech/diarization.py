@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""Online speaker diarization over VAD segments.
+
+Instead of embedding a sliding one-second buffer on every read and
+switching speakers after a run of disagreeing frames, speech is cut at
+VAD boundaries (and every ``max_segment_seconds`` within long turns),
+each segment is embedded once and assigned to a speaker cluster:
+
+* a segment joins the most similar centroid if it clears
+  ``similarity_threshold``, otherwise it opens a new cluster
+* clusters whose centroids drift together past ``merge_threshold`` are
+  merged (agglomerative step), relabeling their segments
+* segments inside ``relabel_window_seconds`` are re-checked against the
+  updated centroids and relabeled when a different speaker now fits
+  clearly better
+
+Memory is bounded: audio lives in a fixed ring buffer, the segment
+history is a bounded deque and there are at most ``max_speakers``
+clusters.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from program_files.config.config import SpeakerDetectorConfig
+
+RELABEL_MARGIN = 0.05  # Similarity a different speaker must gain before a past segment is relabeled
+
+
+@dataclass
+class DiarizationSegment:
+    """A stretch of speech attributed to one speaker; times are stream seconds"""
+    start: float
+    end: float
+    speaker: str
+    similarity: float  # Cosine similarity to the assigned centroid (0.0 when not clustered)
+    embedding: Optional[np.ndarray] = field(default=None, repr=False)
+
+
+class AudioRing:
+    """Fixed-size ring of the most recent samples, addressed by absolute sample index"""
+
+    def __init__(self, capacity: int):
+        self.buffer = np.zeros(capacity, dtype=np.float32)
+        self.total = 0  # Samples written since the start of the stream
+
+    def write(self, samples: np.ndarray):
+        capacity = len(self.buffer)
+        if len(samples) >= capacity:
+            self.total += len(samples) - capacity  # Skip what would be overwritten anyway
+            samples = samples[-capacity:]
+        start = self.total % capacity
+        first = min(len(samples), capacity - start)
+        self.buffer[start:start + first] = samples[:first]
+        self.buffer[:len(samples) - first] = samples[first:]
+        self.total += len(samples)
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        """Samples ``start..end`` (clipped to what is still held)"""
+        start = max(start, self.total - len(self.buffer), 0)
+        end = min(end, self.total)
+        if end <= start:
+            return np.zeros(0, dtype=np.float32)
+        return np.take(self.buffer, np.arange(start, end), mode="wrap")
+
+
+class OnlineDiarizer:
+    """Incremental speaker clustering with bounded memory and per-segment cost"""
+
+    def __init__(self, embed: Callable[[np.ndarray], np.ndarray], config: SpeakerDetectorConfig,
+                 sample_rate: int = 16000):
+        self.embed = embed
+        self.config = config
+        self.sample_rate = sample_rate
+        self.ring = AudioRing(int((config.max_segment_seconds + 2.0) * sample_rate))
+
+        self.clusters: List[Dict] = []  # {'id', 'centroid', 'count'}
+        self.history: deque = deque(maxlen=config.max_history_segments)
+        self.current_speaker = "Speaker_A"
+        self.last_segment: Optional[DiarizationSegment] = None  # Segment that set current_speaker
+        self.relabeled: List[Tuple[DiarizationSegment, str]] = []  # (segment, old speaker) not yet popped
+        self._next_label = 0
+        self._segment_start: Optional[int] = None  # Sample index of the open segment
+
+    @property
+    def stream_time(self) -> float:
+        return self.ring.total / float(self.sample_rate)
+
+    @property
+    def segment_open(self) -> bool:
+        return self._segment_start is not None
+
+    def _sample(self, time: float) -> int:
+        return int(round(time * self.sample_rate))
+
+    def feed(self, samples: np.ndarray) -> List[DiarizationSegment]:
+        """Append audio (voiced or not); closes the open segment every ``max_segment_seconds``"""
+        self.ring.write(samples)
+        closed = []
+        max_samples = int(self.config.max_segment_seconds * self.sample_rate)
+        while self._segment_start is not None and self.ring.total - self._segment_start >= max_samples:
+            end = self._segment_start + max_samples
+            closed.append(self._close(self._segment_start, end))
+            self._segment_start = end
+        return [segment for segment in closed if segment is not None]
+
+    def start_segment(self, time: float):
+        if self._segment_start is None:
+            self._segment_start = min(self._sample(time), self.ring.total)
+
+    def end_segment(self, time: float) -> Optional[DiarizationSegment]:
+        if self._segment_start is None:
+            return None
+        start, self._segment_start = self._segment_start, None
+        return self._close(start, max(start, min(self._sample(time), self.ring.total)))
+
+    # Clustering ###############################################################
+
+    def _new_cluster(self, embedding: np.ndarray) -> Dict:
+        label = chr(65 + self._next_label) if self._next_label < 26 else str(self._next_label + 1)
+        cluster = {'id': f"Speaker_{label}", 'centroid': embedding.copy(), 'count': 1}
+        self._next_label += 1
+        self.clusters.append(cluster)
+        return cluster
+
+    def _similarities(self, embedding: np.ndarray) -> np.ndarray:
+        centroids = np.stack([c['centroid'] for c in self.clusters])
+        return centroids @ embedding
+
+    def _assign(self, embedding: np.ndarray) -> Tuple[Dict, float]:
+        if not self.clusters:
+            return self._new_cluster(embedding), 1.0
+
+        similarities = self._similarities(embedding)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.config.similarity_threshold and len(self.clusters) < self.config.max_speakers:
+            return self._new_cluster(embedding), 1.0
+
+        # Running mean that never weighs a new segment below embedding_alpha
+        cluster = self.clusters[best]
+        weight = max(1.0 / (cluster['count'] + 1), self.config.embedding_alpha)
+        centroid = (1 - weight) * cluster['centroid'] + weight * embedding
+        cluster['centroid'] = centroid / (np.linalg.norm(centroid) + 1e-10)
+        cluster['count'] += 1
+        return cluster, float(similarities[best])
+
+    def _merge_clusters(self):
+        """Merge the closest pair of clusters while they exceed ``merge_threshold``"""
+        while len(self.clusters) > 1:
+            centroids = np.stack([c['centroid'] for c in self.clusters])
+            similarity = centroids @ centroids.T
+            np.fill_diagonal(similarity, -1.0)
+            i, j = np.unravel_index(int(np.argmax(similarity)), similarity.shape)
+            if similarity[i, j] < self.config.merge_threshold:
+                return
+            keep, drop = self.clusters[min(i, j)], self.clusters[max(i, j)]  # Older label survives
+            total = keep['count'] + drop['count']
+            centroid = (keep['centroid'] * keep['count'] + drop['centroid'] * drop['count']) / total
+            keep['centroid'] = centroid / (np.linalg.norm(centroid) + 1e-10)
+            keep['count'] = total
+            self.clusters = [c for c in self.clusters if c is not drop]
+            for segment in self.history:
+                if segment.speaker == drop['id']:
+                    self.relabeled.append((segment, segment.speaker))
+                    segment.speaker = keep['id']
+
+    def _relabel_recent(self, now: float):
+        """Re-check recent segments against the current centroids"""
+        ids = [c['id'] for c in self.clusters]
+        for segment in self.history:
+            if segment.embedding is None or segment.end < now - self.config.relabel_window_seconds:
+                continue
+            similarities = self._similarities(segment.embedding)
+            best = int(np.argmax(similarities))
+            current = ids.index(segment.speaker) if segment.speaker in ids else None
+            if ids[best] != segment.speaker and (
+                    current is None or similarities[best] > similarities[current] + RELABEL_MARGIN):
+                self.relabeled.append((segment, segment.speaker))
+                segment.speaker = ids[best]
+                segment.similarity = float(similarities[best])
+
+    def pop_relabeled(self) -> List[Tuple[DiarizationSegment, str]]:
+        """Past segments whose speaker changed since the last call, with their old label"""
+        relabeled, self.relabeled = self.relabeled, []
+        return relabeled
+
+    def _close(self, start: int, end: int) -> Optional[DiarizationSegment]:
+        audio = self.ring.read(start, end)
+        if not len(audio):
+            return None
+
+        segment = DiarizationSegment(start / self.sample_rate, end / self.sample_rate, self.current_speaker, 0.0)
+        energy = float(np.sqrt(np.mean(audio ** 2)))
+        if len(audio) >= self.config.min_segment_seconds * self.sample_rate and energy >= self.config.min_speech_energy:
+            embedding = np.asarray(self.embed(audio), dtype=np.float32)
+            embedding = embedding / (np.linalg.norm(embedding) + 1e-10)
+            cluster, segment.similarity = self._assign(embedding)
+            segment.speaker, segment.embedding = cluster['id'], embedding
+            self.history.append(segment)
+            mark = len(self.relabeled)
+            self._merge_clusters()
+            self._relabel_recent(segment.end)
+            # The new segment itself was never reported under another label
+            self.relabeled[mark:] = [(s, old) for s, old in self.relabeled[mark:] if s is not segment]
+            del self.relabeled[:-self.config.max_history_segments]
+        else:
+            self.history.append(segment)
+
+        self.current_speaker = segment.speaker
+        self.last_segment = segment
+        return segment
+
+    def reset(self):
+        self.clusters.clear()
+        self.history.clear()
+        self.relabeled = []
+        self.current_speaker = "Speaker_A"
+        self.last_segment = None
+        self._next_label = 0
+        self._segment_start = None
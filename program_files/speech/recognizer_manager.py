@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Vosk recognizer reuse, throttled partials and word-level timestamps"""
+
+import json
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from program_files.config.config import RecognizerConfig
+
+
+class RecognizerPool:
+    """Pool of ready-to-use KaldiRecognizers sharing one read-only Model.
+
+    Allocating a recognizer is expensive, so they are created up front and
+    handed back after use instead of being thrown away.  One pool is shared
+    by every stream at the same sample rate (see ``SharedModels``).
+    """
+
+    def __init__(self, model, sample_rate: int, size: int = 1, enable_words: bool = True):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.enable_words = enable_words
+        self._free = deque()
+        self._lock = threading.Lock()
+        # Vosk word times count from a recognizer's first sample ever, so the
+        # pool remembers how much audio each recognizer has already decoded.
+        self.samples_fed: Dict[int, int] = {}
+        for _ in range(size):
+            self._free.append(self._create())
+
+    def _create(self):
+        from vosk import KaldiRecognizer
+        rec = KaldiRecognizer(self.model, self.sample_rate)
+        if self.enable_words:
+            rec.SetWords(True)
+        self.samples_fed[id(rec)] = 0
+        return rec
+
+    def acquire(self):
+        """Take a recognizer from the pool, creating one if it is empty"""
+        with self._lock:
+            if self._free:
+                return self._free.popleft()
+        return self._create()
+
+    def release(self, rec):
+        """Finalize a recognizer and return it to the pool"""
+        rec.FinalResult()  # Flushes decoder state so the next stream starts clean
+        with self._lock:
+            self._free.append(rec)
+
+
+class RecognizerManager:
+    """Owns the recognizer for one audio stream.
+
+    ``force_endpoint`` finalizes buffered audio with ``FinalResult()`` and
+    keeps decoding with the same recognizer, instead of re-instantiating
+    it and losing what it had buffered.  Partials are only polled every
+    ``partial_poll_interval`` frames and only parsed when they change;
+    ``pop_partial`` hands each new partial to the caller once.
+    Word timestamps are converted to stream time (seconds since the
+    manager started) so callers can align segment boundaries to words.
+    """
+
+    def __init__(self, model=None, sample_rate: Optional[int] = None,
+                 config: Optional[RecognizerConfig] = None, pool: Optional[RecognizerPool] = None):
+        if config is None:
+            from program_files.config.config import cfg
+            config = cfg.recognizer
+        if sample_rate is None:
+            from program_files.config.config import cfg
+            sample_rate = cfg.vosk_model.sample_rate
+
+        self.config = config
+        self.sample_rate = sample_rate
+        self.pool = pool or RecognizerPool(model, sample_rate, size=config.pool_size, enable_words=config.enable_words)
+        self.samples_processed = 0
+        self.rec_origin = 0.0  # Stream time corresponding to t=0 of self.rec's word timestamps
+        self.rec = None
+        self._acquire()
+        self.frames_since_partial = 0
+        self.partial_text = ""
+        self._partial_fresh = False
+        self._last_partial_raw = ""
+        self.last_words: List[Dict] = []
+
+    def _acquire(self):
+        self.rec = self.pool.acquire()
+        already_decoded = self.pool.samples_fed[id(self.rec)] / float(self.sample_rate)
+        self.rec_origin = self.stream_time - already_decoded
+
+    @property
+    def stream_time(self) -> float:
+        """Seconds of audio fed to this stream so far"""
+        return self.samples_processed / float(self.sample_rate)
+
+    def _parse_result(self, raw: str) -> Dict:
+        result = json.loads(raw)
+        words = [
+            {**w, 'start': self.rec_origin + w['start'], 'end': self.rec_origin + w['end']}
+            for w in result.get('result', [])
+        ]
+        result['result'] = words
+        result['text'] = result.get('text', '').strip()
+        self.last_words = words
+        self.partial_text = ""
+        self._partial_fresh = False
+        self._last_partial_raw = ""
+        return result
+
+    def accept(self, data: bytes) -> Optional[Dict]:
+        """Feed audio; return the final result dict when Vosk reaches an endpoint"""
+        samples = len(data) // 2  # 16-bit mono
+        self.samples_processed += samples
+        self.pool.samples_fed[id(self.rec)] += samples
+        if self.rec.AcceptWaveform(data):
+            return self._parse_result(self.rec.Result())
+
+        self.frames_since_partial += 1
+        if self.frames_since_partial >= self.config.partial_poll_interval:
+            self.frames_since_partial = 0
+            raw = self.rec.PartialResult()
+            if raw != self._last_partial_raw:
+                self._last_partial_raw = raw
+                partial = json.loads(raw).get('partial', '').strip()
+                if partial and partial != self.partial_text:
+                    self.partial_text = partial
+                    self._partial_fresh = True
+        return None
+
+    def pop_partial(self) -> Optional[str]:
+        """The partial transcript if it changed since the last call, else None"""
+        if not self._partial_fresh:
+            return None
+        self._partial_fresh = False
+        return self.partial_text
+
+    def force_endpoint(self) -> Dict:
+        """Finalize buffered audio now and keep the recognizer for what follows"""
+        return self._parse_result(self.rec.FinalResult())
+
+    @staticmethod
+    def split_words_at(words: List[Dict], boundary: float) -> Tuple[str, str]:
+        """Split words into text before/after *boundary* (stream seconds) by word midpoint"""
+        before = [w['word'] for w in words if (w['start'] + w['end']) / 2 < boundary]
+        after = [w['word'] for w in words if (w['start'] + w['end']) / 2 >= boundary]
+        return " ".join(before), " ".join(after)
+
+    def close(self):
+        """Hand the recognizer back to the pool"""
+        if self.rec is not None:
+            self.pool.release(self.rec)
+            self.rec = None
@@ -2,13 +2,14 @@
 """Minimal speech processing and speaker detection"""
 
 import numpy as np
-import webrtcvad
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from program_files.config.config import SpeechProcessorConfig, SpeakerDetectorConfig
+from program_files.speech.vad import SpeechEvent, VoiceActivityDetector
+from program_files.speech.diarization import DiarizationSegment, OnlineDiarizer
 
 
 class SpeechProcessor:
-    """Voice Activity Detection using WebRTC VAD"""
+    """Voice Activity Detection over frame-aligned audio (see ``speech.vad``)"""
     
     def __init__(self, config: Optional[SpeechProcessorConfig] = None):
         if config is None:
@@ -16,64 +17,76 @@ class SpeechProcessor:
             config = cfg.speech_processor
             
         self.config = config
-        self.vad = webrtcvad.Vad(config.vad_aggressiveness)
+        self.vad = VoiceActivityDetector(config)
         self.is_speaking = False
-        self.silence_frames = 0
+        self.silence_frames = 0  # Consecutive reads outside a speech segment
+        self.events: List[SpeechEvent] = []  # Segment events produced by the latest read
+    
+    def process(self, audio_data: bytes) -> List[SpeechEvent]:
+        """Classify every frame of a read; returns speech segment start/end events"""
+        self.events = self.vad.process(audio_data)
+        self.is_speaking = self.vad.in_speech
+        self.silence_frames = 0 if self.is_speaking else self.silence_frames + 1
+        return self.events
     
     def process_frame(self, audio_data: bytes) -> bool:
-        """Process audio frame and return if speech detected"""
-        try:
-            frame_size = self.config.frame_size
-            frame_data = audio_data[:frame_size] if len(audio_data) >= frame_size else audio_data.ljust(frame_size, b'\x00')
-            is_speech = self.vad.is_speech(frame_data, self.config.sample_rate)
-        except:
-            audio_np = np.frombuffer(audio_data, dtype=np.int16) if audio_data else np.array([])
-            is_speech = np.mean(np.abs(audio_np)) > self.config.energy_threshold if len(audio_np) > 0 else False
-        
-        if is_speech:
-            self.silence_frames = 0
-            self.is_speaking = True
-        else:
-            self.silence_frames += 1
-            if self.silence_frames > self.config.silence_threshold:
-                self.is_speaking = False
-        
-        return is_speech
+        """Process a read and return whether it is inside a speech segment"""
+        self.process(audio_data)
+        return self.is_speaking
+    
+    def flush(self) -> List[SpeechEvent]:
+        """Close an open speech segment at end of stream"""
+        self.events = self.vad.flush()
+        self.is_speaking = False
+        return self.events
+
+
+def load_speaker_model(config: SpeakerDetectorConfig):
+    """Load the ECAPA-TDNN encoder; it is read-only and can be shared by several detectors"""
+    try:
+        import speechbrain.pretrained
+        return speechbrain.pretrained.EncoderClassifier.from_hparams(
+            source="speechbrain/spkrec-ecapa-voxceleb",
+            savedir=config.model_save_dir
+        )
+    except:
+        print("⚠️  ECAPA-TDNN model not available, falling back to spectral features")
+        return None
 
 
 class SpeakerDetector:
-    """Real-time speaker detection using ECAPA-TDNN embeddings"""
+    """Speaker tracking over VAD segments using ECAPA-TDNN embeddings (see ``speech.diarization``)"""
     
-    def __init__(self, config: Optional[SpeakerDetectorConfig] = None, **kwargs):
+    def __init__(self, config: Optional[SpeakerDetectorConfig] = None, speaker_model=None, sample_rate: int = 16000, **kwargs):
         if config is None:
             from config.config import cfg
             config = cfg.speaker_detector
             
         self.config = config
-        
-        # Core settings
-        self.current_speaker = "Speaker_A"
-        self.speaker_count = 1
-        self.speaker_profiles = []
-        self.audio_buffer = []
-        
-        # State tracking
-        self.frames_since_change = 0
-        self.new_speaker_candidates = {}
+        self.audio_buffer = np.zeros(0, dtype=np.float32)  # Recent voiced audio for message features
         self.speaker_changed = False
+        self.previous_speaker = "Speaker_A"  # Speaker before the last change
+        self.change_time = 0.0  # Stream time at which the current speaker's run began
+        self._last_embedding = None
         
-        # Load ECAPA-TDNN model if enabled
-        self.speaker_model = None
-        if config.use_ecapa_model:
-            try:
-                import speechbrain.pretrained
-                self.speaker_model = speechbrain.pretrained.EncoderClassifier.from_hparams(
-                    source="speechbrain/spkrec-ecapa-voxceleb",
-                    savedir=config.model_save_dir
-                )
-            except:
-                print("⚠️  ECAPA-TDNN model not available, falling back to spectral features")
-                self.speaker_model = None
+        # Load ECAPA-TDNN model if enabled (unless a shared, already loaded one was passed in)
+        self.speaker_model = speaker_model
+        if self.speaker_model is None and config.use_ecapa_model:
+            self.speaker_model = load_speaker_model(config)
+        
+        self.diarizer = OnlineDiarizer(self._get_embedding, config, sample_rate)
+    
+    @property
+    def current_speaker(self) -> str:
+        return self.diarizer.current_speaker
+    
+    @property
+    def speaker_count(self) -> int:
+        return max(1, len(self.diarizer.clusters))
+    
+    @property
+    def speaker_profiles(self) -> list:
+        return [{'id': c['id'], 'embedding': c['centroid'], 'count': c['count']} for c in self.diarizer.clusters]
     
     def _get_embedding(self, audio_np: np.ndarray) -> np.ndarray:
         """Extract speaker embedding from audio"""
@@ -111,91 +124,45 @@ class SpeakerDetector:
                 
             return np.array(band_energies + [centroid, spread])
     
-    def identify_speaker(self, audio_data: bytes) -> str:
-        """Identify speaker from audio frame"""
-        audio_np = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768.0
-        if len(audio_np) == 0:
-            return self.current_speaker
+    def process(self, audio_data: bytes, events: List[SpeechEvent] = (), in_speech: bool = False) -> List[DiarizationSegment]:
+        """Feed one read plus its VAD events; returns the segments closed by it.
         
-        self.audio_buffer.extend(audio_np)
-        if len(self.audio_buffer) > self.config.buffer_size:
-            self.audio_buffer = self.audio_buffer[-self.config.buffer_size:]
-        
-        if len(self.audio_buffer) < self.config.buffer_size:
-            return self.current_speaker
-        
-        buffer_array = np.array(self.audio_buffer)
-        energy = np.sqrt(np.mean(buffer_array ** 2))
-        if energy < self.config.min_speech_energy or np.max(np.abs(buffer_array)) < 0.05:
-            self.new_speaker_candidates.clear()
-            return self.current_speaker
-        
-        # Get speaker embedding
-        current_embedding = self._get_embedding(buffer_array)
-        
-        # First speaker (with energy check)
-        if not self.speaker_profiles:
-            if energy >= self.config.min_speech_energy * 2:
-                self.speaker_profiles.append({'id': 'Speaker_A', 'embedding': current_embedding, 'count': 1})
-                self.speaker_count = 1
-                return 'Speaker_A'
-            return self.current_speaker
-        
-        # Compare with existing speakers
-        similarities = [np.dot(current_embedding, profile['embedding']) for profile in self.speaker_profiles]
-        max_similarity = max(similarities)
-        
-        if max_similarity >= self.config.similarity_threshold:
-            # Match existing speaker
-            best_idx = similarities.index(max_similarity)
-            profile = self.speaker_profiles[best_idx]
-            
-            # Update embedding with moving average
-            alpha = self.config.embedding_alpha
-            profile['embedding'] = (1 - alpha) * profile['embedding'] + alpha * current_embedding
-            profile['count'] += 1
-            
-            candidate_speaker = profile['id']
-            self.new_speaker_candidates.clear()
-        else:
-            # Potential new speaker
-            if len(self.speaker_profiles) < self.config.max_speakers:
-                # Track candidate
-                if 'potential_new' not in self.new_speaker_candidates:
-                    self.new_speaker_candidates['potential_new'] = {'count': 1, 'embeddings': [current_embedding]}
-                else:
-                    self.new_speaker_candidates['potential_new']['count'] += 1
-                    self.new_speaker_candidates['potential_new']['embeddings'].append(current_embedding)
-                
-                # Create new speaker if enough evidence
-                if self.new_speaker_candidates['potential_new']['count'] >= self.config.min_frames_for_new_speaker:
-                    speaker_id = f"Speaker_{chr(65 + len(self.speaker_profiles))}"
-                    avg_embedding = np.mean(self.new_speaker_candidates['potential_new']['embeddings'], axis=0)
-                    self.speaker_profiles.append({'id': speaker_id, 'embedding': avg_embedding, 'count': 1})
-                    self.speaker_count = len(self.speaker_profiles)
-                    candidate_speaker = speaker_id
-                    self.new_speaker_candidates.clear()
-                else:
-                    # Use closest existing speaker while collecting evidence  
-                    best_idx = similarities.index(max_similarity)
-                    candidate_speaker = self.speaker_profiles[best_idx]['id']
+        Audio is only buffered here; embeddings are computed once per
+        closed segment.
+        """
+        audio_np = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32) / 32768.0
+        previous_segment = self.diarizer.last_segment
+        closed = self.diarizer.feed(audio_np)
+        for event in events:
+            if event.kind == "start":
+                self.diarizer.start_segment(event.time)
             else:
-                # Force match to closest existing speaker
-                best_idx = similarities.index(max_similarity)
-                candidate_speaker = self.speaker_profiles[best_idx]['id']
-                self.new_speaker_candidates.clear()
+                closed.append(self.diarizer.end_segment(event.time))
+        closed = [segment for segment in closed if segment is not None]
+        
+        if in_speech:
+            self.audio_buffer = np.concatenate([self.audio_buffer, audio_np])[-self.config.buffer_size:]
+        for segment in closed:
+            if segment.embedding is not None:
+                self._last_embedding = segment.embedding
         
-        # Stability control - avoid rapid switching
-        if candidate_speaker != self.current_speaker:
-            self.frames_since_change += 1
-            if self.frames_since_change >= self.config.min_frames_for_change:
-                self.current_speaker = candidate_speaker
-                self.frames_since_change = 0
-                self.speaker_changed = True
+        # Compare against the previous segment's label as it stands now: merges and relabels
+        # rename past speech, only a newly closed segment with another speaker is a change
+        if closed and previous_segment is not None:
+            self.previous_speaker = previous_segment.speaker
+            self.speaker_changed = self.current_speaker != self.previous_speaker
         else:
-            self.frames_since_change = 0
             self.speaker_changed = False
-        
+        if self.speaker_changed:
+            # The new speaker's run began with the first segment carrying their label
+            self.change_time = next((s.start for s in closed if s.speaker == self.current_speaker), self.diarizer.stream_time)
+        return closed
+    
+    def identify_speaker(self, audio_data: bytes) -> str:
+        """Feed a voiced read without VAD events (segments are cut every max_segment_seconds)"""
+        if not self.diarizer.segment_open:
+            self.diarizer.start_segment(self.diarizer.stream_time)
+        self.process(audio_data, in_speech=True)
         return self.current_speaker
     
     def update_speaker_count(self, audio_data: bytes, silence_frames: int = 0):
@@ -204,17 +171,20 @@ class SpeakerDetector:
     
     def get_known_speakers(self) -> list:
         """Get list of known speaker IDs"""
-        return [profile['id'] for profile in self.speaker_profiles]
+        return [cluster['id'] for cluster in self.diarizer.clusters]
     
     def get_current_features(self) -> Optional[Dict]:
-        """Get current speaker features for database"""
-        if self.audio_buffer:
-            embedding = self._get_embedding(np.array(self.audio_buffer))
+        """Get current speaker features for database (reuses the last segment embedding)"""
+        embedding = self._last_embedding
+        if embedding is None and len(self.audio_buffer):
+            embedding = self._get_embedding(self.audio_buffer)
+        if embedding is not None:
             return {f'feature_{i}': float(f) for i, f in enumerate(embedding)}
     
     def clear_feature_buffer(self):
         """Clear audio buffer"""
-        self.audio_buffer.clear()
+        self.audio_buffer = np.zeros(0, dtype=np.float32)
+        self._last_embedding = None
     
     def has_speaker_changed(self) -> bool:
         """Check if speaker changed in last update"""
@@ -222,9 +192,8 @@ class SpeakerDetector:
     
     def reset_speakers(self):
         """Reset all speaker profiles"""
-        self.speaker_profiles.clear()
-        self.current_speaker = "Speaker_A"
-        self.speaker_count = 1
-        self.frames_since_change = 0
-        self.audio_buffer.clear()
-        self.new_speaker_candidates.clear()
\ No newline at end of file
+        self.diarizer.reset()
+        self.speaker_changed = False
+        self.previous_speaker = "Speaker_A"
+        self.change_time = 0.0
+        self.clear_feature_buffer()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""Frame-aligned voice activity detection with hangover smoothing.
+
+Audio arrives in reads of arbitrary size (2048 samples from PyAudio).
+``FrameAligner`` re-frames that stream into exact 10/20/30 ms frames,
+handed to the classifier as rows of one numpy view, so every sample is
+classified exactly once.  Classifier backends:
+
+* ``webrtc`` - WebRTC VAD, one call per frame
+* ``energy`` - mean absolute amplitude, vectorized over all frames of a read
+* ``silero`` - Silero neural VAD on CPU, run over all windows of a read
+
+Per-frame decisions are smoothed (an onset of consecutive voiced frames
+opens a segment, a hangover of silence closes it) and surfaced as
+``SpeechEvent`` start/end events with stream timestamps.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from program_files.config.config import SpeechProcessorConfig
+
+VALID_FRAME_MS = (10, 20, 30)
+
+
+@dataclass
+class SpeechEvent:
+    """Start or end of a speech segment"""
+    kind: str  # "start" or "end"
+    time: float  # Stream time (s) of the first voiced sample / end of the last voiced frame
+    frame: int  # Index of the frame the event refers to
+
+
+class FrameAligner:
+    """Sliding byte buffer that yields complete VAD frames as zero-copy views.
+
+    ``push`` returns a ``(n_frames, frame_bytes)`` uint8 view into the
+    internal buffer; it stays valid until the next ``push``.  Bytes that
+    do not fill a frame are carried over to the next read.
+    """
+
+    def __init__(self, frame_bytes: int, capacity: int = 16384):
+        self.frame_bytes = frame_bytes
+        self._buffer = np.zeros(max(capacity, frame_bytes * 2), dtype=np.uint8)
+        self._fill = 0  # Valid bytes in the buffer
+        self._consumed = 0  # Bytes handed out as frames by the previous push
+        self.frames_emitted = 0
+
+    @property
+    def pending_bytes(self) -> int:
+        return self._fill - self._consumed
+
+    def push(self, data: bytes) -> np.ndarray:
+        # Carry the partial frame left by the previous read to the front
+        pending = self._fill - self._consumed
+        if self._consumed:
+            self._buffer[:pending] = self._buffer[self._consumed:self._fill]
+        self._fill, self._consumed = pending, 0
+
+        needed = self._fill + len(data)
+        if needed > len(self._buffer):
+            grown = np.zeros(max(needed, len(self._buffer) * 2), dtype=np.uint8)
+            grown[:self._fill] = self._buffer[:self._fill]
+            self._buffer = grown
+        self._buffer[self._fill:needed] = np.frombuffer(data, dtype=np.uint8)
+        self._fill = needed
+
+        n_frames = self._fill // self.frame_bytes
+        self._consumed = n_frames * self.frame_bytes
+        self.frames_emitted += n_frames
+        return self._buffer[:self._consumed].reshape(n_frames, self.frame_bytes)
+
+    def reset(self):
+        self._fill = self._consumed = 0
+        self.frames_emitted = 0
+
+
+class FrameClassifier:
+    """Base class: returns one speech/non-speech decision per frame"""
+
+    name = "base"
+
+    def __init__(self, config: SpeechProcessorConfig):
+        self.config = config
+
+    def classify(self, frames: np.ndarray) -> np.ndarray:
+        """*frames* is a ``(n, frame_bytes)`` uint8 array of 16-bit PCM; returns ``(n,)`` bool"""
+        raise NotImplementedError
+
+    def reset(self):
+        """Forget any per-stream state"""
+
+
+class WebRTCClassifier(FrameClassifier):
+    name = "webrtc"
+
+    def __init__(self, config: SpeechProcessorConfig):
+        super().__init__(config)
+        import webrtcvad
+        self.vad = webrtcvad.Vad(config.vad_aggressiveness)
+
+    def classify(self, frames: np.ndarray) -> np.ndarray:
+        rate = self.config.sample_rate
+        return np.fromiter((self.vad.is_speech(frame, rate) for frame in frames), dtype=bool, count=len(frames))
+
+
+class EnergyClassifier(FrameClassifier):
+    """Mean absolute amplitude per frame, computed for all frames at once"""
+
+    name = "energy"
+
+    def classify(self, frames: np.ndarray) -> np.ndarray:
+        samples = frames.view(np.int16).astype(np.int32)  # int32 so abs(-32768) does not overflow
+        return np.abs(samples).mean(axis=1) > self.config.energy_threshold
+
+
+class SileroClassifier(FrameClassifier):
+    """Silero VAD on CPU.
+
+    The model is recurrent and scores fixed windows (512 samples at 16 kHz),
+    so the frames of a read are scored window by window and each frame
+    takes the probability of the latest window completed by its end.
+    """
+
+    name = "silero"
+
+    def __init__(self, config: SpeechProcessorConfig):
+        super().__init__(config)
+        import torch
+        try:
+            from silero_vad import load_silero_vad
+            self.model = load_silero_vad()
+        except ImportError:
+            self.model, _ = torch.hub.load("snakers4/silero-vad", "silero_vad", trust_repo=True)
+        self.torch = torch
+        self.window = 512 if config.sample_rate == 16000 else 256
+        self.reset()
+
+    def reset(self):
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._last_prob = 0.0
+        if hasattr(self.model, "reset_states"):
+            self.model.reset_states()
+
+    def classify(self, frames: np.ndarray) -> np.ndarray:
+        audio = frames.view(np.int16).reshape(-1).astype(np.float32) / 32768.0
+        carried = len(self._pending)
+        audio = np.concatenate([self._pending, audio])
+        n_windows = len(audio) // self.window
+
+        probs = np.empty(n_windows, dtype=np.float32)
+        with self.torch.inference_mode():
+            for i in range(n_windows):
+                chunk = self.torch.from_numpy(audio[i * self.window:(i + 1) * self.window])
+                probs[i] = self.model(chunk, self.config.sample_rate).item()
+        self._pending = audio[n_windows * self.window:]
+
+        # Window completed by the end of each frame (-1: none yet, use the previous read's)
+        frame_samples = frames.shape[1] // 2
+        frame_ends = carried + frame_samples * np.arange(1, len(frames) + 1)
+        latest = frame_ends // self.window - 1
+        frame_probs = np.where(latest >= 0, probs[np.clip(latest, 0, None)] if n_windows else 0.0, self._last_prob)
+        if n_windows:
+            self._last_prob = float(probs[-1])
+        return frame_probs >= self.config.silero_threshold
+
+
+VAD_BACKENDS = {
+    "webrtc": WebRTCClassifier,
+    "energy": EnergyClassifier,
+    "silero": SileroClassifier,
+}
+
+
+def create_classifier(config: SpeechProcessorConfig) -> FrameClassifier:
+    """Build the configured backend, falling back to the energy classifier if it cannot load"""
+    backend_cls = VAD_BACKENDS.get(config.backend)
+    if backend_cls is None:
+        raise ValueError(f"Unknown VAD backend: {config.backend}")
+    try:
+        return backend_cls(config)
+    except ImportError as e:
+        print(f"⚠️  {config.backend} VAD not available ({e}) - using energy threshold")
+        return EnergyClassifier(config)
+
+
+class HangoverSmoother:
+    """Turns per-frame decisions into segments: onset to open, hangover to close"""
+
+    def __init__(self, onset_frames: int, hangover_frames: int):
+        self.onset_frames = max(1, onset_frames)
+        self.hangover_frames = hangover_frames
+        self.in_speech = False
+        self._voiced_run = 0
+        self._silent_run = 0
+
+    def update(self, voiced: np.ndarray, first_frame: int) -> List[tuple]:
+        """Feed decisions for frames ``first_frame..``; returns ``(kind, frame)`` transitions"""
+        transitions = []
+        for offset, is_voiced in enumerate(voiced):
+            if is_voiced:
+                self._voiced_run += 1
+                self._silent_run = 0
+                if not self.in_speech and self._voiced_run >= self.onset_frames:
+                    self.in_speech = True
+                    transitions.append(("start", first_frame + offset - self.onset_frames + 1))
+            else:
+                self._voiced_run = 0
+                self._silent_run += 1
+                if self.in_speech and self._silent_run > self.hangover_frames:
+                    self.in_speech = False
+                    transitions.append(("end", first_frame + offset - self._silent_run + 1))
+        return transitions
+
+    def flush(self, next_frame: int) -> List[tuple]:
+        """Close an open segment at end of stream"""
+        if not self.in_speech:
+            return []
+        self.in_speech = False
+        end = next_frame - self._silent_run
+        self._voiced_run = self._silent_run = 0
+        return [("end", end)]
+
+    def reset(self):
+        self.in_speech = False
+        self._voiced_run = self._silent_run = 0
+
+
+class VoiceActivityDetector:
+    """Streaming VAD: feed reads of any size, get speech segment events"""
+
+    def __init__(self, config: Optional[SpeechProcessorConfig] = None, classifier: Optional[FrameClassifier] = None):
+        if config is None:
+            from program_files.config.config import cfg
+            config = cfg.speech_processor
+        if config.frame_ms not in VALID_FRAME_MS:
+            raise ValueError(f"frame_ms must be one of {VALID_FRAME_MS}, got {config.frame_ms}")
+
+        self.config = config
+        self.frame_samples = config.sample_rate * config.frame_ms // 1000
+        self.frame_seconds = config.frame_ms / 1000.0
+        self.aligner = FrameAligner(self.frame_samples * 2)
+        self.classifier = classifier or create_classifier(config)
+        self.smoother = HangoverSmoother(config.onset_frames, self._hangover_frames())
+        self.last_voiced_ratio = 0.0  # Fraction of voiced frames in the most recent read
+
+    def _hangover_frames(self) -> int:
+        return -(-self.config.hangover_ms // self.config.frame_ms)  # Round up
+
+    @property
+    def in_speech(self) -> bool:
+        return self.smoother.in_speech
+
+    @property
+    def frames_processed(self) -> int:
+        return self.aligner.frames_emitted
+
+    def _events(self, transitions: List[tuple]) -> List[SpeechEvent]:
+        events = []
+        for kind, frame in transitions:
+            # Start events point at the first voiced sample, end events just past the last voiced frame
+            events.append(SpeechEvent(kind, frame * self.frame_seconds, frame))
+        return events
+
+    def process(self, audio: bytes) -> List[SpeechEvent]:
+        """Classify every complete frame in *audio*; returns segment start/end events"""
+        first_frame = self.aligner.frames_emitted
+        frames = self.aligner.push(audio)
+        if not len(frames):
+            return []
+
+        # Hangover may be retuned at runtime (adaptive monitor)
+        self.smoother.hangover_frames = self._hangover_frames()
+        voiced = self.classifier.classify(frames)
+        self.last_voiced_ratio = float(voiced.mean())
+        return self._events(self.smoother.update(voiced, first_frame))
+
+    def flush(self) -> List[SpeechEvent]:
+        """End of stream: close any open segment"""
+        return self._events(self.smoother.flush(self.aligner.frames_emitted))
+
+    def reset(self):
+        self.aligner.reset()
+        self.classifier.reset()
+        self.smoother.reset()
+        self.last_voiced_ratio = 0.0
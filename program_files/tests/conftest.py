@@ -0,0 +1,54 @@
+"""Put the repository root on the path so program_files and rag_functions imports resolve.
+
+Also holds the fake embeddings shared by the vector-store tests.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from program_files.ai import embedding_service
+from program_files.ai.embedding_service import EmbeddingBackend, EmbeddingService
+from program_files.config.config import EmbeddingConfig
+
+TOPICS = ["warfarin", "falls", "diet"]
+
+
+def keyword_embed(words):
+    """Embedding function with one dimension per keyword, so nearest neighbours are predictable"""
+    def embed(texts):
+        vectors = np.array([[t.lower().count(w) for w in words] for t in texts], dtype=np.float32) + 1e-3
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return embed
+
+
+topic_embed = keyword_embed(TOPICS)
+
+
+class KeywordBackend(EmbeddingBackend):
+    """``keyword_embed`` as an embedding backend; records every text it embeds"""
+
+    name = "keywords"
+
+    def __init__(self, config, words):
+        super().__init__(config)
+        self.embed = keyword_embed(words)
+        self.seen = []
+
+    def load(self):
+        pass
+
+    def embed_batch(self, texts):
+        self.seen.extend(texts)
+        return self.embed(texts)
+
+
+def use_keyword_backend(words) -> KeywordBackend:
+    """Install a ``KeywordBackend`` as the process-wide embedding service; reset ``embedding_service._service`` after"""
+    config = EmbeddingConfig(max_batch_wait=0.0)
+    backend = KeywordBackend(config, words)
+    embedding_service._service = EmbeddingService(config, backend=backend)
+    return backend
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Tests for the pluggable audio sources used by server mode"""
+
+import struct
+import tempfile
+import wave
+from pathlib import Path
+
+from program_files.speech.audio_sources import WavFileSource, create_audio_source
+
+
+def _write_wav(path, samples, sample_rate=16000):
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(struct.pack(f"<{len(samples)}h", *samples))
+
+
+def test_wav_source_reads_frames_until_exhausted():
+    """WAV replay yields fixed-size frames, a short tail, then None"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "room.wav"
+        _write_wav(path, list(range(5000)))
+
+        with WavFileSource(str(path)) as source:
+            sizes = []
+            while True:
+                data = source.read(2048)
+                if data is None:
+                    break
+                sizes.append(len(data) // 2)
+
+    assert sizes == [2048, 2048, 904]
+
+
+def test_wav_source_rejects_wrong_sample_rate():
+    """Mismatched audio fails loudly instead of being decoded at the wrong speed"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "room.wav"
+        _write_wav(path, [0] * 100, sample_rate=8000)
+
+        try:
+            WavFileSource(str(path)).start()
+        except ValueError as e:
+            assert "8000" in str(e)
+        else:
+            raise AssertionError("expected ValueError")
+
+
+def test_create_audio_source_parses_specs():
+    """Source specs map to the matching source type"""
+    assert create_audio_source("wav:/tmp/a.wav").path == "/tmp/a.wav"
+    tcp = create_audio_source("tcp:127.0.0.1:9100")
+    assert (tcp.host, tcp.port) == ("127.0.0.1", 9100)
+    assert create_audio_source("mic:3").device_index == 3
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Tests for id-keyed bulk metadata updates"""
+
+import json
+import tempfile
+
+from program_files.database.enhanced_conversation_db import EnhancedConversationDB
+
+
+def _db_with_rows(tmp, rows=5):
+    db = EnhancedConversationDB(persist_directory=tmp)
+    ids = [f"audio_{i}" for i in range(rows)]
+    db.audio_features.add(
+        ids=ids,
+        documents=[json.dumps({'features': [float(i)], 'feature_names': ["f"]}) for i in range(rows)],
+        metadatas=[{'session_id': "s", 'speaker': "Speaker_A"} for _ in ids],
+        embeddings=[[float(i), 1.0] for i in range(rows)],  # Explicit, so no embedding model is needed
+    )
+    return db, ids
+
+
+def test_bulk_update_merges_patches_in_batches():
+    with tempfile.TemporaryDirectory() as tmp:
+        db, ids = _db_with_rows(tmp)
+        patches = {row_id: {'ml_speaker': "B"} for row_id in ids[:3]}
+        patches["audio_missing"] = {'ml_speaker': "C"}
+
+        counts = db.bulk_update_metadata(patches, batch_size=2)
+
+        assert counts == {'updated': 3, 'missing': 1, 'conflicts': 0}
+        row_ids, metadatas = db.get_metadata()
+        stored = dict(zip(row_ids, metadatas))
+        assert all(stored[row_id]['ml_speaker'] == "B" and stored[row_id]['speaker'] == "Speaker_A"
+                   and stored[row_id]['row_version'] == 1 for row_id in ids[:3])
+        assert 'ml_speaker' not in stored[ids[3]]
+
+
+def test_stale_versions_are_skipped():
+    with tempfile.TemporaryDirectory() as tmp:
+        db, ids = _db_with_rows(tmp, rows=2)
+        db.bulk_update_metadata({ids[0]: {'speaker': "Speaker_B"}})  # Concurrent edit: version 0 -> 1
+
+        counts = db.bulk_update_metadata({row_id: {'ml_speaker': "A"} for row_id in ids},
+                                         expected_versions={row_id: 0 for row_id in ids})
+
+        assert counts == {'updated': 1, 'missing': 0, 'conflicts': 1}
+        stored = dict(zip(*db.get_metadata()))
+        assert stored[ids[0]]['speaker'] == "Speaker_B" and 'ml_speaker' not in stored[ids[0]]
+        assert stored[ids[1]]['ml_speaker'] == "A"
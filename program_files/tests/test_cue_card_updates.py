@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Tests for the embedding similarity gate in cue card updates"""
+
+import tempfile
+
+from conftest import topic_embed
+from program_files.ai.gemma_client import GemmaClient
+from program_files.database.enhanced_conversation_db import EnhancedConversationDB
+from program_files.utils.stub_ollama import StubOllamaServer
+from rag_functions.core.main import store_cue_cards_in_db, update_cue_cards_from_conversations
+
+def session(text):
+    return {"full_text": text, "is_successful": True, "session_feedback": "yes"}
+
+
+def test_llm_is_only_called_for_rewrites_and_new_cards():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = EnhancedConversationDB(persist_directory=tmp, embed=topic_embed)
+        cards = {"question_1": {"question": "How to prevent falls?", "answer": "Clear the path to the bathroom."},
+                 "question_2": {"question": "Warfarin and food?", "answer": "Keep warfarin doses regular."}}
+        store_cue_cards_in_db(db, "/docs/smith.pdf", cards, "advice for carers")
+        sessions = {
+            "s1": session("She had falls at night, falls again today"),
+            "s2": session("Night light helped with the falls"),
+            "s3": session("Warfarin dose taken with dinner"),
+            "s4": session("We talked about the weather"),
+        }
+        db.get_recent_conversations_with_feedback = lambda days_back: sessions
+
+        with StubOllamaServer(first_token_latency=0.0, tokens_per_second=0,
+                              response_text="QUESTION: Updated question ANSWER: Updated answer") as stub:
+            client = GemmaClient(model="gemma3n:e4b", base_url=stub.url)
+            result = update_cue_cards_from_conversations(days_back=1, similarity_threshold=0.7,
+                                                         vector_db=db, client=client)
+            requests = stub.request_count
+
+        assert result == {"updates_made": 3, "new_cards_created": 1, "conversations_processed": 4}
+        assert requests == 4  # One call per session: no per-candidate SIMILAR/DIFFERENT checks
+        updated = [m for m in db.cue_cards.get(include=['metadatas'])['metadatas'] if m.get('update_reason')]
+        assert len(updated) == 2 and db.cue_cards.count() == 3
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Tests for online diarization over VAD segments"""
+
+from dataclasses import replace
+
+import numpy as np
+
+from program_files.config.config import SpeakerDetectorConfig
+from program_files.speech.diarization import AudioRing, OnlineDiarizer
+from program_files.speech.speech_processor import SpeakerDetector
+from program_files.speech.vad import SpeechEvent
+
+CONFIG = SpeakerDetectorConfig(use_ecapa_model=False, similarity_threshold=0.6, merge_threshold=0.9,
+                               min_segment_seconds=0.5, max_segment_seconds=3.0)
+RATE = 16000
+
+
+def _tone(freq, seconds):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (0.3 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def _pitch_embedding(audio):
+    """Toy speaker embedding: energy in four frequency bands"""
+    spectrum = np.abs(np.fft.rfft(audio))
+    return np.array([band.sum() for band in np.array_split(spectrum[:len(spectrum) // 4], 4)])
+
+
+def _speak(diarizer, audio, gap=0.5):
+    """Feed one VAD segment followed by silence; returns the closed segment"""
+    start = diarizer.stream_time
+    diarizer.start_segment(start)
+    diarizer.feed(audio)
+    segment = diarizer.end_segment(diarizer.stream_time)
+    diarizer.feed(np.zeros(int(gap * RATE), dtype=np.float32))
+    return segment
+
+
+def test_ring_keeps_latest_samples():
+    """Reads by absolute index survive wrap-around"""
+    ring = AudioRing(10)
+    ring.write(np.arange(7, dtype=np.float32))
+    ring.write(np.arange(7, 14, dtype=np.float32))
+    assert ring.read(6, 14).tolist() == list(range(6, 14))
+    assert ring.read(0, 6).tolist() == [4, 5]  # Older samples are gone
+
+
+def test_ring_counts_writes_larger_than_capacity():
+    ring = AudioRing(10)
+    ring.write(np.arange(25, dtype=np.float32))
+    assert ring.total == 25
+    assert ring.read(15, 25).tolist() == list(range(15, 25))
+
+
+def test_segments_cluster_by_voice():
+    """Alternating voices get two stable labels with exact segment times"""
+    diarizer = OnlineDiarizer(_pitch_embedding, CONFIG, RATE)
+    low, high = _tone(300, 1.0), _tone(1500, 1.0)
+
+    segments = [_speak(diarizer, audio) for audio in (low, high, low, high)]
+
+    assert [s.speaker for s in segments] == ["Speaker_A", "Speaker_B", "Speaker_A", "Speaker_B"]
+    assert abs(segments[1].start - 1.5) < 1e-6 and abs(segments[1].end - 2.5) < 1e-6
+    assert len(diarizer.clusters) == 2
+
+
+def test_short_segments_keep_previous_speaker():
+    """Segments below min_segment_seconds are not embedded"""
+    calls = []
+    diarizer = OnlineDiarizer(lambda audio: calls.append(len(audio)) or _pitch_embedding(audio), CONFIG, RATE)
+    _speak(diarizer, _tone(300, 1.0))
+    segment = _speak(diarizer, _tone(1500, 0.2))
+
+    assert segment.speaker == "Speaker_A" and segment.embedding is None
+    assert len(calls) == 1
+
+
+def test_long_turns_are_split_and_memory_is_bounded():
+    """Speech without a pause is cut every max_segment_seconds; history stays bounded"""
+    config = replace(CONFIG, max_segment_seconds=1.0, max_history_segments=4)
+    diarizer = OnlineDiarizer(_pitch_embedding, config, RATE)
+    diarizer.start_segment(0.0)
+    audio = _tone(300, 6.5)
+    closed = [s for i in range(0, len(audio), 2048) for s in diarizer.feed(audio[i:i + 2048])]
+
+    assert len(closed) == 6
+    assert len(diarizer.history) == 4
+    assert len(diarizer.ring.buffer) == 3 * RATE
+
+
+def test_merging_clusters_relabels_history():
+    """When two clusters converge, earlier segments move to the surviving label"""
+    # One voice drifting between two early, dissimilar segments
+    embeddings = iter([[1.0, 0.0], [0.5, 0.866], [0.9, 0.436], [0.75, 0.66], [0.8, 0.6], [0.85, 0.53]])
+    config = replace(CONFIG, similarity_threshold=0.6, merge_threshold=0.85)
+    diarizer = OnlineDiarizer(lambda audio: np.array(next(embeddings)), config, RATE)
+
+    segments = [_speak(diarizer, _tone(300, 1.0)) for _ in range(6)]
+    relabeled = diarizer.pop_relabeled()
+
+    assert len(diarizer.clusters) == 1
+    assert {s.speaker for s in segments} == {"Speaker_A"}
+    assert relabeled and {old for _, old in relabeled} == {"Speaker_B"}
+    assert diarizer.pop_relabeled() == []
+
+
+def test_merges_rename_the_speaker_without_a_change():
+    """Only a newly closed segment with another speaker counts as a change, not a merge into an older label"""
+    embeddings = iter([[1.0, 0.0], [0.5, 0.866], [0.6, 0.8], [0.9, 0.436], [0.75, 0.66], [0.8, 0.6], [0.85, 0.53]])
+    config = replace(CONFIG, similarity_threshold=0.6, merge_threshold=0.85)
+    detector = SpeakerDetector(config)
+    detector.diarizer = OnlineDiarizer(lambda audio: np.array(next(embeddings)), config, RATE)
+    audio = (_tone(300, 1.0) * 32767).astype(np.int16).tobytes()
+
+    changes = []
+    for _ in range(7):
+        start = detector.diarizer.stream_time
+        detector.process(b"", [SpeechEvent("start", start, 0)])
+        detector.process(audio, [SpeechEvent("end", start + 1.0, 0)])
+        changes.append((detector.current_speaker, detector.speaker_changed))
+
+    assert changes[1:4] == [("Speaker_B", True), ("Speaker_B", False), ("Speaker_A", True)]
+    assert changes[-1] == ("Speaker_A", False)  # Speaker_B merged into Speaker_A
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Tests for document passages and their links from cue cards"""
+
+import tempfile
+from pathlib import Path
+
+from conftest import topic_embed
+from program_files.database.enhanced_conversation_db import EnhancedConversationDB
+from rag_functions.core.main import (document_key, store_adaptive_prompts_in_db, store_cue_cards_in_db,
+                                     store_document_chunks)
+
+DOCUMENT = ("Mrs Smith takes warfarin daily and her INR is checked weekly by the GP. "
+            "She had two falls last month while walking to the bathroom at night. "
+            "Her diet is low in salt and she prefers soft food after dental work.")
+
+
+def test_cue_cards_link_to_their_source_passages():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = EnhancedConversationDB(persist_directory=tmp, embed=topic_embed)
+        chunks = store_document_chunks(db, "/docs/smith.pdf", DOCUMENT, chunk_words=14, overlap=0)
+        assert len(chunks) == 3 and db.document_chunks.count() == 3
+
+        stored = db.document_chunks.get(ids=[chunks[1]["id"]], include=['documents', 'metadatas'])
+        meta = stored['metadatas'][0]
+        assert DOCUMENT[meta['start_char']:meta['end_char']] == stored['documents'][0]
+        assert "falls" in stored['documents'][0]
+
+        # Storing the same text again replaces its passages instead of adding more
+        store_document_chunks(db, "/docs/smith.pdf", DOCUMENT, chunk_words=14, overlap=0)
+        assert db.document_chunks.count() == 3
+
+        cards = {"question_1": {"question": "What if she falls?", "answer": "Check for injury after falls."}}
+        store_cue_cards_in_db(db, "/docs/smith.pdf", cards, "advice for carers", source_chunks=chunks, chunks_per_card=1)
+        card = db.search_cue_cards("falls", top_k=1)
+        assert card[0]["metadata"]["source_chunk_ids"] == chunks[1]["id"]
+
+        passages = db.get_source_passages(card)
+        assert [p["text"] for p in passages] == [chunks[1]["text"]]
+        assert db.get_vector_context("falls at night")["source_passages"] == passages
+
+
+def test_reprocessing_a_document_replaces_its_rows():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = EnhancedConversationDB(persist_directory=tmp, embed=topic_embed)
+        document = Path(tmp) / "smith.txt"
+        document.write_text(DOCUMENT)
+
+        cards = {f"question_{i}": {"question": f"Q{i} about diet", "answer": f"A{i}"} for i in range(1, 4)}
+        store_cue_cards_in_db(db, document, cards, "advice for family")
+        store_cue_cards_in_db(db, document, cards, "advice for carers")
+        store_adaptive_prompts_in_db(db, document, ["about falls", "about diet"], ["falls", "diet"])
+        assert db.cue_cards.count() == 6 and db.adaptive_prompts.count() == 2
+
+        # Second run: the LLM returns fewer cards and one different issue
+        del cards["question_3"]
+        store_cue_cards_in_db(db, document, cards, "advice for family")
+        store_adaptive_prompts_in_db(db, document, ["about falls", "about warfarin"], ["falls", "warfarin"])
+        assert db.cue_cards.count() == 5  # 2 family cards + the untouched 3 carer cards
+        issues = sorted(m["medical_issue"] for m in db.adaptive_prompts.get(include=['metadatas'])['metadatas'])
+        assert issues == ["falls", "warfarin"]
+
+        row = db.cue_cards.get(ids=[db.cue_cards.get()['ids'][0]], include=['metadatas'])
+        assert row['metadatas'][0]['cue_card_id'] == row['ids'][0]
+
+
+def test_all_rows_of_a_document_share_one_key():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = EnhancedConversationDB(persist_directory=tmp, embed=topic_embed)
+        document = Path(tmp) / "smith.txt"
+        document.write_text(DOCUMENT)
+        key = document_key(document)
+
+        store_document_chunks(db, document, DOCUMENT, chunk_words=8, overlap=0)
+        store_cue_cards_in_db(db, document, {"question_1": {"question": "Diet?", "answer": "Soft food."}}, "advice")
+        store_adaptive_prompts_in_db(db, document, ["about diet"], ["diet"])
+        for collection in (db.document_chunks, db.cue_cards, db.adaptive_prompts):
+            rows = collection.get(include=['metadatas'])
+            assert {m["document_hash"] for m in rows['metadatas']} == {key}
+            assert all(key in row_id for row_id in rows['ids'])
+
+        # Re-ingesting with coarser chunking leaves no passages from the previous run behind
+        chunks = store_document_chunks(db, document, DOCUMENT, chunk_words=20, overlap=0)
+        assert sorted(db.document_chunks.get(include=[])['ids']) == sorted(chunk["id"] for chunk in chunks)
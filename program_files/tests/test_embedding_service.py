@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Tests for batching, caching and compact storage in the embedding service"""
+
+import os
+import tempfile
+import threading
+
+import numpy as np
+from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+
+from program_files.ai.embedding_service import ONNX_FILES, EmbeddingBackend, EmbeddingService, OnnxBackend
+from program_files.config.config import EmbeddingConfig
+from program_files.database.sharding import storage_vectors
+
+
+class HashBackend(EmbeddingBackend):
+    """Deterministic stand-in model that records the batches it sees"""
+
+    name = "hash"
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.batches = []
+        self.busy = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def load(self):
+        pass
+
+    def embed_batch(self, texts):
+        self.busy.set()
+        self.release.wait(timeout=5)
+        self.batches.append(list(texts))
+        vectors = np.stack([np.random.default_rng(sum(map(ord, t))).normal(size=8) for t in texts])
+        return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def test_concurrent_texts_are_micro_batched_and_cached():
+    config = EmbeddingConfig(batch_size=16, max_batch_wait=0.0)
+    backend = HashBackend(config)
+    backend.release.clear()
+    service = EmbeddingService(config, backend=backend)
+
+    first = service.submit("hello")
+    assert backend.busy.wait(timeout=5)  # Worker is blocked in the model with the first text
+    rest = [service.submit(text) for text in ("a", "b", "a")]
+    backend.release.set()
+
+    vectors = np.stack([f.result(timeout=5) for f in [first] + rest])
+    assert [len(b) for b in backend.batches] == [1, 2]  # Duplicate "a" shares one slot
+    np.testing.assert_array_equal(vectors[1], vectors[3])
+
+    again = service.embed(["hello", "b"])
+    assert len(backend.batches) == 2 and service.cache_hits == 2
+    np.testing.assert_array_equal(again, vectors[[0, 2]])
+    assert service.encode("hello").shape == (8,)
+
+
+def test_compact_cache_storage_keeps_vectors_close():
+    for dtype, tolerance in (("float16", 1e-3), ("int8", 2e-2)):
+        config = EmbeddingConfig(cache_dtype=dtype, max_batch_wait=0.0)
+        service = EmbeddingService(config, backend=HashBackend(config))
+        fresh = service.embed(["some text"])[0]
+        cached = service.embed(["some text"])[0]
+        assert service._cache["some text"].dtype == np.dtype(dtype)
+        assert cached.dtype == np.float32 and float(fresh @ cached) > 1 - tolerance
+
+
+def test_cache_is_bounded():
+    config = EmbeddingConfig(cache_size=2, max_batch_wait=0.0)
+    service = EmbeddingService(config, backend=HashBackend(config))
+    service.embed(["a", "b", "c"])
+    assert list(service._cache) == ["b", "c"]
+
+
+def test_compact_cache_never_reaches_storage():
+    config = EmbeddingConfig(cache_dtype="int8", max_batch_wait=0.0)
+    backend = HashBackend(config)
+    service = EmbeddingService(config, backend=backend)
+    fresh = service.embed(["some text"])[0]
+    assert not np.array_equal(service.embed(["some text"])[0], fresh)  # Lookups may use the int8 copy
+
+    np.testing.assert_array_equal(storage_vectors(service, ["some text"])[0], fresh)
+    assert len(backend.batches) == 2
+    assert service._cache["some text"].dtype == np.int8
+
+
+def test_onnx_model_resolves_without_a_local_model_dir():
+    default_cache = ONNXMiniLM_L6_V2.DOWNLOAD_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            ONNXMiniLM_L6_V2.DOWNLOAD_PATH = os.path.join(tmp, "chroma")
+            backend = OnnxBackend(EmbeddingConfig(model_dir=os.path.join(tmp, "missing")))
+            backend.load()  # Default config: downloads into model_dir on first embed instead of failing
+            assert backend.function.DOWNLOAD_PATH == backend.model_dir
+
+            offline = OnnxBackend(EmbeddingConfig(model_dir=os.path.join(tmp, "missing"), offline=True))
+            try:
+                offline.load()
+                assert False, "offline load without a model should fail"
+            except FileNotFoundError:
+                pass
+
+            os.makedirs(os.path.join(tmp, "chroma", "onnx"))
+            for name in ONNX_FILES:
+                open(os.path.join(tmp, "chroma", "onnx", name), "w").close()
+            offline.load()  # Found in Chroma's download cache
+            assert offline.function.DOWNLOAD_PATH == os.path.join(tmp, "chroma")
+        finally:
+            ONNXMiniLM_L6_V2.DOWNLOAD_PATH = default_cache
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Tests for micro-batching and caching in the emotion service"""
+
+import threading
+
+from program_files.ai.emotion_service import EmotionBackend, EmotionService, normalize_text
+from program_files.config.config import EmotionConfig
+
+
+class KeywordBackend(EmotionBackend):
+    """Deterministic stand-in model that records the batches it sees"""
+
+    name = "keyword"
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.batches = []
+        self.busy = threading.Event()
+        self.release = threading.Event()
+
+    def load(self):
+        pass
+
+    def classify_batch(self, texts):
+        self.busy.set()
+        self.release.wait(timeout=5)
+        self.batches.append(list(texts))
+        return [("Fear", 0.9) if "scared" in t.lower() else ("Neutral", 0.6) for t in texts]
+
+
+def test_pending_utterances_are_micro_batched():
+    """Utterances queued while the model is busy share the next forward pass"""
+    backend = KeywordBackend(EmotionConfig(batch_size=8, max_batch_wait=0.0))
+    service = EmotionService(EmotionConfig(batch_size=8, max_batch_wait=0.0), backend=backend)
+
+    first = service.submit("hello there")
+    assert backend.busy.wait(timeout=5)  # Worker is blocked in the model with the first utterance
+    rest = [service.submit(f"utterance {i}") for i in range(3)]
+    backend.release.set()
+
+    assert first.result(timeout=5) == ("Neutral", 0.6)
+    assert [f.result(timeout=5) for f in rest] == [("Neutral", 0.6)] * 3
+    assert [len(b) for b in backend.batches] == [1, 3]
+
+
+def test_identical_normalized_text_is_cached():
+    """Repeats differing only in case and punctuation skip inference"""
+    backend = KeywordBackend(EmotionConfig())
+    backend.release.set()
+    service = EmotionService(EmotionConfig(), backend=backend)
+
+    delivered = []
+    assert service.submit("I'm scared!", callback=lambda e, c: delivered.append(e)).result(timeout=5) == ("Fear", 0.9)
+    repeat = service.submit("i'm SCARED")
+    assert repeat.done() and repeat.result() == ("Fear", 0.9)
+    assert len(backend.batches) == 1
+    assert delivered == ["Fear"]
+    assert service.get_stats()["cache_hits"] == 1
+
+
+def test_normalize_text():
+    assert normalize_text("  Is it   SERIOUS, doctor?? ") == "is it serious doctor"
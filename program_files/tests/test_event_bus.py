@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Tests for the segment-level event bus and its monitor subscribers"""
+
+import threading
+import time
+
+from program_files.core.event_bus import EventBus, EventType
+from program_files.ai.latency_monitor import LatencyMonitor
+from program_files.config.config import LatencyMonitorConfig
+
+
+def test_inline_and_session_filtered_delivery():
+    """Inline handlers run on publish and only see their own session's events"""
+    bus = EventBus()
+    seen = []
+    bus.subscribe(lambda e: seen.append((e.session, e.data["text"])), EventType.FINAL_TRANSCRIPT,
+                  session="room-1", inline=True)
+
+    bus.publish(EventType.FINAL_TRANSCRIPT, "room-1", text="hello")
+    bus.publish(EventType.FINAL_TRANSCRIPT, "room-2", text="other room")
+    bus.publish(EventType.SPEECH_START, "room-1")
+
+    assert seen == [("room-1", "hello")]
+
+
+def test_queued_handlers_run_on_dispatcher_thread():
+    """Queued subscribers are called off the publishing thread, in order"""
+    bus = EventBus()
+    seen, threads, done = [], set(), threading.Event()
+
+    def handler(event):
+        seen.append(event.type)
+        threads.add(threading.current_thread().name)
+        if event.type == EventType.SPEECH_END:
+            done.set()
+
+    bus.subscribe(handler, EventType.SPEECH_START, EventType.SPEECH_END)
+    bus.publish(EventType.SPEECH_START)
+    bus.publish(EventType.SPEECH_END)
+
+    assert done.wait(2.0)
+    assert seen == [EventType.SPEECH_START, EventType.SPEECH_END]
+    assert threads == {"event-bus"}
+
+
+def test_latency_monitor_measures_speech_from_events():
+    """Speech start/end events during a response count as an interruption"""
+    bus = EventBus()
+    monitor = LatencyMonitor(LatencyMonitorConfig())
+    monitor.subscribe(bus, "room-1")
+
+    monitor.start_response_timing("gemma3n:e2b", context_length=0, has_image=False)
+    now = time.time()
+    bus.publish(EventType.SPEECH_START, "room-1", at=now)
+    bus.publish(EventType.SPEECH_END, "room-1", at=now + 0.8)
+    metrics = monitor.end_response_timing()
+
+    assert abs(metrics.speech_activity_during_response - 0.8) < 0.05
+    assert metrics.user_spoke_during_response
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Tests for GMM speaker clustering and incremental database labeling"""
+
+import json
+import os
+import tempfile
+from dataclasses import replace
+
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+from program_files.config.config import cfg
+from program_files.database.enhanced_conversation_db import EnhancedConversationDB
+from program_files.ml.gmm_clustering import (assign_speakers, filter_consistent_dimensions, parse_timestamp,
+                                             select_gmm_by_bic, update_database_speakers)
+
+CONFIG = replace(cfg.speaker_clustering, max_components=4, n_jobs=1)
+
+
+def _two_voices(rows=40, seed=0):
+    """Feature rows alternating between two well separated speakers"""
+    rng = np.random.default_rng(seed)
+    centers = np.array([[0.0, 0.0, 0.0], [6.0, 6.0, 6.0]])
+    return centers[np.arange(rows) % 2] + rng.normal(0, 0.5, (rows, 3))
+
+
+def _add_rows(db, features, timestamps, first=0):
+    ids = [f"audio_{first + i}" for i in range(len(features))]
+    metadatas = [{'speaker': "Speaker_A"} if ts is None else {'speaker': "Speaker_A", 'timestamp': ts}
+                 for ts in timestamps]
+    db.audio_features.add(ids=ids, documents=[json.dumps({'features': list(map(float, f))}) for f in features],
+                          metadatas=metadatas, embeddings=[[float(i), 1.0] for i in range(len(ids))])
+    return ids
+
+
+def test_filter_keeps_the_most_common_dimension_with_aligned_lists():
+    features = [[1, 2], [3, 4, 5], [6, 7], [8]]
+    metadata = [{'n': i} for i in range(4)]
+    kept, meta, ids = filter_consistent_dimensions(features, metadata, ["a", "b", "c", "d"])
+    assert kept == [[1, 2], [6, 7]] and meta == [{'n': 0}, {'n': 2}] and ids == ["a", "c"]
+    assert filter_consistent_dimensions(features, metadata, dim=3)[0] == [[3, 4, 5]]
+
+
+def test_bic_selects_the_speaker_count_and_labels_every_row():
+    features = _two_voices()
+    scaler = StandardScaler().fit(features)
+    gmm, bic_scores = select_gmm_by_bic(scaler.transform(features), CONFIG)
+
+    assert gmm.n_components == 2 and len(bic_scores) == CONFIG.max_components
+    labels, confidences = assign_speakers(gmm, scaler, features)
+    assert len(set(labels[::2])) == 1 and len(set(labels[1::2])) == 1 and labels[0] != labels[1]
+    assert confidences.min() > 0.99
+
+
+def test_timestamps_parse_across_formats():
+    assert parse_timestamp("2026-01-01 09:00:00") > parse_timestamp("2026-01-01T08:00:00")
+    assert parse_timestamp(None) is None and parse_timestamp("yesterday") is None
+
+
+def test_incremental_runs_label_only_new_rows():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = EnhancedConversationDB(persist_directory=tmp)
+        model_path = os.path.join(tmp, "gmm_model.pkl")
+        timestamps = [f"2026-01-01T08:{i:02d}:00" for i in range(39)] + [None]
+        _add_rows(db, _two_voices(), timestamps)
+
+        def run():
+            return update_database_speakers(0.0, db=db, config=CONFIG, model_path=model_path)
+
+        assert run() == 40  # First run: full BIC search, every row labeled (including the untimed one)
+        assert run() == 0
+
+        # Later than the watermark, though it sorts before it as a string; plus one more untimed row
+        _add_rows(db, _two_voices(rows=2, seed=1), ["2026-01-01 09:00:00", None], first=40)
+        assert run() == 2
+        assert run() == 0
+        stored = dict(zip(*db.get_metadata()))
+        assert all('ml_speaker' in stored[f"audio_{i}"] for i in range(42))
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Import-time regression tests: heavy stacks stay out of cheap entry points"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).parent.parent.parent
+
+# Cumulative import budget per entry point, in seconds.  Generous enough for
+# a cold cache on CI; a regression that pulls in torch or chromadb blows it.
+IMPORT_BUDGETS = {
+    "program_files.cli": 0.3,
+    "program_files.utils": 0.3,
+    "program_files.core.program_pipeline": 1.0,
+    "rag_functions.core.main": 1.0,
+}
+
+# Audio, TTS and model stacks no entry point above may import eagerly
+FORBIDDEN_MODULES = ("pyaudio", "vosk", "webrtcvad", "pygame", "edge_tts", "TTS", "torch",
+                     "sounddevice", "chromadb", "sentence_transformers", "sklearn", "layoutparser")
+
+
+def import_profile(module: str) -> dict:
+    """Run ``python -X importtime`` in a fresh interpreter; returns {module: cumulative seconds}"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=REPO_ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            profile[name.strip()] = int(cumulative) / 1e6  # Reported in microseconds
+    return profile
+
+
+def test_entry_points_skip_heavy_modules():
+    """No audio, TTS or model package is imported just by importing an entry point"""
+    for entry_point in IMPORT_BUDGETS:
+        loaded = {name.split(".")[0] for name in import_profile(entry_point)}
+        leaked = sorted(loaded.intersection(FORBIDDEN_MODULES))
+        assert not leaked, f"{entry_point} imports {leaked}"
+
+
+def test_entry_points_within_budget():
+    """Cumulative import time of each entry point stays under its budget"""
+    for entry_point, budget in IMPORT_BUDGETS.items():
+        cumulative = import_profile(entry_point)[entry_point]
+        assert cumulative < budget, f"{entry_point} took {cumulative:.3f}s to import (budget {budget}s)"
+
+
+if __name__ == "__main__":
+    for entry_point in IMPORT_BUDGETS:
+        profile = import_profile(entry_point)
+        print(f"{entry_point:<40} {profile[entry_point] * 1000:8.1f} ms")
+        heaviest = sorted((item for item in profile.items() if item[0] != entry_point), key=lambda item: -item[1])
+        for name, seconds in heaviest[:5]:
+            print(f"   {name:<37} {seconds * 1000:8.1f} ms")
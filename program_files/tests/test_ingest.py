@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Tests for resumable batch ingestion"""
+
+import tempfile
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+from rag_functions.core.config import RAGConfig
+from rag_functions.core.ingest import BatchIngestor, JobStore, content_hash, find_documents
+from rag_functions.utils.semantic_parser import PARSE_FALLBACK_PREFIX
+
+PROMPTS = ["advice for family", "advice for carers"]
+
+
+def fake_extract(path: str) -> str:
+    return Path(path).read_text()
+
+
+class FakePipeline:
+    """Stands in for ``rag_functions.core.main``; records every stage call"""
+
+    PARSE_PROMPT = "parse"
+    AUDIENCE_PROMPTS = PROMPTS
+
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.stored = []
+        self.fail_on = fail_on
+
+    def _call(self, stage, text):
+        self.calls.append((stage, text))
+        if self.fail_on == (stage, text):
+            raise RuntimeError("crashed")
+
+    def parse_document(self, text, prompt, fallback=True):
+        self._call("parse", text)
+        return f"parsed {text}"
+
+    def find_medical_issues(self, parsed, client, config):
+        self._call("issues", parsed)
+        return ["falls"]
+
+    def adaptive_prompts_for(self, issues):
+        return [f"about {issue}" for issue in issues]
+
+    def create_cue_cards(self, text, prompt, config):
+        self._call(f"cards:{prompt}", text)
+        return {"question_1": {"question": prompt, "answer": text}}
+
+    def store_adaptive_prompts_in_db(self, vector_db, path, prompts, issues):
+        self.stored.append(("prompts", Path(path).name))
+
+    def store_document_chunks(self, vector_db, path, text, chunk_words, overlap):
+        self.stored.append(("chunks", Path(path).name))
+        return []
+
+    def store_cue_cards_in_db(self, vector_db, path, cards, prompt, model, source_chunks=None, chunks_per_card=2):
+        self.stored.append(("cards", Path(path).name))
+
+
+class LLMDown(FakePipeline):
+    """Stages report the LLM being unreachable the way the real ones do: with fallback text and error dicts"""
+
+    def parse_document(self, text, prompt, fallback=True):
+        self._call("parse", text)
+        if text != "alpha":
+            return f"parsed {text}"
+        if fallback:
+            return f"{PARSE_FALLBACK_PREFIX} {len(text)} characters analyzed"
+        raise ConnectionError("Ollama unreachable")
+
+    def create_cue_cards(self, text, prompt, config):
+        self._call(f"cards:{prompt}", text)
+        return {"error": "Failed to generate questions. Please check if Ollama server is running."}
+
+
+class FlakyLLM(FakePipeline):
+    """The first parse request drops; cue-card stages only finish if they run at the same time"""
+
+    def __init__(self):
+        super().__init__()
+        self.together = threading.Barrier(len(PROMPTS), timeout=5)
+
+    def parse_document(self, text, prompt, fallback=True):
+        if not self.calls:
+            self._call("parse", text)
+            raise ConnectionError("connection reset")
+        return super().parse_document(text, prompt, fallback)
+
+    def create_cue_cards(self, text, prompt, config):
+        self.together.wait()
+        return super().create_cue_cards(text, prompt, config)
+
+
+def make_ingestor(jobs, pipeline, ocr_workers=0, **kwargs):
+    ingestor = BatchIngestor(jobs, vector_db=object(), client=SimpleNamespace(model="stub"),
+                             config=RAGConfig(retry_backoff=0.0, request_retries=0),
+                             ocr_workers=ocr_workers, extract=fake_extract, **kwargs)
+    ingestor.main = pipeline
+    return ingestor
+
+
+def write_documents(root: Path):
+    (root / "docs").mkdir()
+    for name, text in [("a.pdf", "alpha"), ("b.pdf", "beta"), ("copy_of_a.pdf", "alpha")]:
+        (root / "docs" / name).write_text(text)
+    (root / "docs" / "notes.txt").write_text("ignored")
+
+
+def test_find_documents_expands_directories_and_globs():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        write_documents(root)
+        from_dir = [p.name for p in find_documents([str(root / "docs")])]
+        from_glob = [p.name for p in find_documents([str(root / "docs" / "b.*"), str(root / "docs" / "b.pdf")])]
+    assert from_dir == ["a.pdf", "b.pdf", "copy_of_a.pdf"]
+    assert from_glob == ["b.pdf"]
+
+
+def test_crash_resumes_from_checkpoints_and_skips_done_documents():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        write_documents(root)
+        paths = find_documents([str(root / "docs")])
+        jobs = JobStore(root / "jobs.sqlite3")
+
+        # First run: beta fails while writing its second set of cue cards
+        crashing = FakePipeline(fail_on=(f"cards:{PROMPTS[1]}", "beta"))
+        counts = make_ingestor(jobs, crashing).run(paths)
+        assert counts == {"done": 1, "failed": 1, "skipped": 1}  # The copy of a.pdf has the same content
+        assert jobs.summary() == {"done": 1, "failed": 1}
+
+        # Failed documents wait for --retry-failed
+        idle = FakePipeline()
+        assert make_ingestor(jobs, idle).run(paths) == {"skipped": 3}
+        assert idle.calls == []
+
+        # The retry only runs the stage that failed
+        resumed = FakePipeline()
+        counts = make_ingestor(jobs, resumed, retry_failed=True).run(paths)
+        assert counts == {"done": 1, "skipped": 2}
+        assert resumed.calls == [(f"cards:{PROMPTS[1]}", "beta")]
+        assert resumed.stored.count(("cards", "b.pdf")) == 2
+        assert jobs.summary() == {"done": 2}
+        jobs.close()
+
+
+def test_ocr_runs_in_worker_processes():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        write_documents(root)
+        jobs = JobStore(root / "jobs.sqlite3")
+        pipeline = FakePipeline()
+        counts = make_ingestor(jobs, pipeline, ocr_workers=2).run(find_documents([str(root / "docs")]))
+        assert jobs.checkpoint(content_hash(root / "docs" / "b.pdf"), "extract") == "beta"
+        jobs.close()
+    assert counts == {"done": 2, "skipped": 1}
+    assert sorted(text for stage, text in pipeline.calls if stage == "parse") == ["alpha", "beta"]
+
+
+def test_error_results_fail_without_a_checkpoint():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        write_documents(root)
+        paths = find_documents([str(root / "docs")])
+        jobs = JobStore(root / "jobs.sqlite3")
+
+        assert make_ingestor(jobs, LLMDown()).run(paths) == {"failed": 2, "skipped": 1}
+        alpha, beta = content_hash(root / "docs" / "a.pdf"), content_hash(root / "docs" / "b.pdf")
+        assert jobs.checkpoint(alpha, "parse") is None
+        assert jobs.checkpoint(beta, "issues") == ["falls"] and jobs.checkpoint(beta, f"cue_cards:{PROMPTS[0]}") is None
+        assert "Ollama server" in dict(jobs.failures())[str(root / "docs" / "b.pdf")]
+
+        resumed = FakePipeline()
+        assert make_ingestor(jobs, resumed, retry_failed=True).run(paths) == {"done": 2, "skipped": 1}
+        assert ("parse", "alpha") in resumed.calls and ("parse", "beta") not in resumed.calls
+        assert resumed.stored.count(("cards", "b.pdf")) == 2
+        jobs.close()
+
+
+def test_parse_is_retried_and_cue_card_stages_run_concurrently():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        (root / "a.pdf").write_text("alpha")
+        jobs = JobStore(root / "jobs.sqlite3")
+        pipeline = FlakyLLM()
+        ingestor = make_ingestor(jobs, pipeline)
+        ingestor.config = RAGConfig(retry_backoff=0.0, request_retries=1)
+
+        assert ingestor.run([root / "a.pdf"]) == {"done": 1}
+        assert pipeline.calls.count(("parse", "alpha")) == 2
+        assert jobs.checkpoint(content_hash(root / "a.pdf"), "parse") == "parsed alpha"
+        jobs.close()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""Tests for array-based layout post-processing against the per-block reference"""
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from rag_functions.utils.ocr_layout_copy import compute_iou, inflate_boxes, overlap_keep_mask, reading_order
+
+
+def rect(x1, y1, x2, y2):
+    return SimpleNamespace(x_1=x1, y_1=y1, x_2=x2, y_2=y2, area=(x2 - x1) * (y2 - y1))
+
+
+def reference_keep(boxes, types, iou_threshold):
+    """The original O(n^2) loop"""
+    rects = [rect(*box) for box in boxes]
+    return [not any(types[i] == types[j] and rects[i].area < rects[j].area
+                    and compute_iou(rects[i], rects[j]) > iou_threshold
+                    for j in range(len(rects)) if j != i)
+            for i in range(len(rects))]
+
+
+def test_overlap_removal_matches_pairwise_loop():
+    rng = np.random.default_rng(0)
+    corners = rng.uniform(0, 1000, size=(300, 2))
+    boxes = np.hstack([corners, corners + rng.uniform(5, 120, size=(300, 2))])
+    boxes = np.vstack([boxes, boxes[:40] + 2])  # Near-duplicates, as the detector produces
+    types = np.array(rng.choice(["Text", "Title", "Table"], size=len(boxes)), dtype=object)
+
+    for threshold in (0.5, 0.8):
+        assert overlap_keep_mask(boxes, types, threshold).tolist() == reference_keep(boxes, types, threshold)
+
+
+def test_padding_and_two_column_reading_order():
+    padded = inflate_boxes(np.array([[3.0, 10.0, 50.0, 60.0]]), top=15, bottom=3, left=6, right=6)
+    assert padded.tolist() == [[0.0, 0.0, 56.0, 63.0]]
+
+    boxes = np.array([
+        [520, 100, 900, 200],  # right column, top
+        [50, 300, 400, 400],   # left column, bottom
+        [50, 100, 400, 200],   # left column, top
+        [520, 300, 900, 400],  # right column, bottom
+    ], dtype=float)
+    assert reading_order(boxes, page_width=1000).tolist() == [2, 1, 0, 3]
+    assert reading_order(boxes[[2, 1]], page_width=1000).tolist() == [0, 1]  # One column: top to bottom
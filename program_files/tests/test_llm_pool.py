@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Tests for bounded-concurrency LLM calls in cue card generation"""
+
+import threading
+import time
+
+from program_files.utils.stub_ollama import StubOllamaServer
+from rag_functions.core.config import RAGConfig
+from rag_functions.core.llm_analysis import create_cue_cards
+from rag_functions.core.llm_pool import call_with_retry, ordered_map
+
+PROBLEMS = " ".join(f"{{Problem {i}}}" for i in range(1, 7))
+
+
+def test_answers_run_concurrently_in_order():
+    latency = 0.2
+    with StubOllamaServer(first_token_latency=latency, tokens_per_second=0,
+                          response_text=f"{PROBLEMS} {{Answer: Rest.}}") as stub:
+        config = RAGConfig(ollama_base_url=stub.url, max_parallel_requests=3, retry_backoff=0.0)
+        start = time.perf_counter()
+        cards = create_cue_cards("document", "advice for carers", config)
+        elapsed = time.perf_counter() - start
+
+    assert [cards[f"question_{i}"]["question"] for i in range(1, 7)] == [f"Problem {i}" for i in range(1, 7)]
+    assert all(card["answer"] == "Rest." for card in cards.values())
+    assert elapsed < latency * 5  # 1 question call + 2 rounds of 3 answers (7 calls serially)
+
+
+def test_requests_in_flight_are_bounded_across_nested_pools():
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def fake_llm(_):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return "ok"
+
+    def outer(_):
+        return ordered_map(lambda i: call_with_retry(fake_llm, i, parallel=2), range(4), max_workers=4)
+
+    results = ordered_map(outer, range(3), max_workers=3)
+    assert results == [["ok"] * 4] * 3 and peak[0] <= 2
+
+
+def test_failed_and_empty_calls_are_retried():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("server busy")
+        return None if len(attempts) == 2 else "answer"
+
+    assert call_with_retry(flaky, retries=2, backoff=0.0) == "answer" and len(attempts) == 3
+    assert call_with_retry(lambda: None, retries=1, backoff=0.0) is None
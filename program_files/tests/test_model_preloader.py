@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Tests for the resident model shared by several Gemma clients"""
+
+import threading
+
+from program_files.ai.model_preloader import ModelPreloader
+from program_files.ai.optimized_gemma_client import OptimizedGemmaClient
+from program_files.ai.smart_model_selector import SmartModelSelector
+from program_files.config.config import GemmaClientConfig, ModelPreloaderConfig, SmartModelSelectorConfig
+
+
+class CountingPreloader(ModelPreloader):
+    def __init__(self):
+        super().__init__(ModelPreloaderConfig())
+        self.calls = []
+
+    def warm_model(self, model):
+        self.calls.append(("warm", model))
+        return 0.0
+
+    def unload_model(self, model):
+        self.calls.append(("unload", model))
+
+
+def test_clients_sharing_a_preloader_load_the_model_once():
+    preloader, selector = CountingPreloader(), SmartModelSelector(SmartModelSelectorConfig(switch_threshold=0))
+    clients = [OptimizedGemmaClient(GemmaClientConfig(), selector=selector, preloader=preloader) for _ in range(4)]
+
+    threads = [threading.Thread(target=client._prepare_model, args=("hello", "", False)) for client in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert preloader.calls == [("warm", "gemma3n:e2b")]
+    assert {client.model for client in clients} == {"gemma3n:e2b"}
+
+    switched, _ = clients[0]._prepare_model("describe this", "", has_image=True)
+    assert switched
+    assert preloader.calls[1:] == [("unload", "gemma3n:e2b"), ("warm", "gemma3n:e4b")]
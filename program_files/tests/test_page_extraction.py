@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Tests for the text-layer fast path and the page cache"""
+
+import tempfile
+from pathlib import Path
+
+from rag_functions.utils.ocr_layout_copy import format_page_text
+from rag_functions.utils.page_extraction import PageCache, has_usable_text, text_layer
+
+
+def _block(y, size, *lines):
+    return {"type": 0, "bbox": [72, y, 540, y + 20 * len(lines)],
+            "lines": [{"spans": [{"text": line, "size": size}]} for line in lines]}
+
+
+class TextLayerPage:
+    """Stands in for a PyMuPDF page with an embedded text layer"""
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+
+    def get_text(self, option="text"):
+        if option == "dict":
+            return {"blocks": self.blocks}
+        return "\n".join(span["text"] for block in self.blocks for line in block.get("lines", []) for span in line["spans"])
+
+
+def test_usable_text_rejects_empty_and_garbled_layers():
+    prose = "Patient admitted with shortness of breath; oxygen saturation 91% on room air. " * 2
+    assert has_usable_text(prose)
+    assert not has_usable_text("   \n\n  ")
+    assert not has_usable_text("Page 3")  # Too little to trust over OCR
+    assert not has_usable_text("�■□ ~~ " * 40)  # Broken font encoding
+
+
+def test_page_cache_is_keyed_by_page_dpi_and_method():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = PageCache(Path(tmp))
+        digest = "ab" * 32
+        result = {"text": "page one", "layout": [{"type": "Text", "bbox": [0, 0, 10, 10], "text": "page one"}],
+                  "source": "ocr"}
+        cache.put(digest, 0, 300, "layout", result)
+
+        assert cache.get(digest, 0, 300, "layout") == result
+        assert cache.get(digest, 1, 300, "layout") is None
+        assert cache.get(digest, 0, 200, "layout") is None
+        assert cache.get(digest, 0, 300, "tesseract") is None
+        assert not list(Path(tmp).rglob("*.tmp"))
+
+
+def test_text_layer_pages_are_formatted_like_ocr_pages():
+    page = TextLayerPage([
+        _block(50, 18.0, "Discharge summary"),
+        _block(90, 10.0, "Admitted with a fall at home.", "No fracture on X-ray."),
+        _block(150, 10.0, "Table 1: Observations on admission"),
+        _block(180, 10.0, "Note. Values are the first recorded."),
+        {"type": 1, "bbox": [72, 220, 200, 300]},  # Image block
+        _block(320, 10.0, "Follow up with the GP in two weeks."),
+    ])
+    result = text_layer(page, format_page_text)
+
+    assert [block["type"] for block in result["layout"]] == ["Title", "Text", "Text", "Text", "Text"]
+    assert result["text"] == ("# Discharge summary \n"
+                              "Admitted with a fall at home.\nNo fracture on X-ray.\n \n"
+                              "Follow up with the GP in two weeks.\n \n")
+    assert result["text"] == format_page_text([{"type": b["type"], "text": b["text"]} for b in result["layout"]])
+    assert text_layer(page)["text"] == page.get_text()  # Without a formatter the raw layer is kept
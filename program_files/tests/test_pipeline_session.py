@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Tests for per-stream session state on top of shared models"""
+
+import json
+import threading
+import time
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+from program_files.ai.adaptive_system_monitor import AdaptiveSystemMonitor, SystemMode, adaptive_monitor
+from program_files.core.event_bus import EventBus, EventType
+from program_files.core.pipeline_session import PipelineSession, SharedModels
+from program_files.speech.recognizer_manager import RecognizerPool
+
+SAMPLE_RATE = 16000
+
+
+class SilentRecognizer:
+    def AcceptWaveform(self, data):
+        return False
+
+    def PartialResult(self):
+        return json.dumps({"partial": ""})
+
+    def FinalResult(self):
+        return json.dumps({"text": "", "result": []})
+
+
+class FakePool(RecognizerPool):
+    def _create(self):
+        rec = SilentRecognizer()
+        self.samples_fed[id(rec)] = 0
+        return rec
+
+
+class FakeSource:
+    name = "room"
+    sample_rate = SAMPLE_RATE
+
+
+class SlowEmotions:
+    """Emotion service whose results arrive *delay* seconds after submission, on another thread"""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def submit(self, text):
+        future = Future()
+        threading.Timer(self.delay, future.set_result, args=(("sadness", 0.9),)).start()
+        return future
+
+
+def make_session(emotions, bus=None):
+    models = SharedModels(vosk_model=None, emotion_classifier=emotions)
+    models._recognizer_pools[SAMPLE_RATE] = FakePool(None, SAMPLE_RATE)
+    return PipelineSession(models, FakeSource(), name="room", bus=bus or EventBus())
+
+
+def test_cache_miss_waits_briefly_for_the_emotion():
+    session = make_session(SlowEmotions(delay=0.05))
+    assert session._classify_emotion("I feel low today") == ("sadness", 0.9)
+
+
+def test_late_emotions_reach_the_history_on_the_session_thread():
+    session = make_session(SlowEmotions(delay=0.5))
+    session_thread = threading.current_thread()
+    appended_on = []
+    add = session.conversation_manager.add_emotion_to_history
+    session.conversation_manager.add_emotion_to_history = \
+        lambda *args: (appended_on.append(threading.current_thread()), add(*args))
+
+    assert session._classify_emotion("I feel low today") == (None, None)
+    time.sleep(0.7)
+    assert len(session.conversation_manager.emotion_history) == 0  # Not touched by the emotion worker
+
+    session.process_frame(b"\x00\x00" * 480)
+    assert [e["emotion"] for e in session.conversation_manager.emotion_history] == ["sadness"]
+    assert appended_on == [session_thread]
+    session.finish()
+
+
+def test_finished_sessions_leave_no_subscriptions_behind():
+    bus = EventBus()
+    sessions = [make_session(SlowEmotions(delay=0.0), bus=bus) for _ in range(3)]
+    subscribed = {s for subs in bus._routes.values() for s in subs}
+    assert len(subscribed) == 3 * 2 + 1  # Speech start/end per session, one for the adaptive monitor
+
+    for session in sessions:
+        session.finish()
+    assert {s for subs in bus._routes.values() for s in subs} == {adaptive_monitor.subscribe(bus)}
+
+
+def test_host_mode_follows_every_session():
+    monitor = AdaptiveSystemMonitor()
+    monitor.set_system_mode(SystemMode.LISTENING)
+
+    def speech(event_type, room):
+        monitor._on_speech_event(SimpleNamespace(type=event_type, session=room))
+        return monitor.get_system_mode()
+
+    assert speech(EventType.SPEECH_START, "ward") == SystemMode.PROCESSING
+    assert speech(EventType.SPEECH_START, "clinic") == SystemMode.PROCESSING
+    assert speech(EventType.SPEECH_END, "ward") == SystemMode.PROCESSING  # Clinic is still speaking
+    monitor.end_session("clinic")
+    assert monitor.get_system_mode() == SystemMode.LISTENING
+
+
+def test_exit_command_ends_only_its_session():
+    adaptive_monitor.set_system_mode(SystemMode.LISTENING)
+    session = make_session(SlowEmotions(delay=0.0))
+    assert session._process_result("exit program") is False
+    assert adaptive_monitor.get_system_mode() == SystemMode.LISTENING
+    session.finish()
+
+
+class EndlessSource(FakeSource):
+    closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.closed = True
+
+    def read(self, frames):
+        return b"\x00\x00" * frames
+
+
+def test_reader_stops_and_closes_the_source_when_its_session_finishes():
+    from program_files.core.pipeline_server import PipelineServer
+
+    session = make_session(SlowEmotions(delay=0.0))
+    session.source = EndlessSource()
+    server = PipelineServer(session.models)
+    reader = threading.Thread(target=server._pump, args=(session,), daemon=True)
+    reader.start()
+    while not session.frames.full():  # Nothing consumes: the reader is now waiting on the queue
+        time.sleep(0.01)
+
+    session.finish()
+    reader.join(timeout=2)
+    assert not reader.is_alive() and session.source.closed
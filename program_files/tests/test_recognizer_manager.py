@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Tests for recognizer reuse, throttled partials and word-aligned splits"""
+
+import json
+
+from program_files.config.config import RecognizerConfig
+from program_files.speech.recognizer_manager import RecognizerManager, RecognizerPool
+
+SAMPLE_RATE = 16000
+FRAME = b"\x00\x00" * 1600  # 0.1s of 16-bit mono
+
+
+class FakeRecognizer:
+    """Scripted KaldiRecognizer: words are timed from its own first sample"""
+
+    def __init__(self):
+        self.samples = 0
+        self.partial_polls = 0
+        self.partial = ""
+        self.finals = 0
+
+    def AcceptWaveform(self, data):
+        self.samples += len(data) // 2
+        return False
+
+    def PartialResult(self):
+        self.partial_polls += 1
+        return json.dumps({"partial": self.partial})
+
+    def FinalResult(self):
+        self.finals += 1
+        t = self.samples / SAMPLE_RATE
+        words = [{"word": "hello", "start": t - 0.4, "end": t - 0.3}, {"word": "there", "start": t - 0.2, "end": t - 0.1}]
+        return json.dumps({"text": "hello there", "result": words})
+
+
+class FakePool(RecognizerPool):
+    def _create(self):
+        rec = FakeRecognizer()
+        self.samples_fed[id(rec)] = 0
+        return rec
+
+
+def make_manager(pool=None, poll_interval=3):
+    pool = pool or FakePool(None, SAMPLE_RATE)
+    return RecognizerManager(sample_rate=SAMPLE_RATE, config=RecognizerConfig(partial_poll_interval=poll_interval), pool=pool)
+
+
+def test_partials_are_polled_at_the_configured_rate_and_popped_once():
+    manager = make_manager()
+    manager.rec.partial = "hello"
+    for _ in range(6):
+        assert manager.accept(FRAME) is None
+
+    assert manager.rec.partial_polls == 2
+    assert manager.pop_partial() == "hello"
+    assert manager.pop_partial() is None
+
+    for _ in range(3):
+        manager.accept(FRAME)
+    assert manager.pop_partial() is None  # Unchanged partials are not reported again
+
+
+def test_force_endpoint_keeps_the_recognizer_and_times_words_in_stream_time():
+    manager = make_manager()
+    rec = manager.rec
+    for _ in range(10):
+        manager.accept(FRAME)
+
+    final = manager.force_endpoint()
+
+    assert manager.rec is rec
+    assert final["text"] == "hello there"
+    assert [round(w["start"], 2) for w in final["result"]] == [0.6, 0.8]
+    assert RecognizerManager.split_words_at(final["result"], 0.75) == ("hello", "there")
+
+
+def test_recognizers_are_reused_with_stream_time_offsets():
+    pool = FakePool(None, SAMPLE_RATE)
+    first = make_manager(pool)
+    rec = first.rec
+    for _ in range(10):
+        first.accept(FRAME)
+    first.close()
+
+    second = make_manager(pool)
+    assert second.rec is rec
+    for _ in range(5):
+        second.accept(FRAME)
+
+    final = second.force_endpoint()
+    # The recognizer has decoded 1.5s in total, this stream only 0.5s
+    assert [round(w["start"], 2) for w in final["result"]] == [0.1, 0.3]
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Tests for the chunked hybrid reference index"""
+
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from conftest import use_keyword_backend
+from program_files.ai import embedding_service
+from rag_functions.utils.reference_index import BM25Index, ReferenceIndex, chunk_text
+
+TOPICS = ["warfarin", "insulin", "asthma", "dementia", "fracture", "sepsis"]
+
+
+def test_chunks_overlap_and_bm25_prefers_rare_terms():
+    words = [f"w{i}" for i in range(450)]
+    chunks = chunk_text(" ".join(words), chunk_words=200, overlap=40)
+    assert [len(c.split()) for c in chunks] == [200, 200, 130]
+    assert chunks[1].split()[0] == "w160"
+
+    bm25 = BM25Index.build(["patient takes warfarin daily", "patient has asthma", "patient walks daily"])
+    scores = bm25.scores("warfarin patient")
+    assert int(np.argmax(scores)) == 0
+    assert scores[1] == scores[2] > 0  # "patient" alone: in every document, so it weighs little
+    assert scores[0] > 4 * scores[1]
+
+
+def test_index_persists_and_answers_hybrid_queries():
+    backend = use_keyword_backend(TOPICS)
+    texts = [f"Guidance {i} on {TOPICS[i % len(TOPICS)]} care for residents, document {i}." for i in range(3000)]
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            index = ReferenceIndex(texts, [{'source': f"doc{i}"} for i in range(len(texts))], index_dir=Path(tmp))
+            assert len(index) == 3000 and len(backend.seen) == 3000
+
+            start = time.perf_counter()
+            hits = index.search("asthma inhaler technique", k=5)
+            elapsed = time.perf_counter() - start
+            assert len(hits) == 5 and all("asthma" in hit['text'] for hit in hits)
+            assert hits[0]['meta']['chunk'] == 0
+            assert elapsed < 0.5
+
+            reopened = ReferenceIndex(texts, [{'source': f"doc{i}"} for i in range(len(texts))], index_dir=Path(tmp))
+            assert len(backend.seen) == 3001  # Only the query above; nothing re-embedded
+            assert [h['text'] for h in reopened.search("sepsis", k=3, hybrid=False)][0].count("sepsis") == 1
+    finally:
+        embedding_service._service = None
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Tests for the incremental sentence chunker used by streaming TTS"""
+
+import re
+import sys
+import types
+
+from program_files.config.config import GemmaClientConfig
+from program_files.tts.text_processing import SentenceChunker, split_text_into_chunks
+
+
+def test_first_sentence_emitted_before_stream_ends():
+    """The first chunk is available as soon as the second sentence starts"""
+    chunker = SentenceChunker(max_chunk_length=80)
+    tokens = ["Take your", " medication", " with food.", " Then", " rest for", " an hour."]
+
+    emitted = []
+    for i, token in enumerate(tokens):
+        chunks = chunker.feed(token)
+        if chunks:
+            emitted.append((i, chunks))
+
+    assert emitted == [(3, ["Take your medication with food."])]
+    assert chunker.flush() == ["Then rest for an hour."]
+
+
+def test_abbreviations_do_not_split():
+    """Protected abbreviations never end a sentence"""
+    text = "Ask Dr. Smith about it, e.g. Tomorrow at 9 a.m. Please call. Thanks again!"
+    chunker = SentenceChunker(max_chunk_length=200)
+    chunks = chunker.feed(text) + chunker.flush()
+    assert chunks == [
+        "Ask Dr. Smith about it, e.g. Tomorrow at 9 a.m. Please call.",
+        "Thanks again!",
+    ]
+
+
+def test_short_fragments_are_merged():
+    """Fragments shorter than the minimum are held back and merged"""
+    chunker = SentenceChunker(max_chunk_length=80)
+    assert chunker.feed("Ok. ") == []
+    assert chunker.feed("Yes, that is fine. Bye") == ["Ok. Yes, that is fine."]
+    assert chunker.flush() == []
+
+
+def test_long_sentence_cut_at_clause_break():
+    """Run-on sentences are cut at a clause break to bound latency"""
+    chunker = SentenceChunker(max_chunk_length=30)
+    chunks = chunker.feed("Keep the wound clean and dry, change the dressing daily, and watch for redness")
+    assert chunks == ["Keep the wound clean and dry,", "change the dressing daily,"]
+    assert chunker.flush() == ["and watch for redness"]
+
+
+def test_split_text_into_chunks_merges_streamed_sentences():
+    """Whole-text callers get the streamed sentences, merged up to the limit"""
+    text = "First sentence here. Second one is here. Third sentence follows."
+    assert split_text_into_chunks(text, max_chunk_length=45) == [
+        "First sentence here. Second one is here.",
+        "Third sentence follows.",
+    ]
+
+    streamed = list(SentenceChunker(max_chunk_length=45).iter_chunks(re.findall(r"\S+\s*", text)))
+    assert streamed == ["First sentence here.", "Second one is here.", "Third sentence follows."]
+
+
+def test_no_is_only_an_abbreviation_before_a_number():
+    chunker = SentenceChunker(max_chunk_length=200)
+    chunks = chunker.feed("No. It's fine. Take tablet No. 2 at night. ") + chunker.flush()
+    assert chunks == ["No. It's fine.", "Take tablet No. 2 at night."]
+
+
+def test_edge_voice_speaks_the_first_sentence_while_the_reply_streams():
+    """Streaming is on by default and the edge player speaks chunks as they arrive"""
+    assert GemmaClientConfig().stream
+    missing = [name for name in ("pygame", "soundfile", "edge_tts") if name not in sys.modules]
+    for name in missing:
+        sys.modules[name] = types.ModuleType(name)
+    try:
+        from program_files.tts.tts_personal import OfflineTTSFile
+    finally:
+        for name in missing:
+            del sys.modules[name]
+
+    events = []
+    player = OfflineTTSFile.__new__(OfflineTTSFile)
+    player.tts_available = player.mixer_initialized = True
+    player._speak_chunk = lambda chunk, index: events.append(("spoke", chunk))
+
+    def tokens():
+        for token in ["Take your", " medication", " with food.", " Then", " rest for", " an hour."]:
+            events.append(("token", token))
+            yield token
+
+    assert player.speak_stream(SentenceChunker(max_chunk_length=80).iter_chunks(tokens()))
+    assert events.index(("spoke", "Take your medication with food.")) < events.index(("token", " an hour."))
+    assert events[-1] == ("spoke", "Then rest for an hour.")
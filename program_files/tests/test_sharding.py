@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Tests for time-bucketed utterance shards"""
+
+import tempfile
+from datetime import datetime
+
+import chromadb
+
+from program_files.database.sharding import ShardedCollection
+
+ROWS = {
+    "jan": ("2026-01-15T10:00:00", [1.0, 0.0]),
+    "feb": ("2026-02-03T10:00:00", [0.9, 0.1]),
+    "oct": ("2026-10-19T10:00:00", [0.0, 1.0]),
+}
+
+
+def _sharded(tmp, bucket="month"):
+    sharded = ShardedCollection(chromadb.PersistentClient(path=tmp), "conversations", bucket)
+    sharded.add(ids=list(ROWS), documents=list(ROWS),
+                metadatas=[{'timestamp': ts, 'session_id': "s"} for ts, _ in ROWS.values()],
+                embeddings=[embedding for _, embedding in ROWS.values()])  # Explicit, so no embedding model is needed
+    return sharded
+
+
+def test_rows_are_routed_by_timestamp():
+    with tempfile.TemporaryDirectory() as tmp:
+        sharded = _sharded(tmp)
+        assert sharded.shard_names() == ["conversations_2026_10", "conversations_2026_02", "conversations_2026_01"]
+        assert sharded.count() == 3
+        assert sharded.shard_names(since=datetime(2026, 2, 20)) == ["conversations_2026_10", "conversations_2026_02"]
+        assert sharded.get(since=datetime(2026, 3, 1))['ids'] == ["oct"]
+        assert len(sharded.get(limit=2)['ids']) == 2
+
+        weekly = ShardedCollection(sharded.client, "utterances", "week")
+        assert weekly.shard_name(datetime(2026, 10, 19)) == "utterances_2026_w43"
+
+
+def test_query_merges_shards_by_distance():
+    with tempfile.TemporaryDirectory() as tmp:
+        sharded = _sharded(tmp)
+        result = sharded.query(query_embeddings=[[1.0, 0.0]], n_results=2)
+        assert result['ids'] == [["jan", "feb"]]
+        assert result['distances'][0][0] <= result['distances'][0][1]
+
+        newest = sharded.query(query_embeddings=[[1.0, 0.0]], n_results=2, max_shards=1)
+        assert newest['ids'] == [["oct"]]
+
+
+def test_update_finds_the_owning_shard():
+    with tempfile.TemporaryDirectory() as tmp:
+        sharded = _sharded(tmp)
+        sharded.update(ids=["feb", "oct"], metadatas=[{'session_id': "x"}, {'session_id': "y"}])
+        stored = sharded.get(where={"session_id": "s"}, include=['metadatas'])
+        assert stored['ids'] == ["jan"]
+
+
+def test_update_and_delete_open_only_the_owning_shards():
+    with tempfile.TemporaryDirectory() as tmp:
+        sharded = _sharded(tmp)
+        opened = []
+        open_shard = sharded._open
+        sharded._open = lambda name: opened.append(name) or open_shard(name)
+
+        sharded.update(ids=["jan"], metadatas=[{'timestamp': ROWS["jan"][0], 'session_id': "x"}])
+        assert opened == ["conversations_2026_01"] * 2  # Routed by the timestamp shard key: located, then updated
+
+        opened.clear()
+        sharded.delete(ids=["oct"])
+        assert opened == ["conversations_2026_10"] * 2  # Newest shard first, stop once found
+        assert sharded.count() == 2
+        assert sharded.get(where={"session_id": "x"}, include=[])['ids'] == ["jan"]
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Tests for concurrent and lazy component loading at startup"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+from program_files.core.startup import StartupOrchestrator
+
+
+def test_critical_components_load_concurrently():
+    """Independent loaders overlap instead of running back to back"""
+    orchestrator = StartupOrchestrator(max_workers=3)
+    for name in ("vosk", "ecapa", "chroma"):
+        orchestrator.add(name, lambda name=name: (time.sleep(0.2), name)[1])
+
+    start = time.perf_counter()
+    components = orchestrator.run()
+    assert time.perf_counter() - start < 0.5
+    assert [components[n] for n in ("vosk", "ecapa", "chroma")] == ["vosk", "ecapa", "chroma"]
+    assert len(orchestrator.timeline.events) == 3
+
+
+def test_lazy_component_proxies_and_loads_once():
+    """Lazy components load once and forward attribute access"""
+    calls = []
+    release = threading.Event()
+
+    def load_emotion():
+        calls.append(1)
+        release.wait(timeout=5)
+        return SimpleNamespace(label="Joy")
+
+    orchestrator = StartupOrchestrator(max_workers=2)
+    orchestrator.add("vosk", lambda: "model")
+    emotion = orchestrator.add("emotion", load_emotion, mode="lazy")
+    assert not calls  # Nothing starts before the critical set is ready
+
+    orchestrator.run()
+    assert not emotion.loaded
+    release.set()
+    assert emotion.label == "Joy"  # Attribute access goes through the proxy
+    assert emotion.loaded and calls == [1]
+
+
+def test_critical_failure_is_reported():
+    """A failing critical loader aborts startup with its name"""
+    orchestrator = StartupOrchestrator(max_workers=2)
+    orchestrator.add("vosk", lambda: "model")
+    orchestrator.add("chroma", lambda: 1 / 0)
+    try:
+        orchestrator.run()
+    except RuntimeError as e:
+        assert "chroma" in str(e)
+    else:
+        raise AssertionError("expected RuntimeError")
+
+
+def test_streaming_check_does_not_wait_for_tts():
+    """Asking whether TTS can stream must not block on a TTS that is still loading"""
+    from program_files.core.pipeline_helpers import supports_speak_stream
+    from program_files.tts.tts_backends import SilentTTSPlayer
+
+    release = threading.Event()
+    orchestrator = StartupOrchestrator(max_workers=2)
+    tts = orchestrator.add("tts", lambda: (release.wait(5), SilentTTSPlayer())[1], mode="background")
+
+    start = time.perf_counter()
+    assert not supports_speak_stream(tts)
+    assert time.perf_counter() - start < 0.5
+
+    release.set()
+    tts.get()
+    assert supports_speak_stream(tts)
+    assert not supports_speak_stream(SimpleNamespace())
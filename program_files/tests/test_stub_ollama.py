@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Tests for the benchmark stub Ollama server and stage timer"""
+
+import time
+
+from program_files.ai.gemma_client import GemmaClient
+from program_files.utils.stage_timer import StageTimer
+from program_files.utils.stub_ollama import StubOllamaServer
+
+
+def test_stub_serves_streaming_and_blocking_generate():
+    """Both request styles return the same canned reply"""
+    with StubOllamaServer(first_token_latency=0.0, tokens_per_second=0, response_text="Rest and drink water.") as stub:
+        client = GemmaClient("gemma3n:e2b", stub.url)
+        assert client.is_server_available()
+        assert list(client.generate_response_stream("hi")) == ["Rest ", "and ", "drink ", "water."]
+        assert client.generate_response("hi") == "Rest and drink water."
+        assert stub.request_count == 2
+
+
+def test_stub_latency_is_configurable():
+    """First-token latency and token rate shape the response time"""
+    with StubOllamaServer(first_token_latency=0.05, tokens_per_second=100, response_text="a b c d e f") as stub:
+        start = time.perf_counter()
+        list(GemmaClient("gemma3n:e2b", stub.url).generate_response_stream("hi"))
+        assert time.perf_counter() - start >= 0.05 + 5 * 0.01
+
+
+def test_stage_timer_summary_and_disabled_noop():
+    """Disabled timers record nothing; enabled ones summarize per stage"""
+    timer = StageTimer()
+    with timer.stage("vad"):
+        pass
+    assert timer.summary() == {}
+
+    timer.enabled = True
+    for seconds in (0.1, 0.2, 0.3):
+        timer.record("asr", seconds)
+    stats = timer.summary()["asr"]
+    assert stats["count"] == 3
+    assert stats["p50"] == 0.2 and stats["max"] == 0.3
+
+
+def test_default_benchmark_corpus_is_generated_deterministically():
+    """The benchmark's default corpus resolves to WAV files, identical on every checkout"""
+    import hashlib
+    import tempfile
+    from pathlib import Path
+
+    from program_files.scripts.benchmark_pipeline import DEFAULT_CORPUS, find_corpus
+    from program_files.utils.benchmark_corpus import generate_corpus
+
+    files = find_corpus([str(DEFAULT_CORPUS)])
+    assert len(files) == 3 and all(f.suffix == ".wav" for f in files)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fresh = generate_corpus(Path(tmp))
+        assert [hashlib.sha256(f.read_bytes()).hexdigest() for f in fresh] == \
+               [hashlib.sha256(f.read_bytes()).hexdigest() for f in files]
+
+
+def test_corpus_transcripts_are_injected_and_idle_stages_fail_the_baseline():
+    """Every synthetic conversation has a transcript with a question, and an unmeasured stage is a regression"""
+    import tempfile
+    from pathlib import Path
+
+    from program_files.scripts.benchmark_pipeline import (AUDIO_STAGES, TRANSCRIPT_STAGES, compare_to_baseline,
+                                                          read_transcript)
+    from program_files.utils.benchmark_corpus import generate_corpus
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for path in generate_corpus(Path(tmp)):
+            transcript = read_transcript(path)
+            assert len(transcript) == 6 and any(turn.endswith("?") for turn in transcript)
+        assert read_transcript(Path(tmp) / "recorded.wav") == []
+
+    measured = {"count": 4, "total": 0.4, "mean": 0.1, "p50": 0.1, "p95": 0.1, "max": 0.1}
+    report = {"stages": {stage: measured for stage in AUDIO_STAGES}, "cpu_seconds": 1.0, "peak_rss_mb": 100.0,
+              "wall_seconds": 1.0}
+    assert compare_to_baseline(report, report, 0.2) == []
+    assert compare_to_baseline(report, report, 0.2, AUDIO_STAGES + TRANSCRIPT_STAGES) == \
+        ["llm recorded no samples", "retrieval recorded no samples", "tts recorded no samples"]
+    assert compare_to_baseline(report, {"stages": {"llm": measured}}, 0.2) == ["llm recorded no samples"]
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Tests for table strategy selection and table records"""
+
+from types import SimpleNamespace
+
+from rag_functions.utils.ocr_layout import (choose_table_strategy, page_table_features, reconstruct_tables,
+                                            table_record, to_columns)
+
+LETTER = SimpleNamespace(width=612, height=792)  # 48.5 units of 100 pt²
+PROSE = "Blood pressure was stable throughout the admission and the patient mobilised well. " * 6
+
+
+def _point(x, y):
+    return SimpleNamespace(x=x, y=y)
+
+
+class FakePage:
+    def __init__(self, drawings=(), text=PROSE):
+        self.drawings = [{"items": items} for items in drawings]
+        self.text = text
+        self.rect = LETTER
+
+    def get_drawings(self):
+        return self.drawings
+
+    def get_text(self):
+        return self.text
+
+
+def _rule(x1, y1, x2, y2):
+    return ("l", _point(x1, y1), _point(x2, y2))
+
+
+def _rect(width, height):
+    return ("re", SimpleNamespace(width=width, height=height))
+
+
+def test_page_features_count_rules_boxes_and_density():
+    page = FakePage([[_rule(0, 10, 100, 10), _rule(0, 20, 100, 20.5)], [_rule(5, 0, 5, 50)],
+                     [_rect(100, 1), _rect(1, 80), _rect(40, 20)]])
+    features = page_table_features(page)
+    assert (features['horizontal_lines'], features['vertical_lines'], features['boxes']) == (3, 2, 1)
+    assert features['words'] == 72 and abs(features['words_per_100pt2'] - 72 / 48.4704) < 1e-9
+    assert not features['caption']
+
+
+def test_strategy_follows_rules_captions_and_density():
+    def strategy(drawings=(), text=PROSE):
+        return choose_table_strategy(page_table_features(FakePage(drawings, text)))
+
+    grid = [[_rule(0, y, 100, y) for y in (10, 20)] + [_rule(x, 0, x, 30) for x in (0, 50)]]
+    assert strategy(grid) == "lines_strict"
+    assert strategy([[_rule(0, 10, 100, 10), _rule(0, 20, 100, 20)]]) == "lines"
+    assert strategy([[_rect(40, 20), _rect(40, 20)]]) == "lines"
+    assert strategy(text=f"Table 2: Medications\n{PROSE}") == "text"
+    assert strategy() is None
+    assert strategy(grid, text="Figure 1 heart rate over time mmHg bpm") is None  # Chart axes, sparse text
+    assert strategy(grid, text="a b") is None
+
+
+def test_to_columns_pads_ragged_rows():
+    assert to_columns([["a", "b", "c"], ["d"]]) == [["a", "d"], ["b", None], ["c", None]]
+    assert to_columns([]) == []
+
+
+def test_every_extractor_returns_the_same_record_shape():
+    rows = [["Drug", "Dose"], ["Aspirin", "75 mg"], ["Ramipril", "5 mg"]]
+    table = SimpleNamespace(extract=lambda: rows, header=SimpleNamespace(external=False, names=rows[0]),
+                            bbox=(10, 20, 300, 120), rows=[SimpleNamespace(bbox=(10, y, 300, y + 30)) for y in (20, 50, 80)])
+    detected = table_record(table, 0, 0, "lines")
+    assert detected['header'] == ["Drug", "Dose"]
+    assert detected['columns'] == [["Aspirin", "Ramipril"], ["75 mg", "5 mg"]]
+    assert detected['row_bboxes'][1] == (10, 50, 300, 80) and detected['strategy'] == "lines"
+
+    table.header = SimpleNamespace(external=True, names=["Name", "Amount"])
+    assert table_record(table, 0, 0, "lines")['columns'][0] == ["Drug", "Aspirin", "Ramipril"]
+
+    text = "Table 1: Observations\nMeasure\nValue\nPulse 72\nTemp 37.1\nNote. Taken on admission"
+    reconstructed = reconstruct_tables(text, 2)
+    assert len(reconstructed) == 1
+    assert reconstructed[0].keys() == detected.keys()
+    assert reconstructed[0]['extraction_method'] == "reconstructed" and reconstructed[0]['row_bboxes'] is None
+    assert reconstructed[0]['page'] == 3 and reconstructed[0]['header'] == ["Measure", "Value"]
+    assert reconstructed[0]['title'] == "Table 1: Observations"
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Tests for the persisted template/category embedding index"""
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from conftest import use_keyword_backend
+from program_files.ai import embedding_service
+from rag_functions.ml.vector_operations import EmbeddingIndex
+
+WORDS = ["heart", "lung", "skin", "note", "report"]
+
+
+def test_index_scores_all_entries_and_persists():
+    backend = use_keyword_backend(WORDS)
+    entries = {"cardio": "heart report", "resp": "lung note", "derm": "skin note"}
+    try:
+        _check_index(backend, entries)
+    finally:
+        embedding_service._service = None
+
+
+def _check_index(backend, entries):
+    with tempfile.TemporaryDirectory() as tmp:
+        index = EmbeddingIndex("templates", entries, index_dir=Path(tmp))
+        scores = index.scores("the heart sounds are in the report")
+        assert index.names[int(np.argmax(scores))] == "cardio"
+        assert index.path.exists() and index.matrix.shape == (3, len(WORDS))
+
+        embedding_service._service._cache.clear()
+        backend.seen.clear()
+        EmbeddingIndex("templates", entries, index_dir=Path(tmp))
+        assert backend.seen == []  # Loaded from disk, nothing re-encoded
+
+        changed = EmbeddingIndex("templates", {**entries, "derm": "skin report"}, index_dir=Path(tmp))
+        assert changed.path != index.path and not index.path.exists()
+        assert "skin report" in backend.seen
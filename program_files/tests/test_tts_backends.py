@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Tests for resident TTS backends: latency budget, offline loading and backend sharing"""
+
+import importlib.machinery
+import os
+import sys
+import tempfile
+import time
+import types
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+
+from program_files.config.config import TTSConfig
+from program_files.tts import tts_backends
+from program_files.tts.tts_backends import (CoquiBackend, SilentTTSPlayer, TTSBackend, coqui_model_dir,
+                                            create_tts_player, get_tts_backend, resolve_tts_backend)
+
+
+class SlowBackend(TTSBackend):
+    """Stand-in model whose forward pass costs *seconds_per_sentence* per sentence"""
+
+    name = "slow"
+
+    def __init__(self, config, seconds_per_sentence=0.0, fail=False):
+        super().__init__(config)
+        self.seconds_per_sentence = seconds_per_sentence
+        self.fail = fail
+        self.batches = []
+
+    def _load(self):
+        if self.fail:
+            raise RuntimeError("no model")
+
+    def _synthesize_batch(self, texts, speaker):
+        self.batches.append(len(texts))
+        time.sleep(self.seconds_per_sentence * len(texts))
+        return [np.zeros(100, dtype=np.float32) for _ in texts]
+
+
+def test_slow_batches_shrink_the_batch_size():
+    config = TTSConfig(batch_size=4, max_synthesis_latency=0.15, warmup_text="")
+    backend = SlowBackend(config, seconds_per_sentence=0.05)
+
+    waveforms = backend.synthesize_batch([f"sentence {i}" for i in range(9)])
+
+    assert len(waveforms) == 9
+    assert backend.batches == [4, 2, 2, 1]  # 4 x 0.05s is over budget, 2 x 0.05s is not
+    assert backend.batch_size == 2
+    assert backend.get_latency_stats()["over_budget"] == 1
+
+
+def test_offline_coqui_without_a_local_model_fails_clearly():
+    with tempfile.TemporaryDirectory() as tmp:
+        config = TTSConfig(backend="coqui", model_dir=tmp, warmup_text="")
+        backend = CoquiBackend(config)
+        try:
+            backend._load()
+        except FileNotFoundError as e:
+            assert tmp in str(e) and "offline" in str(e)
+        else:
+            raise AssertionError("expected FileNotFoundError")
+        assert not backend.load()
+
+
+def test_model_dir_defaults_to_coqui_cache():
+    previous = os.environ.get("TTS_HOME")
+    os.environ["TTS_HOME"] = "/models"
+    try:
+        assert coqui_model_dir(TTSConfig()) == Path("/models/tts/tts_models--en--vctk--vits")
+        assert coqui_model_dir(TTSConfig(model_dir="/opt/voice")) == Path("/opt/voice")
+    finally:
+        if previous is None:
+            del os.environ["TTS_HOME"]
+        else:
+            os.environ["TTS_HOME"] = previous
+
+
+def test_backends_are_shared_per_config_and_fall_back_by_network_policy():
+    edge = types.ModuleType("program_files.tts.tts_personal")
+    edge.OfflineTTSFile = type("OfflineTTSFile", (), {})
+    sys.modules["program_files.tts.tts_personal"] = edge
+    tts_backends.TTS_BACKENDS["slow"] = SlowBackend
+    tts_backends.TTS_BACKENDS["broken"] = lambda config: SlowBackend(config, fail=True)
+    try:
+        first = get_tts_backend(TTSConfig(backend="slow", warmup_text=""))
+        assert get_tts_backend(TTSConfig(backend="slow", warmup_text="")) is first
+        assert get_tts_backend(TTSConfig(backend="slow", warmup_text="", speaker="p225")) is not first
+
+        broken = TTSConfig(backend="broken", warmup_text="", offline=False)
+        assert isinstance(create_tts_player(broken), edge.OfflineTTSFile)
+        assert isinstance(create_tts_player(replace(broken, offline=True)), SilentTTSPlayer)
+    finally:
+        del sys.modules["program_files.tts.tts_personal"]
+        del tts_backends.TTS_BACKENDS["slow"], tts_backends.TTS_BACKENDS["broken"]
+        tts_backends._backends.clear()
+
+
+def test_auto_prefers_a_resident_coqui_model_on_disk():
+    with tempfile.TemporaryDirectory() as tmp:
+        config = TTSConfig(model_dir=tmp)
+        assert config.backend == "auto"
+        assert resolve_tts_backend(config) == "none"
+        assert resolve_tts_backend(replace(config, offline=False)) == "edge"
+
+        for name in ("model_file.pth", "config.json"):
+            Path(tmp, name).touch()
+        coqui = types.ModuleType("TTS")
+        coqui.__spec__ = importlib.machinery.ModuleSpec("TTS", None)
+        installed = sys.modules.get("TTS")
+        sys.modules["TTS"] = coqui
+        try:
+            assert resolve_tts_backend(config) == "coqui"
+        finally:
+            if installed is None:
+                del sys.modules["TTS"]
+            else:
+                sys.modules["TTS"] = installed
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Tests for frame-aligned VAD and speech segment events"""
+
+from dataclasses import replace
+
+import numpy as np
+
+from program_files.config.config import SpeechProcessorConfig
+from program_files.speech.vad import FrameAligner, VoiceActivityDetector, create_classifier
+
+ENERGY_CONFIG = SpeechProcessorConfig(backend="energy", frame_ms=30, onset_frames=3, hangover_ms=90)
+
+
+def _tone(seconds, amplitude=8000, sample_rate=16000):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.int16)
+
+
+def _reads(samples, read_size=2048):
+    data = samples.tobytes()
+    return [data[i:i + read_size * 2] for i in range(0, len(data), read_size * 2)]
+
+
+def test_aligner_frames_every_sample_once():
+    """2048-sample reads are re-framed into exact 480-sample frames with the tail carried over"""
+    samples = np.arange(2048 * 5, dtype=np.int16)
+    aligner = FrameAligner(480 * 2)
+
+    frames = [aligner.push(data).view(np.int16).copy() for data in _reads(samples)]
+    framed = np.concatenate([f.reshape(-1) for f in frames])
+
+    assert aligner.frames_emitted == len(samples) // 480
+    assert np.array_equal(framed, samples[:len(framed)])
+    assert aligner.pending_bytes == (len(samples) % 480) * 2
+
+
+def test_energy_segments_with_onset_and_hangover():
+    """Speech between 0.5s and 1.5s becomes one start/end pair; a short click is ignored"""
+    silence = np.zeros(8000, dtype=np.int16)
+    click = _tone(0.03)  # One frame: shorter than the onset
+    audio = np.concatenate([silence, _tone(1.0), silence, click, silence])
+
+    vad = VoiceActivityDetector(ENERGY_CONFIG)
+    events = [e for data in _reads(audio) for e in vad.process(data)]
+    events += vad.flush()
+
+    assert [e.kind for e in events] == ["start", "end"]
+    assert abs(events[0].time - 0.5) <= 0.03
+    assert abs(events[1].time - 1.5) <= 0.03
+
+
+def test_webrtc_classifies_all_frames():
+    """Every frame of a read is classified, not just the first 960 bytes"""
+    config = replace(ENERGY_CONFIG, backend="webrtc")
+    classifier = create_classifier(config)
+    aligner = FrameAligner(480 * 2)
+    frames = aligner.push(np.zeros(2048, dtype=np.int16).tobytes())
+
+    assert classifier.classify(frames).shape == (4,)
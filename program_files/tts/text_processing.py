@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Text clean-up and chunking shared by all TTS backends.
+
+Kept free of audio and model imports so the resident backends, the
+edge-tts fallback and whole-text callers can share one implementation.
+"""
+
+import re
+
+_EMOJI_PATTERN = re.compile("["
+    u"\U0001F600-\U0001F64F"  # emoticons
+    u"\U0001F300-\U0001F5FF"  # symbols & pictographs
+    u"\U0001F680-\U0001F6FF"  # transport & map symbols
+    u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
+    u"\U00002702-\U000027B0"
+    u"\U000024C2-\U0001F251"
+    "]+", flags=re.UNICODE)
+_UNSAFE_CHARS = re.compile(r'[^\w\s\.\,\!\?\-\'\"]')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def clean_text_for_tts(text):
+    """Remove emojis and other problematic characters for TTS processing"""
+    cleaned = _EMOJI_PATTERN.sub('', text)
+    cleaned = _UNSAFE_CHARS.sub('', cleaned)
+    return _WHITESPACE.sub(' ', cleaned).strip()
+
+
+# Abbreviations that end in a period but never end a sentence.  Matched
+# against the text up to (and including) a candidate boundary period.
+_ABBREVIATION = re.compile(
+    r"(?:^|[\s(\[\"'])(?:e\.g|i\.e|etc|vs|Dr|Mr|Mrs|Ms|Prof|Ph\.D|a\.m|p\.m|U\.S\.A|U\.S|U\.K|St|Jr|Sr|approx)\.$"
+)
+# "No." is only an abbreviation when a number follows ("No. 5"), not in "No. It's fine."
+_NUMBER_ABBREVIATION = re.compile(r"(?:^|[\s(\[\"'])No\.$")
+# Sentence end: terminal punctuation (plus closing quotes/brackets), whitespace,
+# then something that starts a new sentence.
+_BOUNDARY = re.compile(r"[.!?]+[\"')\]]*\s+(?=[\"'(\[]?[A-Z0-9])")
+# Clause breaks used to bound latency when a sentence runs long.
+_CLAUSE_BREAK = re.compile(r"[,;:]\s+")
+# A boundary needs a few characters of look-ahead, so unscanned text is
+# re-examined from this far back when more tokens arrive.
+_RESCAN_WINDOW = 16
+
+
+class SentenceChunker:
+    """Incrementally turns a token stream into speakable chunks.
+
+    Text is appended with :meth:`feed`, which returns every chunk that has
+    reached a safe sentence boundary so far; :meth:`flush` returns whatever
+    is left once the stream ends.  Sentences longer than
+    ``max_chunk_length`` are cut at the last clause break so audio never
+    waits for a run-on sentence to finish.
+    """
+
+    def __init__(self, max_chunk_length: int = 100, min_chunk_length: int = 5):
+        self.max_chunk_length = max_chunk_length
+        self.min_chunk_length = min_chunk_length
+        self.buffer = ""
+        self._pending = ""  # Short fragment waiting to be merged with the next sentence
+        self._scan_from = 0
+
+    def _next_cut(self):
+        """Index just past the next safe boundary in the buffer, or None"""
+        for match in _BOUNDARY.finditer(self.buffer, self._scan_from):
+            if _ABBREVIATION.search(self.buffer, 0, match.start() + 1):
+                continue
+            if self.buffer[match.end()].isdigit() and _NUMBER_ABBREVIATION.search(self.buffer, 0, match.start() + 1):
+                continue
+            return match.end()
+
+        if len(self.buffer) > self.max_chunk_length:
+            # Prefer the last clause break inside the limit, else the first one after it
+            breaks = list(_CLAUSE_BREAK.finditer(self.buffer, 0, self.max_chunk_length))
+            if breaks:
+                return breaks[-1].end()
+            late_break = _CLAUSE_BREAK.search(self.buffer, self.max_chunk_length)
+            if late_break:
+                return late_break.end()
+
+        self._scan_from = max(0, len(self.buffer) - _RESCAN_WINDOW)
+        return None
+
+    def _emit(self, sentence: str):
+        sentence = _WHITESPACE.sub(' ', sentence).strip()
+        if len(sentence) < 3 and not self._pending:
+            return None  # Stray punctuation or fragment
+
+        text = f"{self._pending} {sentence}".strip()
+        if len(text) < self.min_chunk_length:
+            self._pending = text
+            return None
+
+        self._pending = ""
+        return text
+
+    def feed(self, text: str) -> list:
+        """Append streamed *text* and return any completed chunks"""
+        self.buffer += text
+        chunks = []
+
+        while True:
+            cut = self._next_cut()
+            if cut is None:
+                break
+
+            sentence, self.buffer = self.buffer[:cut], self.buffer[cut:]
+            self._scan_from = 0
+            chunk = self._emit(sentence)
+            if chunk:
+                chunks.append(chunk)
+
+        return chunks
+
+    def flush(self) -> list:
+        """Return the remaining text once the stream has ended"""
+        remainder, self.buffer, self._scan_from = self.buffer, "", 0
+        text = _WHITESPACE.sub(' ', f"{self._pending} {remainder}").strip()
+        self._pending = ""
+        return [text] if len(text) >= self.min_chunk_length else []
+
+    def iter_chunks(self, tokens):
+        """Yield chunks from an iterable of tokens as soon as each is speakable"""
+        for token in tokens:
+            yield from self.feed(token)
+        yield from self.flush()
+
+
+def split_text_into_chunks(text, max_chunk_length=100):
+    """Split complete text into chunks of whole sentences for streaming TTS"""
+    chunker = SentenceChunker(max_chunk_length)
+    sentences = chunker.feed(text) + chunker.flush()
+
+    chunks = []
+    current_chunk = ""
+    for sentence in sentences:
+        # If adding this sentence would exceed the limit, save current chunk and start new one
+        if current_chunk and len(current_chunk) + len(sentence) > max_chunk_length:
+            chunks.append(current_chunk)
+            current_chunk = sentence
+        else:
+            current_chunk = f"{current_chunk} {sentence}" if current_chunk else sentence
+
+    if current_chunk:
+        chunks.append(current_chunk)
+
+    return chunks
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""Pluggable TTS backends with a warm, resident synthesis model.
+
+Backends are loaded once, kept in memory for the lifetime of the process
+and synthesize straight to float32 numpy arrays - no WAV files and no
+network access.  Every forward pass is timed; a batch slower than
+``max_synthesis_latency`` halves the batch size for the following ones,
+so per-call latency settles under the budget.
+"""
+
+import importlib.util
+import os
+import sys
+import time
+import threading
+from collections import deque
+from dataclasses import astuple, replace
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from program_files.config.config import TTSConfig
+from .text_processing import clean_text_for_tts, split_text_into_chunks
+
+
+class TTSBackend:
+    """Base class for resident TTS engines.
+
+    Subclasses implement ``_load`` and ``_synthesize_batch``; this class
+    handles lazy loading, warm-up, batching and latency bookkeeping.
+    """
+
+    name = "base"
+
+    def __init__(self, config: Optional[TTSConfig] = None):
+        if config is None:
+            from program_files.config.config import cfg
+            config = cfg.tts
+
+        self.config = config
+        self.sample_rate = config.sample_rate
+        self.batch_size = max(1, config.batch_size)  # Shrinks while batches run over the latency budget
+        self.loaded = False
+        self.latencies = deque(maxlen=config.latency_history_size)
+        self._lock = threading.Lock()  # One forward pass at a time
+
+    def _load(self):
+        raise NotImplementedError
+
+    def _synthesize_batch(self, texts: List[str], speaker: Optional[str]) -> List[np.ndarray]:
+        raise NotImplementedError
+
+    def load(self) -> bool:
+        """Load and warm the model; safe to call repeatedly"""
+        if self.loaded:
+            return True
+
+        start = time.time()
+        try:
+            self._load()
+        except Exception as e:
+            print(f"❌ Error loading {self.name} TTS backend: {e}")
+            return False
+
+        self.loaded = True
+        print(f"✅ {self.name} TTS loaded in {time.time() - start:.2f}s ({self.sample_rate} Hz)")
+
+        if self.config.warmup_text:
+            self.synthesize(self.config.warmup_text)
+            self.latencies.clear()  # Warm-up is not representative
+        return True
+
+    def synthesize(self, text: str, speaker: Optional[str] = None) -> np.ndarray:
+        """Synthesize a single sentence to a float32 waveform"""
+        return self.synthesize_batch([text], speaker)[0]
+
+    def synthesize_batch(self, texts: List[str], speaker: Optional[str] = None) -> List[np.ndarray]:
+        """Synthesize several sentences, up to ``batch_size`` per forward pass"""
+        if not texts:
+            return []
+        if not self.loaded and not self.load():
+            return [np.zeros(0, dtype=np.float32) for _ in texts]
+
+        speaker = speaker or self.config.speaker
+        waveforms = []
+
+        i = 0
+        while i < len(texts):
+            batch = texts[i:i + self.batch_size]
+            i += len(batch)
+            start = time.perf_counter()
+            with self._lock:
+                batch_wavs = self._synthesize_batch(batch, speaker)
+            elapsed = time.perf_counter() - start
+
+            audio_seconds = sum(len(w) for w in batch_wavs) / float(self.sample_rate)
+            self.latencies.append({
+                'seconds': elapsed,
+                'sentences': len(batch),
+                'audio_seconds': audio_seconds
+            })
+            if elapsed > self.config.max_synthesis_latency:
+                if self.batch_size > 1:
+                    self.batch_size = max(1, self.batch_size // 2)
+                    print(f"⚠️  TTS batch took {elapsed:.2f}s, reducing batch size to {self.batch_size}")
+                else:
+                    print(f"⚠️  Slow TTS synthesis: {elapsed:.2f}s for one sentence")
+
+            waveforms.extend(batch_wavs)
+
+        return waveforms
+
+    def get_latency_stats(self) -> Dict[str, float]:
+        """Summarize recent synthesis latency"""
+        if not self.latencies:
+            return {"status": "no_data"}
+
+        seconds = np.array([l['seconds'] for l in self.latencies])
+        audio = sum(l['audio_seconds'] for l in self.latencies)
+        return {
+            "calls": len(seconds),
+            "p50": float(np.percentile(seconds, 50)),
+            "p95": float(np.percentile(seconds, 95)),
+            "max": float(seconds.max()),
+            "real_time_factor": float(seconds.sum() / audio) if audio > 0 else 0.0,
+            "over_budget": int(np.sum(seconds > self.config.max_synthesis_latency))
+        }
+
+
+def coqui_model_dir(config: TTSConfig) -> Path:
+    """Where the Coqui model is read from: ``model_dir``, else Coqui's own download cache"""
+    if config.model_dir:
+        return Path(config.model_dir)
+    if os.environ.get("TTS_HOME"):
+        data_home = Path(os.environ["TTS_HOME"])
+    elif os.environ.get("XDG_DATA_HOME"):
+        data_home = Path(os.environ["XDG_DATA_HOME"])
+    elif sys.platform == "darwin":
+        data_home = Path.home() / "Library" / "Application Support"
+    else:
+        data_home = Path.home() / ".local" / "share"
+    return data_home.expanduser() / "tts" / config.model_name.replace("/", "--")
+
+
+def coqui_available(config: TTSConfig) -> bool:
+    """True when the Coqui package is installed and the model is already on disk"""
+    model_dir = coqui_model_dir(config)
+    return (importlib.util.find_spec("TTS") is not None
+            and (model_dir / "model_file.pth").exists() and (model_dir / "config.json").exists())
+
+
+class CoquiBackend(TTSBackend):
+    """Coqui TTS kept resident in memory.
+
+    The model is loaded from ``model_dir`` or Coqui's cache; with
+    ``offline`` set (the default) a missing model is an error rather than
+    a download.
+
+    VITS models are run with padded batches so several sentences share one
+    forward pass; other architectures fall back to per-sentence synthesis.
+    """
+
+    name = "coqui"
+
+    def _load(self):
+        model_dir = coqui_model_dir(self.config)
+        local = (model_dir / "model_file.pth").exists() and (model_dir / "config.json").exists()
+        if not local and self.config.offline:
+            raise FileNotFoundError(f"no Coqui model in {model_dir}; set tts.model_dir to a downloaded model "
+                                    f"or tts.offline=False to download {self.config.model_name}")
+
+        os.environ.setdefault("COQUI_TOS_AGREED", "1")
+        from TTS.api import TTS
+
+        if local:
+            self.tts = TTS(
+                model_path=str(model_dir / "model_file.pth"),
+                config_path=str(model_dir / "config.json"),
+                progress_bar=False,
+                gpu=self.config.use_cuda
+            )
+        else:
+            self.tts = TTS(model_name=self.config.model_name, progress_bar=False, gpu=self.config.use_cuda)
+
+        self.model = self.tts.synthesizer.tts_model
+        self.model.eval()
+        self.sample_rate = self.tts.synthesizer.output_sample_rate
+        self._batching = type(self.model).__name__ == "Vits"
+
+    def _speaker_id(self, speaker: Optional[str]) -> Optional[int]:
+        speaker_manager = getattr(self.model, "speaker_manager", None)
+        if not speaker or speaker_manager is None:
+            return None
+        name_to_id = getattr(speaker_manager, "name_to_id", None) or getattr(speaker_manager, "ids", {})
+        return name_to_id.get(speaker)
+
+    def _forward_batch(self, texts: List[str], speaker: Optional[str]) -> List[np.ndarray]:
+        """Run one padded VITS forward pass for all *texts*"""
+        import torch
+
+        token_ids = [self.model.tokenizer.text_to_ids(text) for text in texts]
+        lengths = torch.tensor([len(ids) for ids in token_ids], dtype=torch.long)
+        x = torch.zeros(len(token_ids), int(lengths.max()), dtype=torch.long)
+        for row, ids in enumerate(token_ids):
+            x[row, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+
+        aux_input = {"x_lengths": lengths}
+        speaker_id = self._speaker_id(speaker)
+        if speaker_id is not None:
+            aux_input["speaker_ids"] = torch.full((len(token_ids),), speaker_id, dtype=torch.long)
+
+        device = next(self.model.parameters()).device
+        x, aux_input = x.to(device), {k: v.to(device) for k, v in aux_input.items()}
+
+        with torch.inference_mode():
+            outputs = self.model.inference(x, aux_input=aux_input)
+
+        audio = outputs["model_outputs"].squeeze(1).cpu().numpy()
+        frames = outputs["y_mask"].sum(dim=(1, 2)).cpu().numpy()
+        hop_length = self.model.config.audio.hop_length
+        return [audio[i, :int(frames[i]) * hop_length].astype(np.float32) for i in range(len(texts))]
+
+    def _synthesize_batch(self, texts: List[str], speaker: Optional[str]) -> List[np.ndarray]:
+        if self._batching and len(texts) > 1:
+            try:
+                return self._forward_batch(texts, speaker)
+            except Exception as e:
+                print(f"⚠️  Batched synthesis failed, falling back to per-sentence: {e}")
+                self._batching = False
+
+        speaker = speaker if self.tts.is_multi_speaker else None
+        return [np.asarray(self.tts.tts(text=text, speaker=speaker), dtype=np.float32) for text in texts]
+
+
+TTS_BACKENDS = {
+    "coqui": CoquiBackend,
+}
+
+_backends: Dict[tuple, TTSBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_tts_backend(config: Optional[TTSConfig] = None) -> TTSBackend:
+    """Return the resident backend for *config*, loading it on first use.
+
+    Backends are shared per distinct configuration, so callers asking for
+    the same settings share one model while a different config gets its own.
+    """
+    if config is None:
+        from program_files.config.config import cfg
+        config = cfg.tts
+
+    backend_cls = TTS_BACKENDS.get(config.backend)
+    if backend_cls is None:
+        raise ValueError(f"Unknown TTS backend: {config.backend}")
+
+    key = astuple(config)
+    with _backends_lock:
+        backend = _backends.get(key)
+        if backend is None:
+            backend = _backends[key] = backend_cls(config)
+    backend.load()
+    return backend
+
+
+class LocalTTSPlayer:
+    """Drop-in replacement for ``OfflineTTSFile`` backed by a resident model.
+
+    Audio is handed to the mixer as in-memory PCM; the next batch is
+    synthesized while the current one is playing.
+    """
+
+    def __init__(self, backend: Optional[TTSBackend] = None):
+        self.backend = backend or get_tts_backend()
+        self.tts_available = self.backend.loaded
+        self.mixer_initialized = False
+
+        try:
+            import pygame
+            pygame.mixer.init(frequency=self.backend.sample_rate, size=-16, channels=1)
+            self._pygame = pygame
+            self.mixer_initialized = True
+        except Exception as e:
+            print(f"❌ Error initializing pygame mixer: {e}")
+
+    def _to_sound(self, waveform: np.ndarray):
+        pcm = (np.clip(waveform, -1.0, 1.0) * 32767).astype(np.int16)
+        return self._pygame.mixer.Sound(buffer=pcm.tobytes())
+
+    def _wait(self, channel):
+        while channel is not None and channel.get_busy():
+            self._pygame.time.Clock().tick(50)
+
+    def play_chunks(self, chunks: List[str], speaker: Optional[str] = None) -> bool:
+        """Synthesize and play *chunks* in order, overlapping synthesis with playback"""
+        if not self.tts_available or not self.mixer_initialized:
+            print("❌ TTS or mixer not initialized")
+            return False
+
+        batch_size = max(1, self.backend.config.batch_size)
+        channel = None
+        for i in range(0, len(chunks), batch_size):
+            waveforms = self.backend.synthesize_batch(chunks[i:i + batch_size], speaker)
+            for waveform in waveforms:
+                if waveform.size == 0:
+                    continue
+                sound = self._to_sound(waveform)
+                self._wait(channel)
+                channel = sound.play()
+        self._wait(channel)
+        return True
+
+    def speak_stream(self, chunks, speaker: Optional[str] = None) -> bool:
+        """Speak chunks from an iterator as they arrive (e.g. a streamed LLM reply).
+
+        The next chunk is pulled while the previous one is still playing, so
+        the first sentence is heard before the reply has finished generating.
+        """
+        if not self.tts_available or not self.mixer_initialized:
+            print("❌ TTS or mixer not initialized")
+            return False
+
+        channel = None
+        for chunk in chunks:
+            cleaned = clean_text_for_tts(chunk)
+            if not cleaned:
+                continue
+            waveform = self.backend.synthesize(cleaned, speaker)
+            if waveform.size == 0:
+                continue
+            sound = self._to_sound(waveform)
+            self._wait(channel)
+            channel = sound.play()
+        self._wait(channel)
+        return True
+
+    def stream_text_to_speech(self, text, chunk_length=100, speaker=None):
+        """Stream text to speech in chunks for real-time playback"""
+        cleaned_text = clean_text_for_tts(text)
+        if not cleaned_text:
+            print("⚠️  Text was empty after cleaning, skipping TTS")
+            return False
+
+        chunks = split_text_into_chunks(cleaned_text, chunk_length)
+        if not chunks:
+            return False
+
+        print(f"🔊 Streaming {len(chunks)} chunks with {self.backend.name} TTS...")
+        return self.play_chunks(chunks, speaker)
+
+
+class SilentTTSPlayer:
+    """Player that accepts text but produces no audio (headless or multi-room hosts)"""
+
+    tts_available = True
+
+    def speak_stream(self, chunks, speaker: Optional[str] = None) -> bool:
+        for _ in chunks:
+            pass  # Consume the stream so the reply is still generated in full
+        return True
+
+    def stream_text_to_speech(self, text, chunk_length=100, speaker=None):
+        return True
+
+
+def resolve_tts_backend(config: TTSConfig) -> str:
+    """The backend ``auto`` stands for: resident Coqui if available, else silence offline or the edge voice"""
+    if config.backend != "auto":
+        return config.backend
+    if coqui_available(config):
+        return "coqui"
+    return "none" if config.offline else "edge"
+
+
+def create_tts_player(config: Optional[TTSConfig] = None):
+    """Build the configured TTS player; ``edge`` keeps the legacy online voice, ``none`` is silent.
+
+    A resident backend that fails to load falls back to the edge voice,
+    or to silence when ``offline`` is set.
+    """
+    if config is None:
+        from program_files.config.config import cfg
+        config = cfg.tts
+
+    backend_name = resolve_tts_backend(config)
+    if backend_name == "none":
+        return SilentTTSPlayer()
+    if backend_name != "edge":
+        backend = get_tts_backend(replace(config, backend=backend_name))
+        if backend.loaded:
+            return LocalTTSPlayer(backend)
+        if config.offline:
+            print(f"⚠️  {backend.name} TTS unavailable offline, responses will not be spoken")
+            return SilentTTSPlayer()
+        print(f"⚠️  {backend.name} TTS unavailable, falling back to the edge voice")
+
+    from .tts_personal import OfflineTTSFile
+    return OfflineTTSFile()
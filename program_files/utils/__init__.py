@@ -11,7 +11,17 @@ from .text_utils import (
     truncate_history,
     format_conversation_context,
 )
-from .ollama_utils import ensure_ollama_running, ensure_required_models
+
+_OLLAMA_EXPORTS = {"ensure_ollama_running", "ensure_required_models"}
+
+
+def __getattr__(name):
+    # Ollama helpers import *requests*; load them only when asked for (PEP 562)
+    if name in _OLLAMA_EXPORTS:
+        from . import ollama_utils
+        return getattr(ollama_utils, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "is_question",
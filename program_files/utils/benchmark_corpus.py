@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Deterministic synthetic conversations for the pipeline benchmark.
+
+Each conversation alternates between speakers with different pitches.
+Every turn is a run of voiced "syllables": harmonic pulse trains shaped
+by vowel formants, with pauses between turns.  The audio is generated
+from a fixed seed, so every checkout benchmarks the same bytes without
+committing recordings.  It exercises VAD, speaker embedding,
+diarization and ASR decoding.  It is not intelligible speech, so Vosk
+returns few or no words; each WAV therefore gets a sibling ``.txt``
+transcript (one turn per line) that the benchmark injects as finalized
+utterances, driving retrieval, the LLM and TTS deterministically.
+"""
+
+import wave
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+CORPUS_VERSION = 1  # Bump when generation changes, so stale corpora are regenerated
+SPEAKER_PITCHES = (110.0, 205.0, 150.0)  # Hz; one per speaker
+VOWEL_FORMANTS = ((730, 1090), (270, 2290), (300, 870), (530, 1840), (640, 1190))  # (F1, F2) in Hz
+TRANSCRIPT_TURNS = (  # Any six consecutive turns include a question, so every conversation reaches the LLM
+    "I have been getting headaches most afternoons this week",
+    "What dose of paracetamol is safe to take with my blood pressure tablets?",
+    "The pharmacist said two tablets every six hours",
+    "How long should I wait after eating before taking them?",
+    "My daughter drives me to the clinic on Mondays",
+    "Can I keep taking ibuprofen while the swelling goes down?",
+    "Which foods should I avoid with this medication?",
+    "I sleep better when I walk in the evening",
+)
+
+
+def _syllable(rng: np.random.Generator, pitch: float, seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    f0 = pitch * (1 + 0.03 * np.sin(2 * np.pi * 5 * t))  # Slight vibrato
+    phase = 2 * np.pi * np.cumsum(f0) / SAMPLE_RATE
+    f1, f2 = VOWEL_FORMANTS[rng.integers(len(VOWEL_FORMANTS))]
+
+    audio = np.zeros_like(t)
+    for k in range(1, int(4000 // pitch)):
+        freq = k * pitch
+        gain = np.exp(-((freq - f1) / 150) ** 2) + 0.6 * np.exp(-((freq - f2) / 200) ** 2) + 0.05 / k
+        audio += gain * np.sin(k * phase)
+    envelope = np.sin(np.pi * np.arange(len(t)) / len(t)) ** 2
+    return audio * envelope
+
+
+def synthesize_conversation(seed: int, turns: int = 6) -> np.ndarray:
+    """One conversation as int16 samples; the same *seed* always gives the same audio"""
+    rng = np.random.default_rng(seed)
+    speakers = SPEAKER_PITCHES[:2 + seed % 2]
+    pieces = [np.zeros(int(0.5 * SAMPLE_RATE))]
+    for turn in range(turns):
+        pitch = speakers[turn % len(speakers)]
+        for _ in range(rng.integers(5, 12)):
+            pieces.append(_syllable(rng, pitch, rng.uniform(0.15, 0.3)))
+            pieces.append(np.zeros(int(rng.uniform(0.02, 0.08) * SAMPLE_RATE)))
+        pieces.append(np.zeros(int(rng.uniform(0.6, 1.0) * SAMPLE_RATE)))
+
+    audio = np.concatenate(pieces)
+    audio += rng.normal(0, 0.002, len(audio))  # Room noise floor
+    audio /= np.abs(audio).max()
+    return (audio * 0.5 * 32767).astype(np.int16)
+
+
+def conversation_transcript(seed: int, turns: int = 6) -> List[str]:
+    """What the speakers of conversation *seed* say, one entry per turn"""
+    return [TRANSCRIPT_TURNS[(seed * 3 + turn) % len(TRANSCRIPT_TURNS)] for turn in range(turns)]
+
+
+def generate_corpus(directory: Path, conversations: int = 3) -> List[Path]:
+    """Write the synthetic corpus and its transcripts to *directory* (skipping files already there); returns the WAV paths"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for seed in range(conversations):
+        path = directory / f"synthetic_{seed:02d}_v{CORPUS_VERSION}.wav"
+        if not path.exists():
+            tmp = path.with_suffix(".tmp")
+            with wave.open(str(tmp), "wb") as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(2)
+                wav.setframerate(SAMPLE_RATE)
+                wav.writeframes(synthesize_conversation(seed).tobytes())
+            tmp.replace(path)
+        transcript = path.with_suffix(".txt")
+        if not transcript.exists():
+            transcript.write_text("\n".join(conversation_transcript(seed)) + "\n")
+        paths.append(path)
+    return paths
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Deferred imports for heavy optional dependencies.
+
+``chromadb = lazy_module("chromadb")`` at the top of a module costs
+nothing; the real import happens on first attribute access.  This keeps
+entry points that never touch audio, TTS or vector stores (cron jobs, the
+CLI) from paying for them.  Kept stdlib-only on purpose.
+"""
+
+import importlib
+import importlib.util
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_module(name: str) -> LazyModule:
+    """Return a proxy that imports *name* when it is first used"""
+    return LazyModule(name)
+
+
+def is_available(name: str) -> bool:
+    """Check whether *name* can be imported, without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
@@ -13,7 +13,9 @@ import subprocess
 import time
 from typing import List
 
-import requests
+from .lazy_imports import lazy_module
+
+requests = lazy_module("requests")
 
 
 _OLLAMA_URL = "http://localhost:11434"
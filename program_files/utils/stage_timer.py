@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Per-stage wall-clock timing for the speech pipeline.
+
+``pipeline_timer`` is disabled by default so the instrumented hot paths
+cost a single attribute check in production; the benchmark harness
+enables it to report VAD, embedding, ASR, retrieval, LLM and TTS latency.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+
+class StageTimer:
+    """Collects durations per named stage"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._samples: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()  # Server sessions record from several workers
+
+    def record(self, stage: str, seconds: float):
+        """Add one measured duration for *stage*"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._samples.setdefault(stage, []).append(seconds)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block as one sample of stage *name*"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def reset(self):
+        """Drop all recorded samples"""
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Count, total, mean, p50, p95 and max (seconds) for every stage"""
+        with self._lock:
+            samples = {stage: sorted(values) for stage, values in self._samples.items()}
+
+        report = {}
+        for stage, values in samples.items():
+            count = len(values)
+            report[stage] = {
+                "count": count,
+                "total": sum(values),
+                "mean": sum(values) / count,
+                "p50": values[int(0.50 * (count - 1))],
+                "p95": values[int(0.95 * (count - 1))],
+                "max": values[-1]
+            }
+        return report
+
+
+pipeline_timer = StageTimer()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""In-process stand-in for the Ollama HTTP API.
+
+Serves ``/api/tags`` and ``/api/generate`` (streaming and non-streaming)
+with configurable model-load latency, time to first token and token rate,
+so the pipeline can be run and benchmarked without a GPU or real models.
+Responses are canned, which keeps benchmark runs deterministic.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+
+DEFAULT_RESPONSE = ("Keep the dressing clean and dry. Change it once a day, "
+                    "and call your nurse if the redness spreads or you develop a fever.")
+
+
+class StubOllamaServer:
+    """Deterministic fake Ollama server running on a background thread"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 load_latency: float = 0.0, first_token_latency: float = 0.1,
+                 tokens_per_second: float = 40.0, response_text: str = DEFAULT_RESPONSE,
+                 models: Optional[List[str]] = None):
+        self.load_latency = load_latency
+        self.first_token_latency = first_token_latency
+        self.tokens_per_second = tokens_per_second
+        self.response_text = response_text
+        self.models = models or ["gemma3n:e2b", "gemma3n:e4b"]
+        self.loaded_models = set()
+        self.request_count = 0
+        self._lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def tokens(self) -> List[str]:
+        """Split the canned reply into Ollama-style tokens (word plus trailing space)"""
+        words = self.response_text.split(" ")
+        return [w + " " for w in words[:-1]] + words[-1:]
+
+    def _load(self, model: str):
+        """Simulate model load latency the first time a model is used"""
+        with self._lock:
+            self.request_count += 1
+            needs_load = model not in self.loaded_models
+            self.loaded_models.add(model)
+        if needs_load and self.load_latency:
+            time.sleep(self.load_latency)
+
+    def _unload(self, model: str):
+        with self._lock:
+            self.loaded_models.discard(model)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output clean
+
+            def _send_json(self, body, status=200):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    self._send_json({"models": [{"name": m} for m in server.models]})
+                else:
+                    self._send_json({"error": "not found"}, 404)
+
+            def do_POST(self):
+                if self.path != "/api/generate":
+                    self._send_json({"error": "not found"}, 404)
+                    return
+
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                model = payload.get("model", "")
+                if payload.get("keep_alive") == 0 and "prompt" not in payload:
+                    server._unload(model)
+                    self._send_json({"model": model, "done": True, "done_reason": "unload"})
+                    return
+
+                server._load(model)
+                tokens = server.tokens()
+                num_predict = payload.get("options", {}).get("num_predict")
+                if num_predict:
+                    tokens = tokens[:num_predict]
+                token_delay = 1.0 / server.tokens_per_second if server.tokens_per_second > 0 else 0.0
+                time.sleep(server.first_token_latency)
+
+                if not payload.get("stream", True):
+                    time.sleep(token_delay * max(0, len(tokens) - 1))
+                    self._send_json({"model": model, "response": "".join(tokens), "done": True})
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+                for i, token in enumerate(tokens):
+                    if i:
+                        time.sleep(token_delay)
+                    self.wfile.write((json.dumps({"model": model, "response": token, "done": False}) + "\n").encode())
+                    self.wfile.flush()
+                self.wfile.write((json.dumps({"model": model, "response": "", "done": True}) + "\n").encode())
+                self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
+
+    def start(self) -> "StubOllamaServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="stub-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -10,6 +10,14 @@ class RAGConfig:
     verbose: bool = False
     request_timeout: int = 120
     default_template: str = "medical_analysis"
+    max_parallel_requests: Optional[int] = None  # Concurrent LLM requests (None = OLLAMA_NUM_PARALLEL, else 4)
+    request_retries: int = 2  # Extra attempts per LLM call after an error or empty response
+    retry_backoff: float = 2.0  # Seconds before the first retry, doubled each time
+    reference_chunk_words: int = 200  # Words per reference chunk
+    hybrid_retrieval: bool = True  # Fuse BM25 with vector search for references
+    passage_chunk_words: int = 120  # Words per stored document passage
+    passage_overlap_words: int = 20  # Words shared by consecutive passages
+    source_chunks_per_card: int = 2  # Passages linked to each cue card as its source
 
 def get_config():
     return RAGConfig()
\ No newline at end of file
@@ -0,0 +1,284 @@
+"""Batch document ingestion with resumable, per-stage checkpoints.
+
+Each document goes through extract -> parse -> issues -> cue cards -> store.
+The result of every stage is checkpointed in a local SQLite job database,
+keyed by the SHA-256 of the file's bytes, so:
+
+* a crash or Ctrl-C loses at most the stage in progress; the next run
+  resumes each document from its last checkpoint
+* a document whose content was already ingested (under any path) is skipped
+* a stage that returns an error payload or fallback text instead of raising
+  fails the document without a checkpoint, so ``--retry-failed`` reruns it
+
+OCR is CPU bound and runs in a process pool, and documents are handed to
+the LLM stages as soon as their text is ready.  At most
+``documents_in_flight`` documents are in the LLM stages at once; within
+a document the audience cue-card stages run concurrently, and all
+requests share the ``llm_pool`` limit on requests in flight.
+"""
+
+import glob
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from rag_functions.core.config import RAGConfig, get_config
+from rag_functions.core.llm_pool import call_with_retry, ordered_map
+from rag_functions.utils.page_extraction import file_hash as content_hash  # Also the root of the stored document_hash
+from rag_functions.utils.semantic_parser import PARSE_FALLBACK_PREFIX
+
+DEFAULT_JOB_DB = Path(__file__).parent.parent.parent / "program_files" / "data" / "ingest_jobs.sqlite3"
+DOCUMENT_SUFFIXES = (".pdf",)
+
+
+def find_documents(patterns: Iterable[str]) -> List[Path]:
+    """Expand directories (recursively, PDFs only), globs and plain paths; sorted, no duplicates"""
+    found = set()
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            found.update(p for p in path.rglob("*") if p.suffix.lower() in DOCUMENT_SUFFIXES)
+        elif path.is_file():
+            found.add(path)
+        else:
+            found.update(Path(p) for p in glob.glob(pattern, recursive=True) if Path(p).is_file())
+    return sorted(p.resolve() for p in found)
+
+
+class StageFailed(RuntimeError):
+    """A stage returned an unusable result (error payload, fallback text or nothing); it is not checkpointed"""
+
+
+def parse_error(parsed) -> Optional[str]:
+    if not parsed:
+        return "no response from the LLM"
+    if str(parsed).startswith(PARSE_FALLBACK_PREFIX):
+        return "LLM unavailable, got the fallback summary"
+    return None
+
+
+def issues_error(issues) -> Optional[str]:
+    return None if issues else "no medical issues found"
+
+
+def cue_cards_error(cards) -> Optional[str]:
+    if not cards:
+        return "no cue cards generated"
+    if "error" in cards:
+        return cards["error"]
+    return None
+
+
+def extract_document_text(path: str) -> str:
+    """OCR one document (module-level so the process pool can pickle it)"""
+    from rag_functions.utils.ocr_layout_copy import extract_text_and_layout
+    return extract_text_and_layout(path, workers=1)  # Documents already run in parallel
+
+
+class JobStore:
+    """SQLite record of ingestion jobs and their stage checkpoints (safe to share between threads)"""
+
+    def __init__(self, path: Path = DEFAULT_JOB_DB):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path), check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.db:
+            self.db.executescript("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    content_hash TEXT PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    error TEXT,
+                    updated_at TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    content_hash TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (content_hash, stage)
+                );
+            """)
+
+    def status(self, digest: str) -> Optional[str]:
+        with self.lock:
+            row = self.db.execute("SELECT status FROM documents WHERE content_hash = ?", (digest,)).fetchone()
+        return row[0] if row else None
+
+    def set_status(self, digest: str, path: Path, status: str, error: Optional[str] = None):
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT INTO documents (content_hash, path, status, error, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(content_hash) DO UPDATE SET path = excluded.path, status = excluded.status, "
+                "error = excluded.error, updated_at = excluded.updated_at",
+                (digest, str(path), status, error, datetime.now().isoformat()))
+
+    def checkpoint(self, digest: str, stage: str) -> Any:
+        """Saved result of *stage*, or None if it has not completed"""
+        with self.lock:
+            row = self.db.execute("SELECT payload FROM checkpoints WHERE content_hash = ? AND stage = ?",
+                                  (digest, stage)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_checkpoint(self, digest: str, stage: str, payload: Any):
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO checkpoints (content_hash, stage, payload, created_at) VALUES (?, ?, ?, ?)",
+                            (digest, stage, json.dumps(payload), datetime.now().isoformat()))
+
+    def summary(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.db.execute("SELECT status, COUNT(*) FROM documents GROUP BY status").fetchall())
+
+    def failures(self) -> List[tuple]:
+        with self.lock:
+            return self.db.execute("SELECT path, error FROM documents WHERE status = 'failed' ORDER BY updated_at").fetchall()
+
+    def close(self):
+        self.db.close()
+
+
+class BatchIngestor:
+    """Runs the ingestion pipeline over many documents with checkpoints in a ``JobStore``"""
+
+    def __init__(self, jobs: JobStore, vector_db=None, client=None, config: Optional[RAGConfig] = None,
+                 ocr_workers: int = 2, documents_in_flight: int = 2, retry_failed: bool = False,
+                 extract: Callable[[str], str] = extract_document_text):
+        from rag_functions.core import main
+        self.main = main
+        self.jobs = jobs
+        self.config = config or get_config()
+        self.vector_db = vector_db
+        self.client = client
+        self.ocr_workers = ocr_workers
+        self.documents_in_flight = max(1, documents_in_flight)
+        self.retry_failed = retry_failed
+        self.extract = extract
+        self._store_lock = threading.Lock()  # One writer to the vector DB at a time
+        self.counts = Counter()
+        self._counts_lock = threading.Lock()
+
+    def _setup(self):
+        if self.vector_db is None:
+            self.vector_db = self.main.setup_rag_vector_db()
+        if self.client is None:
+            self.client = self.main.GemmaClient(model="gemma3n:e4b", base_url=self.config.ollama_base_url)
+
+    def _stage(self, digest: str, stage: str, run: Callable[[], Any],
+               error: Callable[[Any], Optional[str]] = lambda result: None) -> Any:
+        """Return the checkpoint for *stage*, running and saving it first if missing.
+
+        A result for which *error* returns a message raises ``StageFailed``
+        and is not saved, so a retry runs the stage again (checkpoints saved
+        by earlier versions are re-checked the same way).
+        """
+        result = self.jobs.checkpoint(digest, stage)
+        if result is None or error(result):
+            result = run()
+            message = error(result)
+            if message:
+                raise StageFailed(f"{stage}: {message}")
+            self.jobs.save_checkpoint(digest, stage, result)
+        return result
+
+    def _count(self, outcome: str) -> int:
+        with self._counts_lock:
+            self.counts[outcome] += 1
+            return sum(self.counts.values())
+
+    def _llm_stages(self, digest: str, path: Path, text: str):
+        main, config = self.main, self.config
+        retry = dict(retries=config.request_retries, backoff=config.retry_backoff, parallel=config.max_parallel_requests)
+
+        # Without the fallback summary a connection error raises, so call_with_retry can retry it
+        parsed = self._stage(digest, "parse", lambda: call_with_retry(main.parse_document, text, main.PARSE_PROMPT,
+                                                                      fallback=False, **retry), parse_error)
+        issues = self._stage(digest, "issues", lambda: main.find_medical_issues(parsed, self.client, config), issues_error)
+        cards = ordered_map(lambda prompt: self._stage(digest, f"cue_cards:{prompt}",
+                                                       lambda: main.create_cue_cards(text, prompt, config), cue_cards_error),
+                            main.AUDIENCE_PROMPTS, max_workers=len(main.AUDIENCE_PROMPTS), label="audience prompts")
+        cue_cards = dict(zip(main.AUDIENCE_PROMPTS, cards))
+
+        def store():
+            with self._store_lock:
+                main.store_adaptive_prompts_in_db(self.vector_db, path, main.adaptive_prompts_for(issues), issues)
+                chunks = main.store_document_chunks(self.vector_db, path, text, config.passage_chunk_words,
+                                                    config.passage_overlap_words)
+                for prompt, cards in cue_cards.items():
+                    main.store_cue_cards_in_db(self.vector_db, path, cards, prompt, self.client.model,
+                                               source_chunks=chunks, chunks_per_card=config.source_chunks_per_card)
+            return {"issues": len(issues), "prompts": len(cue_cards)}
+
+        self._stage(digest, "store", store)
+
+    def _process(self, digest: str, path: Path, text: str):
+        try:
+            self._llm_stages(digest, path, text)
+        except Exception as e:
+            self.jobs.set_status(digest, path, "failed", f"{type(e).__name__}: {e}")
+            self._count("failed")
+            print(f"❌ {path.name}: {e}")
+            return
+        self.jobs.set_status(digest, path, "done")
+        print(f"✅ {path.name} ingested ({self._count('done')}/{self.total})")
+
+    def run(self, paths: Iterable[Path]) -> Dict[str, int]:
+        """Ingest *paths*; returns counts of done, failed and skipped documents"""
+        start = time.perf_counter()
+        pending = {}
+        for path in paths:
+            digest = content_hash(path)
+            status = self.jobs.status(digest)
+            if status == "done" or (status == "failed" and not self.retry_failed) or digest in pending:
+                self.counts["skipped"] += 1
+                continue
+            self.jobs.set_status(digest, path, "running")
+            pending[digest] = path
+        self.total = len(pending) + self.counts["skipped"]
+        if not pending:
+            return dict(self.counts)
+
+        self._setup()
+        texts = {digest: self.jobs.checkpoint(digest, "extract") for digest in pending}
+        to_extract = [digest for digest, text in texts.items() if text is None]
+        print(f"📄 {len(pending)} documents to ingest ({len(to_extract)} need OCR, {self.counts['skipped']} skipped)")
+
+        with ThreadPoolExecutor(max_workers=self.documents_in_flight, thread_name_prefix="ingest") as llm_pool:
+            llm_jobs = [llm_pool.submit(self._process, digest, pending[digest], text)
+                        for digest, text in texts.items() if text is not None]
+
+            if to_extract and self.ocr_workers > 0:
+                with ProcessPoolExecutor(max_workers=self.ocr_workers) as ocr_pool:
+                    futures = {ocr_pool.submit(self.extract, str(pending[digest])): digest for digest in to_extract}
+                    for future in as_completed(futures):
+                        llm_jobs.append(self._extracted(llm_pool, futures[future], pending, future.result))
+            else:
+                for digest in to_extract:
+                    llm_jobs.append(self._extracted(llm_pool, digest, pending,
+                                                    lambda d=digest: self.extract(str(pending[d]))))
+
+            for job in llm_jobs:
+                if job is not None:
+                    job.result()
+
+        elapsed = time.perf_counter() - start
+        print(f"🎉 Ingestion finished in {elapsed:.0f}s: {dict(self.counts)}")
+        return dict(self.counts)
+
+    def _extracted(self, llm_pool, digest: str, pending: Dict[str, Path], get_text: Callable[[], str]):
+        """Checkpoint an OCR result and queue the document for the LLM stages"""
+        path = pending[digest]
+        try:
+            text = get_text()
+        except Exception as e:
+            self.jobs.set_status(digest, path, "failed", f"extract: {type(e).__name__}: {e}")
+            self._count("failed")
+            print(f"❌ {path.name}: OCR failed: {e}")
+            return None
+        self.jobs.save_checkpoint(digest, "extract", text)
+        return llm_pool.submit(self._process, digest, path, text)
@@ -8,6 +8,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from program_files.ai.gemma_client import GemmaClient
 from rag_functions.core.config import RAGConfig, get_config
+from rag_functions.core.llm_pool import call_with_retry, llm_parallelism, ordered_map
 from rag_functions.templates.prompt_templates import get_template
 
 def analyze_with_llm(parsed_entities, reference_chunks=None, prompt: str = None, config: RAGConfig = None):
@@ -92,12 +93,15 @@ def create_cue_cards(parsed_entities, prompt: str, config: Optional[RAGConfig] =
     if config.verbose:
         print("First pass: Generating questions...")
     
+    retry = dict(retries=config.request_retries, backoff=config.retry_backoff, parallel=config.max_parallel_requests)
     try:
-        questions_response = client.generate_response(
+        questions_response = call_with_retry(
+            client.generate_response,
             prompt=question_generation_prompt,
             context=document_context,
             prompt_template=prompt_template,
-            timeout=config.request_timeout
+            timeout=config.request_timeout,
+            **retry
         )
         
         if not questions_response:
@@ -117,13 +121,12 @@ def create_cue_cards(parsed_entities, prompt: str, config: Optional[RAGConfig] =
             print(f"Error generating questions: {e}")
         return {"error": f"Error generating questions: {str(e)}"}
     
-    # Second pass: Answer each question
-    qa_results = {}
-    
+    # Second pass: Answer each question, concurrently up to the server's parallelism
     if config.verbose:
         print("Second pass: Answering questions...")
     
-    for i, question in enumerate(questions):
+    def answer_question(numbered):
+        i, question = numbered
         answer_prompt = f"""
             Based on the document, please provide medical advise for the following problem:
 
@@ -137,33 +140,32 @@ def create_cue_cards(parsed_entities, prompt: str, config: Optional[RAGConfig] =
             """
         
         try:
-            answer_response = client.generate_response(
+            answer_response = call_with_retry(
+                client.generate_response,
                 prompt=answer_prompt,
                 context=document_context,
                 prompt_template=prompt_template,
-                timeout=config.request_timeout
+                timeout=config.request_timeout,
+                **retry
             )
             
             # Extract answer from response
-            answer = extract_answer_from_response(answer_response)
-            
-            qa_results[f"question_{i+1}"] = {
+            answer = extract_answer_from_response(answer_response) if answer_response else None
+            return {
                 "question": question,
                 "answer": answer if answer else "Failed to generate answer"
             }
-            
-            if config.verbose:
-                print(f"Answered question {i+1}/{len(questions)}")
-                
         except Exception as e:
             if config.verbose:
                 print(f"Error answering question {i+1}: {e}")
-            qa_results[f"question_{i+1}"] = {
+            return {
                 "question": question,
                 "answer": f"Error generating answer: {str(e)}"
             }
     
-    return qa_results
+    answers = ordered_map(answer_question, enumerate(questions), llm_parallelism(config.max_parallel_requests),
+                          label="answers", verbose=config.verbose)
+    return {f"question_{i+1}": qa for i, qa in enumerate(answers)}
 
 
 def extract_questions_from_response(response: str) -> list:
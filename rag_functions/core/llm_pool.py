@@ -0,0 +1,122 @@
+"""Bounded-concurrency execution of blocking LLM calls.
+
+Ollama answers up to ``OLLAMA_NUM_PARALLEL`` requests per model at once
+and queues the rest, so document processing runs its independent calls
+(the answer pass of ``create_cue_cards``, the audience prompts of
+``process_document``) on thread pools while a process-wide semaphore
+keeps the number of requests in flight at the server's parallelism.
+Nested pools therefore share one budget instead of multiplying it.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_PARALLEL = 4  # Ollama's own default when OLLAMA_NUM_PARALLEL is unset
+
+_slots: Dict[int, threading.BoundedSemaphore] = {}
+_slots_lock = threading.Lock()
+
+
+def llm_parallelism(configured: Optional[int] = None) -> int:
+    """Concurrent requests to allow: *configured*, else ``OLLAMA_NUM_PARALLEL``, else 4"""
+    if configured:
+        return configured
+    try:
+        return max(1, int(os.environ.get("OLLAMA_NUM_PARALLEL", DEFAULT_PARALLEL)))
+    except ValueError:
+        return DEFAULT_PARALLEL
+
+
+def llm_slots(limit: int) -> threading.BoundedSemaphore:
+    """Process-wide semaphore bounding requests in flight"""
+    with _slots_lock:
+        if limit not in _slots:
+            _slots[limit] = threading.BoundedSemaphore(limit)
+        return _slots[limit]
+
+
+class CallStats:
+    """Counts LLM calls across threads for the throughput report"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = self.retries = self.failures = 0
+            self.busy_seconds = 0.0
+            self.started = time.perf_counter()
+
+    def record(self, seconds: float, retry: bool = False, failed: bool = False):
+        with self._lock:
+            self.calls += 1
+            self.busy_seconds += seconds
+            self.retries += retry
+            self.failures += failed
+
+    def report(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        return (f"{self.calls} LLM calls in {elapsed:.1f}s ({self.calls / elapsed if elapsed else 0:.2f} calls/s, "
+                f"{self.busy_seconds / elapsed if elapsed else 0:.1f} in flight on average, "
+                f"{self.retries} retries, {self.failures} failed)")
+
+
+llm_stats = CallStats()
+
+
+def call_with_retry(fn: Callable[..., Optional[T]], *args, retries: int = 2, backoff: float = 2.0,
+                    parallel: Optional[int] = None, **kwargs) -> Optional[T]:
+    """Call *fn* holding an LLM slot; retry on exceptions or an empty (None) response.
+
+    Waits ``backoff * 2**attempt`` seconds between attempts, without holding
+    a slot.  Returns the last result, or re-raises the last exception.
+    """
+    slots = llm_slots(llm_parallelism(parallel))
+    for attempt in range(retries + 1):
+        final = attempt == retries
+        start = time.perf_counter()
+        with slots:
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                llm_stats.record(time.perf_counter() - start, retry=not final, failed=final)
+                if final:
+                    raise
+                result = None
+            else:
+                llm_stats.record(time.perf_counter() - start, retry=result is None and not final,
+                                 failed=result is None and final)
+        if result is not None or final:
+            return result
+        time.sleep(backoff * 2 ** attempt)
+
+
+def ordered_map(fn: Callable[[T], object], items: Iterable[T], max_workers: int, label: str = "",
+                verbose: bool = False) -> List:
+    """Run *fn* over *items* on a thread pool; results come back in input order"""
+    items = list(items)
+    if not items:
+        return []
+
+    done = [0]
+    done_lock = threading.Lock()
+    start = time.perf_counter()
+
+    def run(item):
+        result = fn(item)
+        if verbose:
+            with done_lock:
+                done[0] += 1
+                elapsed = time.perf_counter() - start
+                print(f"   {label}: {done[0]}/{len(items)} done ({done[0] / elapsed:.2f}/s)")
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items))),
+                            thread_name_prefix=label.replace(" ", "-") or "llm") as pool:
+        return list(pool.map(run, items))
@@ -10,14 +10,15 @@ from rag_functions.utils.semantic_parser import parse_document
 from rag_functions.utils.retrieval import setup_vector_db, retrieve_references, extract_medical_issues_list
 from rag_functions.core.llm_analysis import analyze_with_llm, create_cue_cards
 from rag_functions.templates.prompt_templates import get_template
-# Optional ML imports (require sentence_transformers)
-try:
+from program_files.utils.lazy_imports import is_available
+# Optional ML imports (require sklearn and an embedding backend); the modules load those lazily,
+# so check availability without paying for the import here
+ML_AVAILABLE = is_available("sklearn") and (is_available("onnxruntime") or is_available("sentence_transformers"))
+if ML_AVAILABLE:
     from rag_functions.ml.vector_operations import select_optimal_templates, analyze_document_type
     from rag_functions.ml.cue_card_extraction import extract_cue_cards
-    ML_AVAILABLE = True
-except ImportError as e:
-    print(f"Warning: ML modules not available: {e}")
-    ML_AVAILABLE = False
+else:
+    print("Warning: ML modules not available: sklearn or an embedding backend (onnxruntime/sentence_transformers) not installed")
     # Provide stub functions
     def select_optimal_templates(*args, **kwargs):
         return []
@@ -26,13 +27,22 @@ except ImportError as e:
     def extract_cue_cards(*args, **kwargs):
         return []
 from rag_functions.core.config import get_config
+from rag_functions.core.llm_pool import call_with_retry, llm_parallelism, llm_stats, ordered_map
 from program_files.ai.gemma_client import GemmaClient
 from program_files.database.enhanced_conversation_db import EnhancedConversationDB
+from program_files.database.sharding import storage_vectors
 import re
 import json
-import uuid
+import hashlib
 from datetime import datetime
 
+import numpy as np
+
+from rag_functions.utils.page_extraction import file_hash
+from rag_functions.utils.reference_index import chunk_spans
+
+WRITE_BATCH_SIZE = 5000  # Rows per vector store write, below Chroma's maximum batch size
+
 
 def setup_rag_vector_db():
     """Setup vector database for RAG functions"""
@@ -44,130 +54,244 @@ def setup_rag_vector_db():
     return EnhancedConversationDB(str(persist_directory))
 
 
-def store_cue_cards_in_db(vector_db, document_path, cue_cards, prompt_type, model_used: str = "unknown"):
-    """Store cue cards in the vector database"""
+def store_document_chunks(vector_db, document_path, text, chunk_words: int = 120, overlap: int = 20):
+    """Store a document's text as overlapping passages with their character offsets.
+    
+    Passages are keyed by ``document_key`` like the document's cue cards and
+    prompts; storing the document again first deletes its previous passages
+    (whatever chunking produced them).  Returns the passages (id, text,
+    embedding) for linking cue cards to their sources with
+    ``link_source_chunks``.
+    """
+    spans = chunk_spans(text, chunk_words, overlap)
+    if not spans:
+        return []
+    
+    key = document_key(document_path)
+    timestamp = datetime.now().isoformat()
+    passages = [text[start:end] for start, end in spans]
+    embeddings = storage_vectors(vector_db.embed, passages)
+    ids = [f"chunk_{key}_{n}" for n in range(len(spans))]
+    
+    collection = vector_db.collection_for("document_chunk")
+    collection.delete(where={"document_hash": key})
+    collection.upsert(
+        ids=ids,
+        documents=passages,
+        embeddings=list(embeddings),
+        metadatas=[{
+            "document_path": str(document_path),
+            "document_hash": key,
+            "chunk_index": n,
+            "start_char": start,
+            "end_char": end,
+            "timestamp": timestamp,
+            "content_type": "document_chunk"
+        } for n, (start, end) in enumerate(spans)]
+    )
+    print(f"✓ Stored {len(ids)} passages from {Path(document_path).name}")
+    return [{"id": chunk_id, "text": passage, "embedding": embedding}
+            for chunk_id, passage, embedding in zip(ids, passages, embeddings)]
+
+
+def link_source_chunks(vector_db, texts, chunks, per_text: int = 2):
+    """Comma-separated ids of the *per_text* passages most similar to each of *texts*"""
+    if not texts or not chunks:
+        return ["" for _ in texts]
+    
+    passages = np.asarray([chunk["embedding"] for chunk in chunks], dtype=np.float32)
+    similarity = np.asarray(vector_db.embed(list(texts)), dtype=np.float32) @ passages.T  # Unit vectors: cosine
+    best = np.argsort(-similarity, axis=1)[:, :per_text]
+    return [",".join(chunks[j]["id"] for j in row) for row in best]
+
+
+def document_key(document_path) -> str:
+    """Short content hash of a document (of its path when the file is not readable).
+    
+    The ``document_hash`` of every row stored for a document - passages,
+    cue cards, adaptive prompts - and the prefix of their ids.
+    """
+    try:
+        return file_hash(document_path)[:16]
+    except OSError:
+        return hashlib.sha256(str(document_path).encode()).hexdigest()[:16]
+
+
+def upsert_rows(collection, ids, documents, metadatas, stale_where=None, batch_size: int = WRITE_BATCH_SIZE):
+    """Upsert rows in batches of at most *batch_size*, then delete rows matching *stale_where* not among *ids*.
+    
+    Each batch is embedded in one pass and persisted in one write.  The
+    stale check removes rows a previous run wrote that this run no longer
+    produces (fewer cards, different issues).
+    """
+    for start in range(0, len(ids), batch_size):
+        collection.upsert(
+            ids=ids[start:start + batch_size],
+            documents=documents[start:start + batch_size],
+            metadatas=metadatas[start:start + batch_size]
+        )
+    if stale_where is not None:
+        keep = set(ids)
+        stale = [row_id for row_id in collection.get(where=stale_where, include=[])['ids'] if row_id not in keep]
+        if stale:
+            collection.delete(ids=stale)
+
+
+def store_cue_cards_in_db(vector_db, document_path, cue_cards, prompt_type, model_used: str = "unknown",
+                          source_chunks=None, chunks_per_card: int = 2):
+    """Store cue cards in the vector database, linked to their *source_chunks* if given.
+    
+    Ids derive from the document's content hash, the prompt type and the
+    card's position, so re-processing a document replaces its cards.
+    """
     if not cue_cards or isinstance(cue_cards, dict) and "error" in cue_cards:
         return
     
-    # Create a unique ID for this document's cue cards
-    doc_id = str(uuid.uuid4())
+    key = document_key(document_path)
+    prompt_key = hashlib.sha256(prompt_type.encode()).hexdigest()[:8]
     timestamp = datetime.now().isoformat()
     
-    # Store each cue card as a separate document
-    for i, (key, value) in enumerate(cue_cards.items()):
-        if isinstance(value, dict) and "question" in value and "answer" in value:
-            # Format the cue card content
-            content = f"Question: {value['question']}\nAnswer: {value['answer']}"
-            
-            # Create metadata
-            metadata = {
-                "document_path": str(document_path),
-                "cue_card_id": f"{doc_id}_{i}",
-                "prompt_type": prompt_type,
-                "question": value['question'],
-                "answer": value['answer'],
-                "timestamp": timestamp,
-                "content_type": "cue_card",
-                "session_id": f"rag_session_{timestamp.replace(':', '-')}",
-                "model_used": model_used
-            }
-            
-            # Store in vector database
-            vector_db.conversations.add(
-                documents=[content],
-                metadatas=[metadata],
-                ids=[f"cue_card_{doc_id}_{i}"]
-            )
-            print(f"✓ Stored cue card {i+1} for {prompt_type}")
+    cards = [(i, value) for i, value in enumerate(cue_cards.values())
+             if isinstance(value, dict) and "question" in value and "answer" in value]
+    contents = [f"Question: {value['question']}\nAnswer: {value['answer']}" for _, value in cards]
+    sources = link_source_chunks(vector_db, contents, source_chunks or [], chunks_per_card)
+    
+    ids, metadatas = [], []
+    for (i, value), source_chunk_ids in zip(cards, sources):
+        ids.append(f"cue_card_{key}_{prompt_key}_{i}")
+        metadatas.append({
+            "document_path": str(document_path),
+            "document_hash": key,
+            "cue_card_id": ids[-1],
+            "prompt_type": prompt_type,
+            "question": value['question'],
+            "answer": value['answer'],
+            "timestamp": timestamp,
+            "content_type": "cue_card",
+            "session_id": f"rag_session_{timestamp.replace(':', '-')}",
+            "model_used": model_used,
+            "source_chunk_ids": source_chunk_ids
+        })
+    
+    upsert_rows(vector_db.collection_for("cue_card"), ids, contents, metadatas,
+                stale_where={"$and": [{"document_hash": key}, {"prompt_type": prompt_type}]})
+    print(f"✓ Stored {len(ids)} cue cards for {prompt_type}")
 
 
 def store_adaptive_prompts_in_db(vector_db, document_path, adaptive_prompts, medical_issues):
-    """Store adaptive prompts in the vector database"""
+    """Store adaptive prompts in the vector database (one per document and medical issue)"""
     if not adaptive_prompts:
         return
     
+    key = document_key(document_path)
     timestamp = datetime.now().isoformat()
     
-    # Store each adaptive prompt with its corresponding medical issue
-    for i, (prompt, issue) in enumerate(zip(adaptive_prompts, medical_issues)):
-        # Create metadata
-        metadata = {
+    ids, documents, metadatas = [], [], []
+    for prompt, issue in zip(adaptive_prompts, medical_issues):
+        prompt_id = f"adaptive_prompt_{key}_{hashlib.sha256(issue.encode()).hexdigest()[:12]}"
+        if prompt_id in ids:
+            continue  # The LLM listed the same issue twice
+        ids.append(prompt_id)
+        documents.append(prompt)
+        metadatas.append({
             "document_path": str(document_path),
-            "prompt_id": f"adaptive_{uuid.uuid4()}",
+            "document_hash": key,
+            "prompt_id": prompt_id,
             "medical_issue": issue,
             "prompt_text": prompt,
             "timestamp": timestamp,
             "content_type": "adaptive_prompt",
             "session_id": f"rag_session_{timestamp.replace(':', '-')}"
-        }
-        
-        # Store in vector database
-        vector_db.conversations.add(
-            documents=[prompt],
-            metadatas=[metadata],
-            ids=[f"adaptive_prompt_{i}_{timestamp.replace(':', '-')}"]
-        )
-        print(f"✓ Stored adaptive prompt for issue: {issue}")
+        })
+    
+    upsert_rows(vector_db.collection_for("adaptive_prompt"), ids, documents, metadatas,
+                stale_where={"document_hash": key})
+    print(f"✓ Stored adaptive prompts for {len(ids)} issues: {', '.join(m['medical_issue'] for m in metadatas)}")
+
+
+PARSE_PROMPT = "Extract key entities, topics, and sections from the following document. Provide a structured summary:"
+
+MEDICAL_ISSUES_PROMPT = """identify the key medical concerns and likely problems the patient is likely to face given the information provided
+        return your responses in a list of strings like this:
+        [
+            "{medical_concern}",
+            "{medical_concern}",
+            "{medical_concern}"
+        ]
+        """
+
+AUDIENCE_PROMPTS = [
+    "medical and care advice for family",
+    "medical and care advice for medical staff",
+    "medical and care advice for carers",
+    "medical and care advice for allied health workers relevant to the context",
+    "medical and care advice for doctors relevant to the context",
+]
+
+
+def find_medical_issues(parsed, client, config=None):
+    """Ask the LLM for the document's key medical issues"""
+    config = config or get_config()
+    response = call_with_retry(client.generate_response, MEDICAL_ISSUES_PROMPT, parsed, timeout=90,
+                               retries=config.request_retries, backoff=config.retry_backoff,
+                               parallel=config.max_parallel_requests) or ""
+    return extract_medical_issues_list(response)
 
 
-def process_document(file_path, reference_texts=None, use_medical_templates=True, generate_cue_cards=True, context_type="medical"):
+def adaptive_prompts_for(medical_issues):
+    return [f"briefly summarise and identify any issues relating to {issue} in the associated conversations, "
+            f"briefly describe what happened and whether it was effective:" for issue in medical_issues]
+
+
+def process_document(file_path, reference_texts=None, use_medical_templates=True, generate_cue_cards=True, context_type="medical",
+                     vector_db=None, client=None):
+    """Extract, parse and analyse one document, storing its adaptive prompts and cue cards.
+    
+    Pass *vector_db* and *client* to reuse them across documents; batch
+    ingestion with checkpoints lives in ``rag_functions.core.ingest``.
+    """
     config = get_config()
     
     # Setup vector database for RAG functions
-    vector_db = setup_rag_vector_db()
+    vector_db = vector_db or setup_rag_vector_db()
     
     # Extract and parse
     txt = extract_text_and_layout(file_path)
-    parsed = parse_document(txt, input_prompt="Extract key entities, topics, and sections from the following document. Provide a structured summary:")
+    parsed = parse_document(txt, input_prompt=PARSE_PROMPT)
     
-    client = GemmaClient(model="gemma3n:e4b")
+    llm_stats.reset()
+    client = client or GemmaClient(model="gemma3n:e4b")
     model_used = client.model
-    key_medical_issues_response = client.generate_response("""identify the key medical concerns and likely problems the patient is likely to face given the information provided
-        return your responses in a list of strings like this:
-        [
-            "{medical_concern}",
-            "{medical_concern}",
-            "{medical_concern}"
-        ]
-        """, parsed, timeout=90)
+    key_medical_issues = find_medical_issues(parsed, client, config)
 
-    # Extract the list from the response
-    key_medical_issues = extract_medical_issues_list(key_medical_issues_response)
-
-    adaptive_prompts = []
-    for issue in key_medical_issues:
-        prompt = f"briefly summarise and identify any issues relating to {issue} in the associated conversations, briefly describe what happened and whether it was effective:"
+    adaptive_prompts = adaptive_prompts_for(key_medical_issues)
+    for prompt in adaptive_prompts:
         print(prompt)
-        adaptive_prompts.append(prompt)
     
-    # Store adaptive prompts in vector database
+    # Store adaptive prompts and the document's passages in vector database
     store_adaptive_prompts_in_db(vector_db, file_path, adaptive_prompts, key_medical_issues)
-    
-    individual_relevant_prompts = [
-        "medical and care advice for family",
-        "medical and care advice for medical staff",
-        "medical and care advice for carers",
-        "medical and care advice for allied health workers relevant to the context",
-        "medical and care advice for doctors relevant to the context",
-        ]
+    chunks = store_document_chunks(vector_db, file_path, txt, config.passage_chunk_words, config.passage_overlap_words)
    
-    # Process each prompt separately and combine responses
-    contextual_responses = {}
-    for prompt in individual_relevant_prompts:
-        contextual_responses[prompt] = create_cue_cards(txt, prompt)
+    # Process the prompts concurrently; LLM requests share the server's parallelism (see llm_pool)
+    responses = ordered_map(lambda prompt: create_cue_cards(txt, prompt, config), AUDIENCE_PROMPTS,
+                            max_workers=len(AUDIENCE_PROMPTS), label="audience prompts", verbose=True)
+    contextual_responses = dict(zip(AUDIENCE_PROMPTS, responses))
+    for prompt, cue_cards in contextual_responses.items():
         # Store cue cards in vector database
-        store_cue_cards_in_db(vector_db, file_path, contextual_responses[prompt], prompt, model_used)
-        #print(contextual_responses[prompt])
+        store_cue_cards_in_db(vector_db, file_path, cue_cards, prompt, model_used,
+                              source_chunks=chunks, chunks_per_card=config.source_chunks_per_card)
 
     # Setup references
     references = []
     if reference_texts:
-        vectorstore = setup_vector_db(reference_texts, None)
-        references = retrieve_references(vectorstore, parsed, k=config.max_reference_chunks)
+        vectorstore = setup_vector_db(reference_texts, None, chunk_words=config.reference_chunk_words)
+        references = retrieve_references(vectorstore, parsed, k=config.max_reference_chunks,
+                                         hybrid=config.hybrid_retrieval)
     
     print(f"\n✓ Document processing complete!")
     print(f"✓ Stored {len(adaptive_prompts)} adaptive prompts")
     print(f"✓ Stored cue cards for {len(contextual_responses)} prompt types")
+    print(f"✓ {llm_stats.report()}")
     
     return {
         "adaptive_prompts": adaptive_prompts,
@@ -177,13 +301,89 @@ def process_document(file_path, reference_texts=None, use_medical_templates=True
     }
 
 
-def update_cue_cards_from_conversations(days_back: int = 1, similarity_threshold: float = 0.7):
-    """Update cue cards based on recent conversation feedback"""
+def rewrite_cue_card(client, cue_card, conversation_text, is_successful, config=None):
+    """Ask the LLM for an improved (question, answer) given a conversation and its outcome; None on failure"""
+    config = config or get_config()
+    update_prompt = f"""
+    Update this medical cue card based on a recent conversation and its outcome.
+    
+    Current cue card:
+    Q: {cue_card['question']}
+    A: {cue_card['answer']}
+    
+    Recent conversation:
+    {conversation_text}
+    
+    Conversation outcome: {'Successful/Helpful' if is_successful else 'Unsuccessful/Not helpful'}
+    
+    Based on this feedback, provide an improved cue card in this exact format:
+    QUESTION: [improved question]
+    ANSWER: [improved answer incorporating lessons learned]
+    
+    If the conversation was successful, reinforce what worked.
+    If unsuccessful, adjust the advice to address what didn't work.
+    """
+    update_response = call_with_retry(client.generate_response, update_prompt, "", timeout=60,
+                                      retries=config.request_retries, backoff=config.retry_backoff,
+                                      parallel=config.max_parallel_requests) or ""
+    
+    # Extract question and answer
+    question_match = re.search(r'QUESTION:\s*(.+?)(?=ANSWER:|$)', update_response, re.DOTALL | re.IGNORECASE)
+    answer_match = re.search(r'ANSWER:\s*(.+?)$', update_response, re.DOTALL | re.IGNORECASE)
+    if not (question_match and answer_match):
+        return None
+    return question_match.group(1).strip(), answer_match.group(1).strip()
+
+
+def new_cue_card_from(client, conversation_text, is_successful, config=None):
+    """Ask the LLM for a (question, answer, category) capturing a conversation's insights; None if there are none"""
+    config = config or get_config()
+    new_card_prompt = f"""
+    Analyze this medical conversation and determine if it contains valuable medical insights that should be captured as a cue card.
+    
+    Conversation:
+    {conversation_text}
+    
+    Conversation outcome: {'Successful/Helpful' if is_successful else 'Unsuccessful/Not helpful'}
+    
+    If this conversation contains valuable medical advice or insights, create a cue card in this format:
+    QUESTION: [relevant medical question]
+    ANSWER: [medical advice based on the conversation]
+    CATEGORY: [medical and care advice for family/medical staff/carers/allied health workers/doctors]
+    
+    If the conversation doesn't contain valuable medical insights, respond with: NO_CARD_NEEDED
+    """
+    new_card_response = call_with_retry(client.generate_response, new_card_prompt, "", timeout=60,
+                                        retries=config.request_retries, backoff=config.retry_backoff,
+                                        parallel=config.max_parallel_requests) or ""
+    if not new_card_response or "NO_CARD_NEEDED" in new_card_response:
+        return None
+    
+    # Extract new cue card details
+    question_match = re.search(r'QUESTION:\s*(.+?)(?=ANSWER:|$)', new_card_response, re.DOTALL | re.IGNORECASE)
+    answer_match = re.search(r'ANSWER:\s*(.+?)(?=CATEGORY:|$)', new_card_response, re.DOTALL | re.IGNORECASE)
+    category_match = re.search(r'CATEGORY:\s*(.+?)$', new_card_response, re.DOTALL | re.IGNORECASE)
+    if not (question_match and answer_match):
+        return None
+    category = category_match.group(1).strip() if category_match else "medical and care advice for family"
+    return question_match.group(1).strip(), answer_match.group(1).strip(), category
+
+
+def update_cue_cards_from_conversations(days_back: int = 1, similarity_threshold: float = 0.7, vector_db=None, client=None):
+    """Update cue cards based on recent conversation feedback.
+    
+    Each session is matched to its nearest cue card by embedding
+    similarity (no LLM call); the LLM is only asked to rewrite matched
+    cards (at least *similarity_threshold* cosine similarity) or to draft
+    a new card for unmatched sessions.  Sessions matching the same card
+    are applied to it in turn; everything else runs concurrently.
+    """
     print(f"🔄 Updating cue cards from last {days_back} day(s) of conversations...")
     
     # Setup
-    vector_db = setup_rag_vector_db()
-    client = GemmaClient(model="gemma3n:e4b")
+    config = get_config()
+    vector_db = vector_db or setup_rag_vector_db()
+    client = client or GemmaClient(model="gemma3n:e4b", base_url=config.ollama_base_url)
     model_used = client.model
     
     # Get recent conversations with feedback
@@ -195,159 +395,69 @@ def update_cue_cards_from_conversations(days_back: int = 1, similarity_threshold
     
     print(f"   Found {len(recent_conversations)} conversations with feedback")
     
-    # Process each conversation
-    updates_made = 0
-    new_cards_created = 0
+    # Similarity gate: one batched embedding search for all sessions
+    sessions = list(recent_conversations.items())
+    matches = vector_db.match_cue_cards([conv_data['full_text'] for _, conv_data in sessions], top_k=1,
+                                        min_similarity=similarity_threshold)
     
-    for session_id, conv_data in recent_conversations.items():
-        conversation_text = conv_data['full_text']
-        is_successful = conv_data['is_successful']
-        feedback = conv_data['session_feedback']
-        
-        print(f"\n📝 Processing conversation: {session_id}")
-        print(f"   Feedback: {feedback} ({'✅ Successful' if is_successful else '❌ Unsuccessful'})")
-        
-        # Find similar cue cards using vector search
-        similar_cue_cards = vector_db.search_cue_cards(conversation_text, top_k=5)
-        
-        if similar_cue_cards:
-            # Check similarity and update existing cards
-            for cue_card in similar_cue_cards:
-                card_content = f"{cue_card['question']} {cue_card['answer']}"
-                
-                # Use vector similarity to determine if update is needed
-                similarity_check_prompt = f"""
-                Compare these two medical conversations and determine if they address the same medical topic/issue.
-                
-                Existing cue card:
-                Q: {cue_card['question']}
-                A: {cue_card['answer']}
-                
-                Recent conversation:
-                {conversation_text}
-                
-                Return only "SIMILAR" if they address the same medical topic, or "DIFFERENT" if they don't.
-                """
-                
-                try:
-                    similarity_result = client.generate_response(similarity_check_prompt, "", timeout=30)
-                    is_similar = "SIMILAR" in similarity_result.upper()
-                    
-                    if is_similar:
-                        print(f"   🔍 Found similar cue card: {cue_card['question'][:50]}...")
-                        
-                        # Generate updated cue card based on conversation outcome
-                        update_prompt = f"""
-                        Update this medical cue card based on a recent conversation and its outcome.
-                        
-                        Current cue card:
-                        Q: {cue_card['question']}
-                        A: {cue_card['answer']}
-                        
-                        Recent conversation:
-                        {conversation_text}
-                        
-                        Conversation outcome: {'Successful/Helpful' if is_successful else 'Unsuccessful/Not helpful'}
-                        
-                        Based on this feedback, provide an improved cue card in this exact format:
-                        QUESTION: [improved question]
-                        ANSWER: [improved answer incorporating lessons learned]
-                        
-                        If the conversation was successful, reinforce what worked.
-                        If unsuccessful, adjust the advice to address what didn't work.
-                        """
-                        
-                        try:
-                            update_response = client.generate_response(update_prompt, "", timeout=60)
-                            
-                            # Extract question and answer
-                            question_match = re.search(r'QUESTION:\s*(.+?)(?=ANSWER:|$)', update_response, re.DOTALL | re.IGNORECASE)
-                            answer_match = re.search(r'ANSWER:\s*(.+?)$', update_response, re.DOTALL | re.IGNORECASE)
-                            
-                            if question_match and answer_match:
-                                new_question = question_match.group(1).strip()
-                                new_answer = answer_match.group(1).strip()
-                                
-                                # Update the cue card
-                                update_reason = f"Updated based on {'successful' if is_successful else 'unsuccessful'} conversation feedback"
-                                success = vector_db.update_cue_card(
-                                    cue_card['metadata']['id'], 
-                                    new_question, 
-                                    new_answer, 
-                                    update_reason
-                                )
-                                
-                                if success:
-                                    print(f"   ✅ Updated cue card: {new_question[:50]}...")
-                                    updates_made += 1
-                                else:
-                                    print(f"   ❌ Failed to update cue card")
-                            else:
-                                print(f"   ❌ Could not parse update response")
-                                
-                        except Exception as e:
-                            print(f"   ❌ Error generating update: {e}")
-                        
-                        break  # Only update one similar card per conversation
-                        
-                except Exception as e:
-                    print(f"   ❌ Error checking similarity: {e}")
-        
+    by_card, unmatched = {}, []
+    for (session_id, conv_data), cards in zip(sessions, matches):
+        print(f"\n📝 Conversation {session_id}: {conv_data['session_feedback']} "
+              f"({'✅ Successful' if conv_data['is_successful'] else '❌ Unsuccessful'})")
+        if cards:
+            print(f"   🔍 Similar cue card ({cards[0]['similarity']:.2f}): {cards[0]['question'][:50]}...")
+            by_card.setdefault(cards[0]['id'], (cards[0], []))[1].append((session_id, conv_data))
         else:
-            # No similar cue cards found - create new one if conversation has new insights
-            print(f"   🆕 No similar cue cards found - checking for new insights...")
-            
-            new_card_prompt = f"""
-            Analyze this medical conversation and determine if it contains valuable medical insights that should be captured as a cue card.
-            
-            Conversation:
-            {conversation_text}
-            
-            Conversation outcome: {'Successful/Helpful' if is_successful else 'Unsuccessful/Not helpful'}
-            
-            If this conversation contains valuable medical advice or insights, create a cue card in this format:
-            QUESTION: [relevant medical question]
-            ANSWER: [medical advice based on the conversation]
-            CATEGORY: [medical and care advice for family/medical staff/carers/allied health workers/doctors]
-            
-            If the conversation doesn't contain valuable medical insights, respond with: NO_CARD_NEEDED
-            """
-            
+            print(f"   🆕 No similar cue card - will check for new insights")
+            unmatched.append((session_id, conv_data))
+    
+    def update_card(cue_card, card_sessions):
+        updated = 0
+        for session_id, conv_data in card_sessions:  # In order, each rewrite builds on the last
             try:
-                new_card_response = client.generate_response(new_card_prompt, "", timeout=60)
-                
-                if "NO_CARD_NEEDED" not in new_card_response:
-                    # Extract new cue card details
-                    question_match = re.search(r'QUESTION:\s*(.+?)(?=ANSWER:|$)', new_card_response, re.DOTALL | re.IGNORECASE)
-                    answer_match = re.search(r'ANSWER:\s*(.+?)(?=CATEGORY:|$)', new_card_response, re.DOTALL | re.IGNORECASE)
-                    category_match = re.search(r'CATEGORY:\s*(.+?)$', new_card_response, re.DOTALL | re.IGNORECASE)
-                    
-                    if question_match and answer_match:
-                        new_question = question_match.group(1).strip()
-                        new_answer = answer_match.group(1).strip()
-                        category = category_match.group(1).strip() if category_match else "medical and care advice for family"
-                        
-                        # Create new cue card
-                        new_card_id = vector_db.create_new_cue_card(
-                            new_question,
-                            new_answer,
-                            category,
-                            f"conversation_feedback_{session_id}",
-                            model_used
-                        )
-                        
-                        if new_card_id:
-                            print(f"   ✅ Created new cue card: {new_question[:50]}...")
-                            new_cards_created += 1
-                        else:
-                            print(f"   ❌ Failed to create new cue card")
-                    else:
-                        print(f"   ❌ Could not parse new card response")
-                else:
-                    print(f"   ➡️  No new insights found in conversation")
-                    
+                rewrite = rewrite_cue_card(client, cue_card, conv_data['full_text'], conv_data['is_successful'], config)
             except Exception as e:
-                print(f"   ❌ Error generating new card: {e}")
+                print(f"   ❌ Error generating update for {session_id}: {e}")
+                continue
+            if rewrite is None:
+                print(f"   ❌ Could not parse update response for {session_id}")
+                continue
+            
+            new_question, new_answer = rewrite
+            update_reason = f"Updated based on {'successful' if conv_data['is_successful'] else 'unsuccessful'} conversation feedback"
+            if vector_db.update_cue_card(cue_card['id'], new_question, new_answer, update_reason):
+                print(f"   ✅ Updated cue card: {new_question[:50]}...")
+                cue_card = {**cue_card, 'question': new_question, 'answer': new_answer}
+                updated += 1
+            else:
+                print(f"   ❌ Failed to update cue card {cue_card['id']}")
+        return updated, 0
+    
+    def create_card(session_id, conv_data):
+        try:
+            new_card = new_cue_card_from(client, conv_data['full_text'], conv_data['is_successful'], config)
+        except Exception as e:
+            print(f"   ❌ Error generating new card for {session_id}: {e}")
+            return 0, 0
+        if new_card is None:
+            print(f"   ➡️  No new insights found in conversation {session_id}")
+            return 0, 0
+        
+        new_question, new_answer, category = new_card
+        new_card_id = vector_db.create_new_cue_card(new_question, new_answer, category,
+                                                    f"conversation_feedback_{session_id}", model_used)
+        if not new_card_id:
+            print(f"   ❌ Failed to create new cue card")
+            return 0, 0
+        print(f"   ✅ Created new cue card: {new_question[:50]}...")
+        return 0, 1
+    
+    tasks = ([lambda card=card, group=group: update_card(card, group) for card, group in by_card.values()] +
+             [lambda s=session_id, c=conv_data: create_card(s, c) for session_id, conv_data in unmatched])
+    results = ordered_map(lambda task: task(), tasks, max_workers=llm_parallelism(config.max_parallel_requests),
+                          label="cue card updates")
+    updates_made = sum(updated for updated, _ in results)
+    new_cards_created = sum(created for _, created in results)
     
     print(f"\n🎉 Cue card update complete!")
     print(f"   📝 Updated {updates_made} existing cue cards")
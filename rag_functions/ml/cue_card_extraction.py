@@ -1,7 +1,6 @@
 from typing import List
 from dataclasses import dataclass
 import re
-from sklearn.cluster import KMeans
 from .vector_operations import vectorize_sentences
 import sys, os
 
@@ -22,6 +21,7 @@ def extract_cue_cards(llm_output: str, context_type: str = "medical") -> List[Cu
         return _simple_extract(llm_output, context_type)
     
     # Cluster sentences
+    from sklearn.cluster import KMeans
     vectors = vectorize_sentences(sentences)
     n_clusters = min(max(2, len(sentences) // 3), 5)
     
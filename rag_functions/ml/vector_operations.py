@@ -1,50 +1,103 @@
-from typing import List, Tuple, Dict
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import List, Tuple, Dict, Optional
 
-_encoder = None
+import numpy as np
+
+# Template and category vectors are persisted here, keyed by a hash of their texts and the model
+INDEX_DIR = Path(__file__).parent.parent.parent / "program_files" / "data" / "embedding_index"
+
+DOCUMENT_CATEGORIES = {
+    'intake': "Patient intake, medical history, chief complaint, new patient visit",
+    'clinical': "Clinical notes, SOAP notes, progress notes, patient encounters",
+    'report': "Medical reports, diagnostic reports, pathology results, radiology findings",
+    'diagnostic': "Differential diagnosis, clinical analysis, diagnostic reasoning",
+    'treatment': "Treatment planning, medication management, care coordination"
+}
 
 def get_encoder():
-    global _encoder
-    if _encoder is None:
-        _encoder = SentenceTransformer('all-MiniLM-L6-v2')
-    return _encoder
+    """The shared embedding service (same resident model as the vector database)"""
+    from program_files.ai.embedding_service import get_embedding_service
+    return get_embedding_service()
 
-def select_optimal_templates(content: str, task_description: str = "", similarity_threshold: float = 0.3, top_k: int = 3) -> List[Tuple[str, float]]:
+def _model_id() -> str:
+    from program_files.config.config import cfg
+    return f"{cfg.embedding.backend}:{cfg.embedding.model_name}"
+
+class EmbeddingIndex:
+    """Fixed texts embedded once into a normalized matrix, scored with one matrix product.
+
+    The matrix is saved under a hash of the texts and the embedding model,
+    so it is only re-encoded when an entry (or the model) changes.
+    """
+
+    def __init__(self, name: str, entries: Dict[str, str], index_dir: Path = INDEX_DIR):
+        self.name = name
+        self.names = list(entries)
+        self.digest = self.content_hash(entries)
+        self.path = Path(index_dir) / f"{name}-{self.digest[:16]}.npz"
+        self.matrix = self._load() if self.path.exists() else None
+        if self.matrix is None:
+            self.matrix = self._build([entries[name] for name in self.names])
+
+    @staticmethod
+    def content_hash(entries: Dict[str, str]) -> str:
+        payload = json.dumps({'model': _model_id(), 'entries': entries}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _load(self) -> Optional[np.ndarray]:
+        try:
+            with np.load(self.path) as data:
+                if list(data['names']) == self.names:
+                    return data['matrix']
+        except (OSError, ValueError, KeyError):
+            pass
+        return None  # Unreadable or foreign file: rebuild
+
+    def _build(self, texts: List[str]) -> np.ndarray:
+        vectors = np.asarray(get_encoder().embed_for_storage(texts), dtype=np.float32)
+        matrix = vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-10)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        for old in self.path.parent.glob(f"{self.name}-*.npz"):
+            old.unlink()
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, names=np.array(self.names), matrix=matrix)
+        os.replace(tmp, self.path)
+        return matrix
+
+    def scores(self, text: str) -> np.ndarray:
+        """Cosine similarity of *text* to every entry, in ``names`` order"""
+        vector = np.asarray(get_encoder().encode(text), dtype=np.float32)
+        return self.matrix @ (vector / (np.linalg.norm(vector) + 1e-10))
+
+_indexes: Dict[str, EmbeddingIndex] = {}
+
+def get_index(name: str, entries: Dict[str, str]) -> EmbeddingIndex:
+    """Index for *entries*, rebuilt only when their texts change"""
+    index = _indexes.get(name)
+    if index is None or index.digest != EmbeddingIndex.content_hash(entries):
+        index = _indexes[name] = EmbeddingIndex(name, entries)
+    return index
+
+def template_entries() -> Dict[str, str]:
     from rag_functions.templates.prompt_templates import ALL_TEMPLATES
-    
-    encoder = get_encoder()
+    return {name: f"{template.description}. {', '.join(template.best_for)}" for name, template in ALL_TEMPLATES.items()}
+
+def select_optimal_templates(content: str, task_description: str = "", similarity_threshold: float = 0.3, top_k: int = 3) -> List[Tuple[str, float]]:
+    index = get_index("templates", template_entries())
     input_text = f"{content[:1000]} {task_description}".strip()
-    content_vector = encoder.encode([input_text])[0]
-    
-    similarities = []
-    for name, template in ALL_TEMPLATES.items():
-        template_text = f"{template.description}. {', '.join(template.best_for)}"
-        template_vector = encoder.encode([template_text])[0]
-        sim = cosine_similarity([content_vector], [template_vector])[0][0]
-        if sim >= similarity_threshold:
-            similarities.append((name, sim))
-    
-    return sorted(similarities, key=lambda x: x[1], reverse=True)[:top_k]
+    scores = index.scores(input_text)
+
+    ranked = np.argsort(-scores)[:top_k]
+    return [(index.names[i], float(scores[i])) for i in ranked if scores[i] >= similarity_threshold]
 
 def analyze_document_type(content: str) -> Dict[str, float]:
-    encoder = get_encoder()
-    content_vector = encoder.encode([content[:1000]])[0]
-    
-    categories = {
-        'intake': "Patient intake, medical history, chief complaint, new patient visit",
-        'clinical': "Clinical notes, SOAP notes, progress notes, patient encounters", 
-        'report': "Medical reports, diagnostic reports, pathology results, radiology findings",
-        'diagnostic': "Differential diagnosis, clinical analysis, diagnostic reasoning",
-        'treatment': "Treatment planning, medication management, care coordination"
-    }
-    
-    scores = {}
-    for category, description in categories.items():
-        cat_vector = encoder.encode([description])[0]
-        scores[category] = cosine_similarity([content_vector], [cat_vector])[0][0]
-    
-    return scores
+    index = get_index("document_categories", DOCUMENT_CATEGORIES)
+    return dict(zip(index.names, map(float, index.scores(content[:1000]))))
 
 def vectorize_sentences(sentences: List[str]) -> List:
-    return get_encoder().encode(sentences)
\ No newline at end of file
+    return get_encoder().encode(sentences)
@@ -1,44 +1,45 @@
-import fitz
-from PIL import Image
-Image.LINEAR = Image.BILINEAR
-import pytesseract
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-def extract_text_and_layout_simple(pdf_path):
+from program_files.utils.lazy_imports import lazy_module
+from rag_functions.utils.page_extraction import extract_pages
+
+fitz = lazy_module("fitz")
+pytesseract = lazy_module("pytesseract")
+
+def _pil_image():
+    """PIL's Image module, with the LINEAR alias layoutparser still expects (import before layoutparser)"""
+    from PIL import Image
+    Image.LINEAR = Image.BILINEAR
+    return Image
+
+def ocr_page(image):
+    """Whole-page Tesseract OCR (module-level so page workers can pickle it)"""
+    return {"text": pytesseract.image_to_string(image), "layout": []}
+
+def extract_text_and_layout_simple(pdf_path, dpi=300, workers=None):
     """
     Simplified version that uses PyMuPDF's built-in text extraction
-    and OCR as fallback for images/scanned documents
+    and OCR as fallback for images/scanned documents.
+    Pages are extracted in parallel and cached (see page_extraction)
     """
-    doc = fitz.open(pdf_path)
     all_text = ""
-    
-    for page_num in range(len(doc)):
-        page = doc[page_num]
-        
-        # Try to extract text directly first (faster for text-based PDFs)
-        text = page.get_text()
-        
-        if text.strip():  # If we got text, use it
-            all_text += f"\n--- Page {page_num + 1} ---\n"
-            all_text += text
-        else:  # If no text, use OCR on the page image
+    for page_num, page in enumerate(extract_pages(pdf_path, ocr_page, "tesseract", dpi=dpi, workers=workers)):
+        if page["source"] == "ocr":
             all_text += f"\n--- Page {page_num + 1} (OCR) ---\n"
-            
-            # Convert page to image
-            pix = page.get_pixmap(dpi=300)
-            mode = "RGB" if pix.alpha == 0 else "RGBA"
-            img = Image.frombytes(mode, [pix.width, pix.height], pix.samples)
-            
-            # Use OCR to extract text
-            ocr_text = pytesseract.image_to_string(img)
-            all_text += ocr_text
+        else:
+            all_text += f"\n--- Page {page_num + 1} ---\n"
+        all_text += page["text"]
     
-    doc.close()
     return all_text
 
 def extract_text_with_layoutparser(pdf_path):
     """
     Original version using layoutparser (requires more dependencies)
     """
+    Image = _pil_image()
     import layoutparser as lp
     
     doc = fitz.open(pdf_path)
@@ -73,49 +74,227 @@ def extract_text_with_layoutparser(pdf_path):
     doc.close()
     return all_text
 
-def extract_tables_pymupdf(pdf_path):
-      """Extract tables using PyMuPDF's built-in table detection"""
-      doc = fitz.open(pdf_path)
-      tables = []
-
-      for page_num in range(len(doc)):
-          page = doc[page_num]
-          print(f"Checking page {page_num + 1} for tables...")
-          
-          # Try different table detection strategies
-          table_finder = page.find_tables(strategy="lines_strict")
-          page_tables = list(table_finder)
-          if not page_tables:
-              table_finder = page.find_tables(strategy="lines")
-              page_tables = list(table_finder)
-          if not page_tables:
-              table_finder = page.find_tables()
-              page_tables = list(table_finder)
-          
-          print(f"Found {len(page_tables)} tables on page {page_num + 1}")
-
-          for i, table in enumerate(page_tables):
-              try:
-                  table_data = table.extract()
-                  tables.append({
-                      'page': page_num + 1,
-                      'table_index': i,
-                      'data': table_data,
-                      'bbox': table.bbox
-                  })
-                  print(f"Successfully extracted table {i+1} with {len(table_data)} rows")
-              except Exception as e:
-                  print(f"Error extracting table {i+1}: {e}")
-
-      doc.close()
-      print(f"Total tables extracted: {len(tables)}")
-      
-      # If no tables found, try text-based detection as fallback
-      if not tables:
-          print("No tables found with PyMuPDF detection, trying text-based approach...")
-          tables = extract_tables_from_text(pdf_path)
-      
-      return tables
+TABLE_CAPTION = re.compile(r'^Table \d+', re.MULTILINE)
+MIN_TABLE_WORDS = 6  # Pages with less text than this (figures, scans) cannot hold an extractable table
+MIN_TABLE_DENSITY = 0.5  # Words per 100 pt² below which a page's rules are a chart or frame, not a table
+
+def page_table_features(page):
+    """Cheap signals for choosing a table strategy: ruling lines, boxes and text density"""
+    horizontal = vertical = boxes = 0
+    for path in page.get_drawings():
+        for item in path["items"]:
+            if item[0] == "l":
+                p1, p2 = item[1], item[2]
+                if abs(p1.y - p2.y) < 1:
+                    horizontal += 1
+                elif abs(p1.x - p2.x) < 1:
+                    vertical += 1
+            elif item[0] == "re":
+                rect = item[1]
+                if rect.height < 2:
+                    horizontal += 1  # Thin rectangles are drawn rules
+                elif rect.width < 2:
+                    vertical += 1
+                else:
+                    boxes += 1
+    text = page.get_text()
+    return {
+        'horizontal_lines': horizontal,
+        'vertical_lines': vertical,
+        'boxes': boxes,
+        'words': len(text.split()),
+        'words_per_100pt2': len(text.split()) / max(page.rect.width * page.rect.height / 10000, 1),
+        'caption': bool(TABLE_CAPTION.search(text)),
+        'text': text
+    }
+
+def choose_table_strategy(features):
+    """Pick one find_tables strategy for a page, or None to skip detection.
+
+    Sparse pages (few words for their area: figures, charts, cover pages)
+    are skipped even when they have ruling lines - axes and gridlines are
+    drawn rules too.
+    """
+    if features['words'] < MIN_TABLE_WORDS or features['words_per_100pt2'] < MIN_TABLE_DENSITY:
+        return None
+    if features['horizontal_lines'] >= 2 and features['vertical_lines'] >= 2:
+        return "lines_strict"  # Fully ruled grid
+    if features['horizontal_lines'] >= 2 or features['boxes'] >= 2:
+        return "lines"  # Partial rules or shaded cells
+    if features['caption']:
+        return "text"  # Borderless table: align on word positions
+    return None
+
+def to_columns(rows):
+    """Row lists to column lists, padding ragged rows with None"""
+    width = max((len(row) for row in rows), default=0)
+    return [[row[i] if i < len(row) else None for row in rows] for i in range(width)]
+
+def table_dict(page_num, table_index, data, header, body, extraction_method, strategy=None, bbox=None,
+               row_bboxes=None, title=None):
+    """The record every extractor returns for a table; geometry is None when it is not known"""
+    return {
+        'page': page_num + 1,
+        'table_index': table_index,
+        'extraction_method': extraction_method,
+        'strategy': strategy,
+        'title': title,
+        'bbox': bbox,
+        'row_bboxes': row_bboxes,
+        'header': header,
+        'columns': to_columns(body),
+        'data': data
+    }
+
+def table_record(table, page_num, table_index, strategy):
+    """A detected table as header + columns, with the row-wise data and bounding boxes"""
+    rows = table.extract()
+    header = getattr(table, 'header', None)
+    if header is not None and header.external:
+        names, body = list(header.names), rows
+    else:
+        names, body = (list(rows[0]) if rows else []), rows[1:]
+    return table_dict(page_num, table_index, rows, names, body, 'find_tables', strategy=strategy,
+                      bbox=tuple(table.bbox), row_bboxes=[tuple(row.bbox) for row in table.rows])
+
+def extract_page_tables(page, page_num):
+    """One detection pass on one page; falls back to caption-based reconstruction of its text"""
+    start = time.perf_counter()
+    features = page_table_features(page)
+    strategy = choose_table_strategy(features)
+
+    tables = []
+    if strategy:
+        for i, table in enumerate(page.find_tables(strategy=strategy).tables):
+            try:
+                tables.append(table_record(table, page_num, i, strategy))
+            except Exception as e:
+                print(f"Error extracting table {i+1} on page {page_num + 1}: {e}")
+    if not tables and features['caption']:
+        tables = reconstruct_tables(features['text'], page_num)
+
+    return {'page': page_num + 1, 'strategy': strategy, 'tables': tables,
+            'seconds': time.perf_counter() - start}
+
+def _extract_tables_from_pages(pdf_path, page_numbers):
+    """Worker: open the PDF once and process a share of its pages"""
+    doc = fitz.open(pdf_path)
+    try:
+        return [extract_page_tables(doc[page_num], page_num) for page_num in page_numbers]
+    finally:
+        doc.close()
+
+def extract_tables_pymupdf(pdf_path, workers=None, verbose=True):
+    """Extract tables using PyMuPDF's built-in table detection.
+
+    Each page gets a single find_tables pass with a strategy chosen from its
+    drawings and text; pages are split across *workers* processes (default:
+    one per CPU, 1 runs in this process).  Tables come back in page order
+    with 'header', 'columns' and bounding boxes.
+    """
+    with fitz.open(pdf_path) as doc:
+        page_count = len(doc)
+    workers = max(1, min(workers or os.cpu_count() or 1, page_count))
+
+    start = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shares = pool.map(_extract_tables_from_pages, [pdf_path] * workers,
+                              [range(i, page_count, workers) for i in range(workers)])
+            pages = sorted((page for share in shares for page in share), key=lambda page: page['page'])
+    else:
+        pages = _extract_tables_from_pages(pdf_path, range(page_count))
+
+    tables = []
+    for page in pages:
+        if verbose:
+            print(f"Page {page['page']}: {len(page['tables'])} tables "
+                  f"(strategy: {page['strategy'] or 'skipped'}) in {page['seconds'] * 1000:.0f} ms")
+        for table in page['tables']:
+            table['table_index'] = len(tables)
+            tables.append(table)
+
+    print(f"Total tables extracted: {len(tables)} from {page_count} pages in {time.perf_counter() - start:.2f}s")
+    return tables
+
+def reconstruct_tables(text, page_num):
+    """Reconstruct tables that follow a "Table N:" caption from a page's text lines"""
+    tables = []
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+
+        # Look for table headers (lines starting with "Table")
+        if line.startswith('Table ') and ':' in line:
+            print(f"\nFound table header: {line}")
+            caption = line
+            table_data = []
+            i += 1
+
+            # Try to reconstruct the table structure
+            # Look for the next few lines that might be table content
+            table_lines = []
+            j = i
+            while j < len(lines) and j < i + 50:  # Look ahead max 50 lines
+                current_line = lines[j]
+
+                # Stop if we hit another table or section
+                if (current_line.startswith('Table ') or 
+                    current_line.startswith('Note.') or
+                    current_line.startswith('Discussion') or
+                    len(current_line) > 100):  # Very long lines are likely prose
+                    break
+
+                table_lines.append(current_line)
+                j += 1
+
+            # Now try to group these lines into rows and columns
+            # Look for patterns that suggest column headers and data
+            potential_headers = []
+            potential_data = []
+
+            for line in table_lines[:20]:  # First 20 lines after table header
+                words = line.split()
+
+                # Potential column headers (non-numeric, reasonable length)
+                if (len(words) <= 4 and 
+                    not any(char.isdigit() for char in line) and 
+                    len(line) < 50):
+                    potential_headers.append(line)
+
+                # Potential data (contains numbers, short)
+                elif (any(char.isdigit() for char in line) and 
+                      len(words) <= 10 and len(line) < 80):
+                    potential_data.append(line)
+
+            # Try to reconstruct table structure
+            if potential_headers and potential_data:
+                # Use headers as column names
+                if len(potential_headers) >= 2:
+                    table_data.append(potential_headers[:5])  # Max 5 columns
+
+                # Group data into rows
+                for data_line in potential_data[:10]:  # Max 10 data rows
+                    words = data_line.split()
+                    if len(words) >= 1:
+                        table_data.append(words[:5])  # Max 5 columns
+
+            if len(table_data) >= 2:  # At least header + 1 data row
+                tables.append(table_dict(page_num, len(tables), table_data, table_data[0], table_data[1:],
+                                         'reconstructed', title=caption))
+                print(f"Reconstructed table with {len(table_data)} rows")
+
+                # Show sample of reconstructed table
+                for row_idx, row in enumerate(table_data[:3]):
+                    print(f"  Row {row_idx}: {row}")
+
+            i = j  # Move past this table
+        else:
+            i += 1
+    
+    return tables
 
 def extract_tables_from_text(pdf_path):
     """Reconstruct tables from line-by-line text extraction"""
@@ -123,86 +302,9 @@ def extract_tables_from_text(pdf_path):
     tables = []
     
     for page_num in range(len(doc)):
-        page = doc[page_num]
-        text = page.get_text()
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-            
-            # Look for table headers (lines starting with "Table")
-            if line.startswith('Table ') and ':' in line:
-                print(f"\nFound table header: {line}")
-                table_data = []
-                i += 1
-                
-                # Try to reconstruct the table structure
-                # Look for the next few lines that might be table content
-                table_lines = []
-                j = i
-                while j < len(lines) and j < i + 50:  # Look ahead max 50 lines
-                    current_line = lines[j]
-                    
-                    # Stop if we hit another table or section
-                    if (current_line.startswith('Table ') or 
-                        current_line.startswith('Note.') or
-                        current_line.startswith('Discussion') or
-                        len(current_line) > 100):  # Very long lines are likely prose
-                        break
-                    
-                    table_lines.append(current_line)
-                    j += 1
-                
-                # Now try to group these lines into rows and columns
-                # Look for patterns that suggest column headers and data
-                potential_headers = []
-                potential_data = []
-                
-                for line in table_lines[:20]:  # First 20 lines after table header
-                    words = line.split()
-                    
-                    # Potential column headers (non-numeric, reasonable length)
-                    if (len(words) <= 4 and 
-                        not any(char.isdigit() for char in line) and 
-                        len(line) < 50):
-                        potential_headers.append(line)
-                    
-                    # Potential data (contains numbers, short)
-                    elif (any(char.isdigit() for char in line) and 
-                          len(words) <= 10 and len(line) < 80):
-                        potential_data.append(line)
-                
-                # Try to reconstruct table structure
-                if potential_headers and potential_data:
-                    # Use headers as column names
-                    if len(potential_headers) >= 2:
-                        table_data.append(potential_headers[:5])  # Max 5 columns
-                    
-                    # Group data into rows
-                    for data_line in potential_data[:10]:  # Max 10 data rows
-                        words = data_line.split()
-                        if len(words) >= 1:
-                            table_data.append(words[:5])  # Max 5 columns
-                
-                if len(table_data) >= 2:  # At least header + 1 data row
-                    tables.append({
-                        'page': page_num + 1,
-                        'table_index': len(tables),
-                        'data': table_data,
-                        'bbox': None,
-                        'extraction_method': 'reconstructed',
-                        'title': line
-                    })
-                    print(f"Reconstructed table with {len(table_data)} rows")
-                    
-                    # Show sample of reconstructed table
-                    for row_idx, row in enumerate(table_data[:3]):
-                        print(f"  Row {row_idx}: {row}")
-                
-                i = j  # Move past this table
-            else:
-                i += 1
+        for table in reconstruct_tables(doc[page_num].get_text(), page_num):
+            table['table_index'] = len(tables)
+            tables.append(table)
     
     doc.close()
     return tables
@@ -210,6 +312,7 @@ def extract_tables_from_text(pdf_path):
 # Use the simple version if layoutparser is not available
 def extract_text_and_layout(pdf_path):
     try:
+        _pil_image()
         import layoutparser as lp
         return extract_text_with_layoutparser(pdf_path)
     except Exception as e:
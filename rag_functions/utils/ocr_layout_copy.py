@@ -1,10 +1,27 @@
-import layoutparser as lp
-from pdf2image import convert_from_path
-from layoutparser.elements import Layout
+import os
 import re 
 
-import pytesseract
-pytesseract.pytesseract.tesseract_cmd = '/opt/homebrew/bin/tesseract'
+import numpy as np
+
+from program_files.utils.lazy_imports import lazy_module
+from rag_functions.utils.page_extraction import extract_pages
+
+# Deferred: layoutparser pulls in torch/detectron2, only needed once a PDF is processed
+lp = lazy_module("layoutparser")
+_pytesseract = None
+
+# Each worker process holds its own copy of the layout model (~0.5 GB), so keep the pool small
+LAYOUT_WORKERS = max(1, min(4, (os.cpu_count() or 1) // 2))
+
+
+def _tesseract():
+    """Import pytesseract and point it at the Homebrew binary on first use"""
+    global _pytesseract
+    if _pytesseract is None:
+        import pytesseract
+        pytesseract.pytesseract.tesseract_cmd = '/opt/homebrew/bin/tesseract'
+        _pytesseract = pytesseract
+    return _pytesseract
 
 # Functions ############################################################################################################
 ## Identify Text Areas and extract
@@ -46,24 +63,9 @@ def compute_iou(rect1, rect2):
     return intersection_area / union_area
 
 def remove_mostly_overlapping_boxes(layout, iou_threshold=0.8):
-    filtered = []
-
-    for i, box1 in enumerate(layout):
-        keep = True
-        for j, box2 in enumerate(layout):
-            if i == j:
-                continue
-
-            if box1.type == box2.type and box1.block.area < box2.block.area:
-                iou = compute_iou(box1.block, box2.block)
-                if iou > iou_threshold:
-                    keep = False
-                    break
-
-        if keep:
-            filtered.append(box1)
-
-    return lp.Layout(filtered)
+    boxes, types = layout_arrays(layout)
+    keep = overlap_keep_mask(boxes, types, iou_threshold)
+    return lp.Layout([block for block, kept in zip(layout, keep) if kept])
 
 # Sort text chunks
 def is_two_column(layout, page_width, threshold=0.15, min_ratio=0.2):
@@ -101,13 +103,13 @@ def sort_blocks_by_layout(blocks, page_width):
         left = [b for b in blocks if b.coordinates[0] < page_width / 2]
         right = [b for b in blocks if b.coordinates[0] >= page_width / 2]
 
-        left_sorted = Layout(left).sort(key=lambda b: b.coordinates[1])
-        right_sorted = Layout(right).sort(key=lambda b: b.coordinates[1])
+        left_sorted = lp.Layout(left).sort(key=lambda b: b.coordinates[1])
+        right_sorted = lp.Layout(right).sort(key=lambda b: b.coordinates[1])
 
         return left_sorted + right_sorted
     else:
         # Single-column: sort top to bottom, then left to right
-        return Layout(blocks).sort(key=lambda b: (b.coordinates[1], b.coordinates[0]))
+        return lp.Layout(blocks).sort(key=lambda b: (b.coordinates[1], b.coordinates[0]))
     
 
 ## Final text extraction helper functions 
@@ -134,59 +136,154 @@ def _load_layout_model():
     return model
 
 
-# Primary Function ############################################################################################################
-def extract_text_and_layout(pdf_path):
-    """Extract text and layout from PDF using layout detection"""
+## Array layout post-processing: dense pages (lab sheets) have hundreds of blocks
+def layout_arrays(layout):
+    """Block coordinates as an (n, 4) float array of x1, y1, x2, y2, and block types as an array"""
+    boxes = np.array([block.coordinates for block in layout], dtype=float).reshape(-1, 4)
+    types = np.array([block.type for block in layout], dtype=object)
+    return boxes, types
+
+def inflate_boxes(boxes, top=0, bottom=0, left=0, right=0):
+    """Array version of inflate_layout"""
+    padded = boxes + np.array([-left, -top, right, bottom], dtype=float)
+    padded[:, :2] = np.maximum(padded[:, :2], 0)
+    return padded
+
+def box_areas(boxes):
+    return (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+
+def pairwise_iou(boxes, others):
+    """(len(boxes), len(others)) IoU of every pair, by broadcasting"""
+    x_left = np.maximum(boxes[:, None, 0], others[None, :, 0])
+    y_top = np.maximum(boxes[:, None, 1], others[None, :, 1])
+    x_right = np.minimum(boxes[:, None, 2], others[None, :, 2])
+    y_bottom = np.minimum(boxes[:, None, 3], others[None, :, 3])
+    intersection = np.clip(x_right - x_left, 0, None) * np.clip(y_bottom - y_top, 0, None)
+    union = box_areas(boxes)[:, None] + box_areas(others)[None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+IOU_CHUNK = 1024  # Rows per broadcast, bounding memory at IOU_CHUNK x n floats per temporary
+
+def overlap_keep_mask(boxes, types, iou_threshold=0.8):
+    """False for boxes that overlap a larger box of the same type by more than *iou_threshold*"""
+    areas = box_areas(boxes)
+    keep = np.ones(len(boxes), dtype=bool)
+    for start in range(0, len(boxes), IOU_CHUNK):
+        rows = slice(start, start + IOU_CHUNK)
+        covered = ((types[rows, None] == types[None, :]) & (areas[rows, None] < areas[None, :])
+                   & (pairwise_iou(boxes[rows], boxes) > iou_threshold))
+        keep[rows] = ~covered.any(axis=1)
+    return keep
+
+def reading_order(boxes, page_width, threshold=0.15, min_ratio=0.2):
+    """Indices of *boxes* in reading order (array version of sort_blocks_by_layout)"""
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=int)
+    x_center = (boxes[:, 0] + boxes[:, 2]) / 2
+    left_ratio = np.mean(x_center < page_width / 2 - threshold * page_width)
+    right_ratio = np.mean(x_center > page_width / 2 + threshold * page_width)
+
+    if left_ratio > min_ratio and right_ratio > min_ratio:
+        # Two columns: left column top to bottom, then the right column
+        right_column = boxes[:, 0] >= page_width / 2
+        return np.lexsort((boxes[:, 1], right_column))
+    # Single column: top to bottom, then left to right
+    return np.lexsort((boxes[:, 0], boxes[:, 1]))
+
+def postprocess_layout(layout, page_width, keep_types=("Title", "Text")):
+    """Pad, de-duplicate, filter and order detected blocks; returns (boxes, types) in reading order"""
+    boxes, types = layout_arrays(layout)
+    boxes = inflate_boxes(boxes, top=15, bottom=3, left=6, right=6)
+    keep = overlap_keep_mask(boxes, types, iou_threshold=0.5) & np.isin(types, keep_types)
+    boxes, types = boxes[keep], types[keep]
+    order = reading_order(boxes, page_width)
+    return boxes[order], types[order]
+
+
+def ocr_blocks(image, boxes):
+    """OCR the whole page once and split its words between *boxes*.
+
+    A word goes to the first box (in reading order) containing its
+    centre; words keep Tesseract's order, one output line per OCR line.
+    """
+    tesseract = _tesseract()
+    data = tesseract.image_to_data(image, output_type=tesseract.Output.DICT)
+    words = [i for i, word in enumerate(data["text"]) if word.strip()]
+    lines = [[] for _ in range(len(boxes))]
+    if not words or not len(boxes):
+        return ["" for _ in lines]
+
+    cx = np.array([data["left"][i] + data["width"][i] / 2 for i in words])[:, None]
+    cy = np.array([data["top"][i] + data["height"][i] / 2 for i in words])[:, None]
+    inside = (cx >= boxes[:, 0]) & (cx <= boxes[:, 2]) & (cy >= boxes[:, 1]) & (cy <= boxes[:, 3])
+    owners = np.where(inside.any(axis=1), inside.argmax(axis=1), -1)
+
+    for i, owner in zip(words, owners):
+        if owner < 0:
+            continue
+        line = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        if lines[owner] and lines[owner][-1][0] == line:
+            lines[owner][-1][1].append(data["text"][i])
+        else:
+            lines[owner].append((line, [data["text"][i]]))
+    return ["\n".join(" ".join(words) for _, words in block_lines) for block_lines in lines]
+
+
+def layout_page(image):
+    """Detect the layout of one page image and OCR its text blocks (runs in page workers)"""
     layout_model = _load_layout_model()
-    
-    # Convert PDF to images
-    pages = convert_from_path(pdf_path, dpi=300, poppler_path="/opt/homebrew/bin")
-
-    total_text = ""
-    for i, image in enumerate(pages):
-        # Detect layout elements
-        layout = layout_model.detect(image)
-        
-        # Process layout: inflate boxes and remove overlaps
-        layout = inflate_layout(layout, top=15, bottom=3, left=6, right=6)
-        layout = remove_mostly_overlapping_boxes(layout, iou_threshold=0.5)
-        
-        # Sort text blocks by reading order
-        page_width, page_height = image.size
-        blocks = [b for b in layout if b.type in ("Title", "Text")]
-        layout_sorted = sort_blocks_by_layout(blocks, page_width)
-
-        # Extract text into sections
-        sections = []
-        current_section = {"heading": "Document", "content": []}
-
-        for block in layout_sorted:
-            cropped = image.crop(block.coordinates)
-            text = pytesseract.image_to_string(cropped).strip()
-            if not text:
-                continue
-
-            if block.type == "Title":
-                if current_section["content"]:
-                    sections.append(current_section)
-                current_section = {"heading": text, "content": []}
-            else:
-                current_section["content"].append(text)
-
-        # Add final section
-        if current_section["content"]:
-            sections.append(current_section)
-
-        # Format page text
-        page_text = ""
-        for section in sections:
-            if section['heading'] != 'Document': 
-                page_text += f"# {section['heading']} \n"
-            for paragraph in section["content"]:
-                if not id_table(paragraph) and not paragraph.startswith("Note. "):
-                    page_text += paragraph + "\n \n"
-        
-        total_text += page_text
-
-    return total_text
 
+    # Detect layout elements, then pad, de-duplicate and order them on arrays
+    page_width, page_height = image.size
+    boxes, types = postprocess_layout(layout_model.detect(image), page_width)
+
+    blocks_out = []
+    for box, block_type, text in zip(boxes, types, ocr_blocks(image, boxes)):
+        text = text.strip()
+        if text:
+            blocks_out.append({"type": block_type, "bbox": box.tolist(), "text": text})
+
+    return {"text": format_page_text(blocks_out), "layout": blocks_out}
+
+
+def format_page_text(blocks):
+    """Page text from ordered Title/Text blocks: '# heading' sections, table captions and notes dropped.
+
+    Used for OCR'd pages and text-layer pages alike, so both read the same.
+    """
+    # Extract text into sections
+    sections = []
+    current_section = {"heading": "Document", "content": []}
+
+    for block in blocks:
+        if block["type"] == "Title":
+            if current_section["content"]:
+                sections.append(current_section)
+            current_section = {"heading": block["text"], "content": []}
+        else:
+            current_section["content"].append(block["text"])
+
+    # Add final section
+    if current_section["content"]:
+        sections.append(current_section)
+
+    # Format page text
+    page_text = ""
+    for section in sections:
+        if section['heading'] != 'Document': 
+            page_text += f"# {section['heading']} \n"
+        for paragraph in section["content"]:
+            if not id_table(paragraph) and not paragraph.startswith("Note. "):
+                page_text += paragraph + "\n \n"
+    return page_text
+
+
+# Primary Function ############################################################################################################
+def extract_text_and_layout(pdf_path, dpi=300, workers=LAYOUT_WORKERS):
+    """Extract text and layout from PDF using layout detection.
+
+    Pages with a usable text layer skip rendering; the rest are laid out and
+    OCR'd on *workers* processes.  Pages are cached, see page_extraction.
+    """
+    pages = extract_pages(pdf_path, layout_page, "layout", dpi=dpi, workers=workers, format_text=format_page_text)
+    return "".join(page["text"] for page in pages)
@@ -0,0 +1,179 @@
+"""Page-parallel PDF text extraction with a page-level cache.
+
+Extraction works page by page:
+
+* pages whose embedded text layer is usable (``page.get_text()``) are
+  taken without rendering or OCR; their blocks are typed "Title" or
+  "Text" by font size and, given a ``format_text`` function, formatted
+  the same way as OCR'd pages
+* the remaining pages are rendered and handed to an OCR function
+  (whole-page Tesseract in ``ocr_layout``, layout detection + Tesseract in
+  ``ocr_layout_copy``) on a process pool
+* every page result (text and layout blocks) is cached on disk under
+  (file hash, page, dpi, method), so re-processing a document - or
+  resuming one that failed half way - only OCRs the pages not seen before
+
+OCR functions take a PIL image and return ``{"text": ..., "layout": [...]}``
+and must be module-level so the process pool can pickle them.
+"""
+
+import hashlib
+import json
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from program_files.utils.lazy_imports import lazy_module
+
+fitz = lazy_module("fitz")
+
+PAGE_CACHE_DIR = Path(__file__).parent.parent.parent / "program_files" / "data" / "page_cache"
+CACHE_VERSION = 2  # Bump when extraction output changes, so stale pages are re-extracted
+
+MIN_TEXT_CHARS = 50
+MIN_TEXT_RATIO = 0.6
+TITLE_SIZE_RATIO = 1.2  # Text-layer blocks set this much larger than the body text are headings
+TITLE_MAX_WORDS = 20
+
+
+def file_hash(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def has_usable_text(text: str, min_chars: int = MIN_TEXT_CHARS, min_ratio: float = MIN_TEXT_RATIO) -> bool:
+    """Whether an embedded text layer is worth keeping instead of OCR.
+
+    Rejects empty or near-empty layers (scans, image-only pages) and
+    garbled ones (bad font encodings, hidden low-quality OCR layers),
+    which are mostly symbols and replacement characters.
+    """
+    chars = [c for c in text if not c.isspace()]
+    if len(chars) < min_chars:
+        return False
+    readable = sum(c.isalnum() or c in ".,;:()%/-'\"" for c in chars)
+    return readable / len(chars) >= min_ratio
+
+
+class PageCache:
+    """One JSON file per extracted page; writes are atomic, so worker processes can share it"""
+
+    def __init__(self, cache_dir: Path = PAGE_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    def path(self, digest: str, page: int, dpi: int, method: str) -> Path:
+        return self.cache_dir / digest[:2] / digest / f"p{page:04d}-{dpi}-{method}-v{CACHE_VERSION}.json"
+
+    def get(self, digest: str, page: int, dpi: int, method: str) -> Optional[Dict]:
+        try:
+            with open(self.path(digest, page, dpi, method)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, digest: str, page: int, dpi: int, method: str, result: Dict):
+        path = self.path(digest, page, dpi, method)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(result, f)
+        os.replace(tmp, path)
+
+
+def render_page(page, dpi: int):
+    """Render a PyMuPDF page to a PIL image"""
+    from PIL import Image
+    pix = page.get_pixmap(dpi=dpi)
+    mode = "RGB" if pix.alpha == 0 else "RGBA"
+    return Image.frombytes(mode, [pix.width, pix.height], pix.samples)
+
+
+def text_blocks(page_dict: Dict) -> List[Dict]:
+    """Text blocks of a ``page.get_text("dict")`` result, typed "Title" when set well above the body size"""
+    blocks, sizes = [], Counter()
+    for block in page_dict["blocks"]:
+        if block.get("type", 0) != 0:
+            continue
+        lines = [[span for span in line["spans"] if span["text"].strip()] for line in block["lines"]]
+        lines = [line for line in lines if line]
+        if not lines:
+            continue
+        for span in (span for line in lines for span in line):
+            sizes[round(span["size"], 1)] += len(span["text"].strip())
+        text = "\n".join("".join(span["text"] for span in line).strip() for line in lines)
+        blocks.append((block["bbox"], text, max(span["size"] for line in lines for span in line)))
+    body_size = max(sizes, key=sizes.get) if sizes else 0.0  # Size of most characters on the page
+
+    return [{"type": "Title" if size >= body_size * TITLE_SIZE_RATIO and len(text.split()) <= TITLE_MAX_WORDS else "Text",
+             "bbox": list(bbox), "text": text}
+            for bbox, text, size in blocks]
+
+
+def text_layer(page, format_text: Optional[Callable[[List[Dict]], str]] = None) -> Dict:
+    """The page's embedded text and its text blocks, in the OCR result format"""
+    blocks = text_blocks(page.get_text("dict"))
+    text = format_text(blocks) if format_text else page.get_text()
+    return {"text": text, "layout": blocks, "source": "text"}
+
+
+def extract_page(pdf_path: str, page_number: int, dpi: int, ocr_page: Callable, min_chars: int,
+                 format_text: Optional[Callable] = None) -> Dict:
+    """Extract one page: its text layer if usable, otherwise OCR of the rendered page"""
+    doc = fitz.open(pdf_path)
+    try:
+        page = doc[page_number]
+        if min_chars is not None and has_usable_text(page.get_text(), min_chars):
+            return text_layer(page, format_text)
+        image = render_page(page, dpi)
+    finally:
+        doc.close()
+    result = ocr_page(image)
+    result["source"] = "ocr"
+    return result
+
+
+def _init_worker():
+    # Pages already run in parallel; Tesseract's own OpenMP threads would oversubscribe the CPUs
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def extract_pages(pdf_path, ocr_page: Callable, method: str, dpi: int = 300, workers: Optional[int] = None,
+                  cache: Optional[PageCache] = None, min_chars: Optional[int] = MIN_TEXT_CHARS,
+                  format_text: Optional[Callable[[List[Dict]], str]] = None) -> List[Dict]:
+    """Extract every page of *pdf_path*; results come back in page order.
+
+    *method* names *ocr_page* in the cache key.  ``workers`` defaults to
+    one process per CPU; 1 extracts in this process.  ``min_chars=None``
+    disables the text-layer fast path (always OCR).  *format_text* turns
+    text-layer blocks into page text (module-level, like *ocr_page*);
+    without it the raw text layer is used.
+    """
+    pdf_path = str(pdf_path)
+    cache = cache or PageCache()
+    digest = file_hash(pdf_path)
+    doc = fitz.open(pdf_path)
+    page_count = len(doc)
+    doc.close()
+
+    results = [cache.get(digest, page, dpi, method) for page in range(page_count)]
+    missing = [page for page, result in enumerate(results) if result is None]
+    if missing:
+        workers = min(workers or os.cpu_count() or 1, len(missing))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                futures = {page: pool.submit(extract_page, pdf_path, page, dpi, ocr_page, min_chars, format_text) for page in missing}
+                for page, future in futures.items():
+                    results[page] = future.result()
+                    cache.put(digest, page, dpi, method, results[page])
+        else:
+            for page in missing:
+                results[page] = extract_page(pdf_path, page, dpi, ocr_page, min_chars, format_text)
+                cache.put(digest, page, dpi, method, results[page])
+        print(f"📄 {Path(pdf_path).name}: {len(missing)}/{page_count} pages extracted "
+              f"({sum(results[page]['source'] == 'ocr' for page in missing)} by OCR)")
+    return results
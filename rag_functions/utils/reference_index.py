@@ -0,0 +1,215 @@
+"""Persistent hybrid (vector + BM25) index over chunked reference texts.
+
+Reference documents are split into overlapping word windows, embedded
+once with the shared embedding service and stored in a Chroma (HNSW)
+collection, next to a BM25 inverted index saved as numpy arrays.  Both
+are keyed by a hash of the chunks and the embedding model, so an
+unchanged corpus is loaded instead of rebuilt.  Queries embed the text
+once, take the nearest chunks from the ANN index and, for hybrid
+retrieval, fuse them with the BM25 ranking by reciprocal rank.
+"""
+
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from program_files.utils.lazy_imports import is_available, lazy_module
+
+chromadb = lazy_module("chromadb")
+
+REFERENCE_INDEX_DIR = Path(__file__).parent.parent.parent / "program_files" / "data" / "reference_index"
+TOKEN_PATTERN = re.compile(r'\b\w\w+\b')
+RRF_K = 60  # Reciprocal rank fusion damping: 1 / (RRF_K + rank)
+ADD_BATCH_SIZE = 5000  # Below Chroma's maximum batch size
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def chunk_spans(text: str, chunk_words: int = 200, overlap: int = 40) -> List[Tuple[int, int]]:
+    """Character (start, end) offsets of windows of *chunk_words* words, consecutive windows sharing *overlap* words"""
+    words = [match.span() for match in re.finditer(r'\S+', text)]
+    if not words:
+        return []
+    if len(words) <= chunk_words:
+        return [(words[0][0], words[-1][1])]
+    step = max(1, chunk_words - overlap)
+    return [(words[start][0], words[min(start + chunk_words, len(words)) - 1][1])
+            for start in range(0, len(words) - overlap, step)]
+
+
+def chunk_text(text: str, chunk_words: int = 200, overlap: int = 40) -> List[str]:
+    """Split *text* into overlapping windows of words (see ``chunk_spans``)"""
+    return [text[start:end] for start, end in chunk_spans(text, chunk_words, overlap)]
+
+
+class BM25Index:
+    """Inverted index with precomputed BM25 weights.
+
+    Postings are stored CSR-style: the documents containing term ``t`` are
+    ``doc_ids[indptr[t]:indptr[t + 1]]`` with matching ``weights``, so a
+    query only touches the postings of its own terms.
+    """
+
+    def __init__(self, vocabulary: Dict[str, int], indptr: np.ndarray, doc_ids: np.ndarray,
+                 weights: np.ndarray, n_docs: int):
+        self.vocabulary = vocabulary
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.n_docs = n_docs
+
+    @classmethod
+    def build(cls, texts: List[str], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        vocabulary: Dict[str, int] = {}
+        terms, docs, freqs = [], [], []
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        for doc, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths[doc] = len(tokens)
+            for token, count in Counter(tokens).items():
+                terms.append(vocabulary.setdefault(token, len(vocabulary)))
+                docs.append(doc)
+                freqs.append(count)
+
+        terms = np.array(terms, dtype=np.int64)
+        order = np.argsort(terms, kind="stable")
+        terms, docs, tf = terms[order], np.array(docs, dtype=np.int32)[order], np.array(freqs, dtype=np.float32)[order]
+
+        df = np.bincount(terms, minlength=len(vocabulary))
+        indptr = np.concatenate([[0], np.cumsum(df)])
+        idf = np.log1p((len(texts) - df + 0.5) / (df + 0.5)).astype(np.float32)
+        norm = k1 * (1 - b + b * lengths[docs] / max(float(lengths.mean()) if len(texts) else 0.0, 1.0))
+        weights = idf[terms] * tf * (k1 + 1) / (tf + norm)
+        return cls(vocabulary, indptr, docs, weights.astype(np.float32), len(texts))
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for token in set(tokenize(query)):
+            term = self.vocabulary.get(token)
+            if term is not None:
+                start, end = self.indptr[term], self.indptr[term + 1]
+                scores[self.doc_ids[start:end]] += self.weights[start:end]  # A term lists each document once
+        return scores
+
+    def save(self, path: Path):
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        tmp = Path(path).with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, terms=np.array(terms, dtype=str), indptr=self.indptr, doc_ids=self.doc_ids,
+                     weights=self.weights, n_docs=self.n_docs)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        with np.load(path) as data:
+            vocabulary = {term: i for i, term in enumerate(data['terms'].tolist())}
+            return cls(vocabulary, data['indptr'], data['doc_ids'], data['weights'], int(data['n_docs']))
+
+
+def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the *k* highest scores, best first"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=int)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+class ReferenceIndex:
+    """Chunked reference texts with a persisted ANN index and a BM25 inverted index.
+
+    ``meta`` (one dict per text) is copied onto each chunk together with
+    the text's position and the chunk number.  Without chromadb the index
+    still answers queries with BM25 alone.
+    """
+
+    def __init__(self, texts: List[str], meta: Optional[List[Dict[str, Any]]] = None, name: str = "references",
+                 chunk_words: int = 200, overlap: int = 40, index_dir: Path = REFERENCE_INDEX_DIR):
+        self.name = name
+        self.index_dir = Path(index_dir)
+        self.chunks, self.meta = [], []
+        for i, text in enumerate(texts):
+            text_meta = meta[i] if meta and i < len(meta) else {}
+            for n, chunk in enumerate(chunk_text(text, chunk_words, overlap)):
+                self.chunks.append(chunk)
+                self.meta.append({**text_meta, 'reference_index': i, 'chunk': n})
+
+        from program_files.config.config import cfg
+        payload = json.dumps({'model': f"{cfg.embedding.backend}:{cfg.embedding.model_name}",
+                              'chunks': self.chunks, 'meta': self.meta}, sort_keys=True, default=str)
+        self.digest = hashlib.sha256(payload.encode()).hexdigest()[:16]
+        self.bm25_path = self.index_dir / f"{name}-{self.digest}.npz"
+        self.collection = None
+
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        if self.bm25_path.exists():
+            self.bm25 = BM25Index.load(self.bm25_path)
+        else:
+            self._prune()
+            self.bm25 = BM25Index.build(self.chunks)
+            self.bm25.save(self.bm25_path)
+        if self.chunks and is_available("chromadb"):
+            self.collection = self._vector_collection()
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def _prune(self):
+        """Remove index files left by earlier versions of this corpus"""
+        for old in self.index_dir.glob(f"{self.name}-*.npz"):
+            old.unlink()
+
+    def _vector_collection(self):
+        from rag_functions.ml.vector_operations import get_encoder
+
+        client = chromadb.PersistentClient(path=str(self.index_dir / "chroma"))
+        collection_name = f"{self.name}_{self.digest}"
+        for collection in client.list_collections():
+            existing = collection if isinstance(collection, str) else collection.name
+            if existing.startswith(f"{self.name}_") and existing != collection_name:
+                client.delete_collection(existing)
+
+        collection = client.get_or_create_collection(collection_name)
+        if collection.count() != len(self.chunks):
+            print(f"📚 Embedding {len(self.chunks)} reference chunks...")
+            encoder = get_encoder()
+            for start in range(0, len(self.chunks), ADD_BATCH_SIZE):
+                batch = self.chunks[start:start + ADD_BATCH_SIZE]
+                collection.upsert(ids=[str(i) for i in range(start, start + len(batch))],
+                                  embeddings=list(encoder.embed_for_storage(batch)),
+                                  metadatas=[{'chunk_index': i} for i in range(start, start + len(batch))])
+        return collection
+
+    def _dense_ranking(self, query: str, candidates: int) -> List[int]:
+        from rag_functions.ml.vector_operations import get_encoder
+
+        vector = get_encoder().embed([query])
+        results = self.collection.query(query_embeddings=list(vector), n_results=min(candidates, len(self.chunks)),
+                                        include=[])
+        return [int(i) for i in results['ids'][0]]
+
+    def search(self, query: str, k: int = 5, hybrid: bool = True, candidates: int = 50) -> List[Dict[str, Any]]:
+        """Top *k* chunks for *query* as dicts of text, meta and score (best first)"""
+        if not self.chunks:
+            return []
+        rankings = []
+        if self.collection is not None:
+            rankings.append(self._dense_ranking(query, max(candidates, k)))
+        if hybrid or self.collection is None:
+            bm25 = self.bm25.scores(query)
+            rankings.append([int(i) for i in _top(bm25, max(candidates, k)) if bm25[i] > 0])
+
+        fused: Dict[int, float] = {}
+        for ranking in rankings:
+            for rank, chunk in enumerate(ranking):
+                fused[chunk] = fused.get(chunk, 0.0) + 1.0 / (RRF_K + rank + 1)
+        best = sorted(fused, key=fused.get, reverse=True)[:k]
+        return [{'text': self.chunks[i], 'meta': self.meta[i], 'score': fused[i]} for i in best]
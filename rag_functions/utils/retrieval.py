@@ -8,35 +8,25 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from program_files.utils.lazy_imports import is_available
+
 try:
     from program_files.database.enhanced_conversation_db import EnhancedConversationDB
-    VECTOR_DB_AVAILABLE = True
+    # chromadb itself is only imported when a database is opened
+    VECTOR_DB_AVAILABLE = is_available("chromadb")
 except ImportError:
     VECTOR_DB_AVAILABLE = False
 
-def setup_vector_db(reference_texts, reference_meta=None):
-    references = []
-    for i, text in enumerate(reference_texts):
-        meta = reference_meta[i] if reference_meta and i < len(reference_meta) else {}
-        references.append({'text': text, 'meta': meta, 'index': i})
-    return references
+def setup_vector_db(reference_texts, reference_meta=None, chunk_words=200):
+    """Chunk and index *reference_texts* (loaded from disk when the corpus is unchanged)"""
+    from rag_functions.utils.reference_index import ReferenceIndex
+    return ReferenceIndex(reference_texts, reference_meta, chunk_words=chunk_words)
 
-def retrieve_references(reference_store, parsed, k=5):
+def retrieve_references(reference_store, parsed, k=5, hybrid=True):
+    """Texts of the *k* reference chunks most relevant to *parsed*"""
     if not reference_store:
         return []
-    
-    parsed_words = set(re.findall(r'\b\w{4,}\b', str(parsed).lower()))
-    
-    scored_refs = []
-    for ref in reference_store:
-        ref_words = set(re.findall(r'\b\w{4,}\b', ref['text'].lower()))
-        overlap = len(parsed_words & ref_words)
-        total = len(parsed_words | ref_words)
-        score = overlap / total if total > 0 else 0
-        scored_refs.append((score, ref['text']))
-    
-    scored_refs.sort(reverse=True, key=lambda x: x[0])
-    return [ref[1] for ref in scored_refs[:k]]
+    return [hit['text'] for hit in reference_store.search(str(parsed), k=k, hybrid=hybrid)]
 
 def extract_medical_issues_list(response_text):
     """Extract medical issues list from LLM response."""
@@ -87,17 +77,18 @@ def search_cue_cards(query: str = "", prompt_type: str = None, document_path: st
         vector_db = get_rag_vector_db()
         
         # Build filter metadata - ChromaDB requires specific operator syntax
-        conditions = [{"content_type": {"$eq": "cue_card"}}]
+        # cue_cards is its own collection, so only the optional filters remain
+        conditions = []
         if prompt_type:
             conditions.append({"prompt_type": {"$eq": prompt_type}})
         if document_path:
             conditions.append({"document_path": {"$eq": str(document_path)}})
         
         # Use $and operator for multiple conditions
-        filter_conditions = {"$and": conditions} if len(conditions) > 1 else conditions[0]
+        filter_conditions = {"$and": conditions} if len(conditions) > 1 else (conditions[0] if conditions else None)
         
         # Search the database
-        results = vector_db.conversations.query(
+        results = vector_db.cue_cards.query(
             query_texts=[query] if query else [""],
             n_results=top_k,
             where=filter_conditions
@@ -141,17 +132,18 @@ def search_adaptive_prompts(query: str = "", medical_issue: str = None, document
         vector_db = get_rag_vector_db()
         
         # Build filter metadata - ChromaDB requires specific operator syntax
-        conditions = [{"content_type": {"$eq": "adaptive_prompt"}}]
+        # adaptive_prompts is its own collection, so only the optional filters remain
+        conditions = []
         if medical_issue:
             conditions.append({"medical_issue": {"$eq": medical_issue}})
         if document_path:
             conditions.append({"document_path": {"$eq": str(document_path)}})
         
         # Use $and operator for multiple conditions
-        filter_conditions = {"$and": conditions} if len(conditions) > 1 else conditions[0]
+        filter_conditions = {"$and": conditions} if len(conditions) > 1 else (conditions[0] if conditions else None)
         
         # Search the database
-        results = vector_db.conversations.query(
+        results = vector_db.adaptive_prompts.query(
             query_texts=[query] if query else [""],
             n_results=top_k,
             where=filter_conditions
@@ -193,12 +185,9 @@ def get_rag_stats() -> Dict[str, Any]:
     try:
         vector_db = get_rag_vector_db()
         
-        # Get all data
-        all_data = vector_db.conversations.get()
-        
-        # Count by content type
-        cue_cards = [m for m in all_data['metadatas'] if m.get('content_type') == 'cue_card']
-        adaptive_prompts = [m for m in all_data['metadatas'] if m.get('content_type') == 'adaptive_prompt']
+        # Each content type has its own collection
+        cue_cards = vector_db.cue_cards.get(include=['metadatas'])['metadatas']
+        adaptive_prompts = vector_db.adaptive_prompts.get(include=['metadatas'])['metadatas']
         
         # Count by prompt type
         prompt_types = {}
@@ -6,7 +6,11 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from program_files.ai.gemma_client import GemmaClient
 
-def parse_document(text, input_prompt = "Extract key entities, topics, and sections from the following document. Provide a structured summary:"):
+PARSE_FALLBACK_PREFIX = "Document parsing summary:"  # Marks the non-LLM summary returned when parsing fails
+
+def parse_document(text, input_prompt = "Extract key entities, topics, and sections from the following document. Provide a structured summary:",
+                   fallback=True):
+    """LLM summary of *text*; on timeout/connection errors a non-LLM summary, or the error itself without *fallback*"""
     client = GemmaClient()
     # Limit text size to prevent timeout
     limited_text = text[:8000] if len(text) > 8000 else text
@@ -14,5 +18,7 @@ def parse_document(text, input_prompt = "Extract key entities, topics, and secti
     try:
         return client.generate_response("Parse document", prompt, timeout=90)
     except:
+        if not fallback:
+            raise  # Let the caller retry (see ingest's call_with_retry)
         # Fallback for timeout/connection issues
-        return f"Document parsing summary: {len(limited_text)} characters analyzed. Key content: {limited_text[:200]}..."
\ No newline at end of file
+        return f"{PARSE_FALLBACK_PREFIX} {len(limited_text)} characters analyzed. Key content: {limited_text[:200]}..."
\ No newline at end of file
@@ -60,7 +60,7 @@ def test_storage_functionality():
                 "session_id": f"test_session_{test_timestamp.replace(':', '-')}"
             }
             
-            vector_db.conversations.add(
+            vector_db.cue_cards.add(
                 documents=[content],
                 metadatas=[metadata],
                 ids=[f"test_cue_card_{doc_id}_{i}"]
@@ -86,7 +86,7 @@ def test_storage_functionality():
                 "session_id": f"test_session_{test_timestamp.replace(':', '-')}"
             }
             
-            vector_db.conversations.add(
+            vector_db.adaptive_prompts.add(
                 documents=[prompt],
                 metadatas=[metadata],
                 ids=[f"test_adaptive_prompt_{i}_{test_timestamp.replace(':', '-')}"]